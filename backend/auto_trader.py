@@ -1,7 +1,22 @@
 """
 Automatic Trading System
 Monitors live prices, calculates indicators, and executes trades based on strategy signals
+
+Two modes:
+    - 'stream' (default): the session subscribes to its symbol on the live
+      data service and receives price events through the price bus; the
+      strategy is evaluated as soon as a bar closes.
+    - 'poll': legacy loop reading the latest bar from the database every
+      polling_interval seconds.
+
+A 'stream' session switches to 'poll' when the live data service does not
+connect within connect_timeout or stops while the session runs.
+
+AutoTraderManager runs its sessions on an AutoTraderScheduler (one asyncio
+loop for all sessions) rather than one thread per session.
 """
+import asyncio
+import queue
 import time
 import threading
 from datetime import datetime, timedelta
@@ -12,29 +27,42 @@ from loguru import logger
 
 from backend.models import (
     SessionLocal, AutoTraderSession, AutoTraderStatus, 
-    Ticker, Strategy, Order, OrderStatus, HistoricalData
+    Ticker, Strategy, Order, OrderStatus, HistoricalData, PARIS_TZ
 )
 from backend.order_manager import OrderManager
 from backend.data_collector import DataCollector
 from backend.ibkr_collector import IBKRCollector
+from backend.data_access import load_bars_frame, record_bars_added
+from backend.ring_buffer import OHLCVRingBuffer
+from backend.price_bus import price_bus, BarBuilder
+from backend.live_data_service import live_data_service
+
+# Session settings cached by AutoTrader (see refresh_config)
+SESSION_CONFIG_FIELDS = (
+    'polling_interval', 'max_position_size', 'max_daily_trades', 'stop_loss_pct', 'take_profit_pct'
+)
 
 
 class AutoTrader:
     """
     Automatic trading system that:
-    1. Polls live prices at regular intervals
+    1. Receives live bars (or polls live prices at regular intervals)
     2. Calculates strategy indicators
     3. Detects BUY/SELL signals
     4. Executes trades automatically
     """
     
-    def __init__(self, session_id: int, ibkr_collector: Optional[IBKRCollector] = None):
+    def __init__(self, session_id: int, ibkr_collector: Optional[IBKRCollector] = None,
+                 mode: str = 'stream', bar_seconds: int = 60, connect_timeout: float = 10.0):
         """
         Initialize AutoTrader for a specific session
         
         Args:
             session_id: Database ID of the AutoTraderSession
             ibkr_collector: IBKR connection for live data and order execution
+            mode: 'stream' (evaluate on bar close) or 'poll' (database polling)
+            bar_seconds: Length of the live bars evaluated in 'stream' mode
+            connect_timeout: Seconds to wait for the live data service before polling instead
         """
         self.session_id = session_id
         self.ibkr_collector = ibkr_collector
@@ -44,8 +72,25 @@ class AutoTrader:
         # Runtime state
         self.running = False
         self.thread: Optional[threading.Thread] = None
-        self.price_buffer: List[Dict] = []  # Buffer of recent prices for indicator calculation
         self.buffer_size = 200  # Keep last 200 data points
+        self.price_buffer = OHLCVRingBuffer(self.buffer_size)  # Recent bars for indicator calculation
+        self.signal_stream = None  # Incremental indicators (see _calculate_signals)
+        self._stream_unavailable = False
+        self._streamed_total: Optional[int] = None  # price_buffer.total already fed to signal_stream
+        
+        # Event-driven mode
+        self.mode = mode
+        self.bus = price_bus
+        self.market_data = live_data_service
+        self.connect_timeout = connect_timeout
+        self.fallback_reason: Optional[str] = None  # Why a 'stream' session polls instead
+        self.bar_builder = BarBuilder(bar_seconds)
+        self.clock = lambda: datetime.now(PARIS_TZ).replace(tzinfo=None)
+        self.last_decision_ms: Optional[float] = None  # Bar close -> decision latency
+        
+        # Set by AutoTraderScheduler
+        self.state_sink = None  # Callable(session_id, checked_at) replacing _update_session writes
+        self.metrics: Dict = {}
         
         # Load session from database
         self.load_session()
@@ -64,12 +109,35 @@ class AutoTrader:
             self.session = session
             self.ticker = session.ticker
             self.strategy = session.strategy
+            self.config = {field: getattr(session, field, None) for field in SESSION_CONFIG_FIELDS}
             
             logger.info(f"AutoTrader loaded: Session #{self.session_id}, {self.ticker.symbol}, Strategy: {self.strategy.name}")
             
         finally:
             db.close()
     
+    def refresh_config(self, changes: Optional[Dict] = None):
+        """
+        Refresh the cached session configuration
+        
+        Args:
+            changes: Settings already written to the database (applied without
+                     a query), or None to reload them from the database
+        """
+        if changes is not None:
+            self.config.update({k: v for k, v in changes.items() if k in SESSION_CONFIG_FIELDS})
+            return
+        
+        db = SessionLocal()
+        try:
+            session = db.query(AutoTraderSession).filter(
+                AutoTraderSession.id == self.session_id
+            ).first()
+            if session:
+                self.config = {field: getattr(session, field, None) for field in SESSION_CONFIG_FIELDS}
+        finally:
+            db.close()
+    
     def _check_and_collect_intraday_data(self) -> int:
         """
         Check if 5-minute data exists for today. If not, collect from start of day.
@@ -129,6 +197,7 @@ class AutoTrader:
                         
                         # Store in database
                         inserted = 0
+                        stored = []
                         for bar in bars:
                             # Only store if it's from today
                             if bar.date.date() == today:
@@ -151,8 +220,10 @@ class AutoTrader:
                                     )
                                     db.add(record)
                                     inserted += 1
+                                    stored.append(bar.date)
                         
                         if inserted > 0:
+                            record_bars_added(db, ticker_id, '5min', inserted, min(stored), max(stored))
                             db.commit()
                             logger.info(f"✅ Stored {inserted} new 5-minute data points for today")
                             return inserted + (today_5m_count if today_5m_count > 0 else 0)
@@ -195,48 +266,24 @@ class AutoTrader:
             logger.info(f"Initializing price buffer for {self.ticker.symbol} with intraday data...")
             
             # First, try to load today's 5-minute data
-            today_data = db.query(HistoricalData).filter(
-                HistoricalData.ticker_id == ticker_id,
-                HistoricalData.interval == '5min',
-                HistoricalData.timestamp >= start_of_today
-            ).order_by(HistoricalData.timestamp.asc()).all()
+            today_data = load_bars_frame(db, ticker_id, interval='5min', start=start_of_today)
             
-            if today_data and len(today_data) >= 50:
+            if len(today_data) >= 50:
                 # Great! We have enough intraday data - use it
                 logger.info(f"✅ Loading {len(today_data)} 5-minute data points from today")
                 
-                for h in today_data:
-                    self.price_buffer.append({
-                        'timestamp': h.timestamp,
-                        'open': h.open,
-                        'high': h.high,
-                        'low': h.low,
-                        'close': h.close,
-                        'volume': h.volume
-                    })
+                self._extend_price_buffer(today_data)
                 
                 logger.info(f"✅ Initialized buffer with {len(self.price_buffer)} intraday points - ready to trade immediately!")
                 return len(self.price_buffer)
             
             # Fallback: Load 200 most recent points (any interval)
-            logger.info(f"⚠️ Only {len(today_data) if today_data else 0} intraday points available, falling back to recent historical data")
+            logger.info(f"⚠️ Only {len(today_data)} intraday points available, falling back to recent historical data")
             
-            historical = db.query(HistoricalData).filter(
-                HistoricalData.ticker_id == ticker_id
-            ).order_by(HistoricalData.timestamp.desc()).limit(self.buffer_size).all()
+            historical = load_bars_frame(db, ticker_id, limit=self.buffer_size)
             
-            if historical:
-                historical = list(reversed(historical))
-                
-                for h in historical:
-                    self.price_buffer.append({
-                        'timestamp': h.timestamp,
-                        'open': h.open,
-                        'high': h.high,
-                        'low': h.low,
-                        'close': h.close,
-                        'volume': h.volume
-                    })
+            if not historical.empty:
+                self._extend_price_buffer(historical)
                 
                 logger.info(f"⚠️ Loaded {len(self.price_buffer)} historical points (will need ~8-9 min for live data to reach 50+ points)")
             else:
@@ -259,26 +306,8 @@ class AutoTrader:
             return
         
         self.running = True
-        
-        # Update session status
-        db = SessionLocal()
-        try:
-            session = db.query(AutoTraderSession).filter(
-                AutoTraderSession.id == self.session_id
-            ).first()
-            session.status = AutoTraderStatus.RUNNING
-            session.started_at = datetime.now()
-            session.stopped_at = None
-            session.error_message = None
-            db.commit()
-        finally:
-            db.close()
-        
-        # Start live price collection for this ticker
-        # This ensures we have real-time price data for strategy signals
-        from backend.live_price_thread import start_live_price_collection
-        start_live_price_collection(self.ticker.symbol, interval=5)
-        logger.info(f"📊 Live price collection started for {self.ticker.symbol}")
+        self._mark_running()
+        self._start_market_data()
         
         # Start trading loop in separate thread
         self.thread = threading.Thread(target=self._trading_loop, daemon=True)
@@ -293,17 +322,32 @@ class AutoTrader:
             return
         
         self.running = False
-        
-        # Stop live price collection
-        from backend.live_price_thread import stop_live_price_collection
-        stop_live_price_collection()
-        logger.info(f"📊 Live price collection stopped")
+        self._stop_market_data()
         
         # Wait for thread to finish
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=5)
         
-        # Update session status
+        self._mark_stopped()
+        logger.info(f"🛑 AutoTrader #{self.session_id} stopped")
+    
+    def _mark_running(self):
+        """Set the session RUNNING in the database"""
+        db = SessionLocal()
+        try:
+            session = db.query(AutoTraderSession).filter(
+                AutoTraderSession.id == self.session_id
+            ).first()
+            session.status = AutoTraderStatus.RUNNING
+            session.started_at = datetime.now()
+            session.stopped_at = None
+            session.error_message = None
+            db.commit()
+        finally:
+            db.close()
+    
+    def _mark_stopped(self):
+        """Set the session STOPPED in the database"""
         db = SessionLocal()
         try:
             session = db.query(AutoTraderSession).filter(
@@ -314,13 +358,56 @@ class AutoTrader:
             db.commit()
         finally:
             db.close()
-        
-        logger.info(f"🛑 AutoTrader #{self.session_id} stopped")
+    
+    def _start_market_data(self):
+        """Start live price collection for this ticker (real-time data for strategy signals)"""
+        if self.mode == 'stream':
+            self.market_data.start()
+            self.market_data.subscribe(self.ticker.symbol, owner=self._owner)
+            if not self.market_data.wait_connected(timeout=self.connect_timeout):
+                self._fall_back_to_polling(f"live data service not connected ({self.market_data.last_error})")
+                return
+        else:
+            from backend.live_price_thread import start_live_price_collection
+            start_live_price_collection(self.ticker.symbol, interval=5)
+        logger.info(f"📊 Live price collection started for {self.ticker.symbol} ({self.mode})")
+    
+    def _stop_market_data(self):
+        """Stop live price collection for this ticker"""
+        if self.mode == 'stream':
+            self.market_data.unsubscribe(self.ticker.symbol, owner=self._owner)
+        else:
+            from backend.live_price_thread import stop_live_price_collection
+            stop_live_price_collection()
+        logger.info(f"📊 Live price collection stopped")
+    
+    def _fall_back_to_polling(self, reason: str):
+        """Switch a 'stream' session to 'poll' (live data service unavailable)"""
+        logger.warning(f"⚠️ AutoTrader #{self.session_id}: {reason}, falling back to polling")
+        self.market_data.unsubscribe(self.ticker.symbol, owner=self._owner)
+        self.fallback_reason = reason
+        self.mode = 'poll'
+        self._start_market_data()
+    
+    @property
+    def _owner(self) -> str:
+        """Subscription owner name on the live data service"""
+        return f"autotrader:{self.session_id}"
     
     def _trading_loop(self):
         """Main trading loop - runs in separate thread"""
         logger.info(f"Trading loop started for session #{self.session_id}")
+        self._prepare_buffer()
+        
+        if self.mode == 'stream':
+            self._stream_loop()  # Returns early if the live data service stops
+        if self.mode == 'poll':
+            self._poll_loop()
         
+        logger.info(f"Trading loop ended for session #{self.session_id}")
+    
+    def _prepare_buffer(self) -> int:
+        """Collect missing intraday data and fill the price buffer before trading"""
         # NEW: Check and collect intraday 5-minute data for today (if missing)
         logger.info(f"🔍 Checking for intraday data...")
         intraday_points = self._check_and_collect_intraday_data()
@@ -334,50 +421,85 @@ class AutoTrader:
             logger.info(f"✅ READY TO TRADE! Buffer has {buffer_size} points, starting signals calculation immediately")
         else:
             logger.warning(f"⚠️ Buffer has only {buffer_size} points (need 50), will start collecting live data...")
-        
+        return buffer_size
+    
+    def _poll_loop(self):
+        """Legacy loop: read the latest price from the database every polling_interval"""
         while self.running:
             try:
-                # 1. Fetch current price
+                # Fetch current price
                 current_price = self._fetch_live_price()
                 
                 if current_price:
-                    # 2. Add to buffer
-                    self._add_to_buffer(current_price)
-                    
-                    # 3. Calculate indicators (only if buffer has enough points)
-                    if len(self.price_buffer) >= 50:
-                        signals = self._calculate_signals()
-                        
-                        # 4. Check for trading signal
-                        if signals:
-                            self._process_signal(signals)
-                    else:
-                        # Buffer still building up
-                        pending = 50 - len(self.price_buffer)
-                        if len(self.price_buffer) % 10 == 0:  # Log every 10 points
-                            logger.info(f"⏳ Building buffer... {len(self.price_buffer)}/50 points ({pending} more needed)")
-                    
-                    # 5. Update session
-                    self._update_session()
+                    self._on_bar(current_price)
                 
-                # Wait for next polling interval
-                db = SessionLocal()
-                try:
-                    session = db.query(AutoTraderSession).filter(
-                        AutoTraderSession.id == self.session_id
-                    ).first()
-                    interval = session.polling_interval
-                finally:
-                    db.close()
-                
-                time.sleep(interval)
+                # Wait for next polling interval (cached, see refresh_config)
+                time.sleep(self.config['polling_interval'])
                 
             except Exception as e:
                 logger.error(f"Error in trading loop: {e}")
                 self._handle_error(str(e))
                 time.sleep(60)  # Wait 1 minute on error
+    
+    def _stream_loop(self):
+        """Event-driven loop: fold price bus events into bars, evaluate each closed bar"""
+        sub_id, events = self.bus.subscribe_queue(symbols=[self.ticker.symbol])
+        try:
+            while self.running:
+                # Wake up on the next event, or when the open bar is due without one
+                remaining = self.bar_builder.seconds_until_due(self.clock())
+                timeout = 1.0 if remaining is None else min(max(remaining, 0.01), 1.0)
+                try:
+                    bar = self.bar_builder.add(events.get(timeout=timeout))
+                except queue.Empty:
+                    if not self.market_data.running:
+                        self._fall_back_to_polling("live data service stopped")
+                        return
+                    bar = self.bar_builder.close_due(self.clock())
+                
+                if bar is None:
+                    continue
+                
+                try:
+                    self._on_bar(bar)
+                except Exception as e:
+                    logger.error(f"Error in trading loop: {e}")
+                    self._handle_error(str(e))
+        finally:
+            self.bus.unsubscribe(sub_id)
+    
+    def _on_bar(self, bar: Dict):
+        """Add a new bar to the buffer, evaluate the strategy and act on its signal"""
+        signals = self._evaluate_bar(bar)
         
-        logger.info(f"Trading loop ended for session #{self.session_id}")
+        # Check for trading signal
+        if signals:
+            self._process_signal(signals)
+        
+        # Update session
+        self._update_session()
+    
+    def _evaluate_bar(self, bar: Dict) -> Optional[Dict]:
+        """
+        Add a new bar to the buffer and calculate the strategy signal
+        
+        Returns:
+            Signal dictionary, or None while the buffer is building up
+        """
+        started = time.perf_counter()
+        self._add_to_buffer(bar)
+        
+        # Calculate indicators (only if buffer has enough points)
+        if len(self.price_buffer) >= 50:
+            signals = self._calculate_signals()
+            self.last_decision_ms = (time.perf_counter() - started) * 1000
+            return signals
+        
+        # Buffer still building up
+        pending = 50 - len(self.price_buffer)
+        if len(self.price_buffer) % 10 == 0:  # Log every 10 points
+            logger.info(f"⏳ Building buffer... {len(self.price_buffer)}/50 points ({pending} more needed)")
+        return None
     
     def _init_price_buffer(self):
         """Initialize price buffer with recent historical data"""
@@ -391,26 +513,12 @@ class AutoTrader:
             ).count()
             logger.info(f"Total historical data points in DB for ticker_id {self.ticker.id}: {total_count}")
             
-            # Get last 200 historical data points - use 'timestamp' instead of 'date'
-            historical = db.query(HistoricalData).filter(
-                HistoricalData.ticker_id == self.ticker.id
-            ).order_by(HistoricalData.timestamp.desc()).limit(self.buffer_size).all()
+            # Get last 200 historical data points (oldest first)
+            historical = load_bars_frame(db, self.ticker.id, limit=self.buffer_size)
             
             logger.info(f"Found {len(historical)} historical data points to load into buffer")
             
-            # Reverse to chronological order
-            historical = list(reversed(historical))
-            
-            # Add to buffer
-            for h in historical:
-                self.price_buffer.append({
-                    'timestamp': h.timestamp,  # Use timestamp instead of date
-                    'open': h.open,
-                    'high': h.high,
-                    'low': h.low,
-                    'close': h.close,
-                    'volume': h.volume
-                })
+            self._extend_price_buffer(historical)
             
             logger.info(f"✅ Initialized price buffer with {len(self.price_buffer)} historical data points")
             
@@ -421,6 +529,10 @@ class AutoTrader:
         finally:
             db.close()
     
+    def _extend_price_buffer(self, bars: pd.DataFrame):
+        """Bulk-copy OHLCV rows (load_bars_frame output) into the price buffer columns"""
+        self.price_buffer.extend_frame(bars)
+    
     def _get_contract_info(self) -> tuple:
         """Get ticker exchange and currency information"""
         exchange = self.ticker.exchange if hasattr(self.ticker, 'exchange') else 'SMART'
@@ -495,12 +607,8 @@ class AutoTrader:
             return None
     
     def _add_to_buffer(self, price_data: Dict):
-        """Add new price data to buffer and maintain buffer size"""
+        """Add new price data to buffer (the ring buffer keeps the last buffer_size entries)"""
         self.price_buffer.append(price_data)
-        
-        # Keep only last buffer_size entries
-        if len(self.price_buffer) > self.buffer_size:
-            self.price_buffer = self.price_buffer[-self.buffer_size:]
     
     def _calculate_signals(self) -> Optional[Dict]:
         """
@@ -514,8 +622,12 @@ class AutoTrader:
             return None
         
         try:
+            stream = self._get_signal_stream()
+            if stream is not None:
+                return self._calculate_signals_streaming(stream)
+            
             # Convert buffer to DataFrame
-            df = pd.DataFrame(self.price_buffer)
+            df = self.price_buffer.to_frame()
             df['date'] = df['timestamp']
             df = df.set_index('date')
             
@@ -551,6 +663,55 @@ class AutoTrader:
             logger.error(f"Error calculating signals: {e}")
             return None
     
+    def _get_signal_stream(self):
+        """Streaming signal generator for the session strategy (None if not supported)"""
+        if self.signal_stream is None and not self._stream_unavailable:
+            from backend.strategy_runner import StrategyRunner
+            
+            self.signal_stream = StrategyRunner().create_signal_stream(self.strategy)
+            self._streamed_total = None
+            if self.signal_stream is None:
+                self._stream_unavailable = True
+                logger.info(f"Strategy {self.strategy.name} has no streaming version, using DataFrame signals")
+        return self.signal_stream
+    
+    def _pending_bars(self) -> Optional[List[Dict]]:
+        """Buffer entries not yet fed to the signal stream (None if some were overwritten first)"""
+        if self._streamed_total is None:
+            return list(self.price_buffer)
+        
+        new = self.price_buffer.total - self._streamed_total
+        if not 0 <= new <= len(self.price_buffer):
+            return None
+        return self.price_buffer.tail(new)
+    
+    def _calculate_signals_streaming(self, stream) -> Optional[Dict]:
+        """
+        Update the streaming indicators with new buffer entries and return the latest signal
+        
+        Only bars added since the previous call are processed (O(1) per bar).
+        """
+        pending = self._pending_bars()
+        if pending is None:
+            # Buffer was rebuilt: start a fresh stream from the whole buffer
+            self.signal_stream = None
+            stream = self._get_signal_stream()
+            pending = list(self.price_buffer)
+        
+        stream.update_many(pending)
+        self._streamed_total = self.price_buffer.total
+        
+        signal_dict = {
+            'timestamp': datetime.now(),
+            'price': self.price_buffer[-1]['close'],
+            'signal': stream.signal,
+            'indicators': dict(stream.indicators.values)
+        }
+        
+        logger.debug(f"Signal calculated: {signal_dict['signal']} at {signal_dict['price']}")
+        
+        return signal_dict
+    
     def _determine_action_and_quantity(self, signal_value: int, session) -> tuple:
         """
         Determine trading action and quantity based on signal
@@ -643,6 +804,11 @@ class AutoTrader:
     
     def _update_session(self):
         """Update session with latest state"""
+        if self.state_sink is not None:
+            # Batched by the scheduler (see AutoTraderScheduler.flush)
+            self.state_sink(self.session_id, datetime.now())
+            return
+        
         db = SessionLocal()
         try:
             session = db.query(AutoTraderSession).filter(
@@ -744,20 +910,323 @@ class AutoTrader:
                 'last_signal_at': session.last_signal_at,
                 'last_check_at': session.last_check_at,
                 'started_at': session.started_at,
-                'buffer_size': len(self.price_buffer)
+                'buffer_size': len(self.price_buffer),
+                'mode': self.mode,
+                'fallback_reason': self.fallback_reason,
+                'last_decision_ms': self.last_decision_ms,
+                'metrics': dict(self.metrics)
             }
             
         finally:
             db.close()
 
 
+class AutoTraderScheduler:
+    """
+    Runs many AutoTrader sessions as coroutines on one asyncio loop
+    
+    - One background thread and event loop for all sessions
+    - Market data is shared: a single price bus subscription, and one bar
+      feed per symbol fanned out to every session trading it
+    - Strategy evaluation runs on the loop; blocking work (buffer
+      initialisation, order placement) goes to the default executor
+    - last_check_at updates are batched into one write every flush_interval
+    - Per-session timing metrics (evaluation time, queue wait, bars, signals)
+    """
+    
+    def __init__(self, bus=price_bus, flush_interval: float = 5.0, bar_seconds: int = 60,
+                 session_factory=SessionLocal):
+        """
+        Args:
+            bus: Price bus to read events from
+            flush_interval: Seconds between two session-state writes
+            bar_seconds: Length of the bars evaluated by 'stream' sessions
+            session_factory: Session factory for the batched writes
+        """
+        self.bus = bus
+        self.flush_interval = flush_interval
+        self.bar_seconds = bar_seconds
+        self.session_factory = session_factory
+        self.clock = lambda: datetime.now(PARIS_TZ).replace(tzinfo=None)
+        
+        self.traders: Dict[int, AutoTrader] = {}
+        self.flushes = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._bus_sub: Optional[int] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._feeds: Dict[str, asyncio.Task] = {}
+        self._feed_queues: Dict[str, asyncio.Queue] = {}
+        self._listeners: Dict[str, Dict[int, asyncio.Queue]] = {}
+        self._checks: Dict[int, datetime] = {}
+        self._checks_lock = threading.Lock()
+    
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+    
+    def start(self):
+        """Start the event loop thread (idempotent)"""
+        if self._loop is not None:
+            return
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+            loop.close()
+        
+        self._loop = loop
+        self._thread = threading.Thread(target=run, daemon=True, name="AutoTraderScheduler")
+        self._thread.start()
+        ready.wait(5)
+        asyncio.run_coroutine_threadsafe(self._flush_loop(), loop)
+        self._bus_sub = self.bus.subscribe(self._on_event)
+        logger.info(f"🗓️ AutoTrader scheduler started (flush every {self.flush_interval}s)")
+    
+    def stop(self):
+        """Stop every session, write pending state and stop the loop"""
+        if self._loop is None:
+            return
+        for session_id in list(self.traders):
+            self.remove(session_id)
+        self.bus.unsubscribe(self._bus_sub)
+        self._bus_sub = None
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self.flush()
+        logger.info("🗓️ AutoTrader scheduler stopped")
+    
+    def add(self, trader: AutoTrader):
+        """Start a session on the scheduler (instead of AutoTrader.start)"""
+        if trader.session_id in self.traders:
+            logger.warning(f"Session #{trader.session_id} already scheduled")
+            return
+        self.start()
+        trader.running = True
+        trader.state_sink = self._record_check
+        trader.metrics = {
+            'bars': 0, 'evaluations': 0, 'signals': 0, 'errors': 0,
+            'last_ms': None, 'avg_ms': None, 'max_ms': 0.0, 'total_ms': 0.0,
+            'last_queue_ms': None, 'last_bar_at': None,
+        }
+        trader._mark_running()
+        if trader.mode == 'stream':
+            trader._start_market_data()
+        self.traders[trader.session_id] = trader
+        asyncio.run_coroutine_threadsafe(self._start_session(trader), self._loop).result(timeout=5)
+        logger.info(f"✅ AutoTrader #{trader.session_id} scheduled ({trader.ticker.symbol}, {trader.mode})")
+    
+    def remove(self, session_id: int):
+        """Stop a scheduled session"""
+        trader = self.traders.pop(session_id, None)
+        if trader is None:
+            return
+        trader.running = False
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._stop_session(trader), self._loop).result(timeout=5)
+        if trader.mode == 'stream' or trader.fallback_reason:
+            trader._stop_market_data()
+        self.flush()
+        trader._mark_stopped()
+        trader.state_sink = None
+        logger.info(f"🛑 AutoTrader #{session_id} unscheduled")
+    
+    def session_metrics(self, session_id: Optional[int] = None) -> Dict:
+        """Timing metrics of one session, or of all sessions by id"""
+        if session_id is not None:
+            trader = self.traders.get(session_id)
+            return dict(trader.metrics) if trader else {}
+        return {sid: dict(trader.metrics) for sid, trader in list(self.traders.items())}
+    
+    # Batched session state --------------------------------------------------
+    
+    def _record_check(self, session_id: int, checked_at: datetime):
+        with self._checks_lock:
+            self._checks[session_id] = checked_at
+    
+    def flush(self) -> int:
+        """
+        Write the pending last_check_at of every session in one transaction
+        
+        Returns:
+            Number of sessions updated
+        """
+        with self._checks_lock:
+            checks, self._checks = self._checks, {}
+        if not checks:
+            return 0
+        
+        db = self.session_factory()
+        try:
+            sessions = db.query(AutoTraderSession).filter(AutoTraderSession.id.in_(list(checks))).all()
+            now = datetime.now()
+            for session in sessions:
+                session.last_check_at = checks[session.id]
+                session.updated_at = now
+            db.commit()
+            self.flushes += 1
+            return len(sessions)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ AutoTrader session flush failed: {e}")
+            # Keep them for the next flush (newer values win)
+            with self._checks_lock:
+                for session_id, checked_at in checks.items():
+                    self._checks.setdefault(session_id, checked_at)
+            return 0
+        finally:
+            db.close()
+    
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await loop.run_in_executor(None, self.flush)
+    
+    # Shared market data -----------------------------------------------------
+    
+    def _on_event(self, event: Dict):
+        """Price bus callback (publisher thread): hand the event to the loop"""
+        loop = self._loop
+        if loop is not None and event['symbol'] in self._feed_queues:
+            loop.call_soon_threadsafe(self._dispatch, event)
+    
+    def _dispatch(self, event: Dict):
+        feed = self._feed_queues.get(event['symbol'])
+        if feed is not None:
+            feed.put_nowait(event)
+    
+    async def _feed(self, symbol: str):
+        """Build bars of one symbol once and fan them out to its sessions"""
+        builder = BarBuilder(self.bar_seconds)
+        events = self._feed_queues[symbol]
+        while True:
+            remaining = builder.seconds_until_due(self.clock())
+            try:
+                if remaining is None:
+                    bar = builder.add(await events.get())
+                else:
+                    bar = builder.add(await asyncio.wait_for(events.get(), max(remaining, 0.01)))
+            except asyncio.TimeoutError:
+                bar = builder.close_due(self.clock())
+            
+            if bar is None:
+                continue
+            closed_at = time.perf_counter()
+            for listener in list(self._listeners.get(symbol, {}).values()):
+                # Each session keeps its own copy in its buffer
+                listener.put_nowait((dict(bar), closed_at))
+    
+    def _listen(self, symbol: str, session_id: int) -> asyncio.Queue:
+        bars = asyncio.Queue()
+        self._listeners.setdefault(symbol, {})[session_id] = bars
+        if symbol not in self._feeds:
+            self._feed_queues[symbol] = asyncio.Queue()
+            self._feeds[symbol] = asyncio.get_running_loop().create_task(self._feed(symbol))
+        return bars
+    
+    def _unlisten(self, symbol: str, session_id: int):
+        listeners = self._listeners.get(symbol, {})
+        listeners.pop(session_id, None)
+        if not listeners and symbol in self._feeds:
+            self._feeds.pop(symbol).cancel()
+            self._feed_queues.pop(symbol, None)
+            self._listeners.pop(symbol, None)
+    
+    # Sessions ---------------------------------------------------------------
+    
+    async def _start_session(self, trader: AutoTrader):
+        bars = self._listen(trader.ticker.symbol, trader.session_id) if trader.mode == 'stream' else None
+        self._tasks[trader.session_id] = asyncio.get_running_loop().create_task(self._run_session(trader, bars))
+    
+    async def _stop_session(self, trader: AutoTrader):
+        task = self._tasks.pop(trader.session_id, None)
+        if task is not None:
+            task.cancel()
+        if trader.mode == 'stream':
+            self._unlisten(trader.ticker.symbol, trader.session_id)
+    
+    async def _cancel_all(self):
+        """Cancel sessions, feeds and the flush loop"""
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+        self._tasks.clear()
+        self._feeds.clear()
+        self._feed_queues.clear()
+        self._listeners.clear()
+    
+    async def _run_session(self, trader: AutoTrader, bars: Optional[asyncio.Queue]):
+        loop = asyncio.get_running_loop()
+        logger.info(f"Trading coroutine started for session #{trader.session_id}")
+        await loop.run_in_executor(None, trader._prepare_buffer)
+        
+        while trader.running:
+            if bars is not None:
+                try:
+                    bar, closed_at = await asyncio.wait_for(bars.get(), 1.0)
+                except asyncio.TimeoutError:
+                    if not trader.market_data.running:
+                        self._unlisten(trader.ticker.symbol, trader.session_id)
+                        await loop.run_in_executor(None, trader._fall_back_to_polling, "live data service stopped")
+                        bars = None
+                    continue
+                trader.metrics['last_queue_ms'] = (time.perf_counter() - closed_at) * 1000
+            else:
+                bar = await loop.run_in_executor(None, trader._fetch_live_price)
+            
+            if bar is not None and not await self._handle_bar(trader, bar):
+                break
+            
+            if bars is None:
+                await asyncio.sleep(trader.config['polling_interval'])
+        
+        logger.info(f"Trading coroutine ended for session #{trader.session_id}")
+    
+    async def _handle_bar(self, trader: AutoTrader, bar: Dict) -> bool:
+        """Evaluate one bar for a session; False if the session stopped on error"""
+        metrics = trader.metrics
+        try:
+            signals = trader._evaluate_bar(bar)
+            metrics['bars'] += 1
+            metrics['last_bar_at'] = bar.get('timestamp')
+            if len(trader.price_buffer) >= 50:  # Strategy was evaluated
+                metrics['evaluations'] += 1
+                metrics['last_ms'] = trader.last_decision_ms
+                metrics['total_ms'] += trader.last_decision_ms
+                metrics['max_ms'] = max(metrics['max_ms'], trader.last_decision_ms)
+                metrics['avg_ms'] = metrics['total_ms'] / metrics['evaluations']
+            
+            if signals and signals.get('signal', 0) != 0:
+                metrics['signals'] += 1
+                await asyncio.get_running_loop().run_in_executor(None, trader._process_signal, signals)
+            trader._update_session()
+            return True
+        
+        except Exception as e:
+            metrics['errors'] += 1
+            logger.error(f"Error in trading coroutine #{trader.session_id}: {e}")
+            await asyncio.get_running_loop().run_in_executor(None, trader._handle_error, str(e))
+            return False
+
+
 class AutoTraderManager:
     """Manages multiple AutoTrader instances"""
     
-    def __init__(self, ibkr_collector: Optional[IBKRCollector] = None):
-        """TODO: Add docstring."""
+    def __init__(self, ibkr_collector: Optional[IBKRCollector] = None, use_scheduler: bool = True):
+        """
+        Args:
+            ibkr_collector: IBKR connection for order execution
+            use_scheduler: Run sessions as coroutines on one AutoTraderScheduler
+                           (False: one thread per session)
+        """
         self.ibkr_collector = ibkr_collector
         self.traders: Dict[int, AutoTrader] = {}  # session_id -> AutoTrader
+        self.scheduler = AutoTraderScheduler() if use_scheduler else None
     
     def create_session(self, ticker_id: int, strategy_id: int, config: Dict = None) -> int:
         """
@@ -795,8 +1264,14 @@ class AutoTraderManager:
         finally:
             db.close()
     
-    def start_session(self, session_id: int):
-        """Start an auto trading session"""
+    def start_session(self, session_id: int, mode: str = 'stream'):
+        """
+        Start an auto trading session
+        
+        Args:
+            session_id: Session to start
+            mode: 'stream' (live data service, falls back to 'poll' if it is down) or 'poll'
+        """
         if session_id in self.traders:
             logger.warning(f"Session #{session_id} already has active trader")
             return
@@ -805,22 +1280,52 @@ class AutoTraderManager:
         ibkr_connected = self.ibkr_collector and self.ibkr_collector.ib.isConnected()
         logger.info(f"Starting session #{session_id} - IBKR connected: {ibkr_connected}")
         
-        trader = AutoTrader(session_id, self.ibkr_collector)
-        trader.start()
+        trader = AutoTrader(session_id, self.ibkr_collector, mode=mode)
+        if self.scheduler is not None:
+            self.scheduler.add(trader)
+        else:
+            trader.start()
         self.traders[session_id] = trader
     
+    def update_session_config(self, session_id: int, config: Dict):
+        """
+        Change the settings of a session (polling_interval, max_position_size, ...)
+        
+        The running trader, if any, picks them up immediately.
+        """
+        changes = {k: v for k, v in config.items() if k in SESSION_CONFIG_FIELDS}
+        db = SessionLocal()
+        try:
+            session = db.query(AutoTraderSession).filter(
+                AutoTraderSession.id == session_id
+            ).first()
+            if not session:
+                raise ValueError(f"AutoTrader session {session_id} not found")
+            for field, value in changes.items():
+                setattr(session, field, value)
+            db.commit()
+        finally:
+            db.close()
+        
+        trader = self.traders.get(session_id)
+        if trader:
+            trader.refresh_config(changes)
+    
     def stop_session(self, session_id: int):
         """Stop an auto trading session"""
         trader = self.traders.get(session_id)
         if trader:
-            trader.stop()
+            if self.scheduler is not None:
+                self.scheduler.remove(session_id)
+            else:
+                trader.stop()
             del self.traders[session_id]
         else:
             logger.warning(f"No active trader for session #{session_id}")
     
     def stop_all(self):
         """Stop all active trading sessions"""
-        for session_id in self.traders.keys():
+        for session_id in list(self.traders.keys()):
             self.stop_session(session_id)
     
     def get_all_sessions(self) -> List[Dict]:
@@ -833,6 +1338,7 @@ class AutoTraderManager:
             
             result = []
             for session in sessions:
+                trader = self.traders.get(session.id)
                 # Skip sessions with orphaned references
                 if session.ticker is None or session.strategy is None:
                     logger.warning(f"Skipping session #{session.id}: orphaned ticker or strategy")
@@ -848,7 +1354,8 @@ class AutoTraderManager:
                     'total_pnl': session.total_pnl,
                     'started_at': session.started_at,
                     'stopped_at': session.stopped_at,
-                    'is_active': session.id in self.traders
+                    'is_active': trader is not None,
+                    'mode': trader.mode if trader else None
                 })
             
             return result
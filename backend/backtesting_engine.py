@@ -6,10 +6,16 @@ from typing import Dict, List, Tuple, Optional, Callable
 from datetime import datetime
 from dataclasses import dataclass, asdict
 import logging
+import math
+import multiprocessing
+from multiprocessing import shared_memory
 from backend.constants import CONST_CLOSE
 
 logger = logging.getLogger(__name__)
 
+# Candidates per worker task = total / (processes * BATCHES_PER_PROCESS)
+BATCHES_PER_PROCESS = 4
+
 
 @dataclass
 class BacktestResult:
@@ -151,33 +157,180 @@ class EnhancedMovingAverageStrategy(Strategy):
 class StrategyGenerator:
     """Generate trading strategies"""
     
-    def __init__(self, target_return: float = 0.0):
-        """Initialize strategy generator"""
+    def __init__(self, target_return: float = 0.0, seed: Optional[int] = None):
+        """Initialize strategy generator
+        
+        Args:
+            target_return: Target return (informative)
+            seed: Random seed, same seed = same sequence of strategies
+        """
         self.target_return = target_return
+        self.rng = np.random.default_rng(seed)
     
     def generate(self) -> Strategy:
         """Generate a random strategy"""
-        strategy_type = np.random.choice(['ma', 'rsi', 'enhanced'])
+        strategy_type = self.rng.choice(['ma', 'rsi', 'enhanced'])
         
         if strategy_type == 'ma':
             return SimpleMovingAverageStrategy(
-                fast=np.random.randint(5, 20),
-                slow=np.random.randint(20, 50)
+                fast=int(self.rng.integers(5, 20)),
+                slow=int(self.rng.integers(20, 50))
             )
         elif strategy_type == 'rsi':
             return RSIStrategy(
-                period=np.random.randint(10, 20),
-                oversold=np.random.randint(20, 35),
-                overbought=np.random.randint(65, 80)
+                period=int(self.rng.integers(10, 20)),
+                oversold=int(self.rng.integers(20, 35)),
+                overbought=int(self.rng.integers(65, 80))
             )
         else:
             return EnhancedMovingAverageStrategy(
-                fast_period=np.random.randint(5, 20),
-                slow_period=np.random.randint(20, 50),
-                rsi_period=np.random.randint(10, 20)
+                fast_period=int(self.rng.integers(5, 20)),
+                slow_period=int(self.rng.integers(20, 50)),
+                rsi_period=int(self.rng.integers(10, 20))
             )
 
 
+class SharedOHLCV:
+    """
+    OHLCV DataFrame published once in shared memory for worker processes
+    
+    Numeric columns are stored as one float64 block, a DatetimeIndex as an
+    int64 block. Workers rebuild a DataFrame on top of the shared buffers
+    without copying, so the data is never pickled per task.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        """Copy the numeric columns (and a DatetimeIndex) into new shared blocks"""
+        numeric = df.select_dtypes(include=[np.number])
+        values = numeric.to_numpy(dtype=np.float64)
+        
+        self._blocks = []
+        self.spec = {
+            "columns": list(numeric.columns),
+            "shape": values.shape,
+            "values": self._publish(values),
+        }
+        
+        if isinstance(df.index, pd.DatetimeIndex):
+            self.spec["index"] = ("datetime", self._publish(df.index.asi8), str(df.index.tz) if df.index.tz else None)
+        else:
+            # Non-datetime index: sent once per worker with the initializer
+            self.spec["index"] = ("values", df.index, None)
+        self.spec["index_name"] = df.index.name
+    
+    def _publish(self, array: np.ndarray) -> str:
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._blocks.append(block)
+        return block.name
+    
+    @staticmethod
+    def attach(spec: Dict) -> Tuple[pd.DataFrame, List[shared_memory.SharedMemory]]:
+        """
+        Rebuild the DataFrame from a spec (worker side)
+        
+        Returns:
+            Tuple (DataFrame, shared blocks to keep alive while the DataFrame is used)
+        """
+        blocks = []
+        
+        values_block = shared_memory.SharedMemory(name=spec["values"])
+        blocks.append(values_block)
+        values = np.ndarray(spec["shape"], dtype=np.float64, buffer=values_block.buf)
+        
+        kind, payload, tz = spec["index"]
+        if kind == "datetime":
+            index_block = shared_memory.SharedMemory(name=payload)
+            blocks.append(index_block)
+            ns = np.ndarray((spec["shape"][0],), dtype=np.int64, buffer=index_block.buf)
+            index = pd.DatetimeIndex(ns.view("datetime64[ns]"), name=spec["index_name"])
+            if tz:
+                index = index.tz_localize("UTC").tz_convert(tz)
+        else:
+            index = payload
+        
+        df = pd.DataFrame(values, columns=spec["columns"], index=index, copy=False)
+        return df, blocks
+    
+    def close(self):
+        """Release and destroy the shared blocks (owner side)"""
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+
+# Per-process state of optimization workers (set by _init_optimization_worker)
+_worker_state: Dict = {}
+
+
+def _init_optimization_worker(spec: Dict, engine_kwargs: Dict, symbol: str):
+    """Pool initializer: attach the shared OHLCV data once per worker"""
+    df, blocks = SharedOHLCV.attach(spec)
+    _worker_state["df"] = df
+    _worker_state["blocks"] = blocks
+    _worker_state["engine"] = BacktestingEngine(**engine_kwargs)
+    _worker_state["symbol"] = symbol
+
+
+def _pack_trades(trades: List[Dict]) -> Dict:
+    """
+    Columnar form of a trade list for inter-process transfer
+    
+    Pickling thousands of dicts holding Timestamps is far slower than the
+    backtest itself; index/array columns pickle as raw buffers.
+    """
+    if not trades:
+        return {}
+    packed = {}
+    for key in trades[0]:
+        column = [trade[key] for trade in trades]
+        packed[key] = pd.Index(column) if key in ("entry_date", "exit_date") else np.asarray(column)
+    return packed
+
+
+def _unpack_trades(packed: Dict) -> List[Dict]:
+    """Inverse of _pack_trades"""
+    if not packed:
+        return []
+    keys = list(packed)
+    columns = [list(packed[key]) if isinstance(packed[key], pd.Index) else packed[key].tolist() for key in keys]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def _evaluate_strategy_batch(batch: List[Tuple[int, Strategy]]) -> List[Tuple[int, Optional[BacktestResult], Dict]]:
+    """Backtest a batch of (candidate index, strategy) in a worker"""
+    engine = _worker_state["engine"]
+    results = []
+    for idx, strategy in batch:
+        try:
+            result = engine.run(strategy, _worker_state["df"], _worker_state["symbol"])
+            packed = _pack_trades(result.trades)
+            result.trades = []
+            results.append((idx, result, packed))
+        except Exception as e:
+            logger.warning(f"Error in iteration {idx}: {e}")
+            results.append((idx, None, {}))
+    return results
+
+
+def _next_true_index(mask: np.ndarray) -> np.ndarray:
+    """
+    For each position k, index of the first True at or after k (len(mask) if none)
+    
+    The result has len(mask) + 1 entries so that lookups at len(mask) are valid.
+    """
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    result = np.empty(n + 1, dtype=np.int64)
+    result[:n] = np.minimum.accumulate(positions[::-1])[::-1]
+    result[n] = n
+    return result
+
+
 class BacktestingEngine:
     """Backtesting engine for trading strategies"""
     
@@ -213,60 +366,129 @@ class BacktestingEngine:
         
         # Generate signals
         signals = strategy.generate_signals(df)
+        prices = df[CONST_CLOSE].values
+        
+        capital, trades = self._simulate(np.asarray(signals, dtype=np.float64), prices, df.index)
+        return self._build_result(strategy, df, symbol, prices, capital, trades)
+    
+    def _hold_times(self, index: pd.Index) -> Optional[np.ndarray]:
+        """Bar times in ns when min_hold_minutes applies (DatetimeIndex only), else None"""
+        if self.min_hold_minutes and self.min_hold_minutes > 0 and isinstance(index, pd.DatetimeIndex):
+            return index.asi8
+        return None
+    
+    def _close_trade(self, capital: float, direction: int, entry_price: float, exit_price: float,
+                     entry_date, exit_date) -> Tuple[float, Dict]:
+        """Close a position: returns the new capital and the trade record (profit and profit_pct net of fees)"""
+        gross = direction * (exit_price - entry_price) * (capital / entry_price)
+        fees = self.commission * (capital + capital * exit_price / entry_price)
+        profit = gross - fees
+        trade = {
+            "entry_date": entry_date,
+            "exit_date": exit_date,
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "profit": profit,
+            "profit_pct": profit / capital * 100,
+            "direction": "LONG" if direction == 1 else "SHORT",
+            "commission": fees
+        }
+        return capital + profit, trade
+    
+    def _simulate(self, signals: np.ndarray, prices: np.ndarray, index: pd.Index) -> Tuple[float, List[Dict]]:
+        """
+        Array-based simulation, same results as _simulate_loop
         
-        # Initialize variables
+        Only bars carrying a signal can change the position, so the walk jumps
+        from trade to trade using "next bar with signal X" lookup tables
+        instead of visiting every bar.
+        
+        Args:
+            signals: Signal per bar (1 = buy, -1 = sell, anything else = hold)
+            prices: Close price per bar
+            index: Bar index (dates used for trade records and min hold)
+            
+        Returns:
+            Tuple (final capital, trades)
+        """
+        n = len(signals)
+        next_buy = _next_true_index(signals == 1)
+        next_sell = _next_true_index(signals == -1)
+        next_entry = _next_true_index((signals == 1) | (signals == -1)) if self.allow_short else next_buy
+        
+        # First bar at which a position opened on bar i may be closed
+        earliest_exit = np.arange(1, n + 1)
+        times = self._hold_times(index)
+        if times is not None:
+            hold_ns = int(self.min_hold_minutes * 60 * 1_000_000_000)
+            earliest_exit = np.maximum(earliest_exit, np.searchsorted(times, times + hold_ns, side='left'))
+        
+        # Walk the trades (integer work only)
+        entries, exits, directions = [], [], []
+        i = int(next_entry[0])
+        while i < n:
+            direction = 1 if signals[i] == 1 else -1
+            j = int(next_sell[earliest_exit[i]] if direction == 1 else next_buy[earliest_exit[i]])
+            entries.append(i)
+            directions.append(direction)
+            if j >= n:
+                exits.append(n - 1)
+                break
+            exits.append(j)
+            i = int(next_entry[j + 1])
+        
+        # Compound capital trade by trade, in the same order as the loop
         capital = self.initial_capital
-        position = 0  # 0 = no position, 1 = long
-        entry_price = 0
         trades = []
-        prices = df[CONST_CLOSE].values
+        entry_dates = list(index[entries])
+        exit_dates = list(index[exits])
+        for i, j, direction, entry_date, exit_date in zip(entries, exits, directions, entry_dates, exit_dates):
+            capital, trade = self._close_trade(
+                capital, direction, prices[i], prices[j], entry_date, exit_date
+            )
+            trades.append(trade)
+        
+        return capital, trades
+    
+    def _simulate_loop(self, signals: np.ndarray, prices: np.ndarray, index: pd.Index) -> Tuple[float, List[Dict]]:
+        """Bar-by-bar reference implementation of _simulate (kept for tests and benchmarks)"""
+        times = self._hold_times(index)
+        hold_ns = int(self.min_hold_minutes * 60 * 1_000_000_000)
+        
+        capital = self.initial_capital
+        position = 0  # 0 = no position, 1 = long, -1 = short
+        entry_idx = 0
+        trades = []
         
-        # Simulate trading
         for i in range(len(signals)):
-            signal = signals.iloc[i]
-            price = prices[i]
+            signal = signals[i]
             
-            if signal == 1 and position == 0:
-                # Buy signal
-                position = 1
-                entry_price = price
-                entry_date = df.index[i]
+            if position == 0:
+                if signal == 1 or (signal == -1 and self.allow_short):
+                    position = 1 if signal == 1 else -1
+                    entry_idx = i
             
-            elif signal == -1 and position == 1:
-                # Sell signal
-                exit_price = price
-                exit_date = df.index[i]
-                profit = (exit_price - entry_price) * (capital / entry_price)
-                capital += profit
-                
-                trades.append({
-                    "entry_date": entry_date,
-                    "exit_date": exit_date,
-                    "entry_price": entry_price,
-                    "exit_price": exit_price,
-                    "profit": profit,
-                    "profit_pct": (exit_price - entry_price) / entry_price * 100
-                })
-                
+            elif signal == -position:
+                if times is not None and times[i] - times[entry_idx] < hold_ns:
+                    continue
+                capital, trade = self._close_trade(
+                    capital, position, prices[entry_idx], prices[i], index[entry_idx], index[i]
+                )
+                trades.append(trade)
                 position = 0
         
         # Close position if still open
-        if position == 1:
-            exit_price = prices[-1]
-            exit_date = df.index[-1]
-            profit = (exit_price - entry_price) * (capital / entry_price)
-            capital += profit
-            
-            trades.append({
-                "entry_date": entry_date,
-                "exit_date": exit_date,
-                "entry_price": entry_price,
-                "exit_price": exit_price,
-                "profit": profit,
-                "profit_pct": (exit_price - entry_price) / entry_price * 100
-            })
-        
-        # Calculate metrics
+        if position != 0:
+            capital, trade = self._close_trade(
+                capital, position, prices[entry_idx], prices[-1], index[entry_idx], index[-1]
+            )
+            trades.append(trade)
+        
+        return capital, trades
+    
+    def _build_result(self, strategy: Strategy, df: pd.DataFrame, symbol: str, prices: np.ndarray,
+                      capital: float, trades: List[Dict]) -> BacktestResult:
+        """Compute metrics and build the BacktestResult"""
         total_return = (capital - self.initial_capital) / self.initial_capital * 100
         total_trades = len(trades)
         winning_trades = sum(1 for t in trades if t["profit"] > 0)
@@ -315,59 +537,120 @@ class BacktestingEngine:
         sharpe = np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252)
         return float(sharpe)
     
+    def _engine_kwargs(self) -> Dict:
+        return {
+            "initial_capital": self.initial_capital,
+            "commission": self.commission,
+            "allow_short": self.allow_short,
+            "min_hold_minutes": self.min_hold_minutes
+        }
+    
     def run_parallel_optimization(self, df: pd.DataFrame, symbol: str, num_iterations: int = 100,
                                  target_return: float = 0.0, num_processes: Optional[int] = None,
-                                 progress_callback: Optional[Callable] = None) -> Tuple[Optional[Strategy], Optional[BacktestResult], List[BacktestResult]]:
+                                 progress_callback: Optional[Callable] = None,
+                                 seed: Optional[int] = None) -> Tuple[Optional[Strategy], Optional[BacktestResult], List[BacktestResult]]:
         """
         Run parallel optimization of trading strategies (sequential fallback if multiprocessing unavailable)
         
+        Candidates are drawn up-front from a seeded StrategyGenerator and
+        evaluated by a process pool in batches; the OHLCV data is shared with
+        the workers through shared memory. Results are returned in candidate
+        order and ties go to the earliest candidate, so a given seed always
+        gives the same outcome whatever the number of processes.
+        
         Args:
             df: DataFrame with OHLCV data
             symbol: Stock symbol
             num_iterations: Number of strategies to test
             target_return: Target return (not used, for compatibility)
-            num_processes: Number of processes (None = auto-detect)
-            progress_callback: Callback for progress (not used)
+            num_processes: Number of processes (None = auto-detect, 1 = sequential)
+            progress_callback: Callback(completed, total, best_return) called as results arrive
+            seed: Random seed for candidate generation
             
         Returns:
             Tuple of (best_strategy, best_result, all_results)
         """
-        generator = StrategyGenerator(target_return=target_return)
-        all_results = []
-        best_result = None
-        best_strategy = None
-        best_return = -np.inf
+        generator = StrategyGenerator(target_return=target_return, seed=seed)
+        candidates = [generator.generate() for _ in range(num_iterations)]
         
-        # Run sequential optimization (simple version)
-        for i in range(num_iterations):
-            try:
-                # Generate random strategy
-                strategy = generator.generate()
-                
-                # Run backtest
-                result = self.run(strategy, df, symbol)
-                all_results.append(result)
-                
-                # Track best result
-                if result.total_return > best_return:
-                    best_return = result.total_return
-                    best_result = result
-                    best_strategy = strategy
+        if num_processes is None:
+            num_processes = max(1, multiprocessing.cpu_count() - 1)
+        num_processes = min(num_processes, num_iterations)
+        
+        results: List[Optional[BacktestResult]] = [None] * num_iterations
+        tracker = {"completed": 0, "best_return": -np.inf}
+        
+        def collect(batch_results):
+            for idx, result in batch_results:
+                results[idx] = result
+                tracker["completed"] += 1
+                if result is not None and result.total_return > tracker["best_return"]:
+                    tracker["best_return"] = result.total_return
                 
                 # Call progress callback if provided
                 if progress_callback:
-                    progress_callback(i + 1, num_iterations, best_return)
+                    progress_callback(tracker["completed"], num_iterations, tracker["best_return"])
                 
                 # Log progress
-                if (i + 1) % 10 == 0:
-                    logger.info(f"[{i + 1}/{num_iterations}] Best return: {best_return:.2f}%")
-            
-            except Exception as e:
-                logger.warning(f"Error in iteration {i}: {e}")
+                if tracker["completed"] % 10 == 0:
+                    logger.info(f"[{tracker['completed']}/{num_iterations}] Best return: {tracker['best_return']:.2f}%")
+        
+        ran_parallel = False
+        if num_processes > 1:
+            try:
+                self._run_pool(df, symbol, candidates, num_processes, collect)
+                ran_parallel = True
+            except (OSError, RuntimeError, ValueError) as e:
+                logger.warning(f"Process pool unavailable ({e}), falling back to sequential optimization")
+                results = [None] * num_iterations
+                tracker.update(completed=0, best_return=-np.inf)
+        
+        if not ran_parallel:
+            for i, strategy in enumerate(candidates):
+                try:
+                    collect([(i, self.run(strategy, df, symbol))])
+                except Exception as e:
+                    logger.warning(f"Error in iteration {i}: {e}")
+                    collect([(i, None)])
+        
+        # Deterministic selection: candidate order, first best wins
+        all_results = []
+        best_result = None
+        best_strategy = None
+        best_return = -np.inf
+        for strategy, result in zip(candidates, results):
+            if result is None:
                 continue
+            all_results.append(result)
+            if result.total_return > best_return:
+                best_return = result.total_return
+                best_result = result
+                best_strategy = strategy
         
         logger.info(f"Optimization complete. Best return: {best_return:.2f}%")
         return best_strategy, best_result, all_results
+    
+    def _run_pool(self, df: pd.DataFrame, symbol: str, candidates: List[Strategy],
+                  num_processes: int, collect: Callable):
+        """Evaluate candidates in a process pool, passing each finished batch to collect()"""
+        batch_size = max(1, math.ceil(len(candidates) / (num_processes * BATCHES_PER_PROCESS)))
+        indexed = list(enumerate(candidates))
+        batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+        
+        shared = SharedOHLCV(df)
+        try:
+            with multiprocessing.Pool(
+                processes=num_processes,
+                initializer=_init_optimization_worker,
+                initargs=(shared.spec, self._engine_kwargs(), symbol)
+            ) as pool:
+                for batch_results in pool.imap_unordered(_evaluate_strategy_batch, batches):
+                    for _, result, packed in batch_results:
+                        if result is not None:
+                            result.trades = _unpack_trades(packed)
+                    collect([(idx, result) for idx, result, _ in batch_results])
+        finally:
+            shared.close()
 
 
 # Aliases for backward compatibility
@@ -0,0 +1,345 @@
+"""
+Tiered retention for historical_data
+
+Each interval has a retention rule: bars older than keep_days are
+1. written to a monthly archive file
+   (BAR_ARCHIVE_DIR/<SYMBOL>/<interval>/<YYYY-MM>.parquet, or .csv.gz
+   without pyarrow),
+2. rolled up into a coarser interval kept in the database (5s -> 1min,
+   1min -> 1h, ...) without overwriting bars that already exist there,
+3. deleted in batches of DELETE_BATCH_SIZE rows, one short transaction each,
+   so collectors and the app are never locked out for long.
+
+The work is split per series and per calendar month; the cutoff is floored
+to midnight, so every rollup bucket is either fully kept or fully rolled up.
+When the database uses auto_vacuum=INCREMENTAL (enable_incremental_vacuum()),
+the freed pages are returned to the file system in small steps.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.config import logger, BAR_ARCHIVE_DIR, DATA_CONFIG
+from backend.constants import (
+    CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME
+)
+from backend.data_access import (
+    ensure_interval_stats, load_bars_frame, notify_bars_changed, refresh_interval_stats, to_sqlite_timestamp,
+    upsert_bars
+)
+from backend.market_calendar import interval_to_seconds
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DELETE_BATCH_SIZE = 5000
+VACUUM_STEP_PAGES = 1000
+
+
+@dataclass(frozen=True)
+class RetentionRule:
+    """How long an interval stays in historical_data, and where it goes next"""
+    keep_days: Optional[int]  # None = kept forever
+    rollup_to: Optional[str] = None  # Coarser interval receiving the expired bars
+
+
+# Keys use the interval names stored by the app; lookups match any spelling of the
+# same bar duration ('5sec', '5s', '5 secs')
+DEFAULT_RETENTION_POLICY: Dict[str, RetentionRule] = {
+    '1sec': RetentionRule(7, '1min'),
+    '5sec': RetentionRule(14, '1min'),
+    '10sec': RetentionRule(14, '1min'),
+    '15sec': RetentionRule(14, '1min'),
+    '30sec': RetentionRule(30, '1min'),
+    '1min': RetentionRule(365, '1h'),
+    '2min': RetentionRule(365, '1h'),
+    '3min': RetentionRule(365, '1h'),
+    '5min': RetentionRule(365, '1h'),
+    '10min': RetentionRule(730, '1day'),
+    '15min': RetentionRule(730, '1day'),
+    '20min': RetentionRule(730, '1day'),
+    '30min': RetentionRule(730, '1day'),
+    '1h': RetentionRule(730, '1day'),
+    '2h': RetentionRule(730, '1day'),
+    '3h': RetentionRule(730, '1day'),
+    '4h': RetentionRule(730, '1day'),
+    '8h': RetentionRule(730, '1day'),
+    '1day': RetentionRule(None),
+    '1week': RetentionRule(None),
+    '1month': RetentionRule(None),
+}
+
+_SERIES_SQL = text(
+    "SELECT s.ticker_id, t.symbol, s.interval, s.first_timestamp, s.bar_count "
+    "FROM ticker_interval_stats s JOIN tickers t ON t.id = s.ticker_id "
+    "WHERE s.bar_count > 0"
+)
+
+_DELETE_BATCH_SQL = text(
+    "DELETE FROM historical_data WHERE id IN ("
+    "SELECT id FROM historical_data "
+    "WHERE ticker_id = :ticker_id AND interval = :interval AND timestamp >= :start AND timestamp < :end "
+    "LIMIT :limit)"
+)
+
+
+def rule_for(interval: str, policy: Optional[Dict[str, RetentionRule]] = None,
+             days: Optional[int] = None) -> RetentionRule:
+    """
+    Retention rule of an interval
+
+    Args:
+        interval: Interval string, matched by name then by bar duration
+        policy: {interval: RetentionRule} (default DEFAULT_RETENTION_POLICY)
+        days: Keep every interval this many days (rollups still follow the policy)
+
+    Returns:
+        RetentionRule (intervals missing from the policy use DATA_CONFIG retention_days)
+    """
+    policy = DEFAULT_RETENTION_POLICY if policy is None else policy
+    rule = policy.get(interval)
+    if rule is None:
+        seconds = interval_to_seconds(interval)
+        rule = next((r for name, r in policy.items() if seconds and interval_to_seconds(name) == seconds),
+                    RetentionRule(DATA_CONFIG["retention_days"]))
+    if days is not None:
+        rule = RetentionRule(days, rule.rollup_to)
+    return rule
+
+
+def retention_cutoff(rule: RetentionRule, now: Optional[datetime] = None) -> Optional[pd.Timestamp]:
+    """First kept timestamp (midnight, naive Paris time) or None if the interval is kept forever"""
+    if rule.keep_days is None:
+        return None
+    now = pd.Timestamp(now if now is not None else datetime.now())
+    return (now - timedelta(days=rule.keep_days)).normalize()
+
+
+def plan_retention(db: Session, policy: Optional[Dict[str, RetentionRule]] = None, days: Optional[int] = None,
+                   now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Series holding bars older than their retention (read from ticker_interval_stats, no scan)
+
+    Returns:
+        List of dicts (ticker_id, symbol, interval, first, cutoff, rule), finest intervals first
+        so that rolled-up bars land before the coarser series is processed
+    """
+    ensure_interval_stats(db)
+    plan = []
+    for ticker_id, symbol, interval, first, _ in db.execute(_SERIES_SQL):
+        rule = rule_for(interval, policy, days)
+        cutoff = retention_cutoff(rule, now)
+        if cutoff is None or first is None or pd.Timestamp(first) >= cutoff:
+            continue
+        plan.append({
+            'ticker_id': ticker_id,
+            'symbol': symbol,
+            'interval': interval,
+            'first': pd.Timestamp(first),
+            'cutoff': cutoff,
+            'rule': rule,
+        })
+    plan.sort(key=lambda item: (interval_to_seconds(item['interval']) or 0, item['ticker_id']))
+    return plan
+
+
+def rollup_bars(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into a coarser interval (first/max/min/last/sum, buckets labelled by their start)
+
+    Args:
+        df: DataFrame with timestamp/open/high/low/close/volume columns, oldest first
+        interval: Target interval string
+
+    Returns:
+        DataFrame with the same columns, empty buckets dropped
+    """
+    seconds = interval_to_seconds(interval)
+    if seconds is None:
+        raise ValueError(f"Unknown interval: {interval}")
+    bars = df.set_index(CONST_TIMESTAMP).resample(f"{seconds}s", label='left', closed='left').agg({
+        CONST_OPEN: 'first',
+        CONST_HIGH: 'max',
+        CONST_LOW: 'min',
+        CONST_CLOSE: 'last',
+        CONST_VOLUME: 'sum',
+    })
+    return bars.dropna(subset=[CONST_OPEN]).reset_index()
+
+
+def archive_path(symbol: str, interval: str, month: pd.Timestamp, archive_dir: Optional[Path] = None) -> Path:
+    """Archive file of one series and one month"""
+    root = Path(archive_dir) if archive_dir is not None else BAR_ARCHIVE_DIR
+    suffix = 'parquet' if PYARROW_AVAILABLE else 'csv.gz'
+    return root / symbol.upper() / interval.replace(' ', '_') / f"{month:%Y-%m}.{suffix}"
+
+
+def read_archive(path: Path) -> pd.DataFrame:
+    """Read an archive file written by write_archive()"""
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path, parse_dates=[CONST_TIMESTAMP])
+
+
+def write_archive(df: pd.DataFrame, symbol: str, interval: str, month: pd.Timestamp,
+                  archive_dir: Optional[Path] = None) -> Path:
+    """
+    Write one month of bars to its archive file, merged with the bars already archived there
+
+    Returns:
+        Path of the archive file
+    """
+    path = archive_path(symbol, interval, month, archive_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        df = pd.concat([read_archive(path), df], ignore_index=True)
+        df = df.drop_duplicates(subset=[CONST_TIMESTAMP], keep='last').sort_values(CONST_TIMESTAMP)
+    if path.suffix == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, compression='gzip')
+    return path
+
+
+def delete_bars_batched(db: Session, ticker_id: int, interval: str, start, end,
+                        batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """
+    Delete the bars of one series in [start, end), committing every batch_size rows
+
+    Returns:
+        Number of rows deleted
+    """
+    params = {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'start': to_sqlite_timestamp(start),
+        'end': to_sqlite_timestamp(end),
+        'limit': batch_size,
+    }
+    deleted = 0
+    while True:
+        count = db.execute(_DELETE_BATCH_SQL, params).rowcount
+        db.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def enable_incremental_vacuum(db: Session) -> bool:
+    """
+    Switch the database to auto_vacuum=INCREMENTAL (one full VACUUM, run it off-hours)
+
+    Returns:
+        True if the mode was changed
+    """
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+        return False
+    db.commit()
+    connection = db.connection()
+    connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    connection.exec_driver_sql("VACUUM")
+    logger.info("✅ auto_vacuum set to INCREMENTAL")
+    return True
+
+
+def incremental_vacuum(db: Session, step_pages: int = VACUUM_STEP_PAGES) -> int:
+    """
+    Release the free pages in steps of step_pages (no-op unless auto_vacuum=INCREMENTAL)
+
+    Returns:
+        Number of pages released
+    """
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        return 0
+    released = 0
+    free = db.execute(text("PRAGMA freelist_count")).scalar()
+    while free:
+        db.connection().exec_driver_sql(f"PRAGMA incremental_vacuum({int(step_pages)})")
+        db.commit()
+        remaining = db.execute(text("PRAGMA freelist_count")).scalar()
+        released += free - remaining
+        if remaining >= free:
+            break
+        free = remaining
+    return released
+
+
+def _rolls_up(interval: str, rule: RetentionRule) -> bool:
+    """True if the rule's rollup interval is strictly coarser than the series"""
+    if not rule.rollup_to:
+        return False
+    source, target = interval_to_seconds(interval), interval_to_seconds(rule.rollup_to)
+    return source is not None and target is not None and target > source
+
+
+def _expire_series(db: Session, item: Dict, archive: bool, archive_dir: Optional[Path],
+                   batch_size: int, summary: Dict):
+    """Archive, roll up and delete the expired bars of one series, month by month"""
+    ticker_id, interval, rule = item['ticker_id'], item['interval'], item['rule']
+    month = item['first'].to_period('M').to_timestamp()
+    while month < item['cutoff']:
+        end = min(month + pd.offsets.MonthBegin(1), item['cutoff'])
+        bars = load_bars_frame(db, ticker_id, interval, start=month, end=end - pd.Timedelta(microseconds=1))
+        if not bars.empty:
+            if archive:
+                summary['files'].append(write_archive(bars, item['symbol'], interval, month, archive_dir))
+                summary['archived'] += len(bars)
+            if _rolls_up(interval, rule):
+                rolled = rollup_bars(bars, rule.rollup_to)
+                summary['rolled_up'] += upsert_bars(db, ticker_id, rule.rollup_to, rolled,
+                                                    keep_existing=True)['new_records']
+            summary['deleted'] += delete_bars_batched(db, ticker_id, interval, month, end, batch_size)
+        month = end
+
+    refresh_interval_stats(db, ticker_id, interval)
+    if _rolls_up(interval, rule):
+        refresh_interval_stats(db, ticker_id, rule.rollup_to)
+    db.commit()
+    notify_bars_changed(ticker_id, interval)
+    if _rolls_up(interval, rule):
+        notify_bars_changed(ticker_id, rule.rollup_to)
+
+
+def apply_retention(db: Session, policy: Optional[Dict[str, RetentionRule]] = None, days: Optional[int] = None,
+                    now: Optional[datetime] = None, archive: Optional[bool] = None,
+                    archive_dir: Optional[Path] = None, batch_size: int = DELETE_BATCH_SIZE,
+                    progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Enforce the retention policy on every series
+
+    Args:
+        db: Database session
+        policy: {interval: RetentionRule} (default DEFAULT_RETENTION_POLICY)
+        days: Keep every interval this many days instead of the policy durations
+        now: Reference time (default: now)
+        archive: Write expired bars to archive files (default DATA_CONFIG archive_enabled)
+        archive_dir: Archive directory (default BAR_ARCHIVE_DIR)
+        batch_size: Rows deleted per transaction
+        progress_callback: Optional callback(series_done, series_total)
+
+    Returns:
+        Dict with 'series', 'deleted', 'archived', 'rolled_up', 'files' and 'pages_released'
+    """
+    if archive is None:
+        archive = DATA_CONFIG.get("archive_enabled", True)
+    plan = plan_retention(db, policy, days, now)
+    summary = {'series': len(plan), 'deleted': 0, 'archived': 0, 'rolled_up': 0, 'files': [], 'pages_released': 0}
+
+    for done, item in enumerate(plan, start=1):
+        _expire_series(db, item, archive, archive_dir, batch_size, summary)
+        summary['pages_released'] += incremental_vacuum(db)
+        if progress_callback:
+            progress_callback(done, len(plan))
+        logger.info(f"Retention {item['symbol']} {item['interval']}: bars before {item['cutoff']:%Y-%m-%d} expired "
+                    f"({done}/{len(plan)})")
+
+    summary['files'] = sorted(set(summary['files']))
+    return summary
@@ -0,0 +1,482 @@
+"""
+Columnar bar store (Parquet) kept alongside the historical_data table
+
+Layout: DATA_DIR/bars/<SYMBOL>/<interval>/<YYYY-MM-DD>.parquet, one file per
+trading day. Readers only open the day files overlapping the requested range
+and get typed columns straight from Arrow buffers, instead of hydrating one
+ORM object per bar.
+
+Each series also has a small manifest (bar count, bounds and the
+ticker_interval_stats.updated_at value it mirrors). Every write to the
+database changes that stamp, so load_bars() checks one summary row to know
+whether the store still matches the database, and reads the database
+otherwise.
+"""
+import json
+import os
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.config import logger, BAR_STORE_DIR, DATA_CONFIG
+from backend.data_access import get_series_stats, load_bars_frame, series_version
+from backend.models import TickerIntervalStats
+from backend.constants import (
+    CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not installed. Parquet bar store disabled.")
+
+BAR_COLUMNS = [CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME]
+PRICE_COLUMNS = [CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE]
+MANIFEST_NAME = '_series.json'
+
+DateLike = Union[str, date, datetime, pd.Timestamp, None]
+
+
+def is_enabled() -> bool:
+    """True when the bar store is switched on (BAR_STORE_ENABLED) and pyarrow is installed"""
+    return PYARROW_AVAILABLE and DATA_CONFIG.get("bar_store_enabled", False)
+
+
+class BarStore:
+    """Parquet bar store partitioned by symbol / interval / day"""
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Args:
+            root: Store directory (default: BAR_STORE_DIR)
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow library not installed. Install with: pip install pyarrow")
+        self.root = Path(root) if root is not None else BAR_STORE_DIR
+
+    @staticmethod
+    def _interval_dir(interval: str) -> str:
+        # IBKR bar sizes contain spaces ('1 min'), keep directory names shell friendly
+        return interval.replace(' ', '_')
+
+    def _series_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / self._interval_dir(interval)
+
+    def _day_path(self, symbol: str, interval: str, day: date) -> Path:
+        return self._series_dir(symbol, interval) / f"{day.isoformat()}.parquet"
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """Typed OHLCV frame with naive timestamps (same wall-clock time as the database)"""
+        if CONST_TIMESTAMP not in df.columns:
+            df = df.reset_index().rename(columns={df.index.name or 'index': CONST_TIMESTAMP})
+
+        timestamps = pd.to_datetime(df[CONST_TIMESTAMP])
+        if getattr(timestamps.dt, 'tz', None) is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+
+        clean = pd.DataFrame({CONST_TIMESTAMP: timestamps.astype('datetime64[ns]')})
+        for col in PRICE_COLUMNS:
+            clean[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64).to_numpy()
+        clean[CONST_VOLUME] = pd.to_numeric(df[CONST_VOLUME], errors='coerce').fillna(0).astype(np.int64).to_numpy()
+        return clean.dropna(subset=[CONST_TIMESTAMP] + PRICE_COLUMNS)
+
+    def _write_day(self, path: Path, day_df: pd.DataFrame):
+        """Atomic write (temp file + rename) so readers never see a partial file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(day_df, preserve_index=False)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def manifest(self, symbol: str, interval: str) -> Optional[Dict]:
+        """
+        Summary of a stored series
+
+        Returns:
+            Dict with 'bar_count', 'first', 'last' (ISO strings) and 'stamp'
+            (database version mirrored, None if unknown), or None if nothing is stored
+        """
+        path = self._series_dir(symbol, interval) / MANIFEST_NAME
+        if path.exists():
+            return json.loads(path.read_text())
+
+        # Series written before manifests existed: count from the Parquet footers
+        files = self._day_files(symbol, interval, None, None)
+        if not files:
+            return None
+        first = pq.read_table(files[0], columns=[CONST_TIMESTAMP]).column(CONST_TIMESTAMP)
+        last = pq.read_table(files[-1], columns=[CONST_TIMESTAMP]).column(CONST_TIMESTAMP)
+        return {
+            'bar_count': sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+            'first': pd.Timestamp(first[0].as_py()).isoformat(),
+            'last': pd.Timestamp(last[-1].as_py()).isoformat(),
+            'stamp': None,
+        }
+
+    def _write_manifest(self, symbol: str, interval: str, manifest: Dict):
+        path = self._series_dir(symbol, interval) / MANIFEST_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest))
+        os.replace(tmp_path, path)
+
+    def set_stamp(self, symbol: str, interval: str, stamp: Optional[str]):
+        """Record the database version the stored series matches (None = unknown)"""
+        manifest = self.manifest(symbol, interval)
+        if manifest is not None:
+            manifest['stamp'] = stamp
+            self._write_manifest(symbol, interval, manifest)
+
+    def clear(self, symbol: str, interval: str):
+        """Remove every stored bar of a series"""
+        series_dir = self._series_dir(symbol, interval)
+        if series_dir.exists():
+            for path in series_dir.iterdir():
+                path.unlink()
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame, keep_existing: bool = False) -> int:
+        """
+        Add bars to the store; a bar already stored for the same timestamp is replaced
+
+        The series manifest is updated and its stamp reset: the caller knows
+        whether the database holds the same bars (see append_bars()).
+
+        Args:
+            symbol: Stock symbol
+            interval: Interval string (as stored in historical_data.interval)
+            df: DataFrame with timestamp (column or index) and OHLCV columns
+            keep_existing: Keep bars already stored instead of replacing them
+
+        Returns:
+            Number of bars written
+        """
+        if df is None or df.empty:
+            return 0
+
+        # A bar may appear twice in one batch (chunk overlap): last one wins, as in the database
+        bars = self._normalize(df).drop_duplicates(subset=CONST_TIMESTAMP, keep='last')
+        if bars.empty:
+            return 0
+
+        manifest = self.manifest(symbol, interval)
+        added = 0
+        for day, day_bars in bars.groupby(bars[CONST_TIMESTAMP].dt.date, sort=True):
+            path = self._day_path(symbol, interval, day)
+            existing_count = 0
+            if path.exists():
+                existing = pq.read_table(path).to_pandas()
+                existing_count = len(existing)
+                day_bars = pd.concat([existing, day_bars], ignore_index=True)
+            day_bars = (day_bars.drop_duplicates(subset=CONST_TIMESTAMP, keep='first' if keep_existing else 'last')
+                        .sort_values(CONST_TIMESTAMP)
+                        .reset_index(drop=True))
+            self._write_day(path, day_bars)
+            added += len(day_bars) - existing_count
+
+        first, last = bars[CONST_TIMESTAMP].min(), bars[CONST_TIMESTAMP].max()
+        if manifest is not None:
+            first = min(first, pd.Timestamp(manifest['first']))
+            last = max(last, pd.Timestamp(manifest['last']))
+        self._write_manifest(symbol, interval, {
+            'bar_count': added + (manifest['bar_count'] if manifest else 0),
+            'first': first.isoformat(),
+            'last': last.isoformat(),
+            'stamp': None,
+        })
+
+        logger.debug(f"Bar store: {symbol} {interval} {len(bars)} bars appended")
+        return len(bars)
+
+    def _day_files(self, symbol: str, interval: str, start: Optional[pd.Timestamp],
+                   end: Optional[pd.Timestamp]) -> List[Path]:
+        series_dir = self._series_dir(symbol, interval)
+        if not series_dir.exists():
+            return []
+
+        files = []
+        for path in sorted(series_dir.glob('*.parquet')):
+            day = date.fromisoformat(path.stem)
+            if start is not None and day < start.date():
+                continue
+            if end is not None and day > end.date():
+                continue
+            files.append(path)
+        return files
+
+    def _read_table(self, symbol: str, interval: str, start: DateLike, end: DateLike,
+                    columns: Optional[Sequence[str]], limit: Optional[int] = None) -> Optional['pa.Table']:
+        start_ts = pd.Timestamp(start) if start is not None else None
+        end_ts = pd.Timestamp(end) if end is not None else None
+
+        files = self._day_files(symbol, interval, start_ts, end_ts)
+        if not files:
+            return None
+
+        read_columns = None
+        if columns is not None:
+            read_columns = [CONST_TIMESTAMP] + [c for c in columns if c != CONST_TIMESTAMP]
+
+        if limit is None:
+            tables = [pq.read_table(path, columns=read_columns) for path in files]
+        else:
+            # Most recent bars only: open day files from the newest until enough rows are in range
+            tables = []
+            in_range = 0
+            for path in reversed(files):
+                day_table = pq.read_table(path, columns=read_columns)
+                tables.insert(0, day_table)
+                day_timestamps = day_table.column(CONST_TIMESTAMP).to_numpy()
+                if end_ts is not None:
+                    in_range += int(np.searchsorted(day_timestamps, end_ts.to_datetime64(), side='right'))
+                else:
+                    in_range += len(day_timestamps)
+                if in_range >= limit:
+                    break
+        table = pa.concat_tables(tables)
+
+        # Trim the partial first/last days to the exact range
+        timestamps = table.column(CONST_TIMESTAMP).to_numpy()
+        lo = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts.to_datetime64(), side='left'))
+        hi = len(timestamps) if end_ts is None else int(np.searchsorted(timestamps, end_ts.to_datetime64(), side='right'))
+        if limit is not None:
+            lo = max(lo, hi - int(limit))
+        return table.slice(lo, max(hi - lo, 0)).combine_chunks()
+
+    def load_bars(self, symbol: str, interval: str, start: DateLike = None, end: DateLike = None,
+                  columns: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Load bars as a DataFrame indexed by timestamp
+
+        Args:
+            symbol: Stock symbol
+            interval: Interval string
+            start: First timestamp included (None = from the beginning)
+            end: Last timestamp included (None = up to the latest bar)
+            columns: Subset of open/high/low/close/volume (default: all)
+            limit: Only the most recent N bars of the range (still oldest first)
+
+        Returns:
+            DataFrame (empty if nothing is stored for the range)
+        """
+        table = self._read_table(symbol, interval, start, end, columns, limit)
+        if table is None:
+            return pd.DataFrame(columns=[c for c in (columns or BAR_COLUMNS[1:])],
+                                index=pd.DatetimeIndex([], name=CONST_TIMESTAMP))
+
+        # split_blocks keeps one block per column so Arrow buffers are reused without consolidation
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        return df.set_index(CONST_TIMESTAMP)
+
+    def load_arrays(self, symbol: str, interval: str, start: DateLike = None, end: DateLike = None,
+                    columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Load bars as NumPy arrays (read-only views on the Arrow buffers)
+
+        Returns:
+            Dict column -> array, timestamps as datetime64[ns] (empty dict if no data)
+        """
+        table = self._read_table(symbol, interval, start, end, columns)
+        if table is None:
+            return {}
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def date_range(self, symbol: str, interval: str) -> Optional[tuple]:
+        """First and last stored day for a series (None if empty)"""
+        files = self._day_files(symbol, interval, None, None)
+        if not files:
+            return None
+        return date.fromisoformat(files[0].stem), date.fromisoformat(files[-1].stem)
+
+
+_default_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> BarStore:
+    """Shared BarStore on BAR_STORE_DIR"""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store
+
+
+def series_stamp(db, ticker_id: int, interval: str) -> Optional[str]:
+    """
+    Database version of a series, to read before writing bars that will be mirrored
+
+    Returns:
+        ticker_interval_stats.updated_at as an ISO string (None if the series
+        has no bars or the store is disabled)
+    """
+    if not is_enabled():
+        return None
+    return series_version(db, ticker_id, interval)
+
+
+def _matches(manifest: Optional[Dict], stats: Optional[Dict]) -> bool:
+    """Stored series and ticker_interval_stats describe the same bars"""
+    if manifest is None or stats is None or not manifest.get('stamp') or stats['updated_at'] is None:
+        return False
+    return (
+        manifest['stamp'] == stats['updated_at'].isoformat()
+        and manifest['bar_count'] == stats['count']
+        and pd.Timestamp(manifest['first']) == pd.Timestamp(stats['first'])
+        and pd.Timestamp(manifest['last']) == pd.Timestamp(stats['last'])
+    )
+
+
+def append_bars(db, ticker_id: int, symbol: str, interval: str, df: pd.DataFrame,
+                stamp_before: Optional[str], keep_existing: bool = False) -> int:
+    """
+    Collector hook: mirror freshly saved (and committed) bars into the store when it is enabled
+
+    The stored series stays marked as current only if it matched the
+    database version read before the save (stamp_before, see series_stamp())
+    and now holds as many bars, over the same bounds, as the database. A
+    series that was empty in the database is rewritten from this batch.
+    Errors are logged, never raised, so the database write stays the source of truth.
+
+    Args:
+        db: Database session used for the save
+        ticker_id: Ticker database ID
+        symbol: Stock symbol
+        interval: Interval string
+        df: Saved bars
+        stamp_before: series_stamp() read before the save
+        keep_existing: The save kept bars already in the database
+
+    Returns:
+        Number of bars written (0 if the store is disabled)
+    """
+    if not is_enabled():
+        return 0
+    try:
+        store = get_bar_store()
+        manifest = store.manifest(symbol, interval)
+        if stamp_before is None:
+            store.clear(symbol, interval)
+            in_sync = True
+        else:
+            in_sync = manifest is not None and manifest.get('stamp') == stamp_before
+
+        written = store.append(symbol, interval, df, keep_existing=keep_existing)
+        stats = get_series_stats(db, ticker_id, interval)
+        manifest = store.manifest(symbol, interval)
+        if manifest is not None and stats is not None and stats['updated_at'] is not None:
+            candidate = dict(manifest, stamp=stats['updated_at'].isoformat())
+            if in_sync and _matches(candidate, stats):
+                store.set_stamp(symbol, interval, candidate['stamp'])
+        return written
+    except Exception as e:
+        logger.error(f"Bar store append failed for {symbol} {interval}: {e}")
+        return 0
+
+
+def _single_interval(db, ticker_id: int) -> Optional[str]:
+    intervals = db.query(TickerIntervalStats.interval).filter(
+        TickerIntervalStats.ticker_id == ticker_id,
+        TickerIntervalStats.bar_count > 0
+    ).all()
+    return intervals[0][0] if len(intervals) == 1 else None
+
+
+def load_bars(db, ticker_id: int, symbol: str, interval: Optional[str] = None, start: DateLike = None,
+              end: DateLike = None, columns: Optional[Sequence[str]] = None, limit: Optional[int] = None,
+              index: bool = False) -> pd.DataFrame:
+    """
+    Load bars from the store when it matches the database, else from historical_data
+
+    Same arguments and result as backend.data_access.load_bars_frame. The
+    check is one ticker_interval_stats lookup; interval=None is served from
+    the store only when the ticker has a single interval.
+
+    Args:
+        db: Database session
+        ticker_id: Ticker database ID
+        symbol: Stock symbol (store partition)
+        interval: Interval filter (None = all intervals)
+        start: First timestamp included (None = no lower bound)
+        end: Last timestamp included (None = no upper bound)
+        columns: Subset of open/high/low/close/volume (default: all)
+        limit: Only the most recent N bars (still returned oldest first)
+        index: Use the timestamp as index instead of a column
+
+    Returns:
+        DataFrame sorted by timestamp
+    """
+    if is_enabled():
+        try:
+            series_interval = interval if interval is not None else _single_interval(db, ticker_id)
+            if series_interval is not None:
+                store = get_bar_store()
+                stats = get_series_stats(db, ticker_id, series_interval)
+                if _matches(store.manifest(symbol, series_interval), stats):
+                    value_columns = [c for c in (columns or BAR_COLUMNS[1:]) if c != CONST_TIMESTAMP]
+                    df = store.load_bars(symbol, series_interval, start, end, value_columns, limit)
+                    df = df.astype({c: np.int64 if c == CONST_VOLUME else np.float64 for c in value_columns})
+                    return df if index else df.reset_index()
+        except Exception as e:
+            logger.error(f"Bar store read failed for {symbol} {interval}: {e}")
+
+    return load_bars_frame(db, ticker_id, interval, start, end, columns=columns, limit=limit, index=index)
+
+
+def backfill_from_database(symbol: Optional[str] = None, interval: Optional[str] = None,
+                           store: Optional[BarStore] = None) -> Dict[str, int]:
+    """
+    Copy historical_data rows into the bar store
+
+    Each series is rewritten and stamped with the database version read
+    before its rows, so load_bars() uses it until the next database write.
+
+    Args:
+        symbol: Only this ticker (default: all)
+        interval: Only this interval (default: all)
+        store: Target store (default: shared store)
+
+    Returns:
+        Dict "SYMBOL interval" -> number of bars written
+    """
+    from sqlalchemy import text
+    from backend.models import SessionLocal
+
+    store = store or get_bar_store()
+    written = {}
+    db = SessionLocal()
+    try:
+        series_sql = (
+            "SELECT DISTINCT t.symbol, h.ticker_id, h.interval FROM historical_data h "
+            "JOIN tickers t ON t.id = h.ticker_id WHERE 1 = 1"
+        )
+        params = {}
+        if symbol:
+            series_sql += " AND t.symbol = :symbol"
+            params['symbol'] = symbol
+        if interval:
+            series_sql += " AND h.interval = :interval"
+            params['interval'] = interval
+
+        for series_symbol, ticker_id, series_interval in db.execute(text(series_sql), params).fetchall():
+            stats = get_series_stats(db, ticker_id, series_interval)
+            rows = db.execute(text(
+                "SELECT timestamp, open, high, low, close, volume FROM historical_data "
+                "WHERE ticker_id = :ticker_id AND interval = :interval ORDER BY timestamp"
+            ), {'ticker_id': ticker_id, 'interval': series_interval}).fetchall()
+
+            df = pd.DataFrame.from_records(rows, columns=BAR_COLUMNS)
+            store.clear(series_symbol, series_interval)
+            count = store.append(series_symbol, series_interval, df)
+            if stats and stats['updated_at']:
+                store.set_stamp(series_symbol, series_interval, stats['updated_at'].isoformat())
+            written[f"{series_symbol} {series_interval}"] = count
+            logger.info(f"Bar store backfill: {series_symbol} {series_interval} -> {count} bars")
+    finally:
+        db.close()
+
+    return written
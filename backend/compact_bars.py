@@ -0,0 +1,246 @@
+"""
+Compact SQLite layout for bar data
+
+Older databases store each historical_data bar with 11 indicator columns that
+stay NULL and five indexes. slim_historical_data() (scripts/migrate_compact_bars.py)
+rebuilds the table with the bar columns and the two indexes of the
+HistoricalData model, and moves the indicator values that were set to
+compact_bar_indicators:
+- WITHOUT ROWID table clustered on PRIMARY KEY (ticker_id, interval_id, ts);
+- ts is an integer epoch (seconds) of the naive Paris wall-clock time, the
+  same convention as historical_data (no timezone conversion);
+- interval_id is a small integer from the bar_intervals lookup table.
+
+compact_bars applies the same layout to the bars themselves. The application
+keeps reading and writing historical_data; compact_bars is the candidate
+layout measured by scripts/benchmark_compact_storage.py.
+"""
+from datetime import date, datetime
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from backend.config import logger
+from backend.constants import (
+    CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME
+)
+from backend.data_access import migrate_unique_bar_index, prepare_bars, UPSERT_CHUNK_SIZE
+from backend.models import HistoricalData
+
+INDICATOR_COLUMNS = [
+    'sma_20', 'sma_50', 'ema_12', 'ema_26', 'rsi_14', 'macd', 'macd_signal', 'macd_hist',
+    'bb_upper', 'bb_middle', 'bb_lower',
+]
+
+# Codes of the usual intervals; other intervals get the next free code
+DEFAULT_INTERVALS = ['1s', '5s', '10s', '30s', '1min', '5min', '15min', '30min', '1h', '1day', '1week']
+
+_INDICATOR_SCHEMA_SQL = [
+    "CREATE TABLE IF NOT EXISTS bar_intervals ("
+    "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS compact_bar_indicators ("
+    "ticker_id INTEGER NOT NULL, interval_id INTEGER NOT NULL, ts INTEGER NOT NULL, "
+    + ", ".join(f"{name} REAL" for name in INDICATOR_COLUMNS) + ", "
+    "PRIMARY KEY (ticker_id, interval_id, ts)) WITHOUT ROWID",
+]
+
+_BARS_SCHEMA_SQL = (
+    "CREATE TABLE IF NOT EXISTS compact_bars ("
+    "ticker_id INTEGER NOT NULL, interval_id INTEGER NOT NULL, ts INTEGER NOT NULL, "
+    "open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL, "
+    "volume INTEGER NOT NULL, "
+    "PRIMARY KEY (ticker_id, interval_id, ts)) WITHOUT ROWID"
+)
+
+_UPSERT_SQL = (
+    "INSERT INTO compact_bars (ticker_id, interval_id, ts, open, high, low, close, volume) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (ticker_id, interval_id, ts) DO UPDATE SET "
+    "open = excluded.open, high = excluded.high, low = excluded.low, "
+    "close = excluded.close, volume = excluded.volume"
+)
+
+# strftime('%s') reads the stored ISO text as UTC: the wall-clock time becomes the epoch, like to_epoch()
+_MOVE_INDICATORS_SQL = (
+    "INSERT OR REPLACE INTO compact_bar_indicators (ticker_id, interval_id, ts, {columns}) "
+    "SELECT h.ticker_id, i.id, CAST(strftime('%s', h.timestamp) AS INTEGER), {selected} "
+    "FROM historical_data h JOIN bar_intervals i ON i.name = h.interval "
+    "WHERE COALESCE({selected}, NULL) IS NOT NULL ORDER BY h.id"
+)
+
+Bound = Union[str, date, datetime, pd.Timestamp, None]
+
+
+def create_compact_schema(db: Session, bars: bool = True):
+    """Create the compact tables (idempotent) and the default interval codes"""
+    for statement in _INDICATOR_SCHEMA_SQL + ([_BARS_SCHEMA_SQL] if bars else []):
+        db.execute(text(statement))
+    db.execute(
+        text("INSERT OR IGNORE INTO bar_intervals (name) VALUES (:name)"),
+        [{'name': name} for name in DEFAULT_INTERVALS]
+    )
+    db.commit()
+
+
+def interval_codes(db: Session) -> Dict[str, int]:
+    """Interval name -> code"""
+    return {name: code for code, name in db.execute(text("SELECT id, name FROM bar_intervals"))}
+
+
+def interval_code(db: Session, interval: str) -> int:
+    """Code of an interval, registered on first use (no commit)"""
+    db.execute(text("INSERT OR IGNORE INTO bar_intervals (name) VALUES (:name)"), {'name': interval})
+    return db.execute(text("SELECT id FROM bar_intervals WHERE name = :name"), {'name': interval}).scalar()
+
+
+def to_epoch(values) -> np.ndarray:
+    """Naive (wall-clock) timestamps to integer epoch seconds"""
+    stamps = pd.to_datetime(pd.Series(values))
+    if getattr(stamps.dt, 'tz', None) is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def from_epoch(values) -> np.ndarray:
+    """Integer epoch seconds to naive datetime64[ns]"""
+    return np.asarray(values, dtype=np.int64).astype('datetime64[s]').astype('datetime64[ns]')
+
+
+def write_compact_bars(db: Session, ticker_id: int, interval: str, df: pd.DataFrame,
+                       chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    Insert or update bars (one executemany per chunk, committed per chunk)
+
+    Args:
+        db: Database session
+        ticker_id: Ticker database ID
+        interval: Interval string
+        df: DataFrame with timestamp/open/high/low/close/volume columns
+
+    Returns:
+        Number of valid rows written
+    """
+    clean, errors = prepare_bars(df)
+    if errors:
+        logger.warning(f"{len(errors)} invalid bars skipped: {errors[:3]}")
+    code = interval_code(db, interval)
+    ts = to_epoch(clean[CONST_TIMESTAMP])
+    n = len(clean)
+    params = list(zip(
+        [ticker_id] * n,
+        [code] * n,
+        ts.tolist(),
+        clean[CONST_OPEN].tolist(),
+        clean[CONST_HIGH].tolist(),
+        clean[CONST_LOW].tolist(),
+        clean[CONST_CLOSE].tolist(),
+        clean[CONST_VOLUME].tolist(),
+    ))
+    for start in range(0, n, chunk_size):
+        db.connection().exec_driver_sql(_UPSERT_SQL, params[start:start + chunk_size])
+        db.commit()
+    return n
+
+
+def load_compact_frame(db: Session, ticker_id: int, interval: str, start: Bound = None, end: Bound = None,
+                       index: bool = False) -> pd.DataFrame:
+    """
+    Bars of one series between start and end (inclusive), same layout as load_bars_frame()
+
+    Returns:
+        DataFrame sorted by timestamp with timestamp/open/high/low/close/volume
+    """
+    sql = ("SELECT ts, open, high, low, close, volume FROM compact_bars "
+           "WHERE ticker_id = ? AND interval_id = (SELECT id FROM bar_intervals WHERE name = ?)")
+    params = [ticker_id, interval]
+    if start is not None:
+        sql += " AND ts >= ?"
+        params.append(int(to_epoch([pd.Timestamp(start)])[0]))
+    if end is not None:
+        sql += " AND ts <= ?"
+        params.append(int(to_epoch([pd.Timestamp(end)])[0]))
+    sql += " ORDER BY ts"
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(sql, tuple(params))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    values = list(zip(*rows)) if rows else [()] * 6
+    df = pd.DataFrame({
+        CONST_TIMESTAMP: from_epoch(values[0]),
+        CONST_OPEN: np.array(values[1], dtype=np.float64),
+        CONST_HIGH: np.array(values[2], dtype=np.float64),
+        CONST_LOW: np.array(values[3], dtype=np.float64),
+        CONST_CLOSE: np.array(values[4], dtype=np.float64),
+        CONST_VOLUME: np.array(values[5], dtype=np.int64),
+    })
+    if index:
+        df = df.set_index(CONST_TIMESTAMP)
+    return df
+
+
+def slim_historical_data(db: Session) -> Dict[str, int]:
+    """
+    Rebuild historical_data with the columns and indexes of the HistoricalData model
+
+    Indicator values that were set are moved to compact_bar_indicators first.
+    The table is then renamed, recreated from the model and refilled with one
+    INSERT ... SELECT (ids are kept), all in one transaction. On a table that
+    already has the model's columns only the extra indexes are dropped, so the
+    migration can be re-run. Duplicate bars are removed beforehand
+    (migrate_unique_bar_index). The file only shrinks after a VACUUM.
+
+    Returns:
+        Dict with 'indicator_rows' moved, 'columns_dropped' and 'indexes_dropped'
+    """
+    migrate_unique_bar_index(db)
+
+    bind = db.get_bind()
+    columns = [column['name'] for column in inspect(bind).get_columns('historical_data')]
+    model_columns = [column.name for column in HistoricalData.__table__.columns]
+    model_indexes = {index.name for index in HistoricalData.__table__.indexes}
+    extra_columns = [name for name in columns if name not in model_columns]
+    extra_indexes = [index['name'] for index in inspect(bind).get_indexes('historical_data')
+                     if index['name'] not in model_indexes]
+
+    indicator_rows = 0
+    stored = [name for name in INDICATOR_COLUMNS if name in extra_columns]
+    if stored:
+        create_compact_schema(db, bars=False)
+        db.execute(text(
+            "INSERT OR IGNORE INTO bar_intervals (name) "
+            "SELECT DISTINCT interval FROM historical_data WHERE interval IS NOT NULL"
+        ))
+        selected = ", ".join(f"h.{name}" for name in stored)
+        indicator_rows = db.execute(text(
+            _MOVE_INDICATORS_SQL.format(columns=", ".join(stored), selected=selected)
+        )).rowcount
+
+    for name in extra_indexes:
+        db.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    if extra_columns:
+        logger.info(f"Rebuilding historical_data without {len(extra_columns)} columns...")
+        kept = ", ".join(model_columns)
+        for index in HistoricalData.__table__.indexes:
+            db.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+        db.execute(text("ALTER TABLE historical_data RENAME TO historical_data_legacy"))
+        HistoricalData.__table__.create(bind=db.connection())
+        db.execute(text(
+            f"INSERT INTO historical_data ({kept}) SELECT {kept} FROM historical_data_legacy ORDER BY id"
+        ))
+        db.execute(text("DROP TABLE historical_data_legacy"))
+
+    db.commit()
+    logger.info(
+        f"historical_data slimmed: {len(extra_columns)} columns and {len(extra_indexes)} indexes dropped, "
+        f"{indicator_rows} indicator rows moved"
+    )
+    return {'indicator_rows': indicator_rows, 'columns_dropped': len(extra_columns),
+            'indexes_dropped': len(extra_indexes)}
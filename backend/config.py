@@ -14,6 +14,8 @@ BASE_DIR = Path(__file__).parent.parent
 LOGS_DIR = BASE_DIR / "logs"
 DATA_DIR = BASE_DIR / "data"
 MODELS_DIR = BASE_DIR / "ml_models" / "trained"
+BAR_STORE_DIR = Path(os.getenv("BAR_STORE_DIR", DATA_DIR / "bars"))
+BAR_ARCHIVE_DIR = Path(os.getenv("BAR_ARCHIVE_DIR", DATA_DIR / "archive"))
 
 # Create directories if they don't exist
 LOGS_DIR.mkdir(exist_ok=True)
@@ -29,6 +31,17 @@ IBKR_CONFIG = {
     "port": int(os.getenv("IBKR_PORT", 7497)),
     "client_id": int(os.getenv("IBKR_CLIENT_ID", 1)),
     "account": os.getenv("IBKR_ACCOUNT", ""),
+    # Qualified contracts are reused this long before being re-qualified
+    "contract_cache_ttl_days": int(os.getenv("IBKR_CONTRACT_CACHE_TTL_DAYS", 7)),
+    # Shared live-data connection (backend/live_data_service.py), one per process:
+    # TWS rejects a second connection with the same clientId, so each role has its own
+    "live_client_id": int(os.getenv("IBKR_LIVE_CLIENT_ID", 202)),  # Streamlit app, scripts
+    "worker_live_client_id": int(os.getenv("IBKR_WORKER_LIVE_CLIENT_ID", 210)),  # Celery worker, + pool process index
+    # LivePriceCollector 'poll' mode connection (backend/live_price_thread.py)
+    "live_price_client_id": int(os.getenv("IBKR_LIVE_PRICE_CLIENT_ID", 201)),
+    # Account limits: simultaneous market-data lines and real-time bar subscriptions
+    "market_data_lines": int(os.getenv("IBKR_MARKET_DATA_LINES", 100)),
+    "max_realtime_bars": int(os.getenv("IBKR_MAX_REALTIME_BARS", 50)),
 }
 
 # Trading Configuration
@@ -43,6 +56,10 @@ TRADING_CONFIG = {
 DATA_CONFIG = {
     "default_interval": os.getenv("DEFAULT_INTERVAL", "1min"),
     "retention_days": int(os.getenv("DATA_RETENTION_DAYS", 365)),
+    # Mirror collected bars into the Parquet store (backend/bar_store.py)
+    "bar_store_enabled": os.getenv("BAR_STORE_ENABLED", "False").lower() == "true",
+    # Write bars removed by the retention policy to BAR_ARCHIVE_DIR (backend/bar_retention.py)
+    "archive_enabled": os.getenv("BAR_ARCHIVE_ENABLED", "True").lower() == "true",
 }
 
 # ML Configuration
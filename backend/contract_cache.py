@@ -0,0 +1,209 @@
+"""
+Qualified IBKR contract cache
+
+IBKRCollector.get_contract may try several exchange/currency combinations
+(with retries) before IBKR qualifies a symbol. The result - conId, routing
+and primary exchange - hardly ever changes, so it is kept in memory and in
+the contract_cache table, and reused until it is older than the TTL
+(IBKR_CONFIG['contract_cache_ttl_days']). Stale entries are re-qualified,
+and still used if IBKR cannot be reached.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.config import logger, IBKR_CONFIG
+from backend.models import SessionLocal, QualifiedContract
+
+try:
+    from ib_insync import Stock
+    IBKR_AVAILABLE = True
+except ImportError:
+    IBKR_AVAILABLE = False
+
+
+def cache_key(symbol: str, exchange: Optional[str] = 'SMART', currency: Optional[str] = None) -> Tuple[str, str, str]:
+    """Lookup key for a get_contract() request (currency '' = auto-detect)"""
+    return (symbol or '').upper(), (exchange or 'SMART').upper(), (currency or '').upper()
+
+
+class ContractCache:
+    """
+    Process-wide contract resolution cache backed by the contract_cache table
+
+    Entries are dicts with the QualifiedContract columns. The table is loaded
+    once, on first use; database errors are logged and never propagated (the
+    collector then simply qualifies again).
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal, ttl: Optional[timedelta] = None):
+        """
+        Args:
+            session_factory: Session factory (injectable for tests)
+            ttl: Age after which an entry is re-qualified
+        """
+        self.session_factory = session_factory
+        self.ttl = ttl if ttl is not None else timedelta(days=IBKR_CONFIG.get('contract_cache_ttl_days', 7))
+        self._entries: Dict[Tuple[str, str, str], Dict] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        db = self.session_factory()
+        try:
+            QualifiedContract.__table__.create(bind=db.get_bind(), checkfirst=True)
+            for row in db.query(QualifiedContract).all():
+                self._entries[(row.symbol, row.request_exchange, row.request_currency)] = self._row_to_entry(row)
+            logger.debug(f"Contract cache loaded: {len(self._entries)} contract(s)")
+        except SQLAlchemyError as e:
+            logger.warning(f"⚠️ Contract cache unavailable, using memory only: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _row_to_entry(row: QualifiedContract) -> Dict:
+        return {
+            'symbol': row.symbol,
+            'isin': row.isin,
+            'con_id': row.con_id,
+            'exchange': row.exchange,
+            'primary_exchange': row.primary_exchange,
+            'currency': row.currency,
+            'local_symbol': row.local_symbol,
+            'qualified_at': row.qualified_at,
+        }
+
+    def is_fresh(self, entry: Dict, now: Optional[datetime] = None) -> bool:
+        """True if the entry is younger than the TTL"""
+        now = now or datetime.now()
+        return now - entry['qualified_at'] < self.ttl
+
+    def lookup(self, symbol: str, exchange: Optional[str] = 'SMART', currency: Optional[str] = None,
+               isin: Optional[str] = None) -> Optional[Dict]:
+        """
+        Cached entry for a request (fresh or stale), or None
+
+        Falls back to an entry with the same ISIN when the exact request is unknown.
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(cache_key(symbol, exchange, currency))
+            if entry is None and isin:
+                entry = next((e for e in self._entries.values() if e['isin'] == isin), None)
+            return entry
+
+    def store(self, symbol: str, exchange: Optional[str], currency: Optional[str], contract,
+              isin: Optional[str] = None) -> Optional[Dict]:
+        """
+        Remember a qualified contract
+
+        Contracts without a conId (not qualified) are ignored.
+
+        Returns:
+            The cached entry, or None if the contract was not cacheable
+        """
+        con_id = getattr(contract, 'conId', 0)
+        if not isinstance(con_id, int) or con_id <= 0:
+            return None
+
+        key = cache_key(symbol, exchange, currency)
+        entry = {
+            'symbol': contract.symbol,
+            'isin': isin,
+            'con_id': con_id,
+            'exchange': getattr(contract, 'exchange', '') or 'SMART',
+            'primary_exchange': getattr(contract, 'primaryExchange', '') or '',
+            'currency': getattr(contract, 'currency', '') or '',
+            'local_symbol': getattr(contract, 'localSymbol', '') or '',
+            'qualified_at': datetime.now(),
+        }
+
+        with self._lock:
+            self._load()
+            self._entries[key] = entry
+            self._persist(key, entry)
+        return entry
+
+    def _persist(self, key: Tuple[str, str, str], entry: Dict):
+        db = self.session_factory()
+        try:
+            row = db.query(QualifiedContract).filter(
+                QualifiedContract.symbol == key[0],
+                QualifiedContract.request_exchange == key[1],
+                QualifiedContract.request_currency == key[2]
+            ).first()
+            if row is None:
+                row = QualifiedContract(symbol=key[0], request_exchange=key[1], request_currency=key[2])
+                db.add(row)
+            row.isin = entry['isin']
+            row.con_id = entry['con_id']
+            row.exchange = entry['exchange']
+            row.primary_exchange = entry['primary_exchange']
+            row.currency = entry['currency']
+            row.local_symbol = entry['local_symbol']
+            row.qualified_at = entry['qualified_at']
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"⚠️ Could not persist contract cache entry for {key[0]}: {e}")
+        finally:
+            db.close()
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Forget cached contracts (all, or every request for one symbol)"""
+        with self._lock:
+            self._load()
+            keys = [k for k in self._entries if symbol is None or k[0] == symbol.upper()]
+            for key in keys:
+                del self._entries[key]
+
+            db = self.session_factory()
+            try:
+                query = db.query(QualifiedContract)
+                if symbol is not None:
+                    query = query.filter(QualifiedContract.symbol == symbol.upper())
+                query.delete(synchronize_session=False)
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.warning(f"⚠️ Could not clear contract cache: {e}")
+            finally:
+                db.close()
+
+    @staticmethod
+    def to_contract(entry: Dict):
+        """Build a ready-to-use (qualified) Stock contract from a cache entry"""
+        if not IBKR_AVAILABLE:
+            raise ImportError("ib_insync library not installed")
+        return Stock(
+            entry['symbol'], entry['exchange'], entry['currency'],
+            conId=entry['con_id'],
+            primaryExchange=entry['primary_exchange'],
+            localSymbol=entry['local_symbol']
+        )
+
+    def cached_contract(self, symbol: str, exchange: Optional[str] = 'SMART',
+                        currency: Optional[str] = None):
+        """
+        Cached contract without any IBKR round-trip (stale entries included)
+
+        Returns:
+            Stock contract or None if the symbol was never qualified
+        """
+        entry = self.lookup(symbol, exchange, currency)
+        if entry is None and currency:
+            # Auto-detected entry in the requested currency will do
+            auto = self.lookup(symbol, exchange, None)
+            if auto and auto['currency'] == currency.upper():
+                entry = auto
+        if entry is None or not IBKR_AVAILABLE:
+            return None
+        return self.to_contract(entry)
+
+
+contract_cache = ContractCache()
@@ -0,0 +1,671 @@
+"""
+Fast data access for the historical_data table
+Bulk writes go through single SQL statements instead of the ORM unit of work,
+reads build DataFrames straight from cursor tuples instead of ORM objects
+"""
+import weakref
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from backend.config import logger
+from backend.models import TickerIntervalStats
+from backend.constants import (
+    CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME
+)
+
+BAR_COLUMNS = [CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME]
+PRICE_COLUMNS = [CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE]
+
+# Rows per INSERT ... ON CONFLICT batch (one SELECT + one executemany per batch)
+UPSERT_CHUNK_SIZE = 50000
+
+# Name shared with database/schema.sql (PostgreSQL)
+UNIQUE_BAR_INDEX = "idx_unique_historical_data"
+
+# Same layout as SQLAlchemy's SQLite DateTime storage, so ORM and bulk rows compare equal
+SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+_SELECT_EXISTING_SQL = text(
+    "SELECT timestamp, open, high, low, close, volume FROM historical_data "
+    "WHERE ticker_id = :ticker_id AND interval = :interval "
+    "AND timestamp >= :start AND timestamp <= :end"
+)
+
+# Positional (qmark) statement, sent straight to the sqlite3 driver's executemany
+_UPSERT_SQL = (
+    "INSERT INTO historical_data "
+    "(ticker_id, interval, timestamp, open, high, low, close, volume, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (ticker_id, interval, timestamp) DO UPDATE SET "
+    "open = excluded.open, high = excluded.high, low = excluded.low, "
+    "close = excluded.close, volume = excluded.volume"
+)
+
+# Insert-only variant: bars already stored are left untouched
+_INSERT_NEW_SQL = (
+    "INSERT INTO historical_data "
+    "(ticker_id, interval, timestamp, open, high, low, close, volume, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (ticker_id, interval, timestamp) DO NOTHING"
+)
+
+# Older duplicates of a bar (the last written row, highest id, is kept)
+_DELETE_DUPLICATES_SQL = text(
+    "DELETE FROM historical_data WHERE id NOT IN ("
+    "SELECT MAX(id) FROM historical_data GROUP BY ticker_id, interval, timestamp)"
+)
+
+# Same columns as the unique index, superseded by it
+_REDUNDANT_BAR_INDEX = "idx_ticker_interval_timestamp"
+
+# Callbacks run after bars are written or deleted (read caches, e.g. the Streamlit data cache)
+_change_listeners: List[Callable[[Optional[int], Optional[str]], None]] = []
+
+
+def add_bars_listener(callback: Callable[[Optional[int], Optional[str]], None]):
+    """
+    Register a callback(ticker_id, interval) called after historical_data changes
+
+    ticker_id / interval are None when the change is not limited to one series.
+    Registering the same callback twice has no effect.
+    """
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
+
+
+def remove_bars_listener(callback: Callable[[Optional[int], Optional[str]], None]):
+    """Unregister a callback (unknown callbacks are ignored)"""
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+
+def notify_bars_changed(ticker_id: Optional[int] = None, interval: Optional[str] = None):
+    """Tell the registered listeners that bars were written or deleted (writers call this after commit)"""
+    for callback in list(_change_listeners):
+        try:
+            callback(ticker_id, interval)
+        except Exception as e:
+            logger.error(f"Bars change listener failed: {e}")
+
+
+# Databases whose ticker_interval_stats is known to exist and be filled (see _prepare_interval_stats)
+_stats_ready: "weakref.WeakSet" = weakref.WeakSet()
+
+_STATS_ADD_SQL = text(
+    "INSERT INTO ticker_interval_stats "
+    "(ticker_id, interval, bar_count, first_timestamp, last_timestamp, updated_at) "
+    "VALUES (:ticker_id, :interval, :count, :first, :last, :now) "
+    "ON CONFLICT (ticker_id, interval) DO UPDATE SET "
+    "bar_count = bar_count + excluded.bar_count, "
+    "first_timestamp = MIN(COALESCE(first_timestamp, excluded.first_timestamp), excluded.first_timestamp), "
+    "last_timestamp = MAX(COALESCE(last_timestamp, excluded.last_timestamp), excluded.last_timestamp), "
+    "updated_at = excluded.updated_at"
+)
+
+_STATS_TOUCH_SQL = text(
+    "UPDATE ticker_interval_stats SET updated_at = :now "
+    "WHERE ticker_id = :ticker_id AND interval = :interval"
+)
+
+_STATS_SERIES_SQL = text(
+    "SELECT bar_count, first_timestamp, last_timestamp, updated_at FROM ticker_interval_stats "
+    "WHERE ticker_id = :ticker_id AND interval = :interval"
+)
+
+def ensure_unique_bar_index(db: Session) -> bool:
+    """
+    Make sure the (ticker_id, interval, timestamp) unique index exists
+
+    ON CONFLICT needs a unique index to target. Creating it fails when the
+    table already contains duplicate bars; callers must then fall back to
+    the row-by-row path. IF NOT EXISTS makes the call a no-op once the
+    index is in place.
+
+    Returns:
+        True if the index exists (or was created)
+    """
+    try:
+        db.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_BAR_INDEX} "
+            "ON historical_data (ticker_id, interval, timestamp)"
+        ))
+        db.commit()
+    except (IntegrityError, OperationalError) as e:
+        db.rollback()
+        logger.warning(f"Cannot create unique index on historical_data (duplicate bars?): {e}")
+        return False
+
+    return True
+
+
+def migrate_unique_bar_index(db: Session) -> Dict[str, int]:
+    """
+    Remove duplicate bars in bulk and build the unique bar index (idempotent)
+
+    Databases created before the HistoricalData model declared the index
+    may hold duplicates, which prevent its creation. They are removed with
+    one DELETE (the most recently written row of each bar is kept), the
+    summary table is rebuilt, then the index is created and the redundant
+    non-unique (ticker_id, interval, timestamp) index is dropped.
+
+    Returns:
+        Dict with 'duplicates_removed' and 'index_created' (0 or 1)
+    """
+    indexes = inspect(db.get_bind()).get_indexes('historical_data')
+    if any(index['name'] == UNIQUE_BAR_INDEX for index in indexes):
+        return {'duplicates_removed': 0, 'index_created': 0}
+
+    logger.info("Removing duplicate bars before creating the unique bar index...")
+    removed = db.execute(_DELETE_DUPLICATES_SQL).rowcount or 0
+    if removed:
+        refresh_interval_stats(db)
+    db.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_BAR_INDEX} "
+        "ON historical_data (ticker_id, interval, timestamp)"
+    ))
+    db.execute(text(f"DROP INDEX IF EXISTS {_REDUNDANT_BAR_INDEX}"))
+    db.commit()
+    if removed:
+        notify_bars_changed()
+
+    logger.info(f"✅ Unique bar index created ({removed} duplicate bars removed)")
+    return {'duplicates_removed': removed, 'index_created': 1}
+
+
+def format_sqlite_timestamps(timestamps: pd.Series) -> np.ndarray:
+    """
+    Format timestamps the way SQLAlchemy stores DateTime in SQLite
+
+    Timezone-aware values keep their wall-clock time, like the ORM does.
+    """
+    ts = pd.to_datetime(timestamps)
+    if getattr(ts.dt, 'tz', None) is not None:
+        ts = ts.dt.tz_localize(None)
+    iso = np.datetime_as_string(ts.values.astype('datetime64[us]'), unit='us')
+    return np.char.replace(iso, 'T', ' ')
+
+
+def prepare_bars(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Validate and normalize an OHLCV DataFrame for bulk writes
+
+    Args:
+        df: DataFrame with timestamp/open/high/low/close/volume columns
+
+    Returns:
+        Tuple (clean DataFrame with a string 'ts' column, list of row errors)
+    """
+    clean = pd.DataFrame({
+        CONST_TIMESTAMP: pd.to_datetime(df[CONST_TIMESTAMP], errors='coerce'),
+        **{col: pd.to_numeric(df[col], errors='coerce').astype('float64') for col in PRICE_COLUMNS},
+        CONST_VOLUME: pd.to_numeric(df[CONST_VOLUME], errors='coerce'),
+    })
+    clean.index = np.arange(len(clean))
+
+    invalid = clean.isna().any(axis=1).to_numpy()
+    errors = [f"Row {idx}: Invalid data types" for idx in np.flatnonzero(invalid)]
+    if invalid.any():
+        clean = clean[~invalid]
+
+    clean[CONST_VOLUME] = clean[CONST_VOLUME].astype('int64')
+    clean['ts'] = format_sqlite_timestamps(clean[CONST_TIMESTAMP])
+    return clean, errors
+
+
+def _classify_chunk(db: Session, chunk: pd.DataFrame, ticker_id: int, interval: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split a chunk into new / changed / identical rows with a single range SELECT
+
+    Returns:
+        Tuple (is_new mask, is_changed mask)
+    """
+    existing_rows = db.execute(_SELECT_EXISTING_SQL, {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'start': chunk['ts'].iat[0],
+        'end': chunk['ts'].iat[-1],
+    }).fetchall()
+
+    if not existing_rows:
+        return np.ones(len(chunk), dtype=bool), np.zeros(len(chunk), dtype=bool)
+
+    existing = pd.DataFrame.from_records(existing_rows, columns=['ts'] + PRICE_COLUMNS + [CONST_VOLUME])
+    existing = existing.drop_duplicates(subset='ts', keep='last').set_index('ts')
+    matched = existing.reindex(chunk['ts'].to_numpy())
+
+    is_new = matched[CONST_OPEN].isna().to_numpy()
+    same = np.ones(len(chunk), dtype=bool)
+    for col in PRICE_COLUMNS + [CONST_VOLUME]:
+        same &= chunk[col].to_numpy() == matched[col].to_numpy()
+    return is_new, ~is_new & ~same
+
+
+def _bar_params(rows: pd.DataFrame, ticker_id: int, interval: str, created_at: str) -> List[tuple]:
+    """Positional parameters of _UPSERT_SQL / _INSERT_NEW_SQL for prepared rows"""
+    n = len(rows)
+    return list(zip(
+        [ticker_id] * n,
+        [interval] * n,
+        rows['ts'].tolist(),
+        rows[CONST_OPEN].tolist(),
+        rows[CONST_HIGH].tolist(),
+        rows[CONST_LOW].tolist(),
+        rows[CONST_CLOSE].tolist(),
+        rows[CONST_VOLUME].tolist(),
+        [created_at] * n,
+    ))
+
+
+def upsert_bars(
+    db: Session,
+    ticker_id: int,
+    interval: str,
+    df: pd.DataFrame,
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    keep_existing: bool = False
+) -> Dict[str, any]:
+    """
+    Insert or update bars with INSERT ... ON CONFLICT DO UPDATE
+
+    Requires the unique (ticker_id, interval, timestamp) index, see
+    ensure_unique_bar_index(). Identical bars are counted but not rewritten.
+    With keep_existing, each chunk is a single INSERT ... ON CONFLICT DO
+    NOTHING statement (no lookup of the stored bars).
+
+    Args:
+        db: Database session (committed after each chunk)
+        ticker_id: Ticker database ID
+        interval: Interval string stored in historical_data.interval
+        df: DataFrame with timestamp/open/high/low/close/volume columns
+        chunk_size: Rows per statement batch
+        progress_callback: Optional callback(processed_rows, total_rows)
+        keep_existing: Only insert new bars, existing ones are counted as skipped
+
+    Returns:
+        Dict with 'new_records', 'updated_records', 'skipped_records' and 'errors'
+    """
+    total_rows = len(df)
+    clean, errors = prepare_bars(df)
+
+    # A bar may appear twice in one download (chunk overlap): last one wins
+    duplicates = clean.duplicated(subset='ts', keep='last')
+    skipped_records = int(duplicates.sum())
+    clean = clean[~duplicates.to_numpy()].sort_values('ts', kind='stable')
+
+    new_records = 0
+    updated_records = 0
+    created_at = datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT)
+
+    for start in range(0, len(clean), chunk_size):
+        chunk = clean.iloc[start:start + chunk_size]
+        if keep_existing:
+            inserted = db.connection().exec_driver_sql(
+                _INSERT_NEW_SQL, _bar_params(chunk, ticker_id, interval, created_at)
+            ).rowcount
+            n_new, n_changed = max(inserted, 0), 0
+        else:
+            is_new, is_changed = _classify_chunk(db, chunk, ticker_id, interval)
+            to_write = chunk[is_new | is_changed]
+            if not to_write.empty:
+                db.connection().exec_driver_sql(_UPSERT_SQL, _bar_params(to_write, ticker_id, interval, created_at))
+            n_new, n_changed = int(is_new.sum()), int(is_changed.sum())
+        if n_new:
+            record_bars_added(db, ticker_id, interval, n_new, chunk['ts'].iat[0], chunk['ts'].iat[-1])
+        elif n_changed:
+            record_bars_updated(db, ticker_id, interval)
+        db.commit()
+
+        new_records += n_new
+        updated_records += n_changed
+        skipped_records += len(chunk) - n_new - n_changed
+
+        if progress_callback:
+            progress_callback(min(start + chunk_size, len(clean)), len(clean))
+
+        logger.info(f"Upserted {start + len(chunk)}/{total_rows} bars ({new_records} new, {updated_records} updated)")
+
+    if new_records or updated_records:
+        notify_bars_changed(ticker_id, interval)
+
+    return {
+        'new_records': new_records,
+        'updated_records': updated_records,
+        'skipped_records': skipped_records,
+        'errors': errors,
+    }
+
+
+def merge_price(db: Session, ticker_id: int, interval: str, timestamp: datetime, price: float) -> bool:
+    """
+    Fold one traded price into its bar (no commit)
+
+    A new bar is inserted with open = high = low = close = price; an
+    existing one gets its high/low widened and its close replaced. One
+    statement when the bar is new, two otherwise, never a SELECT.
+
+    Returns:
+        True if the bar was created
+    """
+    params = {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'timestamp': to_sqlite_timestamp(timestamp),
+        'price': price,
+        'now': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT),
+    }
+    inserted = db.execute(text(
+        "INSERT INTO historical_data "
+        "(ticker_id, interval, timestamp, open, high, low, close, volume, created_at) "
+        "VALUES (:ticker_id, :interval, :timestamp, :price, :price, :price, :price, 0, :now) "
+        "ON CONFLICT (ticker_id, interval, timestamp) DO NOTHING"
+    ), params).rowcount
+    if inserted:
+        record_bars_added(db, ticker_id, interval, 1, timestamp, timestamp)
+        return True
+
+    db.execute(text(
+        "UPDATE historical_data SET high = MAX(high, :price), low = MIN(low, :price), close = :price "
+        "WHERE ticker_id = :ticker_id AND interval = :interval AND timestamp = :timestamp"
+    ), params)
+    record_bars_updated(db, ticker_id, interval)
+    return False
+
+
+def merge_bar(db: Session, ticker_id: int, interval: str, bar: Dict) -> bool:
+    """
+    Fold a partial bar (the events since the last write) into the stored one (no commit)
+
+    A new bar is inserted as is; an existing one keeps its open, gets its
+    high/low widened, its close replaced and the volume added, so late
+    updates of a minute never overwrite what an earlier write stored.
+
+    Args:
+        bar: Dict with timestamp/open/high/low/close/volume
+
+    Returns:
+        True if the bar was created
+    """
+    params = {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'timestamp': to_sqlite_timestamp(bar[CONST_TIMESTAMP]),
+        'open': bar[CONST_OPEN],
+        'high': bar[CONST_HIGH],
+        'low': bar[CONST_LOW],
+        'close': bar[CONST_CLOSE],
+        'volume': int(bar[CONST_VOLUME]),
+        'now': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT),
+    }
+    inserted = db.execute(text(
+        "INSERT INTO historical_data "
+        "(ticker_id, interval, timestamp, open, high, low, close, volume, created_at) "
+        "VALUES (:ticker_id, :interval, :timestamp, :open, :high, :low, :close, :volume, :now) "
+        "ON CONFLICT (ticker_id, interval, timestamp) DO NOTHING"
+    ), params).rowcount
+    if inserted:
+        record_bars_added(db, ticker_id, interval, 1, bar[CONST_TIMESTAMP], bar[CONST_TIMESTAMP])
+        return True
+
+    db.execute(text(
+        "UPDATE historical_data SET high = MAX(high, :high), low = MIN(low, :low), close = :close, "
+        "volume = volume + :volume "
+        "WHERE ticker_id = :ticker_id AND interval = :interval AND timestamp = :timestamp"
+    ), params)
+    record_bars_updated(db, ticker_id, interval)
+    return False
+
+
+def _prepare_interval_stats(db: Session) -> bool:
+    """
+    Create and fill ticker_interval_stats on first use (no commit)
+
+    init_db() migrates the database of the app, but workers and scripts may
+    write to a database created before the summary table existed. The table
+    is created if missing and rebuilt from historical_data if empty, in the
+    caller's transaction; the database is only marked ready once the summary
+    is found in place, so a rolled back rebuild is done again.
+
+    Returns:
+        True if the summary was rebuilt (it then already counts the caller's pending bars)
+    """
+    bind = db.get_bind()
+    if bind in _stats_ready:
+        return False
+    TickerIntervalStats.__table__.create(db.connection(), checkfirst=True)
+    if (db.execute(text("SELECT 1 FROM ticker_interval_stats LIMIT 1")).first() is not None
+            or db.execute(text("SELECT 1 FROM historical_data LIMIT 1")).first() is None):
+        _stats_ready.add(bind)
+        return False
+
+    logger.info("Building ticker_interval_stats from historical_data...")
+    _rebuild_interval_stats(db)
+    return True
+
+
+def record_bars_added(db: Session, ticker_id: int, interval: str, count: int, first, last):
+    """
+    Account for newly inserted bars in ticker_interval_stats (O(1), no commit)
+
+    Runs in the caller's transaction, so the summary is committed together
+    with the bars. first/last may be the bounds of the whole saved batch:
+    after a save every timestamp of the batch is stored.
+
+    Args:
+        db: Database session
+        ticker_id: Ticker database ID
+        interval: Interval string
+        count: Number of bars inserted (updated bars are not counted)
+        first: Oldest timestamp of the batch
+        last: Newest timestamp of the batch
+    """
+    if count <= 0 or _prepare_interval_stats(db):
+        return
+    db.execute(_STATS_ADD_SQL, {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'count': int(count),
+        'first': to_sqlite_timestamp(first),
+        'last': to_sqlite_timestamp(last),
+        'now': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT),
+    })
+
+
+def record_bars_updated(db: Session, ticker_id: int, interval: str):
+    """
+    Account for bars rewritten in place in ticker_interval_stats (O(1), no commit)
+
+    updated_at changes with every write to a series, so copies of the bars
+    (the Parquet bar store) can tell whether they are still current.
+    """
+    if _prepare_interval_stats(db):
+        return
+    db.execute(_STATS_TOUCH_SQL, {
+        'ticker_id': ticker_id,
+        'interval': interval,
+        'now': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT),
+    })
+
+
+def refresh_interval_stats(db: Session, ticker_id: Optional[int] = None, interval: Optional[str] = None):
+    """
+    Recompute ticker_interval_stats from historical_data (no commit)
+
+    Used after deletions and by writers that cannot count their inserts.
+    Scans one series, one ticker, or the whole table (ticker_id=None).
+    """
+    if not _prepare_interval_stats(db):
+        _rebuild_interval_stats(db, ticker_id, interval)
+
+
+def _rebuild_interval_stats(db: Session, ticker_id: Optional[int] = None, interval: Optional[str] = None):
+    where = ""
+    params = {'now': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT)}
+    if ticker_id is not None:
+        where += " AND ticker_id = :ticker_id"
+        params['ticker_id'] = ticker_id
+    if interval is not None:
+        where += " AND interval = :interval"
+        params['interval'] = interval
+
+    db.execute(text(f"DELETE FROM ticker_interval_stats WHERE 1 = 1{where}"), params)
+    db.execute(text(
+        "INSERT INTO ticker_interval_stats "
+        "(ticker_id, interval, bar_count, first_timestamp, last_timestamp, updated_at) "
+        "SELECT ticker_id, interval, COUNT(*), MIN(timestamp), MAX(timestamp), :now "
+        f"FROM historical_data WHERE interval IS NOT NULL{where} "
+        "GROUP BY ticker_id, interval"
+    ), params)
+
+
+def ensure_interval_stats(db: Session) -> bool:
+    """
+    Build ticker_interval_stats if it is empty while bars exist (one full scan)
+
+    Returns:
+        True if the table was (re)built
+    """
+    _stats_ready.discard(db.get_bind())
+    if not _prepare_interval_stats(db):
+        return False
+    db.commit()
+    return True
+
+
+def get_series_stats(db: Session, ticker_id: int, interval: str) -> Optional[Dict]:
+    """
+    Summary of one series from ticker_interval_stats (single-row lookup)
+
+    Returns:
+        Dict with 'count', 'first', 'last' and 'updated_at', or None if the series has no bars
+    """
+    _prepare_interval_stats(db)
+    row = db.execute(_STATS_SERIES_SQL, {'ticker_id': ticker_id, 'interval': interval}).fetchone()
+    if row is None or not row[0]:
+        return None
+    return {
+        'count': row[0],
+        'first': _to_datetime(row[1]),
+        'last': _to_datetime(row[2]),
+        'updated_at': _to_datetime(row[3]),
+    }
+
+
+def series_version(db: Session, ticker_id: int, interval: str) -> Optional[str]:
+    """
+    Version stamp of a series (ticker_interval_stats.updated_at, single-row lookup)
+
+    Changes with every write or deletion in the series, also when made by
+    another process, so caches of derived data can tell they are outdated.
+
+    Returns:
+        ISO string, or None if the series has no bars
+    """
+    stats = get_series_stats(db, ticker_id, interval)
+    return stats['updated_at'].isoformat() if stats and stats['updated_at'] else None
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def to_sqlite_timestamp(value: Union[str, date, datetime, pd.Timestamp]) -> str:
+    """Bound timestamp in the stored text layout (SQLite compares DateTime as strings)"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.strftime(SQLITE_DATETIME_FORMAT)
+
+
+def _parse_timestamps(values: Sequence) -> np.ndarray:
+    """Stored DateTime values (ISO text in SQLite) to datetime64[ns]"""
+    try:
+        return np.array(values, dtype='datetime64[us]').astype('datetime64[ns]')
+    except (TypeError, ValueError):
+        return pd.to_datetime(pd.Series(values, dtype=object), format='ISO8601').to_numpy()
+
+
+def load_bars_frame(
+    db: Session,
+    ticker_id: int,
+    interval: Optional[str] = None,
+    start: Union[str, date, datetime, pd.Timestamp, None] = None,
+    end: Union[str, date, datetime, pd.Timestamp, None] = None,
+    columns: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+    index: bool = False
+) -> pd.DataFrame:
+    """
+    Load OHLCV bars as a typed DataFrame without ORM hydration
+
+    One column-only SELECT, rows are read as raw driver tuples and converted
+    per column (float64 prices, int64 volume, vectorized timestamp parsing).
+
+    Args:
+        db: Database session
+        ticker_id: Ticker database ID
+        interval: Interval filter (None = all intervals)
+        start: First timestamp included (None = no lower bound)
+        end: Last timestamp included (None = no upper bound)
+        columns: Subset of open/high/low/close/volume (default: all)
+        limit: Only the most recent N bars (still returned oldest first)
+        index: Use the timestamp as index instead of a column
+
+    Returns:
+        DataFrame sorted by timestamp (empty, with the requested columns, if no rows)
+    """
+    value_columns = [c for c in (columns or BAR_COLUMNS[1:]) if c != CONST_TIMESTAMP]
+    unknown = set(value_columns) - set(BAR_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown bar columns: {sorted(unknown)}")
+
+    sql = f"SELECT timestamp, {', '.join(value_columns)} FROM historical_data WHERE ticker_id = ?"
+    params = [ticker_id]
+    if interval is not None:
+        sql += " AND interval = ?"
+        params.append(interval)
+    if start is not None:
+        sql += " AND timestamp >= ?"
+        params.append(to_sqlite_timestamp(start))
+    if end is not None:
+        sql += " AND timestamp <= ?"
+        params.append(to_sqlite_timestamp(end))
+    if limit is not None:
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(int(limit))
+    else:
+        sql += " ORDER BY timestamp"
+
+    # Plain DBAPI cursor: SQLAlchemy Row wrapping costs more than the query itself
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(sql, tuple(params))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if limit is not None:
+        rows.reverse()
+
+    names = [CONST_TIMESTAMP] + value_columns
+    if rows:
+        values = list(zip(*rows))
+    else:
+        values = [()] * len(names)
+
+    data = {CONST_TIMESTAMP: _parse_timestamps(values[0])}
+    for name, column in zip(value_columns, values[1:]):
+        dtype = np.int64 if name == CONST_VOLUME else np.float64
+        data[name] = np.array(column, dtype=dtype)
+
+    df = pd.DataFrame(data, columns=names)
+    if index:
+        df = df.set_index(CONST_TIMESTAMP)
+    return df
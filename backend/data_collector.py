@@ -1,6 +1,7 @@
 """
 Data collection service for fetching and storing market data
 """
+import re
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 import pandas as pd
@@ -8,7 +9,15 @@ from sqlalchemy.orm import Session
 from numpy.random import default_rng
 
 from backend.models import Ticker, HistoricalData, SessionLocal
-from backend.config import logger, DATA_CONFIG
+from backend.config import logger
+from backend import bar_store
+from backend.constants import CONST_TIMESTAMP
+from backend.data_access import (
+    ensure_unique_bar_index, upsert_bars, notify_bars_changed, record_bars_added,
+    record_bars_updated, refresh_interval_stats
+)
+from backend.bar_retention import apply_retention
+from backend.market_calendar import interval_to_seconds
 
 # Initialize random number generator
 _rng = default_rng(seed=42)
@@ -114,6 +123,15 @@ class DataCollector:
             Number of records inserted
         """
         try:
+            stamp = bar_store.series_stamp(self.db, ticker.id, bar_size)
+            if ensure_unique_bar_index(self.db):
+                # One INSERT ... ON CONFLICT DO NOTHING per batch
+                frame = df.rename_axis(CONST_TIMESTAMP).reset_index()
+                inserted = upsert_bars(self.db, ticker.id, bar_size, frame, keep_existing=True)['new_records']
+                bar_store.append_bars(self.db, ticker.id, ticker.symbol, bar_size, df, stamp, keep_existing=True)
+                logger.info(f"✅ Inserted {inserted} new records for {ticker.symbol}")
+                return inserted
+            
             inserted = 0
             
             for timestamp, row in df.iterrows():
@@ -138,7 +156,12 @@ class DataCollector:
                     self.db.add(record)
                     inserted += 1
             
+            if inserted:
+                record_bars_added(self.db, ticker.id, bar_size, inserted, df.index.min(), df.index.max())
             self.db.commit()
+            if inserted:
+                notify_bars_changed(ticker.id, bar_size)
+            bar_store.append_bars(self.db, ticker.id, ticker.symbol, bar_size, df, stamp, keep_existing=True)
             logger.info(f"✅ Inserted {inserted} new records for {ticker.symbol}")
             return inserted
             
@@ -150,6 +173,15 @@ class DataCollector:
     def _store_bars(self, bars: List[dict], ticker: Ticker, bar_size: str) -> int:
         """Store IBKR bars in database"""
         try:
+            stamp = bar_store.series_stamp(self.db, ticker.id, bar_size)
+            if bars and ensure_unique_bar_index(self.db):
+                # One INSERT ... ON CONFLICT DO NOTHING per batch
+                frame = pd.DataFrame(bars)
+                inserted = upsert_bars(self.db, ticker.id, bar_size, frame, keep_existing=True)['new_records']
+                bar_store.append_bars(self.db, ticker.id, ticker.symbol, bar_size, frame, stamp, keep_existing=True)
+                logger.info(f"✅ Inserted {inserted} new records for {ticker.symbol}")
+                return inserted
+            
             inserted = 0
             
             for bar in bars:
@@ -174,7 +206,15 @@ class DataCollector:
                     self.db.add(record)
                     inserted += 1
             
+            if inserted:
+                timestamps = [bar['timestamp'] for bar in bars]
+                record_bars_added(self.db, ticker.id, bar_size, inserted, min(timestamps), max(timestamps))
             self.db.commit()
+            if inserted:
+                notify_bars_changed(ticker.id, bar_size)
+            if bars:
+                bar_store.append_bars(self.db, ticker.id, ticker.symbol, bar_size, pd.DataFrame(bars), stamp,
+                                      keep_existing=True)
             logger.info(f"✅ Inserted {inserted} new records for {ticker.symbol}")
             return inserted
             
@@ -187,7 +227,8 @@ class DataCollector:
         self,
         tickers: List[tuple],
         duration: str = "1D",
-        bar_size: str = "5min"
+        bar_size: str = "5min",
+        collector=None
     ):
         """
         Collect data for multiple tickers
@@ -196,13 +237,29 @@ class DataCollector:
             tickers: List of (symbol, name) tuples
             duration: Duration string
             bar_size: Bar size
+            collector: Connected IBKRCollector; when given, all tickers are fetched
+                concurrently under the shared IBKR pacing scheduler
         """
+        if collector is not None:
+            for symbol, name in tickers:
+                self.ensure_ticker_exists(symbol, name)
+            # '5min' / '1D' -> IBKR '5 mins' / '1 D'
+            bar_seconds = interval_to_seconds(bar_size)
+            ibkr_bar_size = next(
+                (size for size, seconds in collector.INTERVAL_SECONDS.items() if seconds == bar_seconds), bar_size
+            )
+            ibkr_duration = re.sub(r'^(\d+)\s*([A-Za-z])$', r'\1 \2', duration.strip()).upper()
+            return collector.collect_multiple_tickers(
+                [symbol for symbol, _ in tickers], ibkr_duration, ibkr_bar_size, interval=bar_size
+            )
+        
         for symbol, name in tickers:
             logger.info(f"Collecting data for {symbol} - {name}")
             self.collect_historical_data(symbol, name, duration, bar_size)
-            # Small delay to avoid rate limiting
-            import time
-            time.sleep(1)
+            if IBKR_AVAILABLE and ibkr_client is not None:
+                # Small delay to avoid rate limiting
+                import time
+                time.sleep(1)
     
     def get_latest_data(self, symbol: str, limit: int = 100) -> pd.DataFrame:
         """
@@ -221,29 +278,9 @@ class DataCollector:
                 logger.warning(f"Ticker {symbol} not found")
                 return pd.DataFrame()
             
-            records = self.db.query(HistoricalData).filter(
-                HistoricalData.ticker_id == ticker.id
-            ).order_by(
-                HistoricalData.timestamp.desc()
-            ).limit(limit).all()
-            
-            if not records:
+            df = bar_store.load_bars(self.db, ticker.id, symbol, limit=limit, index=True)
+            if df.empty:
                 return pd.DataFrame()
-            
-            # Convert to DataFrame
-            data = []
-            for record in reversed(records):
-                data.append({
-                    'timestamp': record.timestamp,
-                    'open': record.open,
-                    'high': record.high,
-                    'low': record.low,
-                    'close': record.close,
-                    'volume': record.volume,
-                })
-            
-            df = pd.DataFrame(data)
-            df.set_index('timestamp', inplace=True)
             return df
             
         except Exception as e:
@@ -252,23 +289,22 @@ class DataCollector:
     
     def cleanup_old_data(self, days: int = None):
         """
-        Delete old historical data
+        Enforce the bar retention policy (backend/bar_retention.py)
+        
+        Expired bars are archived, rolled up to a coarser interval and
+        deleted in small batches instead of one DELETE over the whole table.
         
         Args:
-            days: Number of days to retain (default from config)
-        """
-        if days is None:
-            days = DATA_CONFIG["retention_days"]
+            days: Number of days to retain for every interval (default: per-interval policy)
         
+        Returns:
+            Number of bars deleted
+        """
         try:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-            deleted = self.db.query(HistoricalData).filter(
-                HistoricalData.timestamp < cutoff_date
-            ).delete()
-            
-            self.db.commit()
-            logger.info(f"Deleted {deleted} old records older than {days} days")
-            return deleted
+            result = apply_retention(self.db, days=days)
+            logger.info(f"Deleted {result['deleted']} old records ({result['rolled_up']} rolled up, "
+                        f"{result['archived']} archived in {len(result['files'])} files)")
+            return result['deleted']
             
         except Exception as e:
             logger.error(f"Error cleaning up old data: {e}")
@@ -351,7 +387,9 @@ class DataCollector:
             if records_created % 100 == 0:
                 self.db.commit()
         
+        refresh_interval_stats(self.db, ticker.id, bar_size.replace(' ', ''))
         self.db.commit()
+        notify_bars_changed(ticker.id)
         logger.info(f"Generated {records_created} mock records for {symbol}")
         return records_created
     
@@ -581,6 +619,7 @@ class DataCollector:
                 existing.close = price
                 existing.high = max(existing.high, price) if existing.high else price
                 existing.low = min(existing.low, price) if existing.low else price
+                record_bars_updated(self.db, ticker.id, '1day')
                 self.db.commit()
                 logger.info(f"Updated today's data for {symbol}")
             else:
@@ -596,6 +635,7 @@ class DataCollector:
                     interval='1day'
                 )
                 self.db.add(record)
+                record_bars_added(self.db, ticker.id, '1day', 1, today, today)
                 self.db.commit()
                 logger.info(f"Saved today's market price for {symbol}")
             
@@ -0,0 +1,264 @@
+"""
+Coverage index for historical_data: internal gaps per (ticker, interval)
+
+Gaps are found with a single LAG() window scan over the (ticker_id, interval,
+timestamp) index, then checked against the Euronext session calendar so that
+nights, week-ends and holidays are not reported. The result is cached per
+series and patched incrementally after each save, so collectors only send the
+truly missing ranges to IBKR. A cached series is only trusted while its
+ticker_interval_stats version (series_version) is unchanged, so writes and
+deletions from any path or process make it rebuild.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.config import logger
+from backend.data_access import add_bars_listener, get_series_stats, series_version, to_sqlite_timestamp
+from backend.market_calendar import interval_to_seconds, missing_session_range, SECONDS_PER_DAY
+
+# Intraday holes shorter than this are thin trading, not missing data
+MIN_INTRADAY_GAP_SECONDS = 15 * 60
+
+# Consecutive bars further apart than this many bar durations are gap candidates
+_CANDIDATE_FACTOR = 1.5
+
+_GAP_CANDIDATES_SQL = text(
+    "SELECT prev_ts, ts FROM ("
+    "  SELECT timestamp AS ts, LAG(timestamp) OVER (ORDER BY timestamp) AS prev_ts"
+    "  FROM historical_data"
+    "  WHERE ticker_id = :ticker_id AND interval = :interval"
+    "  AND timestamp >= :start AND timestamp <= :end"
+    ") WHERE prev_ts IS NOT NULL"
+    " AND (julianday(ts) - julianday(prev_ts)) * 86400.0 > :threshold"
+)
+
+_BOUNDS_SQL = text(
+    "SELECT MIN(timestamp), MAX(timestamp), COUNT(*) FROM historical_data "
+    "WHERE ticker_id = :ticker_id AND interval = :interval "
+    "AND timestamp >= :start AND timestamp <= :end"
+)
+
+_PREVIOUS_BAR_SQL = text(
+    "SELECT MAX(timestamp) FROM historical_data "
+    "WHERE ticker_id = :ticker_id AND interval = :interval AND timestamp < :ts"
+)
+
+_NEXT_BAR_SQL = text(
+    "SELECT MIN(timestamp) FROM historical_data "
+    "WHERE ticker_id = :ticker_id AND interval = :interval AND timestamp > :ts"
+)
+
+_MIN_TS = datetime(1900, 1, 1)
+_MAX_TS = datetime(9999, 12, 31)
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _gap(after: datetime, before: datetime, bar_seconds: int) -> Optional[Tuple[datetime, datetime]]:
+    min_gap = MIN_INTRADAY_GAP_SECONDS if bar_seconds < SECONDS_PER_DAY else 0
+    return missing_session_range(after, before, bar_seconds, min_gap)
+
+
+class CoverageIndex:
+    """
+    Per-process cache of stored ranges and internal gaps for each (ticker_id, interval)
+
+    Each entry is {'first': datetime, 'last': datetime, 'gaps': [(prev_bar, next_bar, gap_start, gap_end)],
+    'stamp': series version it describes, 'stale': bool}, where prev_bar/next_bar
+    are the stored bars around the hole.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[int, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def _scan_gaps(self, db: Session, ticker_id: int, interval: str, bar_seconds: int,
+                   start: datetime, end: datetime) -> List[Tuple[datetime, datetime, datetime, datetime]]:
+        """One window-function scan, candidates filtered by the session calendar"""
+        rows = db.execute(_GAP_CANDIDATES_SQL, {
+            'ticker_id': ticker_id,
+            'interval': interval,
+            'start': to_sqlite_timestamp(start),
+            'end': to_sqlite_timestamp(end),
+            'threshold': bar_seconds * _CANDIDATE_FACTOR,
+        }).fetchall()
+
+        gaps = []
+        for prev_ts, ts in rows:
+            prev_ts, ts = _to_datetime(prev_ts), _to_datetime(ts)
+            missing = _gap(prev_ts, ts, bar_seconds)
+            if missing:
+                gaps.append((prev_ts, ts, missing[0], missing[1]))
+        return gaps
+
+    def _build(self, db: Session, ticker_id: int, interval: str, bar_seconds: int) -> Optional[Dict]:
+        stats = get_series_stats(db, ticker_id, interval)
+        stamp = stats['updated_at'].isoformat() if stats and stats['updated_at'] else None
+        if stats is not None:
+            first, last = stats['first'], stats['last']
+        else:
+            # Series written outside the maintained paths: fall back to the index
+            first, last, count = db.execute(_BOUNDS_SQL, {
+                'ticker_id': ticker_id,
+                'interval': interval,
+                'start': to_sqlite_timestamp(_MIN_TS),
+                'end': to_sqlite_timestamp(_MAX_TS),
+            }).fetchone()
+            if not count:
+                return None
+
+        entry = {
+            'first': _to_datetime(first),
+            'last': _to_datetime(last),
+            'gaps': self._scan_gaps(db, ticker_id, interval, bar_seconds, _MIN_TS, _MAX_TS),
+            'stamp': stamp,
+            'stale': False,
+        }
+        logger.debug(f"Coverage index built for ticker {ticker_id} {interval}: {len(entry['gaps'])} gap(s)")
+        return entry
+
+    def get(self, db: Session, ticker_id: int, interval: str) -> Optional[Dict]:
+        """
+        Coverage entry for a series (None if no data)
+
+        The cached entry is used while the series version is unchanged,
+        otherwise it is rebuilt.
+        """
+        bar_seconds = interval_to_seconds(interval)
+        if bar_seconds is None:
+            raise ValueError(f"Unknown interval: {interval}")
+
+        key = (ticker_id, interval)
+        stamp = series_version(db, ticker_id, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['stale'] or stamp is None or entry['stamp'] != stamp:
+                entry = self._build(db, ticker_id, interval, bar_seconds)
+                if entry is not None:
+                    self._entries[key] = entry
+                else:
+                    self._entries.pop(key, None)
+            return entry
+
+    def record_saved(self, db: Session, ticker_id: int, interval: str, start, end,
+                     stamp_before: Optional[str] = None):
+        """
+        Patch a cached entry after bars in [start, end] were written
+
+        Only the stretch between the stored bars surrounding the new ones is
+        rescanned. The entry is patched only if it described the series
+        version read before the save (stamp_before, see series_version());
+        otherwise other writes happened meanwhile and it is dropped. Series
+        that are not cached yet are left alone (built lazily).
+        """
+        key = (ticker_id, interval)
+        bar_seconds = interval_to_seconds(interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or bar_seconds is None:
+                return
+            if stamp_before is None or entry['stamp'] != stamp_before:
+                del self._entries[key]
+                return
+
+            lo = to_sqlite_timestamp(start)
+            hi = to_sqlite_timestamp(end)
+            params = {'ticker_id': ticker_id, 'interval': interval}
+            before = _to_datetime(db.execute(_PREVIOUS_BAR_SQL, {**params, 'ts': lo}).scalar())
+            after = _to_datetime(db.execute(_NEXT_BAR_SQL, {**params, 'ts': hi}).scalar())
+
+            window_start = before or _to_datetime(lo)
+            window_end = after or _to_datetime(hi)
+
+            kept = [g for g in entry['gaps'] if not (g[0] >= window_start and g[1] <= window_end)]
+            fresh = self._scan_gaps(db, ticker_id, interval, bar_seconds, window_start, window_end)
+            entry['gaps'] = sorted(kept + fresh)
+            entry['first'] = min(entry['first'], _to_datetime(lo))
+            entry['last'] = max(entry['last'], _to_datetime(hi))
+            entry['stamp'] = series_version(db, ticker_id, interval)
+            entry['stale'] = False
+
+    def invalidate(self, ticker_id: Optional[int] = None, interval: Optional[str] = None):
+        """
+        Mark cached entries (all, one ticker, or one series) as outdated
+
+        Registered as a bars listener (notify_bars_changed). Outdated entries
+        are rebuilt on next use, unless record_saved() patches them first.
+        """
+        with self._lock:
+            for key, entry in self._entries.items():
+                if ticker_id is None or (key[0] == ticker_id and (interval is None or key[1] == interval)):
+                    entry['stale'] = True
+
+    def coverage(self, db: Session, ticker_id: int, interval: str,
+                 start_date: datetime, end_date: datetime) -> Dict:
+        """
+        Coverage of [start_date, end_date] for a series
+
+        Returns:
+            Dict with 'has_data', 'first_date', 'last_date', 'total_records',
+            'missing_ranges' ([{'start', 'end'}, ...]) and 'is_complete'
+        """
+        bar_seconds = interval_to_seconds(interval)
+        if bar_seconds is None:
+            raise ValueError(f"Unknown interval: {interval}")
+
+        first, last, count = db.execute(_BOUNDS_SQL, {
+            'ticker_id': ticker_id,
+            'interval': interval,
+            'start': to_sqlite_timestamp(start_date),
+            'end': to_sqlite_timestamp(end_date),
+        }).fetchone()
+
+        if not count:
+            missing = _gap(start_date - timedelta(seconds=bar_seconds), end_date + timedelta(seconds=bar_seconds),
+                           bar_seconds)
+            return {
+                'has_data': False,
+                'first_date': None,
+                'last_date': None,
+                'total_records': 0,
+                'missing_ranges': [{'start': missing[0], 'end': missing[1]}] if missing else [],
+                'is_complete': missing is None,
+            }
+
+        first, last = _to_datetime(first), _to_datetime(last)
+        entry = self.get(db, ticker_id, interval)
+        missing_ranges = []
+
+        # Missing at the beginning?
+        head = _gap(start_date - timedelta(seconds=bar_seconds), first, bar_seconds)
+        if head:
+            missing_ranges.append({'start': head[0], 'end': head[1]})
+
+        # Holes between stored bars
+        for _prev_bar, _next_bar, gap_start, gap_end in (entry['gaps'] if entry else []):
+            if gap_end < start_date or gap_start > end_date:
+                continue
+            missing_ranges.append({'start': max(gap_start, start_date), 'end': min(gap_end, end_date)})
+
+        # Missing at the end?
+        tail = _gap(last, end_date + timedelta(seconds=bar_seconds), bar_seconds)
+        if tail:
+            missing_ranges.append({'start': tail[0], 'end': tail[1]})
+
+        return {
+            'has_data': True,
+            'first_date': first,
+            'last_date': last,
+            'total_records': count,
+            'missing_ranges': missing_ranges,
+            'is_complete': not missing_ranges,
+        }
+
+
+coverage_index = CoverageIndex()
+add_bars_listener(coverage_index.invalidate)
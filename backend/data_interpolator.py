@@ -1,16 +1,23 @@
 """
 Data Interpolator - Generate high-frequency data from lower-frequency historical data
 """
+from datetime import timedelta
+from typing import Dict, Iterator, Optional
+
+import numpy as np
 import pandas as pd
 from numpy.random import default_rng
-from datetime import timedelta
 from backend.config import logger
 from backend.models import SessionLocal, HistoricalData, Ticker as TickerModel
+from backend.data_access import ensure_unique_bar_index, upsert_bars, notify_bars_changed, record_bars_added
 from sqlalchemy import and_
 
 # Initialize random number generator
 _rng = default_rng(seed=42)
 
+# Generated rows per chunk written by interpolate_and_save
+OUTPUT_CHUNK_ROWS = 100000
+
 
 class DataInterpolator:
     """Interpolate historical data to create higher frequency data points"""
@@ -82,12 +89,125 @@ class DataInterpolator:
             'ohlc': 'OHLC - Préserve les patterns OHLC'
         }
     
+    @staticmethod
+    def _interpolate_pairs(bars: Dict[str, np.ndarray], multiplier: int, target_delta: timedelta,
+                           method: str, rng) -> Dict[str, np.ndarray]:
+        """
+        Generate the points between each bar and the next one
+
+        Arrays are shaped (pairs, multiplier) and flattened row by row, so the
+        output keeps the order of the former row-by-row loop.
+        """
+        cur = {col: values[:-1, None] for col, values in bars.items()}
+        nxt = {col: values[1:, None] for col, values in bars.items()}
+        shape = (len(bars['close']) - 1, multiplier)
+        ratio = np.arange(multiplier) / multiplier
+
+        step = np.timedelta64(int(target_delta.total_seconds() * 1e6), 'us')
+        timestamps = cur['timestamp'] + np.arange(multiplier) * step
+        volume = np.broadcast_to(np.trunc(cur['volume'] / multiplier), shape)
+
+        if method == 'linear':
+            out = {col: cur[col] + (nxt[col] - cur[col]) * ratio for col in ('open', 'high', 'low', 'close')}
+
+        elif method == 'cubic':
+            # Cubic Hermite basis (tangent terms are zero)
+            t2 = ratio * ratio
+            t3 = t2 * ratio
+            h00 = 2 * t3 - 3 * t2 + 1
+            h01 = -2 * t3 + 3 * t2
+            out = {col: h00 * cur[col] + h01 * nxt[col] for col in ('open', 'high', 'low', 'close')}
+
+        elif method == 'time':
+            # Time-based with random variance (0.1%)
+            variance = 0.001
+            out = {
+                'open': cur['open'] + (nxt['open'] - cur['open']) * ratio * (1 + rng.uniform(-variance, variance, shape)),
+                'high': np.maximum(cur['high'], nxt['high']) * (1 + rng.uniform(0, variance, shape)),
+                'low': np.minimum(cur['low'], nxt['low']) * (1 - rng.uniform(0, variance, shape)),
+                'close': cur['close'] + (nxt['close'] - cur['close']) * ratio * (1 + rng.uniform(-variance, variance, shape)),
+            }
+            volume = np.trunc(cur['volume'] / multiplier * (1 + rng.uniform(-0.2, 0.2, shape)))
+
+        elif method == 'ohlc':
+            # Realistic bars around the close-to-close path; high/low encompass open/close
+            base_price = cur['close'] + (nxt['close'] - cur['close']) * ratio
+            price_range = np.abs(nxt['close'] - cur['close']) / multiplier
+            open_ = base_price + rng.uniform(-0.5, 0.5, shape) * price_range
+            close = base_price + rng.uniform(-0.5, 0.5, shape) * price_range
+            out = {
+                'open': open_,
+                'high': np.maximum(open_, close) + rng.uniform(0, 0.5, shape) * price_range,
+                'low': np.minimum(open_, close) - rng.uniform(0, 0.5, shape) * price_range,
+                'close': close,
+            }
+
+        else:
+            raise ValueError(f"Unknown interpolation method: {method}")
+
+        result = {'timestamp': timestamps.ravel()}
+        result.update({col: np.broadcast_to(out[col], shape).ravel() for col in ('open', 'high', 'low', 'close')})
+        result['volume'] = volume.ravel().astype(np.int64)
+        return result
+    
+    @staticmethod
+    def iter_interpolated(
+        df: pd.DataFrame,
+        source_interval: str,
+        target_interval: str,
+        method: str = 'linear',
+        chunk_rows: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Interpolate data chunk by chunk (about chunk_rows generated points each)
+        
+        Args:
+            df: DataFrame with timestamp/open/high/low/close/volume columns, oldest first
+            source_interval: Original interval (e.g., '1min')
+            target_interval: Target interval (e.g., '1s')
+            method: Interpolation method ('linear', 'cubic', 'time', 'ohlc')
+            chunk_rows: Target number of generated rows per chunk (None = OUTPUT_CHUNK_ROWS)
+            seed: Seed of the random generator ('time' and 'ohlc'; None = module generator)
+        
+        Yields:
+            DataFrames of interpolated bars, in timestamp order; the last one
+            ends with the last original bar
+        """
+        if not DataInterpolator.can_interpolate(source_interval, target_interval):
+            raise ValueError(f"Cannot interpolate from {source_interval} to {target_interval}")
+        if method not in DataInterpolator.get_interpolation_methods():
+            raise ValueError(f"Unknown interpolation method: {method}")
+        if df.empty:
+            return
+        
+        multiplier = DataInterpolator.INTERVAL_MULTIPLIERS[(source_interval, target_interval)]
+        target_delta = DataInterpolator.get_timedelta(target_interval)
+        rng = _rng if seed is None else default_rng(seed)
+        
+        bars = {'timestamp': pd.to_datetime(df['timestamp']).to_numpy()}
+        for col in ('open', 'high', 'low', 'close', 'volume'):
+            bars[col] = df[col].to_numpy(dtype=np.float64)
+        
+        n = len(df)
+        pairs_per_chunk = max(1, (chunk_rows or OUTPUT_CHUNK_ROWS) // multiplier)
+        for start in range(0, n - 1, pairs_per_chunk):
+            stop = min(start + pairs_per_chunk, n - 1)
+            window = {col: values[start:stop + 1] for col, values in bars.items()}
+            yield pd.DataFrame(DataInterpolator._interpolate_pairs(window, multiplier, target_delta, method, rng))
+        
+        # Last original point
+        last = {col: values[-1:] for col, values in bars.items()}
+        last['volume'] = last['volume'].astype(np.int64)
+        yield pd.DataFrame(last)
+    
     @staticmethod
     def interpolate_data(
         df: pd.DataFrame,
         source_interval: str,
         target_interval: str,
-        method: str = 'linear'
+        method: str = 'linear',
+        seed: Optional[int] = None
     ) -> pd.DataFrame:
         """
         Interpolate data from source interval to target interval
@@ -97,6 +217,7 @@ class DataInterpolator:
             source_interval: Original interval (e.g., '1min')
             target_interval: Target interval (e.g., '1s')
             method: Interpolation method ('linear', 'cubic', 'time', 'ohlc')
+            seed: Seed of the random generator (None = module generator)
         
         Returns:
             Interpolated DataFrame
@@ -105,101 +226,15 @@ class DataInterpolator:
             raise ValueError(f"Cannot interpolate from {source_interval} to {target_interval}")
         
         multiplier = DataInterpolator.INTERVAL_MULTIPLIERS[(source_interval, target_interval)]
-        target_delta = DataInterpolator.get_timedelta(target_interval)
-        
         logger.info(f"Interpolating {len(df)} points from {source_interval} to {target_interval} (x{multiplier})")
         
-        interpolated_data = []
-        
-        for i in range(len(df) - 1):
-            current_row = df.iloc[i]
-            next_row = df.iloc[i + 1]
-            
-            current_time = current_row['timestamp']
-            
-            # Generate intermediate points
-            for j in range(multiplier):
-                new_time = current_time + (target_delta * j)
-                
-                if method == 'linear':
-                    # Simple linear interpolation
-                    ratio = j / multiplier
-                    new_row = {
-                        'timestamp': new_time,
-                        'open': current_row['open'] + (next_row['open'] - current_row['open']) * ratio,
-                        'high': current_row['high'] + (next_row['high'] - current_row['high']) * ratio,
-                        'low': current_row['low'] + (next_row['low'] - current_row['low']) * ratio,
-                        'close': current_row['close'] + (next_row['close'] - current_row['close']) * ratio,
-                        'volume': int(current_row['volume'] / multiplier),
-                    }
-                
-                elif method == 'cubic':
-                    # Cubic spline interpolation (smoother)
-                    ratio = j / multiplier
-                    # Use cubic Hermite interpolation
-                    t = ratio
-                    t2 = t * t
-                    t3 = t2 * t
-                    h00 = 2*t3 - 3*t2 + 1
-                    _ = t3 - 2*t2 + t
-                    h01 = -2*t3 + 3*t2
-                    _ = t3 - t2
-                    
-                    new_row = {
-                        'timestamp': new_time,
-                        'open': h00 * current_row['open'] + h01 * next_row['open'],
-                        'high': h00 * current_row['high'] + h01 * next_row['high'],
-                        'low': h00 * current_row['low'] + h01 * next_row['low'],
-                        'close': h00 * current_row['close'] + h01 * next_row['close'],
-                        'volume': int(current_row['volume'] / multiplier),
-                    }
-                
-                elif method == 'time':
-                    # Time-based with random variance
-                    ratio = j / multiplier
-                    variance = 0.001  # 0.1% variance
-                    
-                    new_row = {
-                        'timestamp': new_time,
-                        'open': current_row['open'] + (next_row['open'] - current_row['open']) * ratio * (1 + _rng.uniform(-variance, variance)),
-                        'high': max(current_row['high'], next_row['high']) * (1 + _rng.uniform(0, variance)),
-                        'low': min(current_row['low'], next_row['low']) * (1 - _rng.uniform(0, variance)),
-                        'close': current_row['close'] + (next_row['close'] - current_row['close']) * ratio * (1 + _rng.uniform(-variance, variance)),
-                        'volume': int(current_row['volume'] / multiplier * (1 + _rng.uniform(-0.2, 0.2))),
-                    }
-                
-                elif method == 'ohlc':
-                    # OHLC-aware interpolation
-                    ratio = j / multiplier
-                    
-                    # Create realistic OHLC bars
-                    base_price = current_row['close'] + (next_row['close'] - current_row['close']) * ratio
-                    price_range = abs(next_row['close'] - current_row['close']) / multiplier
-                    
-                    new_row = {
-                        'timestamp': new_time,
-                        'open': base_price + _rng.uniform(-price_range/2, price_range/2),
-                        'close': base_price + _rng.uniform(-price_range/2, price_range/2),
-                        'volume': int(current_row['volume'] / multiplier),
-                    }
-                    # High/Low must encompass Open/Close
-                    new_row['high'] = max(new_row['open'], new_row['close']) + _rng.uniform(0, price_range/2)
-                    new_row['low'] = min(new_row['open'], new_row['close']) - _rng.uniform(0, price_range/2)
-                
-                interpolated_data.append(new_row)
+        chunks = list(DataInterpolator.iter_interpolated(
+            df, source_interval, target_interval, method, chunk_rows=max(len(df), 1) * multiplier, seed=seed
+        ))
+        if not chunks:
+            return pd.DataFrame(columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
-        # Add the last original point
-        last_row = df.iloc[-1]
-        interpolated_data.append({
-            'timestamp': last_row['timestamp'],
-            'open': last_row['open'],
-            'high': last_row['high'],
-            'low': last_row['low'],
-            'close': last_row['close'],
-            'volume': int(last_row['volume']),
-        })
-        
-        result_df = pd.DataFrame(interpolated_data)
+        result_df = pd.concat(chunks, ignore_index=True)
         logger.info(f"Interpolation complete: {len(result_df)} points generated")
         
         return result_df
@@ -232,8 +267,15 @@ class DataInterpolator:
             if not ticker:
                 return {'success': False, 'message': f"Ticker {ticker_symbol} not found"}
             
-            # Get source data
-            query = db.query(HistoricalData).filter(
+            # Get source data (oldest first), columns only
+            query = db.query(
+                HistoricalData.timestamp,
+                HistoricalData.open,
+                HistoricalData.high,
+                HistoricalData.low,
+                HistoricalData.close,
+                HistoricalData.volume
+            ).filter(
                 and_(
                     HistoricalData.ticker_id == ticker.id,
                     HistoricalData.interval == source_interval
@@ -243,61 +285,38 @@ class DataInterpolator:
             if limit:
                 query = query.limit(limit)
             
-            source_data = query.all()
+            df = pd.DataFrame(
+                [tuple(r) for r in query.all()],
+                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+            )
             
-            if not source_data:
+            if df.empty:
                 return {'success': False, 'message': f"No data found for {ticker_symbol} at {source_interval} interval"}
             
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'timestamp': d.timestamp,
-                'open': d.open,
-                'high': d.high,
-                'low': d.low,
-                'close': d.close,
-                'volume': d.volume
-            } for d in source_data])
-            
-            # Interpolate
-            interpolated_df = DataInterpolator.interpolate_data(df, source_interval, target_interval, method)
-            
-            # Save to database
+            # Interpolate and save chunk by chunk: existing bars are never overwritten
+            bulk = ensure_unique_bar_index(db)
+            generated_records = 0
             new_records = 0
             duplicates = 0
             
-            for _, row in interpolated_df.iterrows():
-                # Check if already exists
-                existing = db.query(HistoricalData).filter(
-                    and_(
-                        HistoricalData.ticker_id == ticker.id,
-                        HistoricalData.timestamp == row['timestamp'],
-                        HistoricalData.interval == target_interval
-                    )
-                ).first()
-                
-                if not existing:
-                    new_record = HistoricalData(
-                        ticker_id=ticker.id,
-                        timestamp=row['timestamp'],
-                        open=float(row['open']),
-                        high=float(row['high']),
-                        low=float(row['low']),
-                        close=float(row['close']),
-                        volume=int(row['volume']),
-                        interval=target_interval
-                    )
-                    db.add(new_record)
-                    new_records += 1
+            for chunk in DataInterpolator.iter_interpolated(df, source_interval, target_interval, method):
+                generated_records += len(chunk)
+                if bulk:
+                    stats = upsert_bars(db, ticker.id, target_interval, chunk, keep_existing=True)
+                    new_records += stats['new_records']
+                    duplicates += stats['skipped_records']
                 else:
-                    duplicates += 1
+                    added = DataInterpolator._insert_new_rows(db, ticker.id, target_interval, chunk)
+                    new_records += added
+                    duplicates += len(chunk) - added
             
-            db.commit()
+            logger.info(f"Interpolation complete: {generated_records} points generated, {new_records} new")
             
             return {
                 'success': True,
                 'message': f"Interpolation réussie: {new_records:,} nouveaux enregistrements créés",
-                'source_records': len(source_data),
-                'generated_records': len(interpolated_df),
+                'source_records': len(df),
+                'generated_records': generated_records,
                 'new_records': new_records,
                 'duplicates': duplicates
             }
@@ -309,3 +328,37 @@ class DataInterpolator:
         
         finally:
             db.close()
+    
+    @staticmethod
+    def _insert_new_rows(db, ticker_id: int, interval: str, chunk: pd.DataFrame) -> int:
+        """Row-by-row fallback when the unique bar index cannot be created (returns rows added)"""
+        inserted = []
+        for row in chunk.itertuples(index=False):
+            timestamp = pd.Timestamp(row.timestamp).to_pydatetime()
+            existing = db.query(HistoricalData.id).filter(
+                and_(
+                    HistoricalData.ticker_id == ticker_id,
+                    HistoricalData.timestamp == timestamp,
+                    HistoricalData.interval == interval
+                )
+            ).first()
+            
+            if not existing:
+                db.add(HistoricalData(
+                    ticker_id=ticker_id,
+                    timestamp=timestamp,
+                    open=float(row.open),
+                    high=float(row.high),
+                    low=float(row.low),
+                    close=float(row.close),
+                    volume=int(row.volume),
+                    interval=interval
+                ))
+                inserted.append(timestamp)
+        
+        if inserted:
+            record_bars_added(db, ticker_id, interval, len(inserted), min(inserted), max(inserted))
+        db.commit()
+        if inserted:
+            notify_bars_changed(ticker_id, interval)
+        return len(inserted)
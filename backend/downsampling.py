@@ -0,0 +1,210 @@
+"""
+Downsampling of price series for charts
+
+A chart cannot show more points than it has pixels: series are reduced to
+about one bucket per pixel before being handed to Plotly.
+- OHLC bars are merged per bucket (first open, highest high, lowest low,
+  last close, summed volume), so no extreme is lost.
+- Lines use LTTB (Largest-Triangle-Three-Buckets), which keeps the points
+  that shape the curve, or min/max per bucket for spiky series.
+
+Callers pass the visible range: zooming in (a narrower range) reloads that
+range and therefore shows more detail.
+"""
+from datetime import date, datetime
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.constants import CONST_TIMESTAMP, CONST_OPEN, CONST_HIGH, CONST_LOW, CONST_CLOSE, CONST_VOLUME
+
+# Buckets per horizontal pixel (1 is enough for candles and lines)
+POINTS_PER_PIXEL = 1
+
+# Below this many points a chart is drawn as is
+MIN_POINTS = 200
+
+Bound = Union[str, date, datetime, pd.Timestamp, None]
+
+
+def target_points(width_px: int, points_per_pixel: float = POINTS_PER_PIXEL) -> int:
+    """Number of points worth drawing on a chart width_px pixels wide"""
+    return max(int(width_px * points_per_pixel), MIN_POINTS)
+
+
+def _x_values(x) -> np.ndarray:
+    """X coordinates as float64 (timestamps become nanoseconds)"""
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    if values.dtype == object:
+        return pd.to_datetime(pd.Series(values)).to_numpy().astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection
+
+    The first and last points are kept; in each of the n_out - 2 buckets in
+    between, the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is kept.
+
+    Args:
+        x: X values (numbers or timestamps), increasing
+        y: Y values (NaN are treated as 0 for the selection)
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted indices of the kept points (all indices if len(y) <= n_out)
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    xs = _x_values(x)
+    ys = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    # Bucket i covers [edges[i], edges[i + 1]) over the points 1 .. n - 2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_hi = max(next_hi, next_lo + 1)
+        avg_x = xs[next_lo:next_hi].mean()
+        avg_y = ys[next_lo:next_hi].mean()
+
+        # Twice the triangle areas (a, candidate, next-bucket average)
+        areas = np.abs((xs[a] - avg_x) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y - ys[a]))
+        a = lo + int(np.argmax(areas))
+        kept[i + 1] = a
+    return kept
+
+
+def minmax_indices(y, n_buckets: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of each bucket (at most 2 * n_buckets)
+
+    Preserves every spike, at the price of twice as many points as LTTB.
+    """
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+
+    values = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    sizes = np.diff(edges)
+    keys = np.repeat(np.arange(n_buckets), sizes)
+
+    kept = [np.array([0, n - 1])]
+    for reduce in (np.fmax, np.fmin):
+        extreme = np.repeat(reduce.reduceat(values, edges[:-1]), sizes)
+        positions = np.flatnonzero(values == extreme)
+        # First occurrence of the extreme in each bucket (all-NaN buckets have none)
+        _, first = np.unique(keys[positions], return_index=True)
+        kept.append(positions[first])
+    return np.unique(np.concatenate(kept))
+
+
+def _bucket_starts(n: int, n_buckets: int) -> np.ndarray:
+    return np.unique(np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1])
+
+
+def aggregate_ohlc(df: pd.DataFrame, n_buckets: int) -> pd.DataFrame:
+    """
+    Merge consecutive bars into n_buckets OHLC bars
+
+    open = first open, high = max high, low = min low, close = last close,
+    volume = sum; the bucket is stamped with its first bar. Other columns
+    (e.g. indicators) take the last value of the bucket, like close.
+
+    Args:
+        df: Bars indexed by timestamp or with a timestamp column, oldest first
+        n_buckets: Number of bars to return
+
+    Returns:
+        Reduced DataFrame (df itself if it already has n_buckets bars or fewer)
+    """
+    n = len(df)
+    if n <= n_buckets or n_buckets < 1:
+        return df
+
+    starts = _bucket_starts(n, n_buckets)
+    ends = np.append(starts[1:], n) - 1
+    data = {}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if column == CONST_HIGH:
+            data[column] = np.fmax.reduceat(values.astype(np.float64), starts)
+        elif column == CONST_LOW:
+            data[column] = np.fmin.reduceat(values.astype(np.float64), starts)
+        elif column == CONST_VOLUME:
+            data[column] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), starts).astype(values.dtype)
+        elif column in (CONST_OPEN, CONST_TIMESTAMP):
+            data[column] = values[starts]
+        else:
+            data[column] = values[ends]
+    return pd.DataFrame(data, index=df.index[starts], columns=df.columns)
+
+
+def visible_range(df: pd.DataFrame, start: Bound = None, end: Bound = None) -> pd.DataFrame:
+    """Rows of df between start and end (timestamp index or column, both inclusive)"""
+    if start is None and end is None:
+        return df
+    stamps = df[CONST_TIMESTAMP] if CONST_TIMESTAMP in df.columns else df.index.to_series()
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (stamps >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (stamps <= pd.Timestamp(end)).to_numpy()
+    return df[mask]
+
+
+def downsample(
+    df: pd.DataFrame,
+    width_px: int,
+    start: Bound = None,
+    end: Bound = None,
+    method: str = 'ohlc',
+    column: str = CONST_CLOSE
+) -> pd.DataFrame:
+    """
+    Reduce the visible part of a bar DataFrame to what a chart can show
+
+    Args:
+        df: Bars indexed by timestamp or with a timestamp column, oldest first
+        width_px: Chart width in pixels
+        start: First visible timestamp (None = from the first bar)
+        end: Last visible timestamp (None = up to the last bar)
+        method: 'ohlc' (merge bars), 'lttb' or 'minmax' (keep rows chosen on column)
+        column: Column driving the 'lttb' / 'minmax' selection
+
+    Returns:
+        DataFrame with the same columns, at most about width_px rows
+        (2 * width_px for 'minmax')
+    """
+    visible = visible_range(df, start, end)
+    n_out = target_points(width_px)
+    if len(visible) <= n_out:
+        return visible
+
+    if method == 'ohlc':
+        return aggregate_ohlc(visible, n_out)
+    if method == 'lttb':
+        x = visible[CONST_TIMESTAMP] if CONST_TIMESTAMP in visible.columns else visible.index
+        return visible.iloc[lttb_indices(x, visible[column], n_out)]
+    if method == 'minmax':
+        return visible.iloc[minmax_indices(visible[column], n_out)]
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def take(values: Optional[Sequence], indices: np.ndarray) -> Optional[list]:
+    """Subset of a list-like by position (None stays None), to keep traces aligned"""
+    if values is None:
+        return None
+    return [values[i] for i in indices]
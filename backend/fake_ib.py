@@ -0,0 +1,346 @@
+"""
+Offline stand-ins for ib_insync.IB
+
+FakeIB answers reqHistoricalData(Async) with synthetic bars after a simulated
+latency and records every request that would have broken IBKR's pacing
+rules, so collectors and the pacing scheduler can be benchmarked and tested
+without TWS / IB Gateway. All durations are multiplied by time_scale.
+
+ReplayIB additionally replays a recorded bar file through the streaming
+API (reqRealTimeBars / reqMktData update events), for live-data tests.
+"""
+import asyncio
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.ibkr_pacing import (
+    HIST_MAX_REQUESTS, HIST_WINDOW_SECONDS, CONTRACT_MAX_REQUESTS,
+    CONTRACT_WINDOW_SECONDS, IDENTICAL_REQUEST_SECONDS, STRICT_PACING_MAX_BAR_SECONDS, contract_key
+)
+from backend.market_calendar import interval_to_seconds
+
+
+class FakeBar:
+    """Minimal BarData: date/open/high/low/close/volume"""
+    __slots__ = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, date, open_, high, low, close, volume):
+        self.date = date
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+
+class FakeContract:
+    """Minimal Stock contract"""
+
+    def __init__(self, symbol: str, exchange: str = 'SMART', currency: str = 'EUR', conId: int = 0):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.currency = currency
+        self.conId = conId
+
+
+class FakeIB:
+    """
+    Historical-data subset of ib_insync.IB
+
+    Attributes:
+        requests: (time, contract key, endDateTime, duration, bar size) of every request
+        violations: Human readable pacing violations (empty when the caller is well behaved)
+        max_in_flight: Highest number of simultaneous requests observed
+    """
+
+    def __init__(self, latency: float = 2.0, time_scale: float = 1.0, max_bars: int = 2000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            latency: Simulated server time per request (seconds, before scaling)
+            time_scale: Multiplier applied to latency and pacing windows (e.g. 0.01 to benchmark)
+            max_bars: Cap on synthetic bars returned per request
+            clock: Monotonic clock in seconds used to check pacing (injectable for tests)
+        """
+        self.latency = latency
+        self.time_scale = time_scale
+        self.max_bars = max_bars
+        self.clock = clock
+        self.requests = []
+        self.violations: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self._next_con_id = 1000
+        self._recent = deque()
+        self._recent_by_contract = {}
+        self._last_identical = {}
+
+    # Connection API ---------------------------------------------------------
+
+    def isConnected(self) -> bool:
+        return True
+
+    def connect(self, *args, **kwargs):
+        self.connections += 1
+        return self
+
+    def disconnect(self):
+        pass
+
+    def sleep(self, seconds: float = 0):
+        time.sleep(seconds * self.time_scale)
+
+    def run(self, awaitable):
+        return asyncio.get_event_loop().run_until_complete(awaitable)
+
+    def qualifyContracts(self, *contracts):
+        for contract in contracts:
+            if not getattr(contract, 'conId', 0):
+                contract.conId = self._next_con_id
+                self._next_con_id += 1
+        return list(contracts)
+
+    async def qualifyContractsAsync(self, *contracts):
+        return self.qualifyContracts(*contracts)
+
+    # Historical data --------------------------------------------------------
+
+    def _check_pacing(self, key: str, request: tuple):
+        bar_seconds = interval_to_seconds(request[3]) or 0
+        if bar_seconds > STRICT_PACING_MAX_BAR_SECONDS:
+            # Soft limits only for larger bars
+            self.requests.append((self.clock(),) + request)
+            return
+
+        now = self.clock()
+        window = HIST_WINDOW_SECONDS * self.time_scale
+        contract_window = CONTRACT_WINDOW_SECONDS * self.time_scale
+        identical_window = IDENTICAL_REQUEST_SECONDS * self.time_scale
+
+        while self._recent and now - self._recent[0] >= window:
+            self._recent.popleft()
+        recent = self._recent_by_contract.setdefault(key, deque())
+        while recent and now - recent[0] >= contract_window:
+            recent.popleft()
+
+        if len(self._recent) >= HIST_MAX_REQUESTS:
+            self.violations.append(f"more than {HIST_MAX_REQUESTS} requests in {HIST_WINDOW_SECONDS}s")
+        if len(recent) >= CONTRACT_MAX_REQUESTS:
+            self.violations.append(f"more than {CONTRACT_MAX_REQUESTS} requests for {key} in {CONTRACT_WINDOW_SECONDS}s")
+        last = self._last_identical.get(request)
+        if last is not None and now - last < identical_window:
+            self.violations.append(f"identical request within {IDENTICAL_REQUEST_SECONDS}s: {request}")
+
+        self._recent.append(now)
+        recent.append(now)
+        self._last_identical[request] = now
+        self.requests.append((now,) + request)
+
+    def _make_bars(self, endDateTime, durationStr: str, barSizeSetting: str) -> List[FakeBar]:
+        end = datetime.strptime(endDateTime[:17], '%Y%m%d %H:%M:%S') if endDateTime else datetime.now()
+        value, unit = durationStr.split()
+        unit_seconds = {'S': 1, 'D': 86400, 'W': 7 * 86400, 'M': 30 * 86400, 'Y': 365 * 86400}[unit.upper()]
+        bar_seconds = interval_to_seconds(barSizeSetting) or 60
+        n = min(int(value) * unit_seconds // bar_seconds, self.max_bars)
+
+        rng = np.random.default_rng(zlib.crc32(f"{endDateTime}|{durationStr}|{barSizeSetting}".encode()))
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+        start = end - timedelta(seconds=bar_seconds * n)
+        return [
+            FakeBar(start + timedelta(seconds=bar_seconds * i), c, c * 1.001, c * 0.999, c, 100)
+            for i, c in enumerate(closes.tolist())
+        ]
+
+    def reqHistoricalData(self, contract, endDateTime, durationStr, barSizeSetting,
+                          whatToShow, useRTH, formatDate=1, keepUpToDate=False, chartOptions=(), timeout=60):
+        request = (contract_key(contract), endDateTime, durationStr, barSizeSetting, whatToShow, useRTH)
+        self._check_pacing(request[0], request)
+        time.sleep(self.latency * self.time_scale)
+        return self._make_bars(endDateTime, durationStr, barSizeSetting)
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr, barSizeSetting,
+                                     whatToShow, useRTH, formatDate=1, keepUpToDate=False,
+                                     chartOptions=(), timeout=60):
+        request = (contract_key(contract), endDateTime, durationStr, barSizeSetting, whatToShow, useRTH)
+        self._check_pacing(request[0], request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency * self.time_scale)
+        finally:
+            self.in_flight -= 1
+        return self._make_bars(endDateTime, durationStr, barSizeSetting)
+
+
+class FakeEvent:
+    """Minimal eventkit.Event: handlers added with += and called by emit()"""
+
+    def __init__(self):
+        self._handlers = []
+
+    def __iadd__(self, handler):
+        self._handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+        return self
+
+    def emit(self, *args):
+        for handler in list(self._handlers):
+            handler(*args)
+
+
+class FakeRealTimeBar:
+    """Minimal RealTimeBar (note the open_ attribute, as in ib_insync)"""
+    __slots__ = ('time', 'open_', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, time_, open_, high, low, close, volume):
+        self.time = time_
+        self.open_ = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+
+class FakeRealTimeBarList(list):
+    """Minimal RealTimeBarList: bars plus updateEvent(bars, hasNewBar)"""
+
+    def __init__(self, contract):
+        super().__init__()
+        self.contract = contract
+        self.updateEvent = FakeEvent()
+
+
+class FakeTicker:
+    """Minimal Ticker: last trade and updateEvent(ticker)"""
+
+    def __init__(self, contract):
+        self.contract = contract
+        self.time = None
+        self.last = float('nan')
+        self.lastSize = float('nan')
+        self.updateEvent = FakeEvent()
+
+    def marketPrice(self) -> float:
+        return self.last
+
+
+def load_replay(source: Union[str, Path, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Replay data: symbol, timestamp (naive Paris time), open, high, low, close, volume
+
+    Args:
+        source: DataFrame, or path to a .csv / .parquet file with those columns
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source.copy()
+    elif str(source).endswith('.parquet'):
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_csv(source)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+class ReplayIB(FakeIB):
+    """
+    FakeIB that streams recorded bars to real-time subscriptions
+
+    Every sleep(seconds) advances the replay clock by seconds * speed and
+    emits the rows that became due: one real-time bar update for
+    reqRealTimeBars subscribers and one last-trade update for reqMktData
+    subscribers of that symbol. Timestamps are delivered in UTC, like IBKR.
+
+    With max_tickers set, market-data requests beyond that many simultaneous
+    lines are rejected through errorEvent with code 101, like TWS does.
+    """
+
+    def __init__(self, replay: Union[str, Path, pd.DataFrame], speed: Optional[float] = None,
+                 time_scale: float = 0.0, max_tickers: Optional[int] = None, **kwargs):
+        """
+        Args:
+            replay: Replay data (see load_replay)
+            speed: Replay seconds per simulated second (None = everything on first sleep)
+            time_scale: Multiplier applied to real sleeping (0 = do not wait)
+            max_tickers: Simultaneous market-data lines allowed (None = unlimited)
+        """
+        super().__init__(time_scale=time_scale, **kwargs)
+        self.replay = load_replay(replay)
+        self.speed = speed
+        self.max_tickers = max_tickers
+        self.errorEvent = FakeEvent()
+        self._next_req_id = 1
+        self._position = 0
+        self._clock = self.replay['timestamp'].iloc[0] if len(self.replay) else None
+        self._bar_subscriptions = {}
+        self._tickers = {}
+
+    @property
+    def finished(self) -> bool:
+        return self._position >= len(self.replay)
+
+    def reqRealTimeBars(self, contract, barSize, whatToShow, useRTH, realTimeBarsOptions=()):
+        bars = FakeRealTimeBarList(contract)
+        self._bar_subscriptions.setdefault(contract.symbol, []).append(bars)
+        return bars
+
+    def cancelRealTimeBars(self, bars):
+        subscriptions = self._bar_subscriptions.get(bars.contract.symbol, [])
+        if bars in subscriptions:
+            subscriptions.remove(bars)
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False, regulatorySnapshot=False,
+                   mktDataOptions=()):
+        ticker = self._tickers.get(contract.symbol)
+        if ticker is None:
+            ticker = FakeTicker(contract)
+            req_id = self._next_req_id
+            self._next_req_id += 1
+            if self.max_tickers is not None and len(self._tickers) >= self.max_tickers:
+                # Rejected: the ticker exists but never receives data
+                self.errorEvent.emit(req_id, 101, 'Max number of tickers has been reached', contract)
+                return ticker
+            self._tickers[contract.symbol] = ticker
+        return ticker
+
+    def cancelMktData(self, contract):
+        self._tickers.pop(contract.symbol, None)
+
+    def sleep(self, seconds: float = 0):
+        super().sleep(seconds)
+        if self.finished:
+            return
+        if self.speed is None:
+            until = self.replay['timestamp'].iloc[-1]
+        else:
+            self._clock += pd.Timedelta(seconds=seconds * self.speed)
+            until = self._clock
+        while not self.finished and self.replay['timestamp'].iloc[self._position] <= until:
+            self._emit(self.replay.iloc[self._position])
+            self._position += 1
+
+    def _emit(self, row):
+        when = row['timestamp'].tz_localize('Europe/Paris').tz_convert('UTC').to_pydatetime()
+        symbol = row['symbol']
+
+        for bars in list(self._bar_subscriptions.get(symbol, [])):
+            bars.append(FakeRealTimeBar(when, row['open'], row['high'], row['low'], row['close'], row['volume']))
+            bars.updateEvent.emit(bars, True)
+
+        ticker = self._tickers.get(symbol)
+        if ticker is not None:
+            ticker.time = when
+            ticker.last = row['close']
+            ticker.lastSize = row['volume']
+            ticker.updateEvent.emit(ticker)
@@ -11,6 +11,14 @@ from dotenv import load_dotenv
 
 from backend.config import logger
 from backend.models import SessionLocal, Ticker as TickerModel, HistoricalData
+from backend.data_access import (
+    ensure_unique_bar_index, upsert_bars, notify_bars_changed,
+    record_bars_added, record_bars_updated, refresh_interval_stats, series_version
+)
+from backend import bar_store
+from backend.data_coverage import coverage_index
+from backend.ibkr_pacing import collect_many, plan_chunks
+from backend.contract_cache import contract_cache
 from sqlalchemy import and_
 
 # Constants for duplicated strings (S1192 fix)
@@ -167,6 +175,8 @@ class IBKRCollector:
         
         Tries to qualify with multiple exchanges and currencies to handle both US and European stocks.
         Supports both symbol and ISIN lookup - ISIN is faster for European stocks.
+        Qualified contracts are cached (backend/contract_cache.py): after the first
+        hit, no qualification round-trip is made until the cache entry expires.
         
         Args:
             symbol: Stock symbol (e.g., 'AAPL', 'TTE', 'WLN')
@@ -194,7 +204,14 @@ class IBKRCollector:
                 logger.error("Symbol must be provided")
                 return None
             
-            # Check if this is a known European stock
+            # Already qualified recently? No round-trip at all
+            requested_currency = currency
+            cached = contract_cache.lookup(symbol, exchange, currency, isin)
+            if cached and contract_cache.is_fresh(cached):
+                logger.debug(f"Contract from cache: {symbol} conId={cached['con_id']} ({cached['primary_exchange']})")
+                return contract_cache.to_contract(cached)
+            
+            # Check if this is a known European stock (seed: exchange/currency known up front)
             european_stock = self.EUROPEAN_STOCKS.get(symbol.upper())
             if european_stock and exchange == 'SMART':
                 # For known European stocks with SMART routing, use SMART (don't force exchange)
@@ -205,6 +222,17 @@ class IBKRCollector:
                 # Create contract with SMART exchange to avoid direct routing restrictions
                 try:
                     contract = Stock(symbol, 'SMART', currency)
+                    # Single qualification to learn conId / primary exchange for the cache
+                    try:
+                        contracts = self.ib.qualifyContracts(contract)
+                        if contracts and contract_cache.store(symbol, exchange, requested_currency, contracts[0], isin):
+                            logger.info(f"Contract qualified and cached: {symbol} on SMART/{currency}")
+                            return contracts[0]
+                    except Exception as e:
+                        logger.debug(f"Could not qualify {symbol} on SMART/{currency}: {e}")
+                    if cached:
+                        logger.warning(f"Using cached contract for {symbol} (re-qualification failed)")
+                        return contract_cache.to_contract(cached)
                     logger.info(f"Contract created (unqualified): {symbol} on SMART/{currency}")
                     # Return unqualified contract - IBKR validates on placeOrder
                     return contract
@@ -241,7 +269,7 @@ class IBKRCollector:
                     # Check timeout
                     if time.time() - start_time > timeout_seconds:
                         logger.warning(f"Timeout ({timeout_seconds}s) reached while qualifying contract for {symbol}")
-                        return None
+                        return contract_cache.to_contract(cached) if cached else None
                     
                     try:
                         contract = Stock(symbol, ex, curr)
@@ -257,6 +285,7 @@ class IBKRCollector:
                                 if contracts:
                                     qualified = contracts[0]
                                     logger.info(f"Contract qualified: {qualified.symbol} on {qualified.primaryExchange} (exchange: {qualified.exchange}, currency: {qualified.currency})")
+                                    contract_cache.store(symbol, exchange, requested_currency, qualified, isin)
                                     return qualified
                                 else:
                                     logger.debug(f"Exchange {ex}, currency {curr} - no contracts found for {symbol}")
@@ -274,6 +303,10 @@ class IBKRCollector:
                         logger.debug(f"Exception in get_contract for {ex}/{curr}/{symbol}: {e}")
                         continue
             
+            if cached:
+                logger.warning(f"Could not re-qualify {symbol}, using cached contract (conId={cached['con_id']})")
+                return contract_cache.to_contract(cached)
+            
             logger.warning(f"Could not qualify contract for {symbol} on any exchange/currency combination")
             return None
                 
@@ -289,7 +322,8 @@ class IBKRCollector:
         what_to_show: str = 'TRADES',
         use_rth: bool = False,
         exchange: str = 'SMART',
-        currency: str = None
+        currency: str = None,
+        end_date: Optional[datetime] = None
     ) -> Optional[pd.DataFrame]:
         """
         Get historical data for a symbol
@@ -302,6 +336,7 @@ class IBKRCollector:
             use_rth: Use regular trading hours only
             exchange: Exchange
             currency: Currency (None to auto-detect - tries USD first, then EUR)
+            end_date: End of the requested window (None = now)
         
         Returns:
             DataFrame with OHLCV data or None
@@ -318,9 +353,10 @@ class IBKRCollector:
             logger.info(f"Requesting historical data: {symbol} - {duration} - {bar_size}")
             
             # Request historical data
+            end_datetime = end_date.strftime('%Y%m%d %H:%M:%S') + ' Europe/Paris' if end_date else ''
             bars = self.ib.reqHistoricalData(
                 contract,
-                endDateTime='',
+                endDateTime=end_datetime,
                 durationStr=duration,
                 barSizeSetting=bar_size,
                 whatToShow=what_to_show,
@@ -361,6 +397,23 @@ class IBKRCollector:
             logger.error(f"Error getting historical data for {symbol}: {e}")
             return None
     
+    def _gap_duration(self, start_date: datetime, end_date: datetime) -> str:
+        """
+        Smallest IBKR duration string covering [start_date, end_date]
+
+        Intraday gaps use seconds ('N S', max 1 day) so only the hole is requested.
+        """
+        seconds = int((end_date - start_date).total_seconds()) + 1
+        if seconds < 86400:
+            return f"{max(seconds, 60)} S"
+
+        gap_days = (end_date - start_date).days + 1
+        if gap_days < 7:
+            return f"{gap_days} D"
+        elif gap_days < 30:
+            return f"{-(-gap_days // 7)} W"
+        return f"{-(-gap_days // 30)} M"
+    
     def _parse_duration_to_days(self, duration: str) -> int:
         """
         Convert IBKR duration string to number of days
@@ -456,97 +509,30 @@ class IBKRCollector:
             if num_chunks > 100:
                 logger.warning(f"⚠️ Very large request: {num_chunks} chunks (~{time_estimate}). Data will be collected and saved progressively.")
             
-            all_data = []
-            end_date = datetime.now()
-            
-            for chunk_idx in range(num_chunks):
-                # Update progress
-                if progress_callback:
-                    progress_callback(chunk_idx + 1, num_chunks)
-                
-                # Calculate chunk duration
-                remaining_days = requested_days - (chunk_idx * max_chunk_days)
-                chunk_days = min(max_chunk_days, remaining_days)
-                
-                # Format duration string
-                if chunk_days < 7:
-                    chunk_duration = f"{chunk_days} D"
-                elif chunk_days < 30:
-                    chunk_duration = f"{chunk_days // 7} W"
-                else:
-                    chunk_duration = f"{chunk_days // 30} M"
-                
-                logger.info(f"📦 Chunk {chunk_idx + 1}/{num_chunks}: {chunk_duration} ending at {end_date.strftime('%Y-%m-%d')}")
-                
-                # Request chunk
-                if not self.connected:
-                    if not self.connect():
-                        logger.error("Failed to connect to IBKR")
-                        break
-                
-                contract = self.get_contract(symbol, exchange, currency)
-                if not contract:
-                    logger.error(f"Failed to get contract for {symbol}")
-                    break
-                
-                try:
-                    # Format date for IBKR with timezone to avoid Warning 2174
-                    # Use TIMEZONE_PARIS timezone for European stocks
-                    end_datetime = end_date.strftime('%Y%m%d %H:%M:%S') + TIMEZONE_PARIS
-                    
-                    bars = self.ib.reqHistoricalData(
-                        contract,
-                        endDateTime=end_datetime,
-                        durationStr=chunk_duration,
-                        barSizeSetting=bar_size,
-                        whatToShow=what_to_show,
-                        useRTH=use_rth,
-                        formatDate=1,
-                        timeout=120  # Increase timeout to 120 seconds for large requests
-                    )
-                    
-                    if bars:
-                        df_chunk = util.df(bars)
-                        if not df_chunk.empty:
-                            logger.info(f"✅ Chunk {chunk_idx + 1}: {len(df_chunk)} bars")
-                            all_data.append(df_chunk)
-                            
-                            # Update end_date for next chunk
-                            if not df_chunk.empty:
-                                end_date = pd.to_datetime(df_chunk['date'].min())
-                        else:
-                            logger.warning(f"Empty chunk {chunk_idx + 1}")
-                    else:
-                        logger.warning(f"No data for chunk {chunk_idx + 1}")
-                    
-                    # Respect IBKR pacing (avoid too many requests)
-                    if chunk_idx < num_chunks - 1:
-                        self.ib.sleep(1)  # 1 second between requests
-                        
-                except Exception as e:
-                    logger.error(f"Error fetching chunk {chunk_idx + 1}: {e}")
-                    continue
-            
-            # Combine all chunks
-            if not all_data:
-                logger.warning(f"No data collected for {symbol}")
+            if not self.connected and not self.connect():
+                logger.error("Failed to connect to IBKR")
                 return None
             
-            df_combined = pd.concat(all_data, ignore_index=True)
+            contract = self.get_contract(symbol, exchange, currency)
+            if not contract:
+                logger.error(f"Failed to get contract for {symbol}")
+                return None
             
-            # Remove duplicates
-            df_combined = df_combined.drop_duplicates(subset=['date'], keep='first')
-            df_combined = df_combined.sort_values('date')
+            # Chunks have fixed end dates, so they are fetched concurrently and
+            # paced by the shared scheduler instead of a fixed pause between requests
+            job = {
+                'symbol': symbol,
+                'contract': contract,
+                'bar_size': bar_size,
+                'what_to_show': what_to_show,
+                'use_rth': use_rth,
+                'chunks': plan_chunks(datetime.now(), requested_days, max_chunk_days),
+            }
+            df_combined = self.ib.run(collect_many(self.ib, [job], progress_callback=progress_callback))[symbol]
             
-            # Rename columns
-            df_combined = df_combined.rename(columns={
-                'date': 'timestamp',
-                'open': 'open',
-                'high': 'high',
-                'low': 'low',
-                'close': 'close',
-                'volume': 'volume'
-            })
+            if df_combined.empty:
+                logger.warning(f"No data collected for {symbol}")
+                return None
             
             # Ensure timestamp is datetime
             if not isinstance(df_combined['timestamp'].iloc[0], datetime):
@@ -560,6 +546,70 @@ class IBKRCollector:
             logger.error(f"Error in chunked historical data collection: {e}")
             return None
     
+    def collect_multiple_tickers(
+        self,
+        symbols: List[str],
+        duration: str = '1 M',
+        bar_size: str = TIMEFRAME_1MIN,
+        interval: str = '1min',
+        what_to_show: str = 'TRADES',
+        use_rth: bool = False,
+        progress_callback=None
+    ) -> Dict[str, Dict]:
+        """
+        Collect and save several tickers over this single connection
+
+        Every chunk of every ticker is queued at once; the shared pacing
+        scheduler keeps several requests in flight while honouring IBKR's
+        historical data limits. Each ticker is saved as soon as all its
+        chunks are in.
+        
+        Args:
+            symbols: Stock symbols
+            duration: Duration string per ticker (e.g., '1 M')
+            bar_size: IBKR bar size
+            interval: Interval for database storage
+            what_to_show: Data type
+            use_rth: Use regular trading hours only
+            progress_callback: Optional callback(completed_chunks, total_chunks)
+        
+        Returns:
+            Dict symbol -> save_to_database result
+        """
+        if not self.connected and not self.connect():
+            return {symbol: {'success': False, 'error': 'Failed to connect to IBKR'} for symbol in symbols}
+        
+        requested_days = self._parse_duration_to_days(duration)
+        chunk_days = self.IBKR_LIMITS.get(bar_size, {}).get('chunk_days', requested_days) or requested_days
+        end_date = datetime.now()
+        
+        results = {}
+        jobs = []
+        for symbol in symbols:
+            contract = self.get_contract(symbol)
+            if not contract:
+                results[symbol] = {'success': False, 'error': f'Contract not found for {symbol}'}
+                continue
+            jobs.append({
+                'symbol': symbol,
+                'contract': contract,
+                'bar_size': bar_size,
+                'what_to_show': what_to_show,
+                'use_rth': use_rth,
+                'chunks': plan_chunks(end_date, requested_days, chunk_days),
+            })
+        
+        logger.info(f"📊 Collecting {len(jobs)} tickers: {sum(len(j['chunks']) for j in jobs)} requests @ {bar_size}")
+        
+        def save(symbol: str, df: pd.DataFrame):
+            if df.empty:
+                results[symbol] = {'success': False, 'error': ERROR_NO_DATA}
+                return
+            results[symbol] = self.save_to_database(symbol, df, interval)
+        
+        self.ib.run(collect_many(self.ib, jobs, on_symbol_done=save, progress_callback=progress_callback))
+        return results
+    
     def get_data_coverage(self, symbol: str, interval: str, start_date: datetime, end_date: datetime) -> Dict:
         """
         Get data coverage for a symbol/interval in the specified date range
@@ -582,8 +632,6 @@ class IBKRCollector:
         """
         db = SessionLocal()
         try:
-            from sqlalchemy import func
-            
             # Get ticker
             ticker = db.query(TickerModel).filter(TickerModel.symbol == symbol).first()
             if not ticker:
@@ -596,64 +644,8 @@ class IBKRCollector:
                     'is_complete': False
                 }
             
-            # Get date range and count
-            result = db.query(
-                func.min(HistoricalData.timestamp).label('first'),
-                func.max(HistoricalData.timestamp).label('last'),
-                func.count(HistoricalData.id).label('count')
-            ).filter(
-                and_(
-                    HistoricalData.ticker_id == ticker.id,
-                    HistoricalData.interval == interval,
-                    HistoricalData.timestamp >= start_date,
-                    HistoricalData.timestamp <= end_date
-                )
-            ).first()
-            
-            if not result.count or result.count == 0:
-                return {
-                    'has_data': False,
-                    'first_date': None,
-                    'last_date': None,
-                    'total_records': 0,
-                    'missing_ranges': [{'start': start_date, 'end': end_date}],
-                    'is_complete': False
-                }
-            
-            first_date = result.first
-            last_date = result.last
-            total_records = result.count
-            
-            # Calculate missing ranges
-            missing_ranges = []
-            
-            # Missing at the beginning?
-            if first_date > start_date:
-                missing_ranges.append({
-                    'start': start_date,
-                    'end': first_date - timedelta(days=1)
-                })
-            
-            # Missing at the end?
-            if last_date < end_date:
-                missing_ranges.append({
-                    'start': last_date + timedelta(days=1),
-                    'end': end_date
-                })
-            
-            # Check for gaps in the middle (simplified - could be enhanced)
-            # For now, we assume continuous data between first and last
-            
-            is_complete = len(missing_ranges) == 0
-            
-            return {
-                'has_data': True,
-                'first_date': first_date,
-                'last_date': last_date,
-                'total_records': total_records,
-                'missing_ranges': missing_ranges,
-                'is_complete': is_complete
-            }
+            # Internal gaps come from the cached coverage index (session calendar aware)
+            return coverage_index.coverage(db, ticker.id, interval, start_date, end_date)
             
         except Exception as e:
             logger.error(f"Error getting data coverage: {e}", exc_info=True)
@@ -736,30 +728,12 @@ class IBKRCollector:
             ticker = db.query(TickerModel).filter(TickerModel.symbol == symbol).first()
             if not ticker:
                 return None
-            
-            # Fetch source data
-            source_data = db.query(HistoricalData).filter(
-                and_(
-                    HistoricalData.ticker_id == ticker.id,
-                    HistoricalData.interval == source_interval,
-                    HistoricalData.timestamp >= start_date,
-                    HistoricalData.timestamp <= end_date
-                )
-            ).order_by(HistoricalData.timestamp).all()
-            
-            if not source_data:
+
+            # Fetch source data (Parquet store when it matches the database)
+            df = bar_store.load_bars(db, ticker.id, symbol, source_interval, start_date, end_date)
+            if df.empty:
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'timestamp': row.timestamp,
-                'open': row.open,
-                'high': row.high,
-                'low': row.low,
-                'close': row.close,
-                'volume': row.volume
-            } for row in source_data])
-            
             # Calculate aggregation factor
             source_seconds = self.INTERVAL_SECONDS[source_interval]
             target_seconds = self.INTERVAL_SECONDS[target_interval]
@@ -819,7 +793,8 @@ class IBKRCollector:
         df: pd.DataFrame,
         interval: str,
         name: str = None,
-        progress_callback=None
+        progress_callback=None,
+        bulk: bool = True
     ) -> Dict[str, any]:
         """
         Save historical data to database
@@ -830,6 +805,8 @@ class IBKRCollector:
             interval: Interval string (e.g., '1min', '1h', '1day')
             name: Stock name (optional)
             progress_callback: Optional callback function(current, total) for progress updates
+            bulk: Use batched INSERT ... ON CONFLICT statements (falls back to
+                row-by-row when the unique bar index cannot be created)
 
         Returns:
             Dict with success status and statistics
@@ -872,85 +849,21 @@ class IBKRCollector:
                 db.refresh(ticker)
                 logger.info(f"Created new ticker: {symbol}")
 
-            # Save historical data
-            new_records = 0
-            updated_records = 0
-            skipped_records = 0  # Track records that are identical (no update needed)
-            total_rows = len(df)
-            errors = []
-
-            for idx, (_, row) in enumerate(df.iterrows()):
-                try:
-                    # Update progress
-                    if progress_callback:
-                        progress_callback(idx + 1, total_rows)
-
-                    # Validate row data
-                    try:
-                        timestamp = pd.to_datetime(row['timestamp'])
-                        open_price = float(row['open'])
-                        high_price = float(row['high'])
-                        low_price = float(row['low'])
-                        close_price = float(row['close'])
-                        volume_val = int(row['volume'])
-                    except (ValueError, TypeError) as e:
-                        errors.append(f"Row {idx}: Invalid data types - {e}")
-                        continue
-
-                    # Check if record exists
-                    existing = db.query(HistoricalData).filter(
-                        and_(
-                            HistoricalData.ticker_id == ticker.id,
-                            HistoricalData.timestamp == timestamp,
-                            HistoricalData.interval == interval
-                        )
-                    ).first()
-
-                    if existing:
-                        # Check if data has changed before updating
-                        if (existing.open == open_price and
-                            existing.high == high_price and
-                            existing.low == low_price and
-                            existing.close == close_price and
-                            existing.volume == volume_val):
-                            # Data identical - skip update
-                            skipped_records += 1
-                        else:
-                            # Data changed - update record
-                            existing.open = open_price
-                            existing.high = high_price
-                            existing.low = low_price
-                            existing.close = close_price
-                            existing.volume = volume_val
-                            updated_records += 1
-                    else:
-                        # Create new record
-                        new_record = HistoricalData(
-                            ticker_id=ticker.id,
-                            timestamp=timestamp,
-                            open=open_price,
-                            high=high_price,
-                            low=low_price,
-                            close=close_price,
-                            volume=volume_val,
-                            interval=interval
-                        )
-                        db.add(new_record)
-                        new_records += 1
-
-                    # Commit every 1000 records to avoid memory issues
-                    if (new_records + updated_records + skipped_records) % 1000 == 0:
-                        db.commit()
-                        logger.info(f"Committed {new_records + updated_records}/{total_rows} records ({skipped_records} skipped)")
-
-                except Exception as e:
-                    error_msg = f"Row {idx}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
+            stamp = series_version(db, ticker.id, interval)
+            if bulk and ensure_unique_bar_index(db):
+                counts = upsert_bars(db, ticker.id, interval, df, progress_callback=progress_callback)
+                new_records = counts['new_records']
+                updated_records = counts['updated_records']
+                skipped_records = counts['skipped_records']
+                errors = counts['errors']
+            else:
+                new_records, updated_records, skipped_records, errors = self._save_rows_individually(
+                    db, ticker, df, interval, progress_callback
+                )
 
-            # Final commit
-            db.commit()
+            bar_store.append_bars(db, ticker.id, symbol, interval, df, stamp)
+            coverage_index.record_saved(db, ticker.id, interval, df['timestamp'].min(), df['timestamp'].max(),
+                                        stamp_before=stamp)
 
             result = {
                 'success': True,
@@ -981,6 +894,102 @@ class IBKRCollector:
         
         finally:
             db.close()
+
+    def _save_rows_individually(self, db, ticker, df: pd.DataFrame, interval: str, progress_callback=None) -> tuple:
+        """
+        Row-by-row save (one SELECT per bar), used when bulk upsert is unavailable
+
+        Returns:
+            Tuple (new_records, updated_records, skipped_records, errors)
+        """
+        new_records = 0
+        updated_records = 0
+        skipped_records = 0  # Track records that are identical (no update needed)
+        total_rows = len(df)
+        errors = []
+
+        for idx, (_, row) in enumerate(df.iterrows()):
+            try:
+                # Update progress
+                if progress_callback:
+                    progress_callback(idx + 1, total_rows)
+
+                # Validate row data
+                try:
+                    timestamp = pd.to_datetime(row['timestamp'])
+                    open_price = float(row['open'])
+                    high_price = float(row['high'])
+                    low_price = float(row['low'])
+                    close_price = float(row['close'])
+                    volume_val = int(row['volume'])
+                except (ValueError, TypeError) as e:
+                    errors.append(f"Row {idx}: Invalid data types - {e}")
+                    continue
+
+                # Check if record exists
+                existing = db.query(HistoricalData).filter(
+                    and_(
+                        HistoricalData.ticker_id == ticker.id,
+                        HistoricalData.timestamp == timestamp,
+                        HistoricalData.interval == interval
+                    )
+                ).first()
+
+                if existing:
+                    # Check if data has changed before updating
+                    if (existing.open == open_price and
+                        existing.high == high_price and
+                        existing.low == low_price and
+                        existing.close == close_price and
+                        existing.volume == volume_val):
+                        # Data identical - skip update
+                        skipped_records += 1
+                    else:
+                        # Data changed - update record
+                        existing.open = open_price
+                        existing.high = high_price
+                        existing.low = low_price
+                        existing.close = close_price
+                        existing.volume = volume_val
+                        updated_records += 1
+                else:
+                    # Create new record
+                    new_record = HistoricalData(
+                        ticker_id=ticker.id,
+                        timestamp=timestamp,
+                        open=open_price,
+                        high=high_price,
+                        low=low_price,
+                        close=close_price,
+                        volume=volume_val,
+                        interval=interval
+                    )
+                    db.add(new_record)
+                    new_records += 1
+
+                # Commit every 1000 records to avoid memory issues
+                if (new_records + updated_records + skipped_records) % 1000 == 0:
+                    db.commit()
+                    logger.info(f"Committed {new_records + updated_records}/{total_rows} records ({skipped_records} skipped)")
+
+            except Exception as e:
+                error_msg = f"Row {idx}: {e}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                continue
+
+        # Final commit (rejected rows may lie at the batch bounds: recount the series then)
+        if errors:
+            refresh_interval_stats(db, ticker.id, interval)
+        elif new_records:
+            record_bars_added(db, ticker.id, interval, new_records, df['timestamp'].min(), df['timestamp'].max())
+        elif updated_records:
+            record_bars_updated(db, ticker.id, interval)
+        db.commit()
+        if new_records or updated_records:
+            notify_bars_changed(ticker.id, interval)
+
+        return new_records, updated_records, skipped_records, errors
     
     def _collect_gap_from_ibkr(
         self,
@@ -1014,7 +1023,7 @@ class IBKRCollector:
             
             if bar_size not in self.IBKR_LIMITS:
                 # Fallback for unknown bar size
-                df = self.get_historical_data(symbol, duration_str, bar_size)
+                df = self.get_historical_data(symbol, duration_str, bar_size, end_date=end_date)
                 if df is None or df.empty:
                     return {'success': False, 'error': ERROR_NO_DATA}
                 return self.save_to_database(symbol, df, interval, name, progress_callback)
@@ -1025,7 +1034,7 @@ class IBKRCollector:
             # If within limits, single request
             if gap_days <= max_chunk_days:
                 logger.info(f"Gap within IBKR limits ({gap_days} <= {max_chunk_days} days), single request")
-                df = self.get_historical_data(symbol, duration_str, bar_size)
+                df = self.get_historical_data(symbol, duration_str, bar_size, end_date=end_date)
                 if df is None or df.empty:
                     return {'success': False, 'error': ERROR_NO_DATA}
                 return self.save_to_database(symbol, df, interval, name, progress_callback)
@@ -1238,12 +1247,7 @@ class IBKRCollector:
                     logger.info(f"📦 Gap {gap_idx + 1}/{len(coverage['missing_ranges'])}: {gap_start.date()} → {gap_end.date()} ({gap_days} days)")
                     
                     # Convert gap to duration string for IBKR
-                    if gap_days < 7:
-                        gap_duration = f"{gap_days} D"
-                    elif gap_days < 30:
-                        gap_duration = f"{gap_days // 7} W"
-                    else:
-                        gap_duration = f"{gap_days // 30} M"
+                    gap_duration = self._gap_duration(gap_start, gap_end)
                     
                     # Query IBKR for this gap using standard chunking logic
                     # (Keep existing chunking logic but applied to the gap only)
@@ -1589,8 +1593,8 @@ class IBKRCollector:
                 logger.warning("[get_current_market_price] Failed to connect with temporary connection")
                 return None
             
-            # Create a fresh Stock contract
-            contract = Stock(symbol, 'SMART', currency)
+            # Qualified contract from the cache, else a fresh Stock contract
+            contract = contract_cache.cached_contract(symbol, 'SMART', currency) or Stock(symbol, 'SMART', currency)
             logger.info(f"[get_current_market_price] Contract created: {contract}")
             
             # Request 1 day of historical data
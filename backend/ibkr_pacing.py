@@ -0,0 +1,316 @@
+"""
+IBKR historical data pacing scheduler
+
+Lets several reqHistoricalData requests run concurrently (across tickers and
+chunks) on one ib_insync connection while respecting the historical data
+pacing rules. For bar sizes of 30 seconds or less (hard limits):
+    - no identical request within 15 seconds
+    - no more than 5 requests for the same contract within 2 seconds
+    - no more than 60 requests within any 10 minute window
+Larger bars only have soft limits: identical requests are still spaced and
+the number of requests in flight is capped.
+Source: https://interactivebrokers.github.io/tws-api/historical_limitations.html
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from backend.config import logger
+from backend.market_calendar import interval_to_seconds
+
+HIST_MAX_REQUESTS = 60
+HIST_WINDOW_SECONDS = 600
+CONTRACT_MAX_REQUESTS = 5
+CONTRACT_WINDOW_SECONDS = 2
+IDENTICAL_REQUEST_SECONDS = 15
+MAX_IN_FLIGHT = 6
+# Bar sizes up to this duration are subject to the hard pacing limits
+STRICT_PACING_MAX_BAR_SECONDS = 30
+
+BAR_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class PacingScheduler:
+    """
+    Central admission control for historical data requests
+
+    The 60-per-10-minutes budget is kept as a sliding window of request
+    times (a refilling bucket would let up to twice the budget through in
+    one window). All collectors of a process should share one instance,
+    see get_pacing_scheduler().
+    """
+
+    def __init__(
+        self,
+        max_requests: int = HIST_MAX_REQUESTS,
+        window_seconds: float = HIST_WINDOW_SECONDS,
+        contract_max_requests: int = CONTRACT_MAX_REQUESTS,
+        contract_window_seconds: float = CONTRACT_WINDOW_SECONDS,
+        identical_seconds: float = IDENTICAL_REQUEST_SECONDS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_requests: Requests allowed per window (all contracts)
+            window_seconds: Global window length
+            contract_max_requests: Requests allowed per contract window
+            contract_window_seconds: Per-contract window length
+            identical_seconds: Minimum delay between two identical requests
+            max_in_flight: Requests allowed to wait for an answer at the same time
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.contract_max_requests = contract_max_requests
+        self.contract_window_seconds = contract_window_seconds
+        self.identical_seconds = identical_seconds
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+
+        self._sent: Deque[float] = deque()
+        self._sent_by_contract: Dict[str, Deque[float]] = {}
+        self._last_identical: Dict[tuple, float] = {}
+
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.requests_sent = 0
+        self.total_wait = 0.0
+
+    def delay_for(self, contract_key: str, request_key: tuple, now: Optional[float] = None,
+                  strict: bool = True) -> float:
+        """
+        Seconds to wait before this request may be sent (0 = send now)
+
+        Args:
+            contract_key: Contract identity (conId or symbol/exchange/currency)
+            request_key: Full request identity (contract, end, duration, bar size, ...)
+            now: Current clock value (default: self.clock())
+            strict: Apply the small-bar limits (global window and per-contract)
+        """
+        now = self.clock() if now is None else now
+
+        while self._sent and now - self._sent[0] >= self.window_seconds:
+            self._sent.popleft()
+        contract_sent = self._sent_by_contract.get(contract_key)
+        if contract_sent:
+            while contract_sent and now - contract_sent[0] >= self.contract_window_seconds:
+                contract_sent.popleft()
+
+        delay = 0.0
+        if strict and len(self._sent) >= self.max_requests:
+            delay = max(delay, self._sent[-self.max_requests] + self.window_seconds - now)
+        if strict and contract_sent and len(contract_sent) >= self.contract_max_requests:
+            delay = max(delay, contract_sent[-self.contract_max_requests] + self.contract_window_seconds - now)
+        last = self._last_identical.get(request_key)
+        if last is not None:
+            delay = max(delay, last + self.identical_seconds - now)
+        return max(delay, 0.0)
+
+    def record(self, contract_key: str, request_key: tuple, now: Optional[float] = None,
+               strict: bool = True):
+        """Register a request as sent"""
+        now = self.clock() if now is None else now
+        if strict:
+            self._sent.append(now)
+            self._sent_by_contract.setdefault(contract_key, deque()).append(now)
+        self._last_identical[request_key] = now
+        self.requests_sent += 1
+
+        # Forget identical-request stamps that can no longer delay anything
+        if len(self._last_identical) > 4 * self.max_requests:
+            cutoff = now - self.identical_seconds
+            self._last_identical = {k: t for k, t in self._last_identical.items() if t > cutoff}
+
+    def _primitives(self) -> Tuple[asyncio.Lock, asyncio.Semaphore]:
+        # asyncio primitives are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._lock, self._slots
+
+    async def acquire(self, contract_key: str, request_key: tuple, strict: bool = True):
+        """Wait for an in-flight slot and for the pacing rules to allow the request"""
+        lock, slots = self._primitives()
+        await slots.acquire()
+        try:
+            while True:
+                # Sleep outside the lock: a request held back by its own contract
+                # or identical-request rule must not block other contracts
+                async with lock:
+                    delay = self.delay_for(contract_key, request_key, strict=strict)
+                    if delay <= 0:
+                        self.record(contract_key, request_key, strict=strict)
+                        return
+                self.total_wait += delay
+                await asyncio.sleep(delay)
+        except BaseException:
+            slots.release()
+            raise
+
+    def release(self):
+        """Free the in-flight slot taken by acquire()"""
+        if self._slots is not None:
+            self._slots.release()
+
+
+_scheduler: Optional[PacingScheduler] = None
+
+
+def get_pacing_scheduler() -> PacingScheduler:
+    """Process-wide scheduler shared by all collectors"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PacingScheduler()
+    return _scheduler
+
+
+def contract_key(contract) -> str:
+    """Pacing identity of a contract"""
+    con_id = getattr(contract, 'conId', 0)
+    if con_id:
+        return str(con_id)
+    return f"{contract.symbol}/{getattr(contract, 'exchange', '')}/{getattr(contract, 'currency', '')}"
+
+
+def format_end_datetime(end_date: datetime) -> str:
+    """endDateTime in the format used by the collectors (explicit Paris time zone)"""
+    return end_date.strftime('%Y%m%d %H:%M:%S') + ' Europe/Paris'
+
+
+def plan_chunks(end_date: datetime, requested_days: int, chunk_days: int) -> List[Tuple[datetime, str]]:
+    """
+    Split a request into independent chunks so they can be fetched concurrently
+
+    Returns:
+        List of (chunk end, duration string), most recent first
+    """
+    chunks = []
+    remaining = requested_days
+    chunk_end = end_date
+    while remaining > 0:
+        days = min(chunk_days, remaining)
+        chunks.append((chunk_end, f"{days} D"))
+        chunk_end = chunk_end - timedelta(days=days)
+        remaining -= days
+    return chunks
+
+
+def bars_to_frame(bars) -> pd.DataFrame:
+    """ib_insync BarDataList -> OHLCV DataFrame"""
+    return pd.DataFrame(
+        [(b.date, b.open, b.high, b.low, b.close, b.volume) for b in bars],
+        columns=BAR_COLUMNS
+    )
+
+
+async def fetch_historical(
+    ib,
+    contract,
+    end_date: Optional[datetime],
+    duration: str,
+    bar_size: str,
+    what_to_show: str = 'TRADES',
+    use_rth: bool = False,
+    scheduler: Optional[PacingScheduler] = None,
+    timeout: float = 120
+) -> pd.DataFrame:
+    """
+    One paced reqHistoricalDataAsync call
+
+    Returns:
+        OHLCV DataFrame (empty if IBKR returned nothing)
+    """
+    scheduler = scheduler or get_pacing_scheduler()
+    end_datetime = format_end_datetime(end_date) if end_date else ''
+    key = contract_key(contract)
+    request_key = (key, end_datetime, duration, bar_size, what_to_show, use_rth)
+
+    bar_seconds = interval_to_seconds(bar_size)
+    strict = bar_seconds is None or bar_seconds <= STRICT_PACING_MAX_BAR_SECONDS
+
+    await scheduler.acquire(key, request_key, strict)
+    try:
+        bars = await ib.reqHistoricalDataAsync(
+            contract,
+            endDateTime=end_datetime,
+            durationStr=duration,
+            barSizeSetting=bar_size,
+            whatToShow=what_to_show,
+            useRTH=use_rth,
+            formatDate=1,
+            timeout=timeout
+        )
+    finally:
+        scheduler.release()
+
+    if not bars:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    return bars_to_frame(bars)
+
+
+async def collect_many(
+    ib,
+    jobs: List[Dict],
+    scheduler: Optional[PacingScheduler] = None,
+    on_symbol_done: Optional[Callable[[str, pd.DataFrame], None]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch every chunk of every job concurrently under one pacing scheduler
+
+    Args:
+        ib: Connected ib_insync IB (or a stand-in with reqHistoricalDataAsync)
+        jobs: Dicts with 'symbol', 'contract', 'chunks' [(end, duration)], 'bar_size'
+              and optional 'what_to_show' / 'use_rth'
+        scheduler: Pacing scheduler (default: process-wide one)
+        on_symbol_done: Called with (symbol, DataFrame) once all chunks of a symbol are in
+        progress_callback: Called with (completed_chunks, total_chunks)
+
+    Returns:
+        Dict symbol -> combined DataFrame (sorted, duplicates removed)
+    """
+    scheduler = scheduler or get_pacing_scheduler()
+    total = sum(len(job['chunks']) for job in jobs)
+    completed = 0
+
+    async def run_job(job: Dict) -> Tuple[str, pd.DataFrame]:
+        async def run_chunk(end_date, duration):
+            nonlocal completed
+            try:
+                df = await fetch_historical(
+                    ib, job['contract'], end_date, duration, job['bar_size'],
+                    job.get('what_to_show', 'TRADES'), job.get('use_rth', False), scheduler
+                )
+            except Exception as e:
+                logger.error(f"Chunk {job['symbol']} {duration} ending {end_date}: {e}")
+                df = pd.DataFrame(columns=BAR_COLUMNS)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+            return df
+
+        frames = await asyncio.gather(*(run_chunk(end, duration) for end, duration in job['chunks']))
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            df = (pd.concat(frames, ignore_index=True)
+                  .drop_duplicates(subset='timestamp', keep='first')
+                  .sort_values('timestamp')
+                  .reset_index(drop=True))
+        else:
+            df = pd.DataFrame(columns=BAR_COLUMNS)
+
+        if on_symbol_done:
+            on_symbol_done(job['symbol'], df)
+        return job['symbol'], df
+
+    results = await asyncio.gather(*(run_job(job) for job in jobs))
+    return dict(results)
@@ -0,0 +1,446 @@
+"""
+Multiplexed live market data
+
+One background thread owns one IBKR connection and carries every live
+subscription of the process: each watched symbol gets a reqMktData line
+(trade ticks) and, while the account allows it, a 5-second reqRealTimeBars
+subscription. Updates land in a per-symbol latest-tick table and are
+published on the price bus (backend/price_bus.py), so watching 30 symbols
+costs one connection and one event loop instead of 30 threads.
+
+Subscriptions are reference-counted by owner (a page, a Celery task, an
+auto-trader session...) and capped by the account limits in IBKR_CONFIG:
+symbols beyond 'market_data_lines' wait in a FIFO queue and are activated
+as soon as a line is released; beyond 'max_realtime_bars' a symbol gets
+ticks only. If TWS still refuses a line (error 101) the cap is lowered to
+what it actually accepted.
+
+A failed or dropped connection is retried with exponential backoff and the
+watched symbols are subscribed again once it is back. While it is down,
+`connected` is cleared and `last_error` says why, so callers can poll
+historical data instead.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from backend.config import logger, IBKR_CONFIG
+from backend.models import SessionLocal
+from backend.contract_cache import contract_cache
+from backend.price_bus import PriceBus, price_bus, make_event, MinuteBarWriter
+
+try:
+    from ib_insync import IB, Stock
+    IBKR_AVAILABLE = True
+except ImportError:
+    IBKR_AVAILABLE = False
+
+# TWS error: "Max number of tickers has been reached"
+MAX_TICKERS_ERROR = 101
+
+# Subscription states reported by status()
+STREAMING = 'streaming'  # ticks + real-time bars
+TICKS_ONLY = 'ticks'     # real-time bar cap reached
+PENDING = 'pending'      # waiting for a market-data line
+
+
+def _price(value) -> Optional[float]:
+    """IBKR ticker field to float, None for missing values (nan / -1 / 0)"""
+    if value is None or value != value or value <= 0:
+        return None
+    return float(value)
+
+
+class _Subscription:
+    """IBKR handles of one active symbol (only touched by the service thread)"""
+    __slots__ = ('contract', 'ticker', 'on_ticker', 'bars', 'on_bars')
+
+    def __init__(self, contract, ticker, on_ticker):
+        self.contract = contract
+        self.ticker = ticker
+        self.on_ticker = on_ticker
+        self.bars = None
+        self.on_bars = None
+
+
+class LiveDataService:
+    """Single-connection live data for many symbols"""
+
+    def __init__(self, bus: PriceBus = price_bus, host: Optional[str] = None, port: Optional[int] = None,
+                 client_id: Optional[int] = None, max_lines: Optional[int] = None,
+                 max_realtime_bars: Optional[int] = None, ib_factory: Optional[Callable] = None,
+                 session_factory: Callable = SessionLocal, write_bars: bool = True,
+                 poll_interval: float = 0.2, reconnect_delay: float = 2.0, max_reconnect_delay: float = 60.0):
+        """
+        Args:
+            bus: Price bus receiving ticks and bars
+            host, port, client_id: IBKR connection (defaults from IBKR_CONFIG)
+            max_lines: Market-data lines the service may use
+            max_realtime_bars: Real-time bar subscriptions the service may use
+            ib_factory: Builds the IB instance (injectable for tests, e.g. ReplayIB)
+            session_factory: Session factory for the 1-minute bar writer
+            write_bars: Store 1-minute bars in historical_data while running
+            poll_interval: Seconds the event loop runs between two subscription updates
+            reconnect_delay: Seconds before the first reconnection attempt (doubled after each failure)
+            max_reconnect_delay: Upper bound of the reconnection delay
+        """
+        self.bus = bus
+        self.host = host or IBKR_CONFIG['host']
+        self.port = port or IBKR_CONFIG['port']
+        self.client_id = client_id if client_id is not None else IBKR_CONFIG.get('live_client_id', 202)
+        self.max_lines = max_lines if max_lines is not None else IBKR_CONFIG.get('market_data_lines', 100)
+        self.max_realtime_bars = (max_realtime_bars if max_realtime_bars is not None
+                                  else IBKR_CONFIG.get('max_realtime_bars', 50))
+        self.ib_factory = ib_factory
+        self.session_factory = session_factory
+        self.write_bars = write_bars
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.ib = None
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.last_error: Optional[str] = None  # Why the connection is down, None while connected
+        self.reconnects = 0
+        self._stopping = threading.Event()
+
+        self._lock = threading.Lock()
+        self._owners: Dict[str, set] = {}  # symbol -> owners, in request order
+        self._changed = threading.Event()
+        self._active: Dict[str, _Subscription] = {}
+        self._rejected: List[str] = []
+        self._ticks: Dict[str, Dict] = {}
+
+    # Public API (any thread) -----------------------------------------------
+
+    def start(self) -> bool:
+        """
+        Start the service thread (connects to IBKR)
+
+        Returns:
+            True if started, False if already running
+        """
+        if self.running:
+            return False
+        self.running = True
+        self.connected.clear()
+        self._stopping.clear()
+        self.last_error = None
+        self._changed.set()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="LiveDataService")
+        self.thread.start()
+        logger.info(f"📡 Live data service starting (clientId={self.client_id}, {self.max_lines} lines)")
+        return True
+
+    def stop(self) -> bool:
+        """Cancel every subscription, disconnect and stop the thread"""
+        if not self.running:
+            return False
+        self.running = False
+        self._stopping.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+        return True
+
+    def wait_connected(self, timeout: float = 10.0) -> bool:
+        """Block until the IBKR connection is up (False on timeout)"""
+        return self.connected.wait(timeout)
+
+    def subscribe(self, symbols, owner: str = 'default'):
+        """
+        Watch one or several symbols
+
+        Args:
+            symbols: Symbol or iterable of symbols
+            owner: Who needs the data; a symbol stays subscribed while any owner watches it
+        """
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        with self._lock:
+            for symbol in symbols:
+                self._owners.setdefault(symbol.upper(), set()).add(owner)
+        self._changed.set()
+
+    def unsubscribe(self, symbols: Optional[Iterable[str]] = None, owner: str = 'default'):
+        """
+        Stop watching symbols for an owner (symbols=None: everything it watches)
+
+        The IBKR subscription is cancelled once no owner is left.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        with self._lock:
+            targets = list(self._owners) if symbols is None else [s.upper() for s in symbols]
+            for symbol in targets:
+                owners = self._owners.get(symbol)
+                if owners is None:
+                    continue
+                owners.discard(owner)
+                if not owners:
+                    del self._owners[symbol]
+        self._changed.set()
+
+    def symbols(self) -> List[str]:
+        """Watched symbols, in request order"""
+        with self._lock:
+            return list(self._owners)
+
+    def status(self) -> Dict[str, str]:
+        """Symbol -> STREAMING / TICKS_ONLY / PENDING"""
+        with self._lock:
+            wanted = list(self._owners)
+            active = {s: (STREAMING if sub.bars is not None else TICKS_ONLY)
+                      for s, sub in list(self._active.items())}
+        return {symbol: active.get(symbol, PENDING) for symbol in wanted}
+
+    def latest(self, symbol: str) -> Optional[Dict]:
+        """Latest tick of a symbol (copy), None if nothing received yet"""
+        with self._lock:
+            tick = self._ticks.get(symbol.upper())
+            return dict(tick) if tick else None
+
+    def snapshot(self) -> pd.DataFrame:
+        """Latest-tick table of every watched symbol, one row per symbol"""
+        status = self.status()
+        with self._lock:
+            rows = [dict(self._ticks.get(symbol) or {'symbol': symbol}, status=state)
+                    for symbol, state in status.items()]
+        return pd.DataFrame(rows)
+
+    # Service thread ---------------------------------------------------------
+
+    def _connect(self) -> bool:
+        if self.ib_factory is not None:
+            self.ib = self.ib_factory()
+        elif IBKR_AVAILABLE:
+            self.ib = IB()
+        else:
+            logger.error("[LiveData] ib_insync library not installed")
+            self.last_error = "ib_insync not installed"
+            return False
+
+        logger.info(f"[LiveData] Connecting to IBKR {self.host}:{self.port} (clientId={self.client_id})...")
+        try:
+            self.ib.connect(self.host, self.port, clientId=self.client_id)
+        except Exception as e:
+            logger.error(f"[LiveData] Failed to connect to IBKR: {e}")
+            self.last_error = f"connection failed: {e}"
+            return False
+        for _ in range(20):  # 4 seconds max
+            if self.ib.isConnected():
+                break
+            time.sleep(0.2)
+        if not self.ib.isConnected():
+            logger.error("[LiveData] Failed to connect to IBKR")
+            self.last_error = "connection failed"
+            return False
+
+        if hasattr(self.ib, 'errorEvent'):
+            self.ib.errorEvent += self._on_error
+        if hasattr(self.ib, 'updatePortfolioEvent'):
+            self.ib.updatePortfolioEvent += self._on_portfolio
+        self.last_error = None
+        self.connected.set()
+        logger.info("[LiveData] ✅ Connected")
+        return True
+
+    def _run(self):
+        # ib_insync needs an event loop in this thread
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        writer = None
+        delay = self.reconnect_delay
+        try:
+            if self.write_bars:
+                writer = MinuteBarWriter(self.bus, session_factory=self.session_factory)
+                writer.start()
+
+            while self.running:
+                if self._connect():
+                    delay = self.reconnect_delay
+                    self._stream()
+                self._disconnect()
+                if not self.running:
+                    break
+                logger.warning(f"[LiveData] Reconnecting in {delay:.0f}s ({self.last_error})")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                self.reconnects += 1
+
+        except Exception as e:
+            logger.error(f"[LiveData] Fatal error: {e}", exc_info=True)
+            self._disconnect()
+
+        finally:
+            if writer:
+                writer.stop()
+            self.running = False
+            logger.info("[LiveData] Service stopped")
+
+    def _stream(self):
+        """Serve subscriptions until the service stops or the connection drops"""
+        # Every watched symbol is (re)subscribed on a fresh connection
+        self._changed.set()
+        try:
+            while self.running and self.ib.isConnected():
+                if self._changed.is_set():
+                    self._changed.clear()
+                    self._reconcile()
+                # Let ib_insync process incoming messages (callbacks run here)
+                self.ib.sleep(self.poll_interval)
+                if self._rejected:
+                    self._reconcile()
+        except Exception as e:
+            logger.error(f"[LiveData] Streaming error: {e}", exc_info=True)
+            self.last_error = f"streaming error: {e}"
+            return
+        if self.running:
+            logger.warning("[LiveData] ⚠️ Connection to IBKR lost")
+            self.last_error = "connection lost"
+
+    def _disconnect(self):
+        """Cancel the subscriptions still open and close the connection"""
+        self.connected.clear()
+        if self.ib is None:
+            return
+        if self.ib.isConnected():
+            for symbol in list(self._active):
+                self._cancel(symbol)
+        with self._lock:
+            self._active.clear()
+        self._rejected = []
+        try:
+            self.ib.disconnect()
+        except Exception:
+            pass
+
+    def _reconcile(self):
+        """Bring IBKR subscriptions in line with the watched symbols and the caps"""
+        # Lines refused by TWS: drop them and never ask for more than what was accepted
+        if self._rejected:
+            rejected, self._rejected = self._rejected, []
+            for symbol in rejected:
+                if symbol in self._active:
+                    self._cancel(symbol)
+            if len(self._active) < self.max_lines:
+                logger.warning(f"[LiveData] ⚠️ IBKR refused market data beyond {len(self._active)} lines")
+                self.max_lines = len(self._active)
+
+        with self._lock:
+            wanted = list(self._owners)
+
+        for symbol in [s for s in self._active if s not in wanted]:
+            self._cancel(symbol)
+
+        for symbol in wanted:
+            if len(self._active) >= self.max_lines:
+                break
+            if symbol not in self._active:
+                self._activate(symbol)
+
+        # Real-time bars for active symbols, first come first served
+        bar_count = sum(1 for sub in self._active.values() if sub.bars is not None)
+        for symbol in wanted:
+            sub = self._active.get(symbol)
+            if sub is None or sub.bars is not None:
+                continue
+            if bar_count >= self.max_realtime_bars:
+                break
+            sub.on_bars = partial(self._on_realtime_bars, symbol)
+            sub.bars = self.ib.reqRealTimeBars(sub.contract, 5, 'TRADES', False)
+            sub.bars.updateEvent += sub.on_bars
+            bar_count += 1
+
+        pending = len(wanted) - len(self._active)
+        if pending > 0:
+            logger.info(f"[LiveData] {len(self._active)} symbol(s) streaming, {pending} waiting for a market-data line")
+
+    def _activate(self, symbol: str):
+        contract = contract_cache.cached_contract(symbol) or Stock(symbol, 'SMART', 'EUR')
+        on_ticker = partial(self._on_ticker, symbol)
+        ticker = self.ib.reqMktData(contract, '', False, False)
+        ticker.updateEvent += on_ticker
+        with self._lock:
+            self._active[symbol] = _Subscription(contract, ticker, on_ticker)
+        logger.debug(f"[LiveData] Subscribed to {symbol}")
+
+    def _cancel(self, symbol: str):
+        with self._lock:
+            sub = self._active.pop(symbol, None)
+        if sub is None:
+            return
+        try:
+            sub.ticker.updateEvent -= sub.on_ticker
+            self.ib.cancelMktData(sub.contract)
+            if sub.bars is not None:
+                sub.bars.updateEvent -= sub.on_bars
+                self.ib.cancelRealTimeBars(sub.bars)
+        except Exception as e:
+            logger.debug(f"[LiveData] Error cancelling {symbol}: {e}")
+
+    # Callbacks (service thread) ---------------------------------------------
+
+    def _update_tick(self, symbol: str, **values):
+        with self._lock:
+            tick = self._ticks.setdefault(symbol, {'symbol': symbol, 'updates': 0})
+            tick.update(values)
+            tick['updates'] += 1
+
+    def _on_ticker(self, symbol: str, ticker):
+        """reqMktData callback: refresh the tick table and publish the last trade"""
+        price = _price(ticker.last)
+        if price is None:
+            return
+        event = make_event(symbol, ticker.time or datetime.now(), price)
+        self._update_tick(
+            symbol,
+            timestamp=event['timestamp'],
+            last=price,
+            bid=_price(getattr(ticker, 'bid', None)),
+            ask=_price(getattr(ticker, 'ask', None)),
+            open=_price(getattr(ticker, 'open', None)),
+            high=_price(getattr(ticker, 'high', None)),
+            low=_price(getattr(ticker, 'low', None)),
+            close=_price(getattr(ticker, 'close', None)),
+            volume=_price(getattr(ticker, 'volume', None)) or 0,
+            source='market_data',
+        )
+        self.bus.publish(event)
+
+    def _on_realtime_bars(self, symbol: str, bars, has_new_bar: bool):
+        """reqRealTimeBars callback: publish the new 5-second bar"""
+        if not has_new_bar or not bars:
+            return
+        bar = bars[-1]
+        self.bus.publish(make_event(
+            symbol, bar.time, bar.close, bar.open_, bar.high, bar.low, bar.volume, kind='bar'
+        ))
+
+    def _on_portfolio(self, item):
+        """Portfolio prices fill the table for watched symbols without market data"""
+        symbol = item.contract.symbol
+        price = _price(item.marketPrice)
+        if price is None:
+            return
+        with self._lock:
+            if symbol not in self._owners:
+                return
+            tick = self._ticks.get(symbol)
+            if tick and tick.get('source') == 'market_data':
+                return
+        self._update_tick(symbol, timestamp=datetime.now(), last=price, source='portfolio')
+
+    def _on_error(self, req_id, error_code, error_string, contract=None):
+        if error_code == MAX_TICKERS_ERROR and contract is not None:
+            logger.warning(f"[LiveData] ⚠️ {contract.symbol}: {error_string}")
+            self._rejected.append(contract.symbol)
+
+
+# One service (IBKR connection + 1-minute bar writer) per process; Celery workers
+# switch it to their own clientId (backend/live_data_task.py)
+live_data_service = LiveDataService()
@@ -1,11 +1,9 @@
 """
 Celery task for live data collection and streaming
 """
-from datetime import datetime, timedelta
 from backend.celery_config import celery_app
-from backend.models import SessionLocal, Ticker as TickerModel, HistoricalData
-from backend.config import logger
-from backend.ibkr_collector import IBKRCollector
+from backend.config import logger, IBKR_CONFIG
+from backend.live_data_service import live_data_service
 import time
 import json
 import redis
@@ -20,13 +18,30 @@ except Exception:
     logger.warning("[Live Task] Redis not available for live data caching")
 
 
+def worker_client_id() -> int:
+    """
+    Live-data clientId of this worker process
+
+    The Streamlit app has its own (IBKR_CONFIG['live_client_id']); prefork
+    pool processes are numbered, so each one gets base + index.
+    """
+    try:
+        from billiard.process import current_process
+        index = getattr(current_process(), 'index', None) or 0
+    except ImportError:
+        index = 0
+    return IBKR_CONFIG.get('worker_live_client_id', 210) + index
+
+
 @celery_app.task(bind=True)
 def stream_live_data_continuous(self, symbol: str, duration: int = 300):
     """
     Stream live data from IBKR to Redis for a specific symbol
     Runs in background and updates Redis cache every second
     
-    Uses portfolio prices as fallback if market data subscription fails
+    All tasks of a worker process share the live data service (one IBKR
+    connection, one subscription per symbol); portfolio prices are used as
+    fallback when the market data subscription delivers nothing.
     
     Args:
         symbol: Stock symbol (e.g., 'WLN')
@@ -35,112 +50,57 @@ def stream_live_data_continuous(self, symbol: str, duration: int = 300):
     Returns:
         Dictionary with collection summary
     """
+    owner = f"celery:{getattr(self.request, 'id', None) or symbol}"
+    service = live_data_service
     try:
         logger.info(f"[Stream] Starting live stream for {symbol} (duration: {duration}s)")
         
-        # Initialize collector with dedicated client_id for Celery tasks
-        collector = IBKRCollector(client_id=2)  # Use client_id=2 for Celery live data tasks
-        if not collector.connect():
+        if not service.running:
+            service.client_id = worker_client_id()
+        service.start()
+        if not service.wait_connected(timeout=10):
             logger.error(f"[Stream] Failed to connect to IBKR for {symbol}")
             return {'success': False, 'error': 'IBKR connection failed'}
         
-        # Get contract - this now tries SBF first for EUR stocks
-        contract = collector.get_contract(symbol)
-        if not contract:
-            logger.error(f"[Stream] Contract not found for {symbol}")
-            collector.disconnect()
-            return {'success': False, 'error': f'Contract not found for {symbol}'}
-        
-        logger.info(f"[Stream] Contract: {contract.symbol} on exchange={contract.exchange} (primaryExchange={contract.primaryExchange})")
-        
-        # Try to get market data, but fall back to portfolio if subscription fails
-        logger.info(f"[Stream] Requesting market data for {symbol}")
-        ticker_data = collector.ib.reqMktData(contract, '', False, False)
+        service.subscribe(symbol, owner=owner)
         
         # Stream data
         collected_count = 0
         start_time = time.time()
         redis_key = f"live_data:{symbol}"
         last_price = None
-        use_portfolio_fallback = False
-        
-        # Initial wait to let IBKR send delayed data (longer for delayed data)
-        logger.info("[Stream] Waiting for market data to arrive (delayed data may take 2-5 seconds)...")
-        wait_count = 0
-        for _ in range(15):  # Wait up to 7.5 seconds for delayed data
-            if ticker_data.last > 0 or ticker_data.close > 0:
-                logger.info(f"[Stream] ✅ Got market data for {symbol} after {wait_count*0.5:.1f}s")
-                break
-            wait_count += 1
-            collector.ib.sleep(0.5)
-        else:
-            logger.warning(f"[Stream] ⚠️ Market data not available for {symbol}, will use portfolio prices as fallback")
-            use_portfolio_fallback = True
         
         while time.time() - start_time < duration:
-            try:
-                # Get price - try market data first, then portfolio
-                price = None
+            tick = service.latest(symbol)
+            
+            # Always update Redis if we have a price (not just on change)
+            if tick and tick.get('last'):
+                price = tick['last']
+                data_point = {
+                    'symbol': symbol,
+                    'timestamp': tick['timestamp'].isoformat(),
+                    'price': price,
+                    'open': tick.get('open') or price,
+                    'high': tick.get('high') or price,
+                    'low': tick.get('low') or price,
+                    'close': tick.get('close') or price,
+                    'volume': tick.get('volume') or 0,
+                    'bid': tick.get('bid') or price,
+                    'ask': tick.get('ask') or price,
+                }
                 
-                if use_portfolio_fallback:
-                    # Use portfolio prices as fallback
+                # Store in Redis with 60 second TTL - always update
+                if redis_client:
                     try:
-                        portfolio = collector.ib.portfolio()
-                        for item in portfolio:
-                            if item.contract.symbol == symbol:
-                                price = item.marketPrice
-                                # Removed verbose debug - only log on price change
-                                break
+                        redis_client.setex(redis_key, 60, json.dumps(data_point))
+                        if price != last_price:
+                            logger.info(f"[Stream] {symbol}: {price}€ (updated)")
+                            collected_count += 1
+                        last_price = price
                     except Exception as e:
-                        pass  # Silently continue on portfolio error
-                else:
-                    # Use market data
-                    price = ticker_data.last if ticker_data.last > 0 else ticker_data.close
-                
-                # Always update Redis if we have a price (not just on change)
-                if price and price > 0:
-                    data_point = {
-                        'symbol': symbol,
-                        'timestamp': datetime.now().isoformat(),
-                        'price': price,
-                        'open': ticker_data.open if ticker_data.open > 0 else price,
-                        'high': ticker_data.high if ticker_data.high > 0 else price,
-                        'low': ticker_data.low if ticker_data.low > 0 else price,
-                        'close': ticker_data.close if ticker_data.close > 0 else price,
-                        'volume': ticker_data.volume if ticker_data.volume > 0 else 0,
-                        'bid': ticker_data.bid if ticker_data.bid > 0 else price,
-                        'ask': ticker_data.ask if ticker_data.ask > 0 else price,
-                    }
-                    
-                    # Store in Redis with 60 second TTL - always update
-                    if redis_client:
-                        try:
-                            redis_client.setex(
-                                redis_key,
-                                60,  # TTL
-                                json.dumps(data_point)
-                            )
-                            if price != last_price:
-                                logger.info(f"[Stream] {symbol}: {price}€ (updated)")
-                                collected_count += 1
-                            last_price = price
-                        except Exception as e:
-                            logger.warning(f"[Stream] Redis error: {e}")
-                
-                # Wait before next check
-                collector.ib.sleep(0.2)  # Check more frequently (5 times per second)
+                        logger.warning(f"[Stream] Redis error: {e}")
             
-            except Exception as e:
-                logger.warning(f"[Stream] Error in loop: {e}")
-                continue
-        
-        # Cancel market data subscription
-        try:
-            collector.ib.cancelMktData(contract)
-        except Exception:
-            pass
-        
-        collector.disconnect()
+            time.sleep(0.2)  # Check 5 times per second
         
         logger.info(f"[Stream] Collected {collected_count} data points for {symbol}")
         
@@ -153,3 +113,7 @@ def stream_live_data_continuous(self, symbol: str, duration: int = 300):
     except Exception as e:
         logger.error(f"[Stream] Error: {e}", exc_info=True)
         return {'success': False, 'error': str(e)}
+    
+    finally:
+        # Release the subscription (cancelled once no other task watches the symbol)
+        service.unsubscribe(symbol, owner=owner)
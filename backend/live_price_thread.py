@@ -1,6 +1,17 @@
 """
 Background thread for collecting live market prices
 Runs independently from Streamlit and saves to database
+
+Two modes:
+    - 'stream' (default): the symbol is watched through the process-wide live
+      data service (backend/live_data_service.py), which owns the IBKR
+      connection, publishes every update on the price bus (backend/price_bus.py)
+      and runs the process's only MinuteBarWriter.
+    - 'poll': legacy loop re-downloading 1 D of 1-minute bars every interval,
+      on its own connection (IBKR_CONFIG['live_price_client_id']).
+
+A 'stream' collector switches to 'poll' when the service cannot connect or
+stops; connection drops are handled by the service itself (it reconnects).
 """
 import threading
 import time
@@ -10,8 +21,10 @@ from sqlalchemy.orm import Session
 from ib_insync import IB, Stock
 
 from backend.models import SessionLocal, Ticker, HistoricalData
-from backend.ibkr_collector import IBKRCollector
-from backend.config import logger
+from backend.contract_cache import contract_cache
+from backend.live_data_service import live_data_service
+from backend.data_access import ensure_unique_bar_index, merge_price, record_bars_added, record_bars_updated
+from backend.config import logger, IBKR_CONFIG
 
 
 class LivePriceCollector:
@@ -22,16 +35,19 @@ class LivePriceCollector:
         self.running = False
         self.symbol: Optional[str] = None
         self.interval = 1  # seconds between price collections (1 sec for real-time)
-        self.ib: Optional['IB'] = None  # Persistent connection for this thread
-        self.ticker = None  # Current market ticker object
+        self.ib: Optional['IB'] = None  # Connection of the 'poll' mode
+        self.mode = 'stream'
+        self.service = live_data_service  # Connection of the 'stream' mode, shared by the process
+        self._bulk: Optional[bool] = None  # Unique bar index available (checked once)
     
-    def start(self, symbol: str, interval: int = 3) -> bool:
+    def start(self, symbol: str, interval: int = 3, mode: str = 'stream') -> bool:
         """
         Start collecting live prices for a symbol
         
         Args:
             symbol: Stock symbol (e.g., 'TTE')
-            interval: Seconds between price collections (default: 3)
+            interval: Seconds between price collections in 'poll' mode (default: 3)
+            mode: 'stream' (IBKR subscriptions + price bus) or 'poll' (reqHistoricalData loop)
             
         Returns:
             True if started successfully
@@ -42,6 +58,7 @@ class LivePriceCollector:
         
         self.symbol = symbol
         self.interval = interval
+        self.mode = mode
         self.running = True
         
         # Start background thread
@@ -51,7 +68,7 @@ class LivePriceCollector:
             name=f"LivePriceCollector-{symbol}"
         )
         self.thread.start()
-        logger.info(f"Live price collector started for {symbol} (interval: {interval}s)")
+        logger.info(f"Live price collector started for {symbol} ({mode}, interval: {interval}s)")
         return True
     
     def stop(self) -> bool:
@@ -68,6 +85,12 @@ class LivePriceCollector:
     
     def _collect_prices(self):
         """Background thread function - runs continuously with persistent connection"""
+        if self.mode == 'stream':
+            if self._stream_prices() or not self.running:
+                return
+            logger.warning(f"[LivePriceCollector] Falling back to polling for {self.symbol}")
+            self.mode = 'poll'
+        
         db: Optional[Session] = None
         
         try:
@@ -75,9 +98,10 @@ class LivePriceCollector:
             db = SessionLocal()
             
             # Initialize persistent IBKR connection for real-time data
+            client_id = IBKR_CONFIG.get('live_price_client_id', 201)
             self.ib = IB()
-            logger.info("[LivePriceCollector] Connecting to IBKR (clientId=201)...")
-            self.ib.connect('127.0.0.1', 4002, clientId=201)
+            logger.info(f"[LivePriceCollector] Connecting to IBKR (clientId={client_id})...")
+            self.ib.connect('127.0.0.1', 4002, clientId=client_id)
             
             # Wait for connection
             for i in range(20):  # 4 seconds max
@@ -90,42 +114,8 @@ class LivePriceCollector:
                 logger.error("[LivePriceCollector] Failed to connect to IBKR")
                 return
             
-            logger.info(f"[LivePriceCollector] Starting price collection for {self.symbol}")
-            
-            # Loop and collect prices - SAME LOGIC AS DASHBOARD
-            while self.running:
-                try:
-                    # Create fresh contract (like dashboard)
-                    contract = Stock(self.symbol, 'SMART', 'EUR')
-                    
-                    # Request 1-sec bars for maximum frequency updates
-                    bars = self.ib.reqHistoricalData(
-                        contract,
-                        endDateTime='',
-                        durationStr='1 D',
-                        barSizeSetting='1 min',
-                        whatToShow='TRADES',
-                        useRTH=False,
-                        formatDate=1
-                    )
-                    
-                    if bars and len(bars) > 0:
-                        bar = bars[-1]
-                        price = bar.close
-                        date = bar.date
-                        
-                        # Save to database
-                        self._save_price_to_db(db, self.symbol, price)
-                        logger.info(f"[LivePriceCollector] {self.symbol}: {price}€ @ {date} saved to DB")
-                    else:
-                        logger.warning(f"[LivePriceCollector] No bars available for {self.symbol}")
-                    
-                    # Wait before next collection
-                    time.sleep(self.interval)
-                    
-                except Exception as e:
-                    logger.error(f"[LivePriceCollector] Error collecting price: {e}", exc_info=True)
-                    time.sleep(self.interval)
+            logger.info(f"[LivePriceCollector] Starting price collection for {self.symbol} ({self.mode})")
+            self._poll_prices(db)
         
         except Exception as e:
             logger.error(f"[LivePriceCollector] Fatal error: {e}", exc_info=True)
@@ -143,7 +133,76 @@ class LivePriceCollector:
                 db.close()
             
             logger.info(f"[LivePriceCollector] Thread ended for {self.symbol}")
+    
+    def _stream_prices(self) -> bool:
+        """
+        Watch the symbol through the live data service until stopped
 
+        Returns:
+            False if the service could not connect or stopped (the caller polls instead)
+        """
+        if not self.running:
+            return True
+        
+        owner = f"live_price_thread:{self.symbol}"
+        try:
+            self.service.start()
+            if not self.service.wait_connected(timeout=10):
+                logger.error(f"[LivePriceCollector] Live data service not connected to IBKR ({self.service.last_error})")
+                return False
+            self.service.subscribe(self.symbol, owner=owner)
+            logger.info(f"[LivePriceCollector] Streaming {self.symbol} (clientId={self.service.client_id})")
+            while self.running:
+                if not self.service.running:
+                    logger.error("[LivePriceCollector] Live data service stopped")
+                    return False
+                time.sleep(0.2)
+            return True
+        except Exception as e:
+            logger.error(f"[LivePriceCollector] Fatal error: {e}", exc_info=True)
+            return True
+        finally:
+            # The subscription is cancelled once no other owner watches the symbol
+            self.service.unsubscribe(self.symbol, owner=owner)
+            logger.info(f"[LivePriceCollector] Thread ended for {self.symbol}")
+    
+    def _poll_prices(self, db: Session):
+        """Legacy polling loop: download the day's 1-minute bars and keep the last close"""
+        # Loop and collect prices - SAME LOGIC AS DASHBOARD
+        while self.running:
+            try:
+                # Qualified contract from the cache, else a fresh one (like dashboard)
+                contract = contract_cache.cached_contract(self.symbol) or Stock(self.symbol, 'SMART', 'EUR')
+                
+                # Request 1-sec bars for maximum frequency updates
+                bars = self.ib.reqHistoricalData(
+                    contract,
+                    endDateTime='',
+                    durationStr='1 D',
+                    barSizeSetting='1 min',
+                    whatToShow='TRADES',
+                    useRTH=False,
+                    formatDate=1
+                )
+                
+                if bars and len(bars) > 0:
+                    bar = bars[-1]
+                    price = bar.close
+                    date = bar.date
+                    
+                    # Save to database
+                    self._save_price_to_db(db, self.symbol, price)
+                    logger.info(f"[LivePriceCollector] {self.symbol}: {price}€ @ {date} saved to DB")
+                else:
+                    logger.warning(f"[LivePriceCollector] No bars available for {self.symbol}")
+                
+                # Wait before next collection
+                time.sleep(self.interval)
+                
+            except Exception as e:
+                logger.error(f"[LivePriceCollector] Error collecting price: {e}", exc_info=True)
+                time.sleep(self.interval)
+    
     def _save_price_to_db(self, db: Session, symbol: str, price: float) -> bool:
         """Save price to database with 1-minute interval for live trading"""
         try:
@@ -165,6 +224,14 @@ class LivePriceCollector:
             now = datetime.now()
             current_minute = now.replace(second=0, microsecond=0)
             
+            if self._bulk is None:
+                self._bulk = ensure_unique_bar_index(db)
+            if self._bulk:
+                # Single conflict-handling statement, no existence SELECT
+                merge_price(db, ticker.id, '1min', current_minute, price)
+                db.commit()
+                return True
+            
             existing_record = db.query(HistoricalData).filter(
                 HistoricalData.ticker_id == ticker.id,
                 HistoricalData.interval == '1min',
@@ -176,6 +243,7 @@ class LivePriceCollector:
                 existing_record.high = max(existing_record.high, price)
                 existing_record.low = min(existing_record.low, price)
                 existing_record.close = price
+                record_bars_updated(db, ticker.id, '1min')
                 db.commit()
             else:
                 # Create new 1-minute record
@@ -190,6 +258,7 @@ class LivePriceCollector:
                     volume=0
                 )
                 db.add(new_record)
+                record_bars_added(db, ticker.id, '1min', 1, current_minute, current_minute)
                 db.commit()
             
             return True
@@ -203,9 +272,9 @@ class LivePriceCollector:
 _live_collector = LivePriceCollector()
 
 
-def start_live_price_collection(symbol: str, interval: int = 3) -> bool:
-    """Start live price collection for a symbol"""
-    return _live_collector.start(symbol, interval)
+def start_live_price_collection(symbol: str, interval: int = 3, **kwargs) -> bool:
+    """Start live price collection for a symbol (kwargs: mode='stream' or 'poll')"""
+    return _live_collector.start(symbol, interval, **kwargs)
 
 
 def stop_live_price_collection() -> bool:
@@ -0,0 +1,155 @@
+"""
+Euronext Paris trading calendar
+
+Timestamps in historical_data are naive Europe/Paris wall-clock times (IBKR
+bars are requested with the TWS time zone), so the calendar works on naive
+local datetimes as well.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Regular continuous trading session (cash market)
+SESSION_OPEN = time(9, 0)
+SESSION_CLOSE = time(17, 30)
+# 24 and 31 December: early close
+EARLY_CLOSE = time(14, 5)
+
+SECONDS_PER_DAY = 86400
+
+_INTERVAL_UNITS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hour': 3600, 'hours': 3600,
+    'd': SECONDS_PER_DAY, 'day': SECONDS_PER_DAY, 'days': SECONDS_PER_DAY,
+    'w': 7 * SECONDS_PER_DAY, 'week': 7 * SECONDS_PER_DAY, 'weeks': 7 * SECONDS_PER_DAY,
+    'month': 30 * SECONDS_PER_DAY, 'months': 30 * SECONDS_PER_DAY,
+}
+
+
+def interval_to_seconds(interval: str) -> Optional[int]:
+    """
+    Bar duration of an interval string
+
+    Accepts database intervals ('1min', '5sec', '1h', '1day') as well as
+    IBKR bar sizes ('1 min', '5 secs', '1 hour', '1 day').
+
+    Returns:
+        Duration in seconds, or None if the interval is not recognized
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*([a-zA-Z]+)\s*', interval or '')
+    if not match:
+        return None
+    unit = _INTERVAL_UNITS.get(match.group(2).lower())
+    if unit is None:
+        return None
+    return int(match.group(1)) * unit
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=64)
+def euronext_holidays(year: int) -> frozenset:
+    """Euronext Paris market holidays for a year"""
+    easter = _easter_sunday(year)
+    return frozenset({
+        date(year, 1, 1),                # New Year's Day
+        easter - timedelta(days=2),      # Good Friday
+        easter + timedelta(days=1),      # Easter Monday
+        date(year, 5, 1),                # Labour Day
+        date(year, 12, 25),              # Christmas
+        date(year, 12, 26),              # Boxing Day
+    })
+
+
+def is_trading_day(day: date) -> bool:
+    """True for weekdays that are not Euronext holidays"""
+    return day.weekday() < 5 and day not in euronext_holidays(day.year)
+
+
+def session_bounds(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Regular session (open, close) for a day
+
+    Returns:
+        Tuple of naive local datetimes, or None if the market is closed
+    """
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if (day.month == 12 and day.day in (24, 31)) else SESSION_CLOSE
+    return datetime.combine(day, SESSION_OPEN), datetime.combine(day, close)
+
+
+def trading_days(start: date, end: date) -> List[date]:
+    """Trading days between start and end (inclusive)"""
+    days = []
+    day = start
+    while day <= end:
+        if is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def trading_seconds_between(start: datetime, end: datetime) -> float:
+    """Regular session time (seconds) inside [start, end)"""
+    if end <= start:
+        return 0.0
+    total = 0.0
+    for day in trading_days(start.date(), end.date()):
+        session_open, session_close = session_bounds(day)
+        lo = max(start, session_open)
+        hi = min(end, session_close)
+        if hi > lo:
+            total += (hi - lo).total_seconds()
+    return total
+
+
+def missing_session_range(after: datetime, before: datetime, bar_seconds: int,
+                          min_gap_seconds: float = 0) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Market time that should hold bars between two consecutive stored bars
+
+    Args:
+        after: Timestamp of the earlier stored bar
+        before: Timestamp of the later stored bar
+        bar_seconds: Bar duration
+        min_gap_seconds: Intraday holes shorter than this are ignored (thin trading)
+
+    Returns:
+        (start, end) of the missing range, or None if nothing is missing
+    """
+    if bar_seconds >= SECONDS_PER_DAY:
+        # Daily (or longer) bars: one bar per trading day
+        first_day = after.date() + timedelta(days=1)
+        last_day = before.date() - timedelta(days=1)
+        missing = trading_days(first_day, last_day)
+        if len(missing) * SECONDS_PER_DAY < bar_seconds:
+            return None
+        return datetime.combine(missing[0], time.min), datetime.combine(missing[-1], time.max)
+
+    start = after + timedelta(seconds=bar_seconds)
+    missing_seconds = trading_seconds_between(start, before)
+    if missing_seconds < max(bar_seconds, min_gap_seconds):
+        return None
+
+    # Tighten the range to the sessions that actually lack bars
+    days = [d for d in trading_days(start.date(), before.date())
+            if min(before, session_bounds(d)[1]) > max(start, session_bounds(d)[0])]
+    gap_start = max(start, session_bounds(days[0])[0])
+    gap_end = min(before, session_bounds(days[-1])[1])
+    return gap_start, gap_end
@@ -1,7 +1,7 @@
 """
 Database models and connection management
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Index, Enum
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Index, Enum, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, timezone
@@ -95,9 +95,33 @@ class Ticker(Base):
     
     # Relationships
     historical_data = relationship("HistoricalData", back_populates="ticker", cascade="all, delete-orphan")
+    interval_stats = relationship("TickerIntervalStats", cascade="all, delete-orphan")
     trades = relationship("Trade", back_populates="ticker")
 
 
+class QualifiedContract(Base):
+    """IBKR contract resolution cache (see backend/contract_cache.py)"""
+    __tablename__ = "contract_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # Lookup key: what the caller asked for
+    symbol = Column(String(10), nullable=False, index=True)
+    request_exchange = Column(String(20), nullable=False, default="SMART")
+    request_currency = Column(String(3), nullable=False, default="")  # '' = auto-detect
+    isin = Column(String(12), nullable=True, index=True)
+    # Qualified contract returned by IBKR
+    con_id = Column(Integer, nullable=False)
+    exchange = Column(String(20))
+    primary_exchange = Column(String(20))
+    currency = Column(String(3))
+    local_symbol = Column(String(20))
+    qualified_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', 'request_exchange', 'request_currency', name='uq_contract_cache_request'),
+    )
+
+
 class JobStatus(enum.Enum):
     """Data collection job status"""
     PENDING = "pending"
@@ -153,9 +177,9 @@ class HistoricalData(Base):
     """Historical price data"""
     __tablename__ = "historical_data"
     
-    id = Column(Integer, primary_key=True, index=True)
-    ticker_id = Column(Integer, ForeignKey(FK_TICKERS_ID), nullable=False, index=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    ticker_id = Column(Integer, ForeignKey(FK_TICKERS_ID), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
@@ -163,28 +187,41 @@ class HistoricalData(Base):
     volume = Column(Integer, nullable=False)
     interval = Column(String(10), default="1min")  # 1min, 5min, 1hour, etc.
     
-    # Technical indicators (computed and stored)
-    sma_20 = Column(Float)
-    sma_50 = Column(Float)
-    ema_12 = Column(Float)
-    ema_26 = Column(Float)
-    rsi_14 = Column(Float)
-    macd = Column(Float)
-    macd_signal = Column(Float)
-    macd_hist = Column(Float)
-    bb_upper = Column(Float)
-    bb_middle = Column(Float)
-    bb_lower = Column(Float)
+    # Indicator values are computed on the fly; cached ones live in
+    # compact_bar_indicators (backend/compact_bars.py)
     
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     # Relationships
     ticker = relationship("Ticker", back_populates="historical_data")
     
-    # Indexes for performance
+    # One row per bar (same name as database/schema.sql); the unique index also
+    # serves ticker_id lookups, idx_ticker_timestamp the scans without interval
     __table_args__ = (
         Index('idx_ticker_timestamp', 'ticker_id', 'timestamp'),
-        Index('idx_ticker_interval_timestamp', 'ticker_id', 'interval', 'timestamp'),
+        Index('idx_unique_historical_data', 'ticker_id', 'interval', 'timestamp', unique=True),
+    )
+
+
+class TickerIntervalStats(Base):
+    """
+    Summary of the bars stored per (ticker, interval)
+
+    Maintained by the writers (see backend/data_access.py) so that ticker
+    lists, counts and date bounds never scan historical_data.
+    """
+    __tablename__ = "ticker_interval_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker_id = Column(Integer, ForeignKey(FK_TICKERS_ID), nullable=False)
+    interval = Column(String(10), nullable=False)
+    bar_count = Column(Integer, nullable=False, default=0)
+    first_timestamp = Column(DateTime)
+    last_timestamp = Column(DateTime)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        UniqueConstraint('ticker_id', 'interval', name='uq_ticker_interval_stats'),
     )
 
 
@@ -412,6 +449,16 @@ def init_db():
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
+        
+        # Databases created before ticker_interval_stats existed. The unique bar
+        # index is created by the writers (ensure_unique_bar_index); databases
+        # holding duplicate bars need scripts/migrate_unique_bar_index.py first.
+        from backend.data_access import ensure_interval_stats
+        db = SessionLocal()
+        try:
+            ensure_interval_stats(db)
+        finally:
+            db.close()
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
         raise
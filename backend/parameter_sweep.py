@@ -0,0 +1,391 @@
+"""
+Parameter sweep for the SMA / RSI / Enhanced strategies
+
+Instead of backtesting random candidates one by one (each recomputing its
+own rolling means), the sweep:
+- computes every distinct indicator window once into a 2-D matrix
+  (period x bar), see IndicatorMatrix;
+- builds the signals of a whole batch of parameter combinations by
+  indexing that matrix, and scores them with a vectorized long-only
+  simulation (same entries, exits and commission as BacktestingEngine);
+- re-runs only the top_k combinations through BacktestingEngine.run for
+  the exact result (shorts, minimum hold time, trade list).
+
+Combinations come from a grid, random or Latin-hypercube sampler over an
+integer parameter space {name: (low, high)} (bounds inclusive).
+"""
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.backtesting_engine import (
+    BacktestingEngine, BacktestResult, Strategy,
+    SimpleMovingAverageStrategy, RSIStrategy, EnhancedMovingAverageStrategy
+)
+from backend.constants import CONST_CLOSE
+
+logger = logging.getLogger(__name__)
+
+# Signal cells (combinations x bars) evaluated per batch, bounds memory use
+BATCH_CELLS = 2 ** 22
+
+ParameterSpace = Dict[str, Tuple[int, int]]
+
+# Same ranges as StrategyGenerator. EnhancedMovingAverageStrategy.generate_signals
+# does not use its rsi_period, so it is not searched (it would only multiply the
+# combinations by ten identical copies).
+PARAMETER_SPACES: Dict[str, ParameterSpace] = {
+    'ma': {'fast_period': (5, 19), 'slow_period': (20, 49)},
+    'rsi': {'period': (10, 19), 'oversold': (20, 34), 'overbought': (65, 79)},
+    'enhanced': {'fast_period': (5, 19), 'slow_period': (20, 49)},
+}
+
+
+# Samplers -------------------------------------------------------------------
+
+def grid_samples(space: ParameterSpace, step: int = 1) -> np.ndarray:
+    """
+    Every combination of the space (one column per parameter, in space order)
+
+    Args:
+        space: {name: (low, high)}, bounds inclusive
+        step: Spacing between the values of each parameter
+    """
+    axes = [np.arange(low, high + 1, step) for low, high in space.values()]
+    return np.array(list(itertools.product(*axes)), dtype=np.int64).reshape(-1, len(axes))
+
+
+def random_samples(space: ParameterSpace, n: int, rng: np.random.Generator) -> np.ndarray:
+    """n combinations drawn uniformly (duplicates possible)"""
+    columns = [rng.integers(low, high + 1, n) for low, high in space.values()]
+    return np.column_stack(columns).astype(np.int64)
+
+
+def latin_hypercube_samples(space: ParameterSpace, n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    n combinations from a Latin hypercube
+
+    Each parameter range is cut into n strata and every stratum is used
+    exactly once, so the samples cover each axis evenly.
+    """
+    columns = []
+    for low, high in space.values():
+        unit = (rng.permutation(n) + rng.random(n)) / n
+        columns.append(np.minimum(low + np.floor(unit * (high - low + 1)), high))
+    return np.column_stack(columns).astype(np.int64)
+
+
+SAMPLERS = ('grid', 'random', 'lhs')
+
+
+def sample_parameters(space: ParameterSpace, sampler: str = 'grid', n_samples: Optional[int] = None,
+                      seed: Optional[int] = None, step: int = 1) -> np.ndarray:
+    """
+    Combinations to evaluate
+
+    Args:
+        space: {name: (low, high)}, bounds inclusive
+        sampler: 'grid', 'random' or 'lhs' (Latin hypercube)
+        n_samples: Number of combinations ('random' / 'lhs'; 'grid' keeps
+            a random subset of that size if given)
+        seed: Random seed
+        step: Grid spacing
+
+    Returns:
+        Array (combinations x parameters), in space order
+    """
+    rng = np.random.default_rng(seed)
+    if sampler == 'grid':
+        samples = grid_samples(space, step)
+        if n_samples is not None and n_samples < len(samples):
+            samples = samples[np.sort(rng.choice(len(samples), n_samples, replace=False))]
+        return samples
+    if n_samples is None:
+        raise ValueError(f"n_samples is required for the '{sampler}' sampler")
+    if sampler == 'random':
+        return random_samples(space, n_samples, rng)
+    if sampler == 'lhs':
+        return latin_hypercube_samples(space, n_samples, rng)
+    raise ValueError(f"Unknown sampler: {sampler}")
+
+
+def valid_combinations(strategy_type: str, params: np.ndarray) -> np.ndarray:
+    """Mask of the usable rows: fast period below slow period, oversold below overbought"""
+    if strategy_type == 'rsi':
+        return params[:, 1] < params[:, 2]
+    return params[:, 0] < params[:, 1]
+
+
+# Indicators -----------------------------------------------------------------
+
+class IndicatorMatrix:
+    """
+    One indicator computed for a set of periods, stored as a (period x bar) matrix
+
+    Each row is computed with the same pandas code as the strategies, so
+    signals built from the matrix are identical to generate_signals().
+    """
+
+    def __init__(self, values: np.ndarray, periods: Iterable[int]):
+        self.values = values
+        self.periods = [int(p) for p in periods]
+        self._rows = {p: i for i, p in enumerate(self.periods)}
+
+    @classmethod
+    def rolling_mean(cls, close: pd.Series, periods: Iterable[int]) -> 'IndicatorMatrix':
+        periods = sorted(set(int(p) for p in periods))
+        values = np.empty((len(periods), len(close)))
+        for i, period in enumerate(periods):
+            values[i] = close.rolling(window=period).mean().to_numpy()
+        return cls(values, periods)
+
+    @classmethod
+    def rsi(cls, close: pd.Series, periods: Iterable[int]) -> 'IndicatorMatrix':
+        periods = sorted(set(int(p) for p in periods))
+        delta = close.diff()
+        gains = delta.where(delta > 0, 0)
+        losses = -delta.where(delta < 0, 0)
+        values = np.empty((len(periods), len(close)))
+        for i, period in enumerate(periods):
+            rs = gains.rolling(window=period).mean() / losses.rolling(window=period).mean()
+            values[i] = (100 - (100 / (1 + rs))).to_numpy()
+        return cls(values, periods)
+
+    def rows(self, periods: np.ndarray) -> np.ndarray:
+        """Row index of each period"""
+        return np.array([self._rows[int(p)] for p in periods], dtype=np.int64)
+
+
+# Vectorized scoring ---------------------------------------------------------
+
+def score_signals(signals: np.ndarray, prices: np.ndarray, commission: float) -> Dict[str, np.ndarray]:
+    """
+    Long-only outcome of each row of a signal matrix
+
+    A position opens on a bar with signal 1 and closes on the next bar with
+    signal -1 (or on the last bar), like BacktestingEngine without shorts
+    and without minimum hold time.
+
+    Only the bars where a row's signal changes are extracted; entries and
+    exits are then found on that short list instead of on every bar.
+
+    Args:
+        signals: int8 matrix (combinations x bars), 1 = buy, -1 = sell
+        prices: Close price per bar
+        commission: Commission per trade side (decimal)
+
+    Returns:
+        Dict of arrays (one value per row): total_return (%), total_trades, winning_trades
+    """
+    n_rows, n = signals.shape
+    changed = np.empty((n_rows, n), dtype=bool)
+    changed[:, 0] = True
+    np.not_equal(signals[:, 1:], signals[:, :-1], out=changed[:, 1:])
+    positions = np.flatnonzero(changed)
+    values = signals.ravel()[positions]
+
+    # A 0 signal keeps the current position: only non-zero changes matter
+    nonzero = values != 0
+    positions, values = positions[nonzero], values[nonzero]
+    rows = positions // n
+    first_of_row = np.ones(len(rows), dtype=bool)
+    first_of_row[1:] = rows[1:] != rows[:-1]
+    previous = np.roll(values, 1)
+    previous[first_of_row] = 0
+
+    is_entry = (values == 1) & (previous != 1)
+    is_exit = (values == -1) & (previous == 1)
+    events = np.flatnonzero(is_entry | is_exit)
+    entries = events[is_entry[events]]
+    # Entries and exits alternate within a row: an entry's exit is the next
+    # event of the same row, otherwise the position is closed on the last bar
+    follower = np.searchsorted(events, entries) + 1
+    follower_event = events[np.minimum(follower, len(events) - 1)] if len(events) else entries
+    closed = (follower < len(events)) & (rows[follower_event] == rows[entries])
+    entry_rows = rows[entries]
+    entry_bars = positions[entries] - entry_rows * n
+    exit_bars = np.where(closed, positions[follower_event] - rows[follower_event] * n, n - 1)
+
+    factor = prices[exit_bars] / prices[entry_bars] * (1 - commission) - commission
+
+    total_trades = np.bincount(entry_rows, minlength=n_rows)
+    winning_trades = np.bincount(entry_rows, weights=factor > 1, minlength=n_rows).astype(np.int64)
+    growth = np.ones(n_rows)
+    traded = np.flatnonzero(total_trades)
+    if len(traded):
+        starts = np.concatenate(([0], np.cumsum(total_trades[traded])[:-1]))
+        growth[traded] = np.multiply.reduceat(factor, starts)
+    return {
+        'total_return': (growth - 1) * 100,
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+    }
+
+
+@dataclass
+class SweepResult:
+    """Outcome of a parameter sweep"""
+    strategy_type: str
+    scores: pd.DataFrame
+    top: List[Tuple[Strategy, BacktestResult]] = field(default_factory=list)
+
+    @property
+    def best_strategy(self) -> Optional[Strategy]:
+        return self.top[0][0] if self.top else None
+
+    @property
+    def best_result(self) -> Optional[BacktestResult]:
+        return self.top[0][1] if self.top else None
+
+
+class ParameterSweep:
+    """Evaluate many parameter combinations of one strategy type on one price series"""
+
+    STRATEGY_CLASSES = {
+        'ma': SimpleMovingAverageStrategy,
+        'rsi': RSIStrategy,
+        'enhanced': EnhancedMovingAverageStrategy,
+    }
+
+    def __init__(self, df: pd.DataFrame, engine: Optional[BacktestingEngine] = None,
+                 batch_cells: int = BATCH_CELLS):
+        """
+        Args:
+            df: DataFrame with OHLCV data
+            engine: Engine used for commission and for the final exact backtests
+            batch_cells: Signal cells (combinations x bars) built per batch
+        """
+        if df.empty:
+            raise ValueError("DataFrame is empty")
+        self.df = df
+        self.engine = engine or BacktestingEngine()
+        self.batch_cells = batch_cells
+        self.close = df[CONST_CLOSE]
+        self.prices = self.close.to_numpy(dtype=np.float64)
+
+    def _signals(self, strategy_type: str, params: np.ndarray, matrix: IndicatorMatrix,
+                 buffers: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> np.ndarray:
+        """
+        Signal matrix of a batch, identical to generate_signals() of each strategy
+
+        Rows are compared in place into preallocated buffers (no copy of the
+        indicator rows).
+        """
+        above, below, signals = (buffer[:len(params)] for buffer in buffers)
+        values = matrix.values
+        if strategy_type in ('ma', 'enhanced'):
+            fast_rows, slow_rows = matrix.rows(params[:, 0]), matrix.rows(params[:, 1])
+            for k in range(len(params)):
+                np.greater(values[fast_rows[k]], values[slow_rows[k]], out=above[k])
+                np.less(values[fast_rows[k]], values[slow_rows[k]], out=below[k])
+            # 1 when fast > slow, -1 when fast < slow
+            np.subtract(above.view(np.int8), below.view(np.int8), out=signals)
+        else:
+            rsi_rows = matrix.rows(params[:, 0])
+            for k, (oversold, overbought) in enumerate(params[:, 1:3]):
+                np.less(values[rsi_rows[k]], oversold, out=above[k])
+                np.greater(values[rsi_rows[k]], overbought, out=below[k])
+            # 1 when oversold, -1 when overbought
+            np.subtract(above.view(np.int8), below.view(np.int8), out=signals)
+        return signals
+
+    def evaluate(self, strategy_type: str, params: np.ndarray,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized scores of every combination
+
+        Args:
+            strategy_type: 'ma', 'rsi' or 'enhanced'
+            params: Array (combinations x parameters) in PARAMETER_SPACES order
+            progress_callback: Optional callback(evaluated, total)
+
+        Returns:
+            Dict of arrays: total_return, total_trades, winning_trades
+        """
+        if strategy_type not in self.STRATEGY_CLASSES:
+            raise ValueError(f"Unknown strategy type: {strategy_type}")
+        if strategy_type == 'rsi':
+            matrix = IndicatorMatrix.rsi(self.close, params[:, 0])
+        else:
+            matrix = IndicatorMatrix.rolling_mean(self.close, params[:, :2].ravel())
+
+        total = len(params)
+        scores = {'total_return': np.empty(total), 'total_trades': np.empty(total, dtype=np.int64),
+                  'winning_trades': np.empty(total, dtype=np.int64)}
+        batch = min(total, max(1, self.batch_cells // len(self.prices)))
+        shape = (batch, len(self.prices))
+        buffers = (np.empty(shape, dtype=bool), np.empty(shape, dtype=bool), np.empty(shape, dtype=np.int8))
+        for start in range(0, total, batch):
+            stop = min(start + batch, total)
+            signals = self._signals(strategy_type, params[start:stop], matrix, buffers)
+            for key, values in score_signals(signals, self.prices, self.engine.commission).items():
+                scores[key][start:stop] = values
+            if progress_callback:
+                progress_callback(stop, total)
+        return scores
+
+    @staticmethod
+    def make_strategy(strategy_type: str, values: Iterable[int]) -> Strategy:
+        """Strategy instance for one row of parameters"""
+        names = PARAMETER_SPACES[strategy_type]
+        kwargs = dict(zip(names, (int(v) for v in values)))
+        if strategy_type == 'ma':
+            return SimpleMovingAverageStrategy(fast=kwargs['fast_period'], slow=kwargs['slow_period'])
+        return ParameterSweep.STRATEGY_CLASSES[strategy_type](**kwargs)
+
+    def run(self, strategy_type: str = 'ma', sampler: str = 'grid', n_samples: Optional[int] = None,
+            space: Optional[ParameterSpace] = None, seed: Optional[int] = None, step: int = 1,
+            top_k: int = 10, symbol: str = "UNKNOWN",
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> SweepResult:
+        """
+        Sample, score and confirm the best combinations
+
+        Args:
+            strategy_type: 'ma', 'rsi' or 'enhanced'
+            sampler: 'grid', 'random' or 'lhs'
+            n_samples: Number of combinations (required for 'random' / 'lhs')
+            space: Parameter space (default PARAMETER_SPACES[strategy_type]), same keys and order
+            seed: Random seed of the sampler
+            step: Grid spacing
+            top_k: Combinations re-run with BacktestingEngine.run
+            symbol: Stock symbol for the results
+            progress_callback: Optional callback(evaluated, total)
+
+        Returns:
+            SweepResult (scores sorted by total_return, top sorted by exact total_return)
+        """
+        if strategy_type not in self.STRATEGY_CLASSES:
+            raise ValueError(f"Unknown strategy type: {strategy_type}")
+        space = space or PARAMETER_SPACES[strategy_type]
+        if list(space) != list(PARAMETER_SPACES[strategy_type]):
+            raise ValueError(f"Parameter space must define {list(PARAMETER_SPACES[strategy_type])}")
+
+        params = sample_parameters(space, sampler, n_samples, seed, step)
+        params = params[valid_combinations(strategy_type, params)]
+        if len(params) == 0:
+            raise ValueError("No valid parameter combination in the space")
+
+        logger.info(f"Sweeping {len(params)} {strategy_type} combinations on {len(self.prices)} bars ({sampler})")
+        scores = self.evaluate(strategy_type, params, progress_callback)
+
+        table = pd.DataFrame(params, columns=list(space))
+        for key, values in scores.items():
+            table[key] = values
+        table['win_rate'] = np.where(table['total_trades'] > 0,
+                                     table['winning_trades'] / table['total_trades'].clip(lower=1) * 100, 0.0)
+        # Stable sort: ties keep the sampling order
+        table = table.sort_values('total_return', ascending=False, kind='stable').reset_index(drop=True)
+
+        top = []
+        for values in table[list(space)].head(top_k).itertuples(index=False):
+            strategy = self.make_strategy(strategy_type, values)
+            top.append((strategy, self.engine.run(strategy, self.df, symbol)))
+        top.sort(key=lambda item: item[1].total_return, reverse=True)
+
+        if top:
+            logger.info(f"Sweep complete. Best return: {top[0][1].total_return:.2f}% ({top[0][0].parameters})")
+        return SweepResult(strategy_type=strategy_type, scores=table, top=top)
@@ -0,0 +1,388 @@
+"""
+In-process live price bus
+
+Live collectors publish price events (IBKR market-data ticks and 5-second
+real-time bars) once; every consumer - auto-trader, Streamlit pages, the
+database writer - subscribes instead of polling IBKR or SQLite.
+
+An event is a dict:
+    {'symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'kind'}
+where kind is 'tick' (single trade price, volume 0) or 'bar' (real-time bar).
+Timestamps are naive Europe/Paris wall-clock times, like historical_data.
+"""
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from backend.config import logger
+from backend.models import SessionLocal, Ticker, HistoricalData, PARIS_TZ
+from backend.data_access import (
+    ensure_unique_bar_index, merge_bar, notify_bars_changed, record_bars_added, record_bars_updated
+)
+
+
+def to_paris_naive(value: datetime) -> datetime:
+    """IBKR (UTC-aware) timestamp to the naive Paris time stored in the database"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(PARIS_TZ).replace(tzinfo=None)
+
+
+def make_event(symbol: str, timestamp: datetime, close: float, open_: Optional[float] = None,
+               high: Optional[float] = None, low: Optional[float] = None, volume: float = 0,
+               kind: str = 'tick') -> Dict:
+    """Build a price event (missing OHLC values default to the close)"""
+    return {
+        'symbol': symbol,
+        'timestamp': to_paris_naive(timestamp),
+        'open': close if open_ is None else open_,
+        'high': close if high is None else high,
+        'low': close if low is None else low,
+        'close': close,
+        'volume': volume,
+        'kind': kind,
+    }
+
+
+class PriceBus:
+    """
+    Thread-safe fan-out of price events
+
+    Callbacks run synchronously in the publisher's thread and must be quick;
+    consumers living in their own thread should use subscribe_queue().
+    A failing subscriber is logged and never affects the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, tuple] = {}
+        self._next_id = 1
+        self._latest: Dict[str, Dict] = {}
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[Dict], None], symbols: Optional[Iterable[str]] = None) -> int:
+        """
+        Register a callback
+
+        Args:
+            callback: Called with each event
+            symbols: Symbols to receive (None = all)
+
+        Returns:
+            Subscription id (for unsubscribe)
+        """
+        wanted = frozenset(symbols) if symbols is not None else None
+        with self._lock:
+            sub_id = self._next_id
+            self._next_id += 1
+            self._subscribers[sub_id] = (callback, wanted)
+        return sub_id
+
+    def subscribe_queue(self, symbols: Optional[Iterable[str]] = None, maxsize: int = 1000):
+        """
+        Receive events through a queue (for consumers running in another thread)
+
+        When the queue is full the oldest event is dropped: consumers care
+        about the latest prices, not about a backlog.
+
+        Returns:
+            Tuple (subscription id, queue.Queue)
+        """
+        events = queue.Queue(maxsize=maxsize)
+
+        def put(event: Dict):
+            while True:
+                try:
+                    events.put_nowait(event)
+                    return
+                except queue.Full:
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        pass
+
+        return self.subscribe(put, symbols), events
+
+    def unsubscribe(self, sub_id: int):
+        """Remove a subscription (unknown ids are ignored)"""
+        with self._lock:
+            self._subscribers.pop(sub_id, None)
+
+    def publish(self, event: Dict):
+        """Record the event as latest for its symbol and deliver it to subscribers"""
+        symbol = event['symbol']
+        with self._lock:
+            self._latest[symbol] = event
+            self.published += 1
+            subscribers = list(self._subscribers.values())
+
+        for callback, wanted in subscribers:
+            if wanted is not None and symbol not in wanted:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Price bus subscriber failed on {symbol}: {e}")
+
+    def latest(self, symbol: str) -> Optional[Dict]:
+        """Last event published for a symbol (None if none yet)"""
+        with self._lock:
+            return self._latest.get(symbol)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+price_bus = PriceBus()
+
+
+class BarBuilder:
+    """
+    Folds the events of one symbol into fixed-length bars
+
+    add() returns the previous bar as soon as an event of a later period
+    arrives; close_due() closes the current bar on the clock when no event
+    comes (illiquid stocks). Events older than the last closed bar are
+    dropped. Like MinuteBarWriter, only 'bar' events carry volume.
+    """
+
+    def __init__(self, seconds: int = 60, grace: float = 2.0):
+        """
+        Args:
+            seconds: Bar length (must divide a day, e.g. 60 or 300)
+            grace: Seconds to wait after the end of a bar for late events
+        """
+        self.seconds = seconds
+        self.grace = grace
+        self.current: Optional[Dict] = None
+        self._closed_until: Optional[datetime] = None
+
+    def bar_start(self, timestamp: datetime) -> datetime:
+        """Start of the bar containing timestamp"""
+        offset = (timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second) % self.seconds
+        return timestamp.replace(microsecond=0) - timedelta(seconds=offset)
+
+    def add(self, event: Dict) -> Optional[Dict]:
+        """
+        Fold one event
+
+        Returns:
+            The bar closed by this event, or None
+        """
+        start = self.bar_start(event['timestamp'])
+        if self._closed_until is not None and start < self._closed_until:
+            return None
+        if self.current is not None and start < self.current['timestamp']:
+            return None
+
+        closed = None
+        if self.current is not None and start > self.current['timestamp']:
+            closed = self._close()
+
+        volume = event['volume'] if event['kind'] == 'bar' else 0
+        bar = self.current
+        if bar is None:
+            self.current = {
+                'timestamp': start,
+                'open': event['open'],
+                'high': event['high'],
+                'low': event['low'],
+                'close': event['close'],
+                'volume': volume,
+            }
+        else:
+            bar['high'] = max(bar['high'], event['high'])
+            bar['low'] = min(bar['low'], event['low'])
+            bar['close'] = event['close']
+            bar['volume'] += volume
+        return closed
+
+    def seconds_until_due(self, now: datetime) -> Optional[float]:
+        """Seconds before close_due() will close the current bar (None if no bar is open)"""
+        if self.current is None:
+            return None
+        due = self.current['timestamp'] + timedelta(seconds=self.seconds + self.grace)
+        return max((due - now).total_seconds(), 0.0)
+
+    def close_due(self, now: datetime) -> Optional[Dict]:
+        """Close the current bar if its period (plus grace) is over"""
+        remaining = self.seconds_until_due(now)
+        if remaining is None or remaining > 0:
+            return None
+        return self._close()
+
+    def _close(self) -> Dict:
+        bar, self.current = self.current, None
+        self._closed_until = bar['timestamp'] + timedelta(seconds=self.seconds)
+        return bar
+
+
+class MinuteBarWriter:
+    """
+    Bus subscriber that folds events into 1-minute bars and writes them in batches
+
+    Events are folded in memory into partial bars and merged into the
+    database every flush_interval seconds, instead of one SELECT + COMMIT per
+    price. A partial bar only holds the events since the last successful
+    write and is dropped once committed; a minute updated after a flush is
+    merged in SQL (open kept, high/low widened, close replaced, volume
+    added). Only 'bar' events carry volume; ticks update open/high/low/close.
+    """
+
+    def __init__(self, bus: PriceBus = price_bus, interval: str = '1min', flush_interval: float = 5.0,
+                 session_factory: Callable = SessionLocal):
+        """
+        Args:
+            bus: Price bus to subscribe to
+            interval: Interval stored in historical_data
+            flush_interval: Seconds between two database writes
+            session_factory: Session factory (injectable for tests)
+        """
+        self.bus = bus
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+
+        self._lock = threading.Lock()
+        self._bars: Dict[str, Dict[datetime, Dict]] = {}  # symbol -> minute -> partial bar not written yet
+        self._ticker_ids: Dict[str, int] = {}
+        self._sub_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.bars_written = 0
+
+    def on_event(self, event: Dict):
+        """Fold one event into the current minute bar of its symbol"""
+        minute = event['timestamp'].replace(second=0, microsecond=0)
+        symbol = event['symbol']
+        with self._lock:
+            bars = self._bars.setdefault(symbol, {})
+            bar = bars.get(minute)
+            if bar is None:
+                bars[minute] = {
+                    'timestamp': minute,
+                    'open': event['open'],
+                    'high': event['high'],
+                    'low': event['low'],
+                    'close': event['close'],
+                    'volume': event['volume'] if event['kind'] == 'bar' else 0,
+                }
+            else:
+                bar['high'] = max(bar['high'], event['high'])
+                bar['low'] = min(bar['low'], event['low'])
+                bar['close'] = event['close']
+                if event['kind'] == 'bar':
+                    bar['volume'] += event['volume']
+
+    def _ticker_id(self, db, symbol: str) -> int:
+        ticker_id = self._ticker_ids.get(symbol)
+        if ticker_id is None:
+            ticker = db.query(Ticker).filter(Ticker.symbol == symbol).first()
+            if not ticker:
+                ticker = Ticker(symbol=symbol, name=symbol, exchange="EURONEXT", currency="EUR")
+                db.add(ticker)
+                db.commit()
+                db.refresh(ticker)
+            ticker_id = self._ticker_ids[symbol] = ticker.id
+        return ticker_id
+
+    def flush(self) -> int:
+        """
+        Merge the partial bars built since the last flush into the database
+
+        Returns:
+            Number of bars written
+        """
+        with self._lock:
+            pending = {symbol: [bars[m] for m in sorted(bars)] for symbol, bars in self._bars.items() if bars}
+            self._bars = {}
+        if not pending:
+            return 0
+
+        written = 0
+        db = self.session_factory()
+        try:
+            bulk = ensure_unique_bar_index(db)
+            for symbol, bars in list(pending.items()):
+                ticker_id = self._ticker_id(db, symbol)
+                if bulk:
+                    for bar in bars:
+                        merge_bar(db, ticker_id, self.interval, bar)
+                else:
+                    self._merge_rows(db, ticker_id, bars)
+                db.commit()
+                notify_bars_changed(ticker_id, self.interval)
+                written += len(bars)
+                self.bars_written += len(bars)
+                del pending[symbol]
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Live bar flush failed: {e}")
+            self._restore(pending)
+        finally:
+            db.close()
+        return written
+
+    def _restore(self, pending: Dict[str, List[Dict]]):
+        """Put back partial bars that were not committed, under the events received since"""
+        with self._lock:
+            for symbol, bars in pending.items():
+                current = self._bars.setdefault(symbol, {})
+                for bar in bars:
+                    newer = current.get(bar['timestamp'])
+                    if newer is not None:
+                        bar['high'] = max(bar['high'], newer['high'])
+                        bar['low'] = min(bar['low'], newer['low'])
+                        bar['close'] = newer['close']
+                        bar['volume'] += newer['volume']
+                    current[bar['timestamp']] = bar
+
+    def _merge_rows(self, db, ticker_id: int, bars: List[Dict]):
+        """Row-by-row fallback when the unique bar index cannot be created (no commit)"""
+        inserted = []
+        updated = False
+        for bar in bars:
+            record = db.query(HistoricalData).filter(
+                HistoricalData.ticker_id == ticker_id,
+                HistoricalData.interval == self.interval,
+                HistoricalData.timestamp == bar['timestamp']
+            ).first()
+            if record is None:
+                db.add(HistoricalData(ticker_id=ticker_id, interval=self.interval, **bar))
+                inserted.append(bar['timestamp'])
+            else:
+                record.high, record.low = max(record.high, bar['high']), min(record.low, bar['low'])
+                record.close, record.volume = bar['close'], record.volume + bar['volume']
+                updated = True
+        if inserted:
+            record_bars_added(db, ticker_id, self.interval, len(inserted), min(inserted), max(inserted))
+        elif updated:
+            record_bars_updated(db, ticker_id, self.interval)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """Subscribe to the bus and start the periodic flush thread"""
+        if self._sub_id is not None:
+            return
+        self._stop.clear()
+        self._sub_id = self.bus.subscribe(self.on_event)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MinuteBarWriter")
+        self._thread.start()
+        logger.info(f"💾 Live bar writer started (flush every {self.flush_interval}s)")
+
+    def stop(self):
+        """Unsubscribe, stop the flush thread and write what is pending"""
+        if self._sub_id is None:
+            return
+        self.bus.unsubscribe(self._sub_id)
+        self._sub_id = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+        logger.info(f"💾 Live bar writer stopped ({self.bars_written} bars written)")
@@ -0,0 +1,168 @@
+"""
+Fixed-capacity OHLCV ring buffer
+
+Columns are preallocated NumPy arrays of twice the capacity: every value is
+written at position i and i + capacity, so the most recent bars are always
+one contiguous slice. append() is O(1), and view() hands indicator code a
+read-only, zero-copy window without rebuilding a DataFrame.
+
+For existing callers the buffer still behaves like a list of bar dicts
+(len, indexing, slicing, iteration), each dict being built on demand.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_VALUE_COLUMNS = OHLCV_COLUMNS[1:]
+
+
+class OHLCVRingBuffer:
+    """
+    Last `capacity` bars of one series
+
+    Attributes:
+        capacity: Maximum number of bars kept
+        total: Bars appended since creation (including those overwritten)
+    """
+
+    def __init__(self, capacity: int = 200):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._count = 0
+        self._next = 0  # Slot of the next write, in [0, capacity)
+        self._data = {'timestamp': np.full(2 * capacity, np.datetime64('NaT'), dtype='datetime64[ns]')}
+        for column in _VALUE_COLUMNS:
+            self._data[column] = np.full(2 * capacity, np.nan)
+
+    # Writing ----------------------------------------------------------------
+
+    def append(self, bar: Dict):
+        """Add one bar (dict with timestamp/open/high/low/close/volume; missing keys are NaN/NaT)"""
+        slot = self._next
+        mirror = slot + self.capacity
+        timestamp = bar.get('timestamp')
+        if timestamp is None:
+            stamp = np.datetime64('NaT')
+        elif isinstance(timestamp, datetime) and timestamp.tzinfo is None:
+            stamp = np.datetime64(timestamp, 'ns')
+        else:
+            stamp = pd.Timestamp(timestamp).to_datetime64()
+        data = self._data
+        data['timestamp'][slot] = data['timestamp'][mirror] = stamp
+        for column in _VALUE_COLUMNS:
+            value = bar.get(column)
+            data[column][slot] = data[column][mirror] = np.nan if value is None else value
+
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, bars: Union[pd.DataFrame, Iterable[Dict]]):
+        """Add many bars: a DataFrame is copied column by column, anything else bar by bar"""
+        if isinstance(bars, pd.DataFrame):
+            self.extend_frame(bars)
+        else:
+            for bar in bars:
+                self.append(bar)
+
+    def extend_frame(self, frame: pd.DataFrame):
+        """Bulk-append an OHLCV DataFrame (timestamp column or DatetimeIndex), oldest first"""
+        n = len(frame)
+        if n == 0:
+            return
+        kept = min(n, self.capacity)
+        slots = (self._next + np.arange(kept)) % self.capacity
+
+        if 'timestamp' in frame.columns:
+            stamps = pd.to_datetime(frame['timestamp'])
+        elif isinstance(frame.index, pd.DatetimeIndex):
+            stamps = frame.index
+        else:
+            stamps = pd.Series(pd.NaT, index=frame.index)
+        columns = {'timestamp': np.asarray(stamps, dtype='datetime64[ns]')[-kept:]}
+        for column in _VALUE_COLUMNS:
+            if column in frame.columns:
+                columns[column] = frame[column].to_numpy(dtype=float, na_value=np.nan)[-kept:]
+            else:
+                columns[column] = np.full(kept, np.nan)
+
+        for column, values in columns.items():
+            self._data[column][slots] = values
+            self._data[column][slots + self.capacity] = values
+
+        self._next = (self._next + kept) % self.capacity
+        self._count = min(self._count + kept, self.capacity)
+        self.total += n
+
+    def clear(self):
+        """Drop every bar (capacity and arrays are kept)"""
+        self._count = 0
+        self._next = 0
+
+    # Reading ----------------------------------------------------------------
+
+    def _bounds(self, last: Optional[int] = None):
+        n = self._count if last is None else max(0, min(last, self._count))
+        end = self._next + self.capacity
+        return end - n, end
+
+    def view(self, column: str, last: Optional[int] = None) -> np.ndarray:
+        """
+        Read-only contiguous view of a column, oldest first (no copy)
+
+        Args:
+            column: One of timestamp/open/high/low/close/volume
+            last: Only the most recent `last` bars (default: all)
+
+        The view reflects later writes to the same slots; copy it to keep it.
+        """
+        start, end = self._bounds(last)
+        values = self._data[column][start:end]
+        values.flags.writeable = False
+        return values
+
+    def arrays(self, last: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """All columns as read-only views"""
+        return {column: self.view(column, last) for column in OHLCV_COLUMNS}
+
+    def to_frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """Copy of the buffer as a DataFrame (timestamp column + OHLCV)"""
+        return pd.DataFrame({column: values.copy() for column, values in self.arrays(last).items()})
+
+    def tail(self, n: int) -> List[Dict]:
+        """Last n bars as dicts, oldest first"""
+        start, end = self._bounds(n)
+        return [self._row(pos) for pos in range(start, end)]
+
+    def _row(self, pos: int) -> Dict:
+        stamp = self._data['timestamp'][pos]
+        row = {'timestamp': None if np.isnat(stamp) else pd.Timestamp(stamp)}
+        for column in _VALUE_COLUMNS:
+            row[column] = float(self._data[column][pos])
+        return row
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self._count))]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("ring buffer index out of range")
+        start, _ = self._bounds()
+        return self._row(start + key)
+
+    def __iter__(self):
+        start, end = self._bounds()
+        for pos in range(start, end):
+            yield self._row(pos)
+
+    def __repr__(self):
+        return f"OHLCVRingBuffer({self._count}/{self.capacity})"
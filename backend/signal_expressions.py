@@ -0,0 +1,245 @@
+"""
+Safe, vectorized evaluation of simple strategy conditions
+
+Simple strategies store their rules as text, e.g.
+    "rsi < 30 and price > 100"
+Instead of eval()-ing that string for every bar, it is parsed once into a
+restricted AST (names, numbers, comparisons, boolean ops and basic
+arithmetic) and evaluated over whole NumPy columns in one pass. Missing
+values are NaN, so the stored "rsi is not None and rsi < 20" form is a
+NaN check. Anything else (calls, attributes, subscripts, lambdas, ...) is
+rejected.
+"""
+import ast
+import operator
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet
+
+import numpy as np
+
+# Condition variable -> DataFrame column
+VARIABLE_COLUMNS = {
+    'rsi': 'rsi_14',
+    'macd': 'macd',
+    'macd_signal': 'macd_signal',
+    'price': 'close',
+}
+
+_COMPARE_OPS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+class SignalExpressionError(ValueError):
+    """Condition text that is not a valid, safe signal expression"""
+
+
+def _truth(value):
+    # Same truthiness as Python's bool() for numbers (NaN counts as true)
+    return np.not_equal(value, 0)
+
+
+def _missing(value):
+    # "x is None": unavailable indicator values are None (scalars) or NaN (columns)
+    if value is None:
+        return True
+    return np.isnan(np.asarray(value, dtype=float))
+
+
+def _is_none(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and node.value is None
+
+
+def _compile_comparison(op: ast.cmpop, left_node: ast.AST, right_node: ast.AST,
+                        names: set) -> Callable[[Dict], object]:
+    if isinstance(op, (ast.Is, ast.IsNot)):
+        if _is_none(right_node):
+            operand = _compile_node(left_node, names)
+        elif _is_none(left_node):
+            operand = _compile_node(right_node, names)
+        else:
+            raise SignalExpressionError("'is' / 'is not' are only supported against None")
+        if isinstance(op, ast.Is):
+            return lambda v: _missing(operand(v))
+        return lambda v: np.logical_not(_missing(operand(v)))
+
+    if type(op) not in _COMPARE_OPS:
+        raise SignalExpressionError(f"Unsupported comparison: {type(op).__name__}")
+    func = _COMPARE_OPS[type(op)]
+    left = _compile_node(left_node, names)
+    right = _compile_node(right_node, names)
+
+    def compare(v):
+        lhs = left(v)
+        rhs = right(v)
+        if lhs is None or rhs is None:
+            # Missing value: compares false, like NaN
+            return False
+        return func(lhs, rhs)
+    return compare
+
+
+class CompiledCondition:
+    """
+    A parsed condition, callable on scalars or on aligned NumPy columns
+
+    Attributes:
+        source: Original condition text
+        names: Variables referenced by the condition
+    """
+
+    def __init__(self, source: str, evaluator: Callable[[Dict], object], names: FrozenSet[str]):
+        self.source = source
+        self.names = names
+        self._evaluator = evaluator
+
+    def evaluate(self, variables: Dict):
+        """
+        Evaluate the condition
+
+        Args:
+            variables: Name -> scalar or NumPy array (arrays must have the same length)
+
+        Returns:
+            Boolean (scalar inputs) or boolean array
+
+        Raises:
+            KeyError: If a referenced variable is missing
+        """
+        return self._evaluator(variables)
+
+    def __repr__(self):
+        return f"CompiledCondition({self.source!r})"
+
+
+def _compile_node(node: ast.AST, names: set) -> Callable[[Dict], object]:
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names)
+
+    if isinstance(node, ast.Name):
+        names.add(node.id)
+        key = node.id
+        return lambda v: v[key]
+
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (int, float)):  # bool is an int
+            raise SignalExpressionError(f"Unsupported constant: {node.value!r}")
+        value = node.value
+        return lambda v: value
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value, names) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def bool_op(v):
+            result = _truth(operands[0](v))
+            for operand in operands[1:]:
+                result = combine(result, _truth(operand(v)))
+            return result
+        return bool_op
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.Not):
+            return lambda v: np.logical_not(_truth(operand(v)))
+        if isinstance(node.op, ast.USub):
+            return lambda v: operator.neg(operand(v))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        raise SignalExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+
+    if isinstance(node, ast.Compare):
+        # Chained comparisons: a < b < c == (a < b) and (b < c)
+        operands = [node.left] + node.comparators
+        steps = [
+            _compile_comparison(op, left_node, right_node, names)
+            for op, left_node, right_node in zip(node.ops, operands, operands[1:])
+        ]
+
+        def compare(v):
+            result = steps[0](v)
+            for step in steps[1:]:
+                result = np.logical_and(result, step(v))
+            return result
+        return compare
+
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _BINARY_OPS:
+            raise SignalExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        func = _BINARY_OPS[type(node.op)]
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
+        return lambda v: func(left(v), right(v))
+
+    raise SignalExpressionError(f"Unsupported expression element: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_condition(source: str) -> CompiledCondition:
+    """
+    Parse a condition once into a safe evaluator
+
+    Args:
+        source: Condition text (e.g. "rsi < 30 and price > 100")
+
+    Returns:
+        CompiledCondition
+
+    Raises:
+        SignalExpressionError: If the text is not valid or uses forbidden constructs
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise SignalExpressionError(f"Invalid condition {source!r}: {e.msg}") from e
+
+    names: set = set()
+    evaluator = _compile_node(tree, names)
+    return CompiledCondition(source, evaluator, frozenset(names))
+
+
+def frame_variables(df, names) -> Dict[str, np.ndarray]:
+    """
+    Columns needed by a condition, as float arrays
+
+    Known aliases (rsi, price, ...) map to their indicator columns and are
+    all NaN when the column is missing (like None in the per-bar variables),
+    so only the comparisons using them are false. Any other name is looked
+    up as a DataFrame column; names that cannot be resolved are left out
+    (evaluate() will then raise KeyError).
+    """
+    variables = {}
+    for name in names:
+        column = VARIABLE_COLUMNS.get(name, name)
+        if column in df.columns:
+            variables[name] = df[column].to_numpy(dtype=float, na_value=np.nan)
+        elif name in VARIABLE_COLUMNS:
+            variables[name] = np.full(len(df), np.nan)
+    return variables
+
+
+def evaluate_on_frame(condition: CompiledCondition, df) -> np.ndarray:
+    """
+    Evaluate a condition for every row of a DataFrame
+
+    Returns:
+        Boolean array of len(df) (all False if a referenced name is neither
+        a known alias nor a column)
+    """
+    variables = frame_variables(df, condition.names)
+    if len(variables) < len(condition.names):
+        return np.zeros(len(df), dtype=bool)
+    result = condition.evaluate(variables)
+    return np.broadcast_to(np.asarray(result, dtype=bool), (len(df),)).copy()
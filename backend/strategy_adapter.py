@@ -3,17 +3,23 @@ Adaptateur pour utiliser les stratégies EnhancedMA sur la page Cours Live
 Permet de générer des signaux avec toutes les stratégies existantes
 """
 
+import hashlib
 import pandas as pd
+import numpy as np
 import json
 from typing import Dict, List, Tuple, Optional
 from backend.models import SessionLocal, Strategy as StrategyModel
 from backend.backtesting_engine import EnhancedMovingAverageStrategy
 from backend.strategy_manager import StrategyManager
+from backend.signal_expressions import compile_condition, evaluate_on_frame, CompiledCondition
 
 
 class StrategyAdapter:
     """Adaptateur pour utiliser toutes les stratégies sur la page Cours Live"""
     
+    # (strategy id, parameters hash) -> compiled (buy, sell) conditions
+    _condition_cache: Dict[tuple, Tuple[Optional[CompiledCondition], Optional[CompiledCondition]]] = {}
+    
     @staticmethod
     def is_simple_strategy(strategy: StrategyModel) -> bool:
         """Vérifie si une stratégie est simple (buy_conditions/sell_conditions)"""
@@ -86,13 +92,27 @@ class StrategyAdapter:
         sell_condition = False
         
         if 'buy_conditions' in params:
-            buy_condition = eval(params['buy_conditions'], variables)
+            buy_condition = bool(compile_condition(params['buy_conditions']).evaluate(variables))
         
         if 'sell_conditions' in params:
-            sell_condition = eval(params['sell_conditions'], variables)
+            sell_condition = bool(compile_condition(params['sell_conditions']).evaluate(variables))
         
         return buy_condition, sell_condition
     
+    @staticmethod
+    def _compiled_conditions(strategy: StrategyModel, params: dict) -> Tuple[Optional[CompiledCondition], Optional[CompiledCondition]]:
+        """Buy/sell conditions parsed once per strategy id and parameters"""
+        params_hash = hashlib.sha1((strategy.parameters or '').encode()).hexdigest()
+        key = (getattr(strategy, 'id', None), params_hash)
+        compiled = StrategyAdapter._condition_cache.get(key)
+        if compiled is None:
+            compiled = (
+                compile_condition(params['buy_conditions']) if 'buy_conditions' in params else None,
+                compile_condition(params['sell_conditions']) if 'sell_conditions' in params else None,
+            )
+            StrategyAdapter._condition_cache[key] = compiled
+        return compiled
+    
     @staticmethod
     def generate_signals_simple(df: pd.DataFrame, strategy: StrategyModel) -> Tuple[List, List, List]:
         """
@@ -102,38 +122,31 @@ class StrategyAdapter:
             Tuple (signal_times, signal_prices, signal_types)
         """
         signal_times = []
-        _ = []
+        signal_prices = []
         signal_types = []
         
         try:
             params = json.loads(strategy.parameters)
+            buy_condition, sell_condition = StrategyAdapter._compiled_conditions(strategy, params)
             
-            # Parcourir toutes les données
-            for i in range(1, len(df)):
-                try:
-                    # Préparer les variables pour eval
-                    variables = StrategyAdapter._prepare_signal_variables(df, i)
-                    
-                    # Évaluer les conditions
-                    buy_condition, sell_condition = StrategyAdapter._evaluate_conditions(params, variables)
-                    
-                    # Ajouter les signaux
-                    if buy_condition:
-                        signal_times.append(df['time'].iloc[i])
-                        signal_prices.append(df['close'].iloc[i])
-                        signal_types.append('buy')
-                    elif sell_condition:
-                        signal_times.append(df['time'].iloc[i])
-                        signal_prices.append(df['close'].iloc[i])
-                        signal_types.append('sell')
-                
-                except Exception:
-                    continue
+            # Évaluer les conditions sur toutes les barres en une fois
+            n = len(df)
+            buy = evaluate_on_frame(buy_condition, df) if buy_condition else np.zeros(n, dtype=bool)
+            sell = evaluate_on_frame(sell_condition, df) if sell_condition else np.zeros(n, dtype=bool)
+            sell &= ~buy  # L'achat est prioritaire
+            if n:
+                buy[0] = sell[0] = False  # Pas de signal sur la première barre
+            
+            rows = np.flatnonzero(buy | sell)
+            times = df['time'] if 'time' in df.columns else df.index.to_series()
+            signal_times = times.iloc[rows].tolist()
+            signal_prices = df['close'].to_numpy()[rows].tolist()
+            signal_types = np.where(buy[rows], 'buy', 'sell').tolist()
         
         except Exception as e:
             print(f"Erreur generate_signals_simple: {e}")
         
-        return signal_times, _, signal_types
+        return signal_times, signal_prices, signal_types
     
     @staticmethod
     def generate_signals_enhanced(df: pd.DataFrame, strategy: StrategyModel) -> Tuple[List, List, List]:
@@ -455,8 +455,7 @@ class StrategyManager:
         # Get data
         db = SessionLocal()
         try:
-            from backend.models import HistoricalData
-            import pandas as pd
+            from backend import bar_store
             
             # Remove .PA suffix if present
             ticker_symbol = symbol.replace('.PA', '')
@@ -466,28 +465,12 @@ class StrategyManager:
                 return None
             
             # Query data
-            data = db.query(HistoricalData).filter(
-                HistoricalData.ticker_id == ticker.id,
-                HistoricalData.timestamp >= start_date,
-                HistoricalData.timestamp <= end_date
-            ).order_by(HistoricalData.timestamp.asc()).all()
+            df = bar_store.load_bars(db, ticker.id, ticker.symbol, start=start_date, end=end_date, index=True)
             
-            if not data:
+            if df.empty:
                 logger.error(f"No data found for {symbol} between {start_date} and {end_date}")
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'timestamp': d.timestamp,
-                'open': d.open,
-                'high': d.high,
-                'low': d.low,
-                'close': d.close,
-                'volume': d.volume
-            } for d in data])
-            
-            df.set_index('timestamp', inplace=True)
-            
             logger.info(f"  Loaded {len(df)} data points")
             
             # Run backtest
@@ -16,6 +16,7 @@ from backend.backtesting_engine import (
     EnhancedMovingAverageStrategy
 )
 from backend.constants import CONST_CLOSE
+from backend.streaming_indicators import SignalStream, MACrossSignal, RSISignal
 
 
 class StrategyRunner:
@@ -116,11 +117,9 @@ class StrategyRunner:
             
             elif strategy_type == "Enhanced" or strategy_type == "EnhancedMovingAverage":
                 return EnhancedMovingAverageStrategy(
-                    fast=params.get('fast_period', 5),
-                    slow=params.get('slow_period', 20),
-                    rsi_period=params.get('rsi_period', 14),
-                    rsi_oversold=params.get('rsi_oversold', 30),
-                    rsi_overbought=params.get('rsi_overbought', 70)
+                    fast_period=params.get('fast_period', 5),
+                    slow_period=params.get('slow_period', 20),
+                    rsi_period=params.get('rsi_period', 14)
                 )
             
             else:
@@ -133,6 +132,31 @@ class StrategyRunner:
             logger.error(traceback.format_exc())
             return None
     
+    def create_signal_stream(self, strategy_model: StrategyModel) -> Optional[SignalStream]:
+        """
+        Create an incremental signal generator for a strategy
+        
+        The stream is fed one bar at a time (dict with open/high/low/close/volume)
+        and returns the same latest signal as generate_signals(), in O(1) per bar
+        and without building a DataFrame.
+        
+        Args:
+            strategy_model: Strategy model from database
+            
+        Returns:
+            SignalStream, or None if the strategy type has no streaming version
+        """
+        strategy = self._create_strategy(strategy_model)
+        
+        # EnhancedMovingAverageStrategy emits the same crossover signals as the SMA strategy
+        if isinstance(strategy, (SimpleMovingAverageStrategy, EnhancedMovingAverageStrategy)):
+            return MACrossSignal(strategy.fast_period, strategy.slow_period)
+        
+        if isinstance(strategy, RSIStrategy):
+            return RSISignal(strategy.period, strategy.oversold, strategy.overbought)
+        
+        return None
+    
     def get_signal_value(self, signal_series: pd.Series) -> int:
         """
         Get the latest signal value from a signal series
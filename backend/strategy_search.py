@@ -0,0 +1,291 @@
+"""
+Budgeted strategy search: TPE sampling + successive halving
+
+Random search (run_parallel_optimization) spends most of its backtests on
+hopeless parameters, each over the full history. Here:
+- candidates are proposed by a Tree-structured Parzen Estimator (TPE):
+  after a few random draws, parameters are picked where good results are
+  dense relative to bad ones;
+- every candidate is first backtested on a short, recent slice of the
+  history; only the best 1/eta go on to a slice eta times longer, and so
+  on up to the full range (successive halving).
+
+With the default eta = 3 and three rungs, 1/9 of the candidates get a full
+backtest. Backtests go through BacktestingEngine.run and the winner can be
+stored with StrategyManager.save_strategy.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.backtesting_engine import BacktestingEngine, BacktestResult, Strategy
+from backend.parameter_sweep import (
+    PARAMETER_SPACES, ParameterSpace, ParameterSweep, latin_hypercube_samples, random_samples, valid_combinations
+)
+
+logger = logging.getLogger(__name__)
+
+# Shortest history slice worth a backtest (rolling windows need some warm-up)
+MIN_SLICE_BARS = 200
+
+
+class TPESampler:
+    """
+    Tree-structured Parzen Estimator over an integer parameter space
+
+    Observations are split into the best gamma fraction ("good") and the
+    rest ("bad"). Each parameter gets two kernel densities over its integer
+    range, l(x) for good and g(x) for bad. Candidates drawn from l are kept
+    when they maximize l(x) / g(x). Until n_startup observations exist,
+    samples come from a Latin hypercube.
+    """
+
+    def __init__(self, space: ParameterSpace, gamma: float = 0.25, n_startup: int = 20,
+                 n_candidates: int = 64, prior_weight: float = 1.0, seed: Optional[int] = None):
+        """
+        Args:
+            space: {name: (low, high)}, bounds inclusive
+            gamma: Fraction of observations considered good
+            n_startup: Observations before the model is used
+            n_candidates: Draws from l(x) per proposed sample
+            prior_weight: Weight of the uniform prior in each density
+            seed: Random seed
+        """
+        self.space = space
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.prior_weight = prior_weight
+        self.rng = np.random.default_rng(seed)
+        self._params: List[np.ndarray] = []
+        self._scores: List[np.ndarray] = []
+
+    @property
+    def n_observations(self) -> int:
+        return sum(len(s) for s in self._scores)
+
+    def tell(self, params: np.ndarray, scores: np.ndarray):
+        """Record evaluated parameters (rows) and their scores (higher is better)"""
+        self._params.append(np.asarray(params, dtype=np.int64).reshape(-1, len(self.space)))
+        self._scores.append(np.asarray(scores, dtype=np.float64).ravel())
+
+    def _density(self, values: np.ndarray, observed: np.ndarray, low: int, high: int) -> np.ndarray:
+        """Prior + Gaussian kernels at the observed values, over every integer of the range"""
+        width = max(1.0, (high - low + 1) * max(len(observed), 1) ** -0.2 / 3)
+        density = np.full(len(values), self.prior_weight / len(values))
+        if len(observed):
+            kernels = np.exp(-0.5 * ((values[:, None] - observed[None, :]) / width) ** 2)
+            density += (kernels / kernels.sum(axis=0)).sum(axis=1)
+        return density / density.sum()
+
+    def ask(self, n: int) -> np.ndarray:
+        """
+        Propose n parameter rows
+
+        Returns:
+            Array (n x parameters), in space order
+        """
+        if self.n_observations < self.n_startup:
+            return latin_hypercube_samples(self.space, n, self.rng)
+
+        params = np.concatenate(self._params)
+        scores = np.concatenate(self._scores)
+        scores = np.where(np.isfinite(scores), scores, -np.inf)
+        n_good = max(1, int(math.ceil(self.gamma * len(scores))))
+        order = np.argsort(-scores, kind='stable')
+        good, bad = params[order[:n_good]], params[order[n_good:]]
+
+        draws = np.empty((n, self.n_candidates, len(self.space)), dtype=np.int64)
+        log_ratio = np.zeros((n, self.n_candidates))
+        for d, (low, high) in enumerate(self.space.values()):
+            values = np.arange(low, high + 1)
+            l_density = self._density(values, good[:, d], low, high)
+            g_density = self._density(values, bad[:, d], low, high)
+            picks = self.rng.choice(len(values), size=(n, self.n_candidates), p=l_density)
+            draws[:, :, d] = values[picks]
+            log_ratio += np.log(l_density[picks]) - np.log(g_density[picks])
+        return draws[np.arange(n), np.argmax(log_ratio, axis=1)]
+
+
+@dataclass
+class SearchResult:
+    """Outcome of a strategy search"""
+    best_strategy: Optional[Strategy]
+    best_result: Optional[BacktestResult]
+    results: List[BacktestResult] = field(default_factory=list)  # Full-range backtests, best first
+    candidates: int = 0
+    full_backtests: int = 0
+    total_backtests: int = 0
+    bars_backtested: int = 0  # Sum of slice lengths, the actual cost
+
+
+class StrategySearch:
+    """Search the parameters of one strategy type with TPE + successive halving"""
+
+    def __init__(self, df: pd.DataFrame, symbol: str = "UNKNOWN", engine: Optional[BacktestingEngine] = None):
+        """
+        Args:
+            df: DataFrame with OHLCV data, oldest first
+            symbol: Stock symbol
+            engine: Engine running the backtests
+        """
+        if df.empty:
+            raise ValueError("DataFrame is empty")
+        self.df = df
+        self.symbol = symbol
+        self.engine = engine or BacktestingEngine()
+        self._cache: Dict[Tuple, Optional[BacktestResult]] = {}
+        self.total_backtests = 0
+        self.bars_backtested = 0
+
+    def slice_fractions(self, eta: int, rungs: int) -> List[float]:
+        """History fraction of each rung, shortest first (rungs too short for MIN_SLICE_BARS are dropped)"""
+        fractions = [eta ** -k for k in reversed(range(rungs))]
+        return [f for f in fractions if f == 1 or len(self.df) * f >= MIN_SLICE_BARS]
+
+    def _backtest(self, strategy_type: str, values: Tuple[int, ...], fraction: float) -> Optional[BacktestResult]:
+        """Backtest on the most recent fraction of the history (cached per candidate and fraction)"""
+        key = (strategy_type, values, fraction)
+        if key not in self._cache:
+            bars = max(1, int(round(len(self.df) * fraction)))
+            strategy = ParameterSweep.make_strategy(strategy_type, values)
+            try:
+                self._cache[key] = self.engine.run(strategy, self.df.iloc[-bars:], self.symbol)
+            except Exception as e:
+                logger.warning(f"Backtest failed for {strategy.parameters}: {e}")
+                self._cache[key] = None
+            self.total_backtests += 1
+            self.bars_backtested += bars
+        return self._cache[key]
+
+    @staticmethod
+    def _score(result: Optional[BacktestResult]) -> float:
+        return result.total_return if result is not None else -np.inf
+
+    def _propose(self, sampler, space: ParameterSpace, strategy_type: str, n: int,
+                 seen: set, rng: np.random.Generator) -> List[Tuple[int, ...]]:
+        """
+        Up to n new valid candidates (already evaluated ones are skipped)
+
+        When the sampler keeps proposing known points, uniform draws fill the batch.
+        """
+        proposed = []
+        for attempt in range(10):
+            use_sampler = sampler is not None and attempt < 3
+            rows = sampler.ask(n) if use_sampler else random_samples(space, n, rng)
+            rows = rows[valid_combinations(strategy_type, rows)]
+            for row in map(tuple, rows.tolist()):
+                if row not in seen and len(proposed) < n:
+                    seen.add(row)
+                    proposed.append(row)
+            if len(proposed) == n:
+                break
+        return proposed
+
+    def run(self, n_candidates: int = 270, strategy_type: str = 'enhanced', sampler: str = 'tpe',
+            eta: int = 3, rungs: int = 3, batch_size: int = 10, space: Optional[ParameterSpace] = None,
+            seed: Optional[int] = None,
+            progress_callback: Optional[Callable[[int, int, float], None]] = None) -> SearchResult:
+        """
+        Run the search
+
+        Args:
+            n_candidates: Candidates backtested on the shortest slice
+            strategy_type: 'ma', 'rsi' or 'enhanced'
+            sampler: 'tpe' or 'random'
+            eta: Promotion ratio (the best 1/eta of a rung go to the next one)
+            rungs: Number of slice lengths (history / eta**(rungs - 1), ..., full history)
+            batch_size: Candidates proposed per TPE update
+            space: Parameter space (default PARAMETER_SPACES[strategy_type]), same keys and order
+            seed: Random seed
+            progress_callback: Callback(backtests done, backtests planned, best full-range return)
+
+        Returns:
+            SearchResult
+        """
+        if strategy_type not in PARAMETER_SPACES:
+            raise ValueError(f"Unknown strategy type: {strategy_type}")
+        if sampler not in ('tpe', 'random'):
+            raise ValueError(f"Unknown sampler: {sampler}")
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        space = space or PARAMETER_SPACES[strategy_type]
+        if list(space) != list(PARAMETER_SPACES[strategy_type]):
+            raise ValueError(f"Parameter space must define {list(PARAMETER_SPACES[strategy_type])}")
+
+        fractions = self.slice_fractions(eta, rungs)
+        rng = np.random.default_rng(seed)
+        tpe = TPESampler(space, seed=seed) if sampler == 'tpe' else None
+
+        sizes = [n_candidates]
+        for _ in fractions[1:]:
+            sizes.append(max(1, int(math.ceil(sizes[-1] / eta))))
+        planned = sum(sizes)
+        tracker = {"done": 0, "best": -np.inf}
+
+        def progress(full_result: Optional[BacktestResult] = None):
+            tracker["done"] += 1
+            if full_result is not None:
+                tracker["best"] = max(tracker["best"], full_result.total_return)
+            if progress_callback:
+                progress_callback(tracker["done"], planned, tracker["best"])
+
+        # Rung 0: propose in batches on the shortest slice, the sampler learns from these scores
+        candidates: List[Tuple[int, ...]] = []
+        scores: List[float] = []
+        seen: set = set()
+        while len(candidates) < n_candidates:
+            batch = self._propose(tpe, space, strategy_type, min(batch_size, n_candidates - len(candidates)), seen, rng)
+            if not batch:
+                break  # Space exhausted
+            batch_scores = []
+            for values in batch:
+                result = self._backtest(strategy_type, values, fractions[0])
+                batch_scores.append(self._score(result))
+                progress(result if fractions[0] == 1 else None)
+            if tpe is not None:
+                tpe.tell(np.array(batch), np.array(batch_scores))
+            candidates.extend(batch)
+            scores.extend(batch_scores)
+
+        # Next rungs: promote the best 1/eta (ties keep the proposal order)
+        survivors = candidates
+        for fraction, size in zip(fractions[1:], sizes[1:]):
+            order = np.argsort(-np.array(scores), kind='stable')[:size]
+            survivors = [survivors[i] for i in order]
+            scores = []
+            for values in survivors:
+                result = self._backtest(strategy_type, values, fraction)
+                scores.append(self._score(result))
+                progress(result if fraction == 1 else None)
+
+        finals = [(ParameterSweep.make_strategy(strategy_type, values), self._cache[(strategy_type, values, 1)])
+                  for values in survivors if self._cache.get((strategy_type, values, 1)) is not None]
+        finals.sort(key=lambda item: item[1].total_return, reverse=True)
+
+        best_strategy, best_result = finals[0] if finals else (None, None)
+        full_backtests = sum(1 for key in self._cache if key[2] == 1)
+        if best_result is not None:
+            logger.info(f"Search complete: best return {best_result.total_return:.2f}% "
+                        f"({full_backtests} full backtests, {len(candidates)} candidates)")
+        return SearchResult(
+            best_strategy=best_strategy,
+            best_result=best_result,
+            results=[result for _, result in finals],
+            candidates=len(candidates),
+            full_backtests=full_backtests,
+            total_backtests=self.total_backtests,
+            bars_backtested=self.bars_backtested,
+        )
+
+    @staticmethod
+    def save_best(result: SearchResult) -> Optional[int]:
+        """Store the best strategy and its full-range backtest (StrategyManager.save_strategy)"""
+        if result.best_strategy is None:
+            return None
+        from backend.strategy_manager import StrategyManager
+        return StrategyManager.save_strategy(result.best_strategy, result.best_result)
@@ -0,0 +1,631 @@
+"""
+Streaming (incremental) technical indicators
+Each indicator is updated bar by bar in O(1) and gives the same values as the
+batch versions in backend/technical_indicators.py, without building DataFrames
+"""
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+NAN = float('nan')
+
+
+def _isnan(value) -> bool:
+    return value is None or value != value
+
+
+class _SameValueRun:
+    """Length of the current run of identical values (pandas returns exact results over flat windows)"""
+
+    def __init__(self):
+        self.value = NAN
+        self.length = 0
+
+    def update(self, value: float):
+        if value == self.value:
+            self.length += 1
+        else:
+            self.value = value
+            self.length = 0 if _isnan(value) else 1
+
+
+class RollingSum:
+    """
+    Sum over the last `period` values, pandas rolling(period).sum() semantics
+
+    The window yields NaN until it is full or while it contains a NaN.
+    Compensated (Kahan) summation keeps long runs from drifting, and the sum
+    snaps back to exactly 0 when the window holds only zeros, so ratios such
+    as RSI gain/loss see a true zero like pandas does.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque()
+        self._sum = 0.0
+        self._compensation = 0.0
+        self._nan_count = 0
+        self._nonzero_count = 0
+
+    def _add(self, value: float):
+        y = value - self._compensation
+        t = self._sum + y
+        self._compensation = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, value: float) -> float:
+        value = NAN if value is None else float(value)
+        self._window.append(value)
+        self._push(value, 1)
+
+        if len(self._window) > self.period:
+            self._push(self._window.popleft(), -1)
+
+        return self.value
+
+    def _push(self, value: float, sign: int):
+        if _isnan(value):
+            self._nan_count += sign
+            return
+        if value != 0.0:
+            self._nonzero_count += sign
+            self._add(sign * value)
+        if self._nonzero_count == 0:
+            self._sum = 0.0
+            self._compensation = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._window) == self.period and self._nan_count == 0
+
+    @property
+    def value(self) -> float:
+        return self._sum if self.ready else NAN
+
+
+class RollingVariance:
+    """Rolling sample variance (ddof=1), same compensated add/remove update as pandas roll_var"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque()
+        self._nobs = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._compensation = 0.0
+        self._nan_count = 0
+        self._run = _SameValueRun()
+
+    def _add(self, value: float):
+        self._nobs += 1
+        prev_mean = self._mean - self._compensation
+        y = value - self._compensation
+        t = y - self._mean
+        self._compensation = t + self._mean - y
+        self._mean += t / self._nobs
+        self._ssqdm += (value - prev_mean) * (value - self._mean)
+
+    def _remove(self, value: float):
+        self._nobs -= 1
+        if self._nobs == 0:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+            self._compensation = 0.0
+            return
+        prev_mean = self._mean - self._compensation
+        y = value - self._compensation
+        t = y - self._mean
+        self._compensation = t + self._mean - y
+        self._mean -= t / self._nobs
+        self._ssqdm -= (value - prev_mean) * (value - self._mean)
+
+    def update(self, value: float) -> float:
+        value = NAN if value is None else float(value)
+        self._window.append(value)
+        self._run.update(value)
+        if _isnan(value):
+            self._nan_count += 1
+        else:
+            self._add(value)
+
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            if _isnan(old):
+                self._nan_count -= 1
+            else:
+                self._remove(old)
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self._window) < self.period or self._nan_count or self._nobs < 2:
+            return NAN
+        if self._run.length >= self._nobs:
+            return 0.0
+        return max(self._ssqdm, 0.0) / (self._nobs - 1)
+
+
+class MonotonicExtremum:
+    """Rolling max (or min) over `period` values with a monotonic deque, amortized O(1)"""
+
+    def __init__(self, period: int, mode: str = 'max'):
+        self.period = period
+        self._better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self._deque = deque()  # (position, value), best value first
+        self._count = 0
+        self._last_nan = -1
+
+    def update(self, value: float) -> float:
+        position = self._count
+        self._count += 1
+
+        if _isnan(value):
+            self._last_nan = position
+        else:
+            while self._deque and self._better(value, self._deque[-1][1]):
+                self._deque.pop()
+            self._deque.append((position, float(value)))
+
+        while self._deque and self._deque[0][0] <= position - self.period:
+            self._deque.popleft()
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        position = self._count - 1
+        if self._count < self.period or self._last_nan > position - self.period or not self._deque:
+            return NAN
+        return self._deque[0][1]
+
+
+class SMA:
+    """Simple Moving Average - same values as TechnicalIndicators.add_sma"""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self._sum = RollingSum(period)
+        self._run = _SameValueRun()
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        total = self._sum.update(value)
+        self._run.update(value)
+        if _isnan(total):
+            self.value = NAN
+        elif self._run.length >= self.period:
+            self.value = self._run.value
+        else:
+            self.value = total / self.period
+        return self.value
+
+
+class EMA:
+    """Exponential Moving Average (ewm(span, adjust=False)) - same values as add_ema"""
+
+    def __init__(self, period: int = 12, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        if _isnan(value):
+            return self.value
+        if _isnan(self.value):
+            self.value = float(value)
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * float(value)
+        return self.value
+
+
+class RSI:
+    """
+    Relative Strength Index
+
+    method='sma' (default) averages gains/losses with a simple moving average,
+    exactly like TechnicalIndicators.add_rsi and the backtesting RSIStrategy.
+    method='wilder' uses Wilder's smoothing (seeded with the SMA of the first
+    `period` moves, then avg = (avg * (period - 1) + move) / period).
+    """
+
+    def __init__(self, period: int = 14, method: str = 'sma'):
+        if method not in ('sma', 'wilder'):
+            raise ValueError(f"Unknown RSI method: {method}")
+        self.period = period
+        self.method = method
+        self._prev_close = NAN
+        self._gain_sum = RollingSum(period)
+        self._loss_sum = RollingSum(period)
+        self._avg_gain = NAN
+        self._avg_loss = NAN
+        self._moves = 0
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        delta = float(close) - self._prev_close if not _isnan(self._prev_close) else NAN
+        self._prev_close = float(close)
+
+        # Same as delta.where(delta > 0, 0): the undefined first move counts as 0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.method == 'sma':
+            avg_gain = self._gain_sum.update(gain) / self.period
+            avg_loss = self._loss_sum.update(loss) / self.period
+        else:
+            avg_gain, avg_loss = self._wilder(delta, gain, loss)
+
+        self.value = _rsi_from_averages(avg_gain, avg_loss)
+        return self.value
+
+    def _wilder(self, delta: float, gain: float, loss: float):
+        if _isnan(delta):
+            return NAN, NAN
+        self._moves += 1
+        if self._moves <= self.period:
+            self._gain_sum.update(gain)
+            self._loss_sum.update(loss)
+            if self._moves == self.period:
+                self._avg_gain = self._gain_sum.value / self.period
+                self._avg_loss = self._loss_sum.value / self.period
+            return self._avg_gain, self._avg_loss
+        self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+        self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+        return self._avg_gain, self._avg_loss
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """100 - 100 / (1 + gain / loss) with pandas division semantics"""
+    if _isnan(avg_gain) or _isnan(avg_loss):
+        return NAN
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else NAN
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class MACD:
+    """MACD line, signal and histogram - same values as add_macd"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+        self.hist = NAN
+
+    def update(self, close: float) -> Dict[str, float]:
+        self.macd = self._fast.update(close) - self._slow.update(close)
+        self.signal = self._signal.update(self.macd)
+        self.hist = self.macd - self.signal
+        return self.values
+
+    @property
+    def values(self) -> Dict[str, float]:
+        return {'macd': self.macd, 'macd_signal': self.signal, 'macd_hist': self.hist}
+
+
+class BollingerBands:
+    """Bollinger Bands - same values as add_bollinger_bands"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.std_dev = std_dev
+        self._middle = SMA(period)
+        self._variance = RollingVariance(period)
+        self.middle = self.upper = self.lower = self.width = self.percent = NAN
+
+    def update(self, close: float) -> Dict[str, float]:
+        self.middle = self._middle.update(close)
+        variance = self._variance.update(close)
+        std = math.sqrt(variance) if not _isnan(variance) else NAN
+        self.upper = self.middle + self.std_dev * std
+        self.lower = self.middle - self.std_dev * std
+        self.width = self.upper - self.lower
+        self.percent = _divide(float(close) - self.lower, self.width)
+        return self.values
+
+    @property
+    def values(self) -> Dict[str, float]:
+        return {
+            'bb_middle': self.middle,
+            'bb_upper': self.upper,
+            'bb_lower': self.lower,
+            'bb_width': self.width,
+            'bb_percent': self.percent,
+        }
+
+
+class TrueRange:
+    """True range; the first bar (no previous close) uses high - low like add_atr"""
+
+    def __init__(self):
+        self._prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        ranges = [float(high) - float(low)]
+        if not _isnan(self._prev_close):
+            ranges.append(abs(float(high) - self._prev_close))
+            ranges.append(abs(float(low) - self._prev_close))
+        self._prev_close = float(close)
+        ranges = [r for r in ranges if not _isnan(r)]
+        return max(ranges) if ranges else NAN
+
+
+class ATR:
+    """Average True Range (simple average of the true range) - same values as add_atr"""
+
+    def __init__(self, period: int = 14):
+        self._true_range = TrueRange()
+        self._average = SMA(period)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self._average.update(self._true_range.update(high, low, close))
+        return self.value
+
+
+class ADX:
+    """Average Directional Index with +DI/-DI - same values as add_adx"""
+
+    def __init__(self, period: int = 14):
+        self._true_range = TrueRange()
+        self._tr_avg = SMA(period)
+        self._dm_plus_avg = SMA(period)
+        self._dm_minus_avg = SMA(period)
+        self._dx_avg = SMA(period)
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self.adx = self.di_plus = self.di_minus = NAN
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        high, low = float(high), float(low)
+        high_diff = high - self._prev_high
+        low_diff = self._prev_low - low
+        self._prev_high, self._prev_low = high, low
+
+        dm_plus = max(high_diff, 0.0) if high_diff > low_diff else 0.0
+        dm_minus = max(low_diff, 0.0) if low_diff > high_diff else 0.0
+
+        tr_avg = self._tr_avg.update(self._true_range.update(high, low, close))
+        self.di_plus = 100 * _divide(self._dm_plus_avg.update(dm_plus), tr_avg)
+        self.di_minus = 100 * _divide(self._dm_minus_avg.update(dm_minus), tr_avg)
+
+        dx = _divide(100 * abs(self.di_plus - self.di_minus), self.di_plus + self.di_minus)
+        self.adx = self._dx_avg.update(dx)
+        return self.values
+
+    @property
+    def values(self) -> Dict[str, float]:
+        return {'adx': self.adx, 'di_plus': self.di_plus, 'di_minus': self.di_minus}
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """Float division with pandas semantics (x/0 = +-inf, 0/0 = NaN)"""
+    if _isnan(numerator) or _isnan(denominator):
+        return NAN
+    if denominator == 0:
+        if numerator == 0:
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class Stochastic:
+    """Stochastic oscillator %K/%D - same values as add_stochastic"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self._lowest = MonotonicExtremum(k_period, 'min')
+        self._highest = MonotonicExtremum(k_period, 'max')
+        self._d = SMA(d_period)
+        self.k = self.d = NAN
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        low_min = self._lowest.update(low)
+        high_max = self._highest.update(high)
+        self.k = _divide(100 * (float(close) - low_min), high_max - low_min)
+        self.d = self._d.update(self.k)
+        return self.values
+
+    @property
+    def values(self) -> Dict[str, float]:
+        return {'stoch_k': self.k, 'stoch_d': self.d}
+
+
+class OBV:
+    """On-Balance Volume - same values as add_obv"""
+
+    def __init__(self):
+        self._prev_close = NAN
+        self.value = 0.0
+
+    def update(self, close: float, volume: float) -> float:
+        close = float(close)
+        if not _isnan(self._prev_close):
+            change = close - self._prev_close
+            if change > 0:
+                self.value += float(volume)
+            elif change < 0:
+                self.value -= float(volume)
+        self._prev_close = close
+        return self.value
+
+
+class VWAP:
+    """Cumulative Volume Weighted Average Price - same values as add_vwap"""
+
+    def __init__(self):
+        self._price_volume = 0.0
+        self._volume = 0.0
+        self.value = NAN
+
+    def update(self, close: float, volume: float) -> float:
+        self._price_volume += float(close) * float(volume)
+        self._volume += float(volume)
+        self.value = _divide(self._price_volume, self._volume)
+        return self.value
+
+
+class MFI:
+    """Money Flow Index - same values as add_mfi"""
+
+    def __init__(self, period: int = 14):
+        self._positive = RollingSum(period)
+        self._negative = RollingSum(period)
+        self._prev_tp = NAN
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        tp = (float(high) + float(low) + float(close)) / 3
+        money_flow = tp * float(volume)
+        positive = money_flow if tp > self._prev_tp else 0.0
+        negative = money_flow if tp < self._prev_tp else 0.0
+        self._prev_tp = tp
+
+        ratio = _divide(self._positive.update(positive), self._negative.update(negative))
+        self.value = NAN if _isnan(ratio) else 100 - (100 / (1 + ratio))
+        return self.value
+
+
+class IndicatorSet:
+    """
+    A group of streaming indicators fed with the same bars
+
+    Values are exposed under the column names used by
+    TechnicalIndicators (sma_20, rsi_14, macd_signal, bb_upper, atr_14...).
+
+    Example:
+        indicators = IndicatorSet(sma=[20, 50], rsi=[14], macd=True)
+        for bar in bars:
+            values = indicators.update(bar)
+    """
+
+    def __init__(
+        self,
+        sma: Iterable[int] = (),
+        ema: Iterable[int] = (),
+        rsi: Iterable[int] = (),
+        rsi_method: str = 'sma',
+        macd: bool = False,
+        bollinger: bool = False,
+        atr: Iterable[int] = (),
+        adx: Optional[int] = None,
+        stochastic: bool = False,
+        obv: bool = False,
+        vwap: bool = False,
+        mfi: Iterable[int] = ()
+    ):
+        self._scalar = {}  # column -> (indicator, input fields)
+        self._grouped = []  # (indicator, input fields)
+
+        for period in sma:
+            self._scalar[f'sma_{period}'] = (SMA(period), ('close',))
+        for period in ema:
+            self._scalar[f'ema_{period}'] = (EMA(period), ('close',))
+        for period in rsi:
+            self._scalar[f'rsi_{period}'] = (RSI(period, rsi_method), ('close',))
+        for period in atr:
+            self._scalar[f'atr_{period}'] = (ATR(period), ('high', 'low', 'close'))
+        for period in mfi:
+            self._scalar[f'mfi_{period}'] = (MFI(period), ('high', 'low', 'close', 'volume'))
+        if obv:
+            self._scalar['obv'] = (OBV(), ('close', 'volume'))
+        if vwap:
+            self._scalar['vwap'] = (VWAP(), ('close', 'volume'))
+
+        if macd:
+            self._grouped.append((MACD(), ('close',)))
+        if bollinger:
+            self._grouped.append((BollingerBands(), ('close',)))
+        if adx:
+            self._grouped.append((ADX(adx), ('high', 'low', 'close')))
+        if stochastic:
+            self._grouped.append((Stochastic(), ('high', 'low', 'close')))
+
+        self.values: Dict[str, float] = {}
+        self.count = 0
+
+    def update(self, bar: Dict) -> Dict[str, float]:
+        """
+        Feed one bar (mapping with open/high/low/close/volume)
+
+        Returns:
+            Latest value of every indicator, keyed by column name
+        """
+        for column, (indicator, fields) in self._scalar.items():
+            self.values[column] = indicator.update(*(bar[field] for field in fields))
+        for indicator, fields in self._grouped:
+            self.values.update(indicator.update(*(bar[field] for field in fields)))
+        self.count += 1
+        return self.values
+
+    def update_many(self, bars: Iterable[Dict]) -> Dict[str, float]:
+        """Feed several bars in order (warm-up)"""
+        for bar in bars:
+            self.update(bar)
+        return self.values
+
+
+class SignalStream:
+    """
+    Incremental version of a backtesting_engine strategy's generate_signals()
+
+    update() returns the signal of the latest bar (1 = BUY, -1 = SELL,
+    0 = HOLD), equal to generate_signals(df).iloc[-1] on the same history.
+    """
+
+    def __init__(self, indicators: IndicatorSet):
+        self.indicators = indicators
+        self.signal = 0
+
+    def update(self, bar: Dict) -> int:
+        self.signal = self._signal(self.indicators.update(bar))
+        return self.signal
+
+    def update_many(self, bars: Iterable[Dict]) -> int:
+        for bar in bars:
+            self.update(bar)
+        return self.signal
+
+    @property
+    def count(self) -> int:
+        return self.indicators.count
+
+    def _signal(self, values: Dict[str, float]) -> int:
+        raise NotImplementedError()
+
+
+class MACrossSignal(SignalStream):
+    """SimpleMovingAverageStrategy / EnhancedMovingAverageStrategy: 1 while fast > slow, -1 while fast < slow"""
+
+    def __init__(self, fast_period: int, slow_period: int):
+        super().__init__(IndicatorSet(sma=sorted({fast_period, slow_period})))
+        self.fast_column = f'sma_{fast_period}'
+        self.slow_column = f'sma_{slow_period}'
+
+    def _signal(self, values: Dict[str, float]) -> int:
+        fast, slow = values[self.fast_column], values[self.slow_column]
+        if fast > slow:
+            return 1
+        if fast < slow:
+            return -1
+        return 0
+
+
+class RSISignal(SignalStream):
+    """RSIStrategy: 1 below oversold, -1 above overbought"""
+
+    def __init__(self, period: int, oversold: float, overbought: float):
+        super().__init__(IndicatorSet(rsi=[period]))
+        self.column = f'rsi_{period}'
+        self.oversold = oversold
+        self.overbought = overbought
+
+    def _signal(self, values: Dict[str, float]) -> int:
+        rsi = values[self.column]
+        if rsi > self.overbought:
+            return -1
+        if rsi < self.oversold:
+            return 1
+        return 0
+
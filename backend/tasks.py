@@ -176,6 +176,50 @@ def collect_data_ibkr(
             logger.warning(f"Error disconnecting IBKR for job {job_id}: {disconnect_error}")
 
 
+@celery_app.task(bind=True)
+def collect_universe_ibkr(
+    self,
+    ticker_symbols: list,
+    duration: str,
+    bar_size: str,
+    interval_db: str
+):
+    """
+    Collect historical data for many tickers over ONE IBKR connection
+    
+    Instead of one task (and one connection) per ticker, all requests go
+    through the shared pacing scheduler with several in flight at once.
+    
+    Args:
+        ticker_symbols: Stock symbols
+        duration: IBKR duration string per ticker (e.g., '1 M')
+        bar_size: IBKR bar size (e.g., '1 min')
+        interval_db: Database interval format (e.g., '1min')
+    """
+    from backend.ibkr_collector import IBKRCollector
+    import random
+    
+    collector = IBKRCollector(client_id=random.randint(4, 999))
+    try:
+        if not collector.connect():
+            raise IBKRConnectionError("Failed to connect to IBKR")
+        
+        def progress_callback(current, total):
+            """Report chunk progress to Celery"""
+            self.update_state(state='PROGRESS', meta={'current': current, 'total': total})
+        
+        results = collector.collect_multiple_tickers(
+            ticker_symbols, duration, bar_size, interval_db, progress_callback=progress_callback
+        )
+        succeeded = sum(1 for r in results.values() if r.get('success'))
+        logger.info(f"✅ Universe collection: {succeeded}/{len(ticker_symbols)} tickers saved")
+        return results
+    
+    finally:
+        if collector.connected:
+            collector.disconnect()
+
+
 @celery_app.task
 def cleanup_old_jobs(days_to_keep: int = 7):
     """
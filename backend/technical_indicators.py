@@ -164,8 +164,8 @@ class TechnicalIndicators:
         nmf = np.where(tp < tp.shift(1), mf, 0)
         
         # Calculate Money Flow Ratio
-        pmf_sum = pd.Series(pmf).rolling(window=period).sum()
-        nmf_sum = pd.Series(nmf).rolling(window=period).sum()
+        pmf_sum = pd.Series(pmf, index=df.index).rolling(window=period).sum()
+        nmf_sum = pd.Series(nmf, index=df.index).rolling(window=period).sum()
         mfr = pmf_sum / nmf_sum
         
         # Calculate MFI
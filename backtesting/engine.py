@@ -3,7 +3,7 @@ Backtesting engine for testing trading strategies
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from backend.config import logger
@@ -35,6 +35,90 @@ class Trade:
     status: str = 'OPEN'  # 'OPEN', 'CLOSED'
 
 
+class RollingState:
+    """
+    Bars replayed so far, as seen by a streaming strategy
+    
+    Columns are kept as NumPy arrays and the state only moves a cursor, so
+    reading the latest values is O(1). Strategies may keep their own
+    incremental values (running sums, previous signal...) in `vars`.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._columns = {col: df[col].to_numpy() for col in df.columns}
+        self.position = -1
+        self.vars: Dict[str, Any] = {}
+    
+    def __len__(self) -> int:
+        return self.position + 1
+    
+    def advance(self):
+        """Move to the next bar"""
+        self.position += 1
+    
+    def has_column(self, column: str) -> bool:
+        return column in self._columns
+    
+    def history(self, column: str, n: int) -> np.ndarray:
+        """Last n values of a column (view, oldest first)"""
+        start = max(0, self.position + 1 - n)
+        return self._columns[column][start:self.position + 1]
+    
+    def window(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Last n bars as a DataFrame (all bars so far if n is None)
+        
+        Building a DataFrame costs far more than history(); it exists for
+        strategies written against the generate_signal(data) interface.
+        """
+        start = 0 if n is None else max(0, self.position + 1 - n)
+        return self._df.iloc[start:self.position + 1]
+
+
+class Bar:
+    """One bar of a backtest replay (read-only view into the RollingState arrays)"""
+    
+    __slots__ = ('timestamp', 'position', '_columns')
+    
+    def __init__(self, timestamp, position: int, columns: Dict[str, np.ndarray]):
+        self.timestamp = timestamp
+        self.position = position
+        self._columns = columns
+    
+    def __getitem__(self, column: str):
+        return self._columns[column][self.position]
+    
+    def get(self, column: str, default=None):
+        values = self._columns.get(column)
+        return default if values is None else values[self.position]
+    
+    @property
+    def close(self) -> float:
+        return self['close']
+
+
+def as_bar_handler(strategy, lookback: Optional[int] = None) -> Callable[[Bar, RollingState], str]:
+    """
+    Adapt a strategy to the streaming on_bar(bar, state) protocol
+    
+    Accepted:
+        - objects exposing on_bar(bar, state)
+        - bound generate_signal methods of such objects (BaseStrategy), which
+          then get their bounded lookback window instead of the full history
+        - any callable(data) -> signal; it receives the last `lookback` bars,
+          or the whole history when lookback is None (quadratic, legacy)
+    """
+    if hasattr(strategy, 'on_bar'):
+        return strategy.on_bar
+    
+    owner = getattr(strategy, '__self__', None)
+    if getattr(strategy, '__name__', None) == 'generate_signal' and hasattr(owner, 'on_bar'):
+        return owner.on_bar
+    
+    return lambda bar, state: strategy(state.window(lookback))
+
+
 class BacktestEngine:
     """Backtesting engine for strategy evaluation"""
     
@@ -202,15 +286,22 @@ class BacktestEngine:
         self,
         df: pd.DataFrame,
         strategy_func,
-        symbol: str
+        symbol: str,
+        lookback: Optional[int] = None
     ) -> Dict:
         """
         Run backtest with a strategy function
         
+        The replay is linear in the number of bars: each bar is handed to the
+        strategy together with a RollingState instead of re-slicing the
+        growing history.
+        
         Args:
             df: DataFrame with OHLCV data and indicators
-            strategy_func: Function that returns signals ('BUY', 'SELL', 'HOLD')
+            strategy_func: Streaming strategy (on_bar), BaseStrategy.generate_signal,
+                or function that returns signals ('BUY', 'SELL', 'HOLD') from a DataFrame
             symbol: Symbol being traded
+            lookback: Bars passed to a plain strategy function (None = full history)
             
         Returns:
             Backtest results dictionary
@@ -219,12 +310,18 @@ class BacktestEngine:
         
         logger.info(f"Starting backtest for {symbol} with {len(df)} bars")
         
+        on_bar = as_bar_handler(strategy_func, lookback)
+        state = RollingState(df)
+        closes = df['close'].to_numpy()
+        timestamps = df.index
+        
         for idx in range(len(df)):
-            current_bar = df.iloc[idx]
-            timestamp = df.index[idx]
+            state.advance()
+            timestamp = timestamps[idx]
+            price = closes[idx]
             
             # Get strategy signal
-            signal = strategy_func(df.iloc[:idx+1])
+            signal = on_bar(Bar(timestamp, idx, state._columns), state)
             
             # Execute trades based on signal
             if signal == 'BUY' and len(self.positions) == 0:
@@ -232,7 +329,7 @@ class BacktestEngine:
                     timestamp=timestamp,
                     symbol=symbol,
                     direction='LONG',
-                    price=current_bar['close'],
+                    price=price,
                     percent_capital=self.config.risk_per_trade
                 )
             
@@ -242,20 +339,19 @@ class BacktestEngine:
                         self.close_position(
                             timestamp=timestamp,
                             trade=trade,
-                            price=current_bar['close']
+                            price=price
                         )
             
             # Update equity curve
-            self.update_equity(timestamp, {symbol: current_bar['close']})
+            self.update_equity(timestamp, {symbol: price})
         
         # Close any remaining positions at the end
         if self.positions:
-            last_bar = df.iloc[-1]
             for trade in self.positions[:]:
                 self.close_position(
-                    timestamp=df.index[-1],
+                    timestamp=timestamps[-1],
                     trade=trade,
-                    price=last_bar['close']
+                    price=closes[-1]
                 )
         
         # Calculate results
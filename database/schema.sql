@@ -27,31 +27,27 @@ CREATE TABLE IF NOT EXISTS historical_data (
     close FLOAT NOT NULL,
     volume INTEGER NOT NULL,
     interval VARCHAR(10) DEFAULT '1min',
-    
-    -- Technical indicators
-    sma_20 FLOAT,
-    sma_50 FLOAT,
-    ema_12 FLOAT,
-    ema_26 FLOAT,
-    rsi_14 FLOAT,
-    macd FLOAT,
-    macd_signal FLOAT,
-    macd_hist FLOAT,
-    bb_upper FLOAT,
-    bb_middle FLOAT,
-    bb_lower FLOAT,
-    
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_historical_ticker ON historical_data(ticker_id);
-CREATE INDEX idx_historical_timestamp ON historical_data(timestamp);
-CREATE INDEX idx_historical_ticker_timestamp ON historical_data(ticker_id, timestamp);
-CREATE INDEX idx_historical_ticker_interval_timestamp ON historical_data(ticker_id, interval, timestamp);
+-- Indicator values are not stored with the bars (see backend/compact_bars.py)
+CREATE INDEX idx_ticker_timestamp ON historical_data(ticker_id, timestamp);
 
 -- Unique constraint to prevent duplicate data
 CREATE UNIQUE INDEX idx_unique_historical_data ON historical_data(ticker_id, timestamp, interval);
 
+-- Per (ticker, interval) summary maintained by the writers
+CREATE TABLE IF NOT EXISTS ticker_interval_stats (
+    id SERIAL PRIMARY KEY,
+    ticker_id INTEGER NOT NULL REFERENCES tickers(id) ON DELETE CASCADE,
+    interval VARCHAR(10) NOT NULL,
+    bar_count INTEGER NOT NULL DEFAULT 0,
+    first_timestamp TIMESTAMP,
+    last_timestamp TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_ticker_interval_stats UNIQUE (ticker_id, interval)
+);
+
 -- Strategies table
 CREATE TABLE IF NOT EXISTS strategies (
     id SERIAL PRIMARY KEY,
@@ -27,7 +27,7 @@ from frontend.constants import (
     MENU_DASHBOARD, MENU_DATA_COLLECTION, MENU_TECHNICAL_ANALYSIS,
     MENU_AUTO_TRADING, MENU_ORDER_PLACEMENT, MENU_SETTINGS,
     BTN_REFRESH, ERROR_DETAILS, LABEL_QUANTITY, LABEL_PRICE_EUR,
-    HOVERMODE_X_UNIFIED
+    HOVERMODE_X_UNIFIED, CHART_WIDTH_PX
 )
 
 # Set timezone to Europe/Paris at startup
@@ -52,42 +52,22 @@ from backend.config import logger, FRENCH_TICKERS
 from backend.data_collector import DataCollector
 from backend.technical_indicators import calculate_and_update_indicators
 from backend.indicators import calculate_rsi, calculate_macd, calculate_bollinger_bands
-from backend.models import SessionLocal, Ticker as TickerModel, HistoricalData, Order, OrderStatus, init_db
+from backend.models import SessionLocal, Order, OrderStatus, init_db
+from backend.data_access import load_bars_frame, refresh_interval_stats
+from backend import bar_store
+from backend.downsampling import downsample, lttb_indices, take, target_points
 from sqlalchemy import func
+from frontend import data_cache
+from frontend.data_cache import get_available_tickers
 
 # Initialize database on startup
 init_db()
+data_cache.register_invalidation()
 
 # IBKR client is optional - loaded lazily to avoid event loop warnings
 IBKR_AVAILABLE = False
 ibkr_client = None
 
-def get_available_tickers():
-    """Get only tickers that have collected data in the database (excluding test tickers)"""
-    db = SessionLocal()
-    try:
-        # Get tickers that have data in historical_data table
-        tickers_with_data = db.query(TickerModel.symbol, TickerModel.name).join(
-            HistoricalData,
-            TickerModel.id == HistoricalData.ticker_id
-        ).distinct().all()
-        
-        # Filter out test tickers
-        result = {}
-        for ticker in tickers_with_data:
-            symbol = ticker.symbol.upper()
-            # Skip test/mock tickers
-            if any(skip in symbol for skip in ['TEST', 'MOCK', 'INVALID', 'XYZ', 'DUMMY']):
-                continue
-            result[ticker.symbol] = ticker.name
-        
-        return result
-    except Exception as e:
-        logger.error(f"Error getting available tickers: {e}")
-        return {}
-    finally:
-        db.close()
-
 # Page configuration
 st.set_page_config(
     page_title="Boursicotor - Trading Algorithmique",
@@ -196,6 +176,12 @@ def main():
     try:
         active_jobs = get_cached_active_jobs()
         
+        # Celery workers write bars in another process: drop cached data once one of their jobs is over
+        active_job_ids = {job.id for job in active_jobs}
+        if st.session_state.get('active_job_ids', set()) - active_job_ids:
+            data_cache.invalidate()
+        st.session_state.active_job_ids = active_job_ids
+        
         if active_jobs:
             with st.container():
                 st.markdown("""
@@ -914,23 +900,9 @@ def data_collection_page():
         db = SessionLocal()
         try:
             from backend.models import Ticker as TickerModel, HistoricalData
-            from sqlalchemy import func
-            
-            # Get all tickers with data
-            tickers_with_stats = db.query(
-                TickerModel.symbol,
-                TickerModel.name,
-                func.count(HistoricalData.id).label('total_points'),
-                func.min(HistoricalData.timestamp).label('first_date'),
-                func.max(HistoricalData.timestamp).label('last_date')
-            ).join(
-                HistoricalData,
-                TickerModel.id == HistoricalData.ticker_id
-            ).group_by(
-                TickerModel.id,
-                TickerModel.symbol,
-                TickerModel.name
-            ).order_by(TickerModel.symbol).all()
+            
+            # Get all tickers with data (cached)
+            tickers_with_stats = list(data_cache.get_data_overview().itertuples(index=False))
             
             if tickers_with_stats:
                 # Prepare data for display
@@ -1043,9 +1015,11 @@ def data_collection_page():
                                     ticker_obj = db.query(TickerModel).filter(TickerModel.symbol == ticker_sym).first()
                                     if ticker_obj:
                                         count = db.query(HistoricalData).filter(HistoricalData.ticker_id == ticker_obj.id).delete()
+                                        refresh_interval_stats(db, ticker_obj.id)
                                         deleted_count += count
                                 
                                 db.commit()
+                                data_cache.invalidate()
                                 
                                 # Show success and clear selection (no rerun)
                                 st.session_state.delete_selection = []
@@ -1080,112 +1054,88 @@ def data_collection_page():
         col_interp1, col_interp2 = st.columns(2)
         
         with col_interp1:
-            # Get available tickers
-            db_interp = SessionLocal()
-            try:
-                from backend.models import Ticker as TickerModel, HistoricalData
-                from sqlalchemy import func, distinct
-                
-                # Get tickers with data
-                tickers_with_data = db_interp.query(
-                    TickerModel.symbol,
-                    TickerModel.name
-                ).join(
-                    HistoricalData,
-                    TickerModel.id == HistoricalData.ticker_id
-                ).distinct().all()
-                
-                if tickers_with_data:
-                    ticker_options_interp = {t.symbol: f"{t.symbol} - {t.name}" for t in tickers_with_data}
-                    selected_ticker_interp = st.selectbox(
-                        "Sélectionner le ticker",
-                        list(ticker_options_interp.keys()),
-                        format_func=lambda x: ticker_options_interp[x],
-                        key="interp_ticker"
+            # Get tickers with data (cached)
+            tickers_with_data = list(data_cache.get_data_overview().itertuples(index=False))
+            
+            if tickers_with_data:
+                ticker_options_interp = {t.symbol: f"{t.symbol} - {t.name}" for t in tickers_with_data}
+                selected_ticker_interp = st.selectbox(
+                    "Sélectionner le ticker",
+                    list(ticker_options_interp.keys()),
+                    format_func=lambda x: ticker_options_interp[x],
+                    key="interp_ticker"
                 )
-                
+            
                 # Get available intervals for this ticker
-                ticker_obj = db_interp.query(TickerModel).filter(TickerModel.symbol == selected_ticker_interp).first()
-                
-                if ticker_obj:
-                    available_intervals = db_interp.query(
-                        distinct(HistoricalData.interval),
-                        func.count(HistoricalData.id)
-                    ).filter(
-                        HistoricalData.ticker_id == ticker_obj.id
-                    ).group_by(
-                        HistoricalData.interval
-                    ).all()
+                interval_stats = data_cache.get_interval_stats(selected_ticker_interp)
+                available_intervals = list(zip(interval_stats['interval'], interval_stats['count'].astype(int)))
+                
+                if available_intervals:
+                    interval_info = {interval: f"{interval} ({count:,} points)" for interval, count in available_intervals}
+                    source_interval_interp = st.selectbox(
+                        "Intervalle source",
+                        [interval for interval, _ in available_intervals],
+                        format_func=lambda x: interval_info[x],
+                        key="source_interval"
+                    )
+                    
+                    # Get available target intervals
+                    from backend.data_interpolator import DataInterpolator
                     
-                    if available_intervals:
-                        interval_info = {interval: f"{interval} ({count:,} points)" for interval, count in available_intervals}
-                        source_interval_interp = st.selectbox(
-                            "Intervalle source",
-                            [interval for interval, _ in available_intervals],
-                            format_func=lambda x: interval_info[x],
-                            key="source_interval"
+                    possible_targets = []
+                    all_targets = ['1s', '5s', '10s', '30s', '1min', '5min', '15min', '30min', '1h']
+                    
+                    for target in all_targets:
+                        if DataInterpolator.can_interpolate(source_interval_interp, target):
+                            multiplier = DataInterpolator.INTERVAL_MULTIPLIERS[(source_interval_interp, target)]
+                            possible_targets.append((target, multiplier))
+                    
+                    if possible_targets:
+                        target_labels = {t: f"{t} (×{m} points)" for t, m in possible_targets}
+                        target_interval_interp = st.selectbox(
+                            "Intervalle cible",
+                            [t for t, _ in possible_targets],
+                            format_func=lambda x: target_labels[x],
+                            key="target_interval"
                         )
                         
-                        # Get available target intervals
-                        from backend.data_interpolator import DataInterpolator
+                        # Interpolation method
+                        methods = DataInterpolator.get_interpolation_methods()
+                        selected_method = st.selectbox(
+                            "Méthode d'interpolation",
+                            list(methods.keys()),
+                            format_func=lambda x: methods[x],
+                            key="interp_method"
+                        )
                         
-                        possible_targets = []
-                        all_targets = ['1s', '5s', '10s', '30s', '1min', '5min', '15min', '30min', '1h']
+                        # Limit records
+                        source_count = next(count for interval, count in available_intervals if interval == source_interval_interp)
+                        max_limit = min(source_count, 10000)  # Limit to 10k source records max
                         
-                        for target in all_targets:
-                            if DataInterpolator.can_interpolate(source_interval_interp, target):
-                                multiplier = DataInterpolator.INTERVAL_MULTIPLIERS[(source_interval_interp, target)]
-                                possible_targets.append((target, multiplier))
+                        limit_records = st.number_input(
+                            "Limiter le nombre d'enregistrements source",
+                            min_value=10,
+                            max_value=max(max_limit, 10),  # Ensure max >= min
+                            value=max(min(1000, max_limit), 10),  # Ensure value >= min_value
+                            step=100,
+                            help=f"Pour éviter la surcharge, limitez le nombre d'enregistrements à traiter ({source_count:,} disponibles)"
+                        )
+                        
+                        # Calculate expected output
+                        multiplier = next(m for t, m in possible_targets if t == target_interval_interp)
+                        expected_records = limit_records * multiplier
+                        
+                        st.info(f"📊 **Estimation**: {limit_records:,} enregistrements source → ~{expected_records:,} enregistrements générés")
                         
-                        if possible_targets:
-                            target_labels = {t: f"{t} (×{m} points)" for t, m in possible_targets}
-                            target_interval_interp = st.selectbox(
-                                "Intervalle cible",
-                                [t for t, _ in possible_targets],
-                                format_func=lambda x: target_labels[x],
-                                key="target_interval"
-                            )
-                            
-                            # Interpolation method
-                            methods = DataInterpolator.get_interpolation_methods()
-                            selected_method = st.selectbox(
-                                "Méthode d'interpolation",
-                                list(methods.keys()),
-                                format_func=lambda x: methods[x],
-                                key="interp_method"
-                            )
-                            
-                            # Limit records
-                            source_count = next(count for interval, count in available_intervals if interval == source_interval_interp)
-                            max_limit = min(source_count, 10000)  # Limit to 10k source records max
-                            
-                            limit_records = st.number_input(
-                                "Limiter le nombre d'enregistrements source",
-                                min_value=10,
-                                max_value=max(max_limit, 10),  # Ensure max >= min
-                                value=max(min(1000, max_limit), 10),  # Ensure value >= min_value
-                                step=100,
-                                help=f"Pour éviter la surcharge, limitez le nombre d'enregistrements à traiter ({source_count:,} disponibles)"
-                            )
-                            
-                            # Calculate expected output
-                            multiplier = next(m for t, m in possible_targets if t == target_interval_interp)
-                            expected_records = limit_records * multiplier
-                            
-                            st.info(f"📊 **Estimation**: {limit_records:,} enregistrements source → ~{expected_records:,} enregistrements générés")
-                            
-                        else:
-                            st.warning(f"⚠️ Aucune interpolation possible depuis {source_interval_interp}")
-                            target_interval_interp = None
                     else:
-                        st.warning("⚠️ Aucune donnée disponible pour ce ticker")
+                        st.warning(f"⚠️ Aucune interpolation possible depuis {source_interval_interp}")
                         target_interval_interp = None
                 else:
-                    st.warning("⚠️ Aucun ticker avec données historiques")
+                    st.warning("⚠️ Aucune donnée disponible pour ce ticker")
                     target_interval_interp = None
-            
-            finally:
-                db_interp.close()
+            else:
+                st.warning("⚠️ Aucun ticker avec données historiques")
+                target_interval_interp = None
         
         with col_interp2:
             st.markdown("### 📋 Comment ça marche ?")
@@ -1259,48 +1209,27 @@ def data_collection_page():
         )
     
     with col_viz2:
-        # Get date range for this ticker
-        db = SessionLocal()
-        try:
-            ticker_obj = db.query(TickerModel).filter(TickerModel.symbol == viz_ticker).first()
-            if ticker_obj:
-                min_date_row = db.query(HistoricalData).filter(
-                    HistoricalData.ticker_id == ticker_obj.id
-                ).order_by(HistoricalData.timestamp.asc()).first()
-                
-                max_date_row = db.query(HistoricalData).filter(
-                    HistoricalData.ticker_id == ticker_obj.id
-                ).order_by(HistoricalData.timestamp.desc()).first()
-                
-                if min_date_row and max_date_row:
-                    min_date = min_date_row.timestamp.date()
-                    max_date = max_date_row.timestamp.date()
-                    
-                    # Quick period selector
-                    period_options = {
-                        "Tout": None,
-                        "Dernières 24h": 1,
-                        "Derniers 7 jours": 7,
-                        "Derniers 30 jours": 30,
-                        "Derniers 90 jours": 90,
-                        "Personnalisé": "custom"
-                    }
-                    
-                    selected_period = st.selectbox(
-                        "Période",
-                        list(period_options.keys()),
-                        key="viz_period"
-                    )
-                else:
-                    min_date = None
-                    max_date = None
-                    selected_period = "Tout"
-            else:
-                min_date = None
-                max_date = None
-                selected_period = "Tout"
-        finally:
-            db.close()
+        # Get date range for this ticker (cached)
+        min_date, max_date = data_cache.get_date_bounds(viz_ticker)
+        
+        if min_date and max_date:
+            # Quick period selector
+            period_options = {
+                "Tout": None,
+                "Dernières 24h": 1,
+                "Derniers 7 jours": 7,
+                "Derniers 30 jours": 30,
+                "Derniers 90 jours": 90,
+                "Personnalisé": "custom"
+            }
+            
+            selected_period = st.selectbox(
+                "Période",
+                list(period_options.keys()),
+                key="viz_period"
+            )
+        else:
+            selected_period = "Tout"
     
     # Custom date range if selected
     use_custom_dates = False
@@ -1339,47 +1268,37 @@ def data_collection_page():
             if not ticker_obj:
                 st.warning(f"⚠️ Aucune donnée disponible pour {viz_ticker}")
             else:
-                # Build query
-                query = db.query(HistoricalData).filter(HistoricalData.ticker_id == ticker_obj.id)
-                
-                # Apply date filters
+                # Date filters
+                start_filter = None
+                end_filter = None
                 if use_custom_dates:
-                    query = query.filter(
-                        HistoricalData.timestamp >= datetime.combine(start_date, datetime.min.time()),
-                        HistoricalData.timestamp <= datetime.combine(end_date, datetime.max.time())
-                    )
+                    start_filter = datetime.combine(start_date, datetime.min.time())
+                    end_filter = datetime.combine(end_date, datetime.max.time())
                 elif period_options[selected_period] is not None:
                     days = period_options[selected_period]
-                    cutoff_date = datetime.now() - timedelta(days=days)
-                    query = query.filter(HistoricalData.timestamp >= cutoff_date)
+                    # Rounded to the minute so that reruns hit the cache
+                    start_filter = datetime.now().replace(second=0, microsecond=0) - timedelta(days=days)
                 
-                # Execute query
-                data = query.order_by(HistoricalData.timestamp.asc()).all()
+                # Execute query (cached)
+                df = data_cache.get_bars(viz_ticker, start=start_filter, end=end_filter, index=True)
                 
-                if not data:
+                if df.empty:
                     st.warning("⚠️ Aucune donnée disponible pour la période sélectionnée")
                 else:
-                    # Convert to DataFrame
-                    df = pd.DataFrame([{
-                        'timestamp': d.timestamp,
-                        'open': d.open,
-                        'high': d.high,
-                        'low': d.low,
-                        'close': d.close,
-                        'volume': d.volume
-                    } for d in data])
-                    
-                    df.set_index('timestamp', inplace=True)
-                    
-                    st.info(f"📊 {len(df)} points de données affichés")
+                    # One candle per pixel at most: narrow the period to see every bar
+                    df_plot = downsample(df, CHART_WIDTH_PX)
+                    if len(df_plot) < len(df):
+                        st.info(f"📊 {len(df):,} points de données ({len(df_plot):,} bougies affichées, réduisez la période pour plus de détail)")
+                    else:
+                        st.info(f"📊 {len(df)} points de données affichés")
                     
                     # Create candlestick chart
                     fig = go.Figure(data=[go.Candlestick(
-                        x=df.index,
-                        open=df['open'],
-                        high=df['high'],
-                        low=df['low'],
-                        close=df['close'],
+                        x=df_plot.index,
+                        open=df_plot['open'],
+                        high=df_plot['high'],
+                        low=df_plot['low'],
+                        close=df_plot['close'],
                         name=viz_ticker
                     )])
                     
@@ -1396,8 +1315,8 @@ def data_collection_page():
                     
                     # Volume chart
                     fig_volume = go.Figure(data=[go.Bar(
-                        x=df.index,
-                        y=df['volume'],
+                        x=df_plot.index,
+                        y=df_plot['volume'],
                         name='Volume',
                         marker=dict(color='rgba(100, 150, 255, 0.7)')
                     )])
@@ -1857,6 +1776,9 @@ def technical_analysis_page():
     with st.spinner("Calcul des indicateurs..."):
         df = calculate_and_update_indicators(df)
     
+    # Indicators are computed on every bar, then merged per pixel for display
+    df_plot = downsample(df, CHART_WIDTH_PX)
+    
     # Create subplots
     fig = make_subplots(
         rows=4, cols=1,
@@ -1870,37 +1792,37 @@ def technical_analysis_page():
     # Candlestick
     fig.add_trace(
         go.Candlestick(
-            x=df.index, open=df['open'], high=df['high'],
-            low=df['low'], close=df['close'], name='Prix'
+            x=df_plot.index, open=df_plot['open'], high=df_plot['high'],
+            low=df_plot['low'], close=df_plot['close'], name='Prix'
         ),
         row=1, col=1
     )
     
     # Moving averages
     if 'sma_20' in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df['sma_20'], name='SMA 20', line=dict(color='orange')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['sma_20'], name='SMA 20', line=dict(color='orange')), row=1, col=1)
     if 'sma_50' in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df['sma_50'], name='SMA 50', line=dict(color='blue')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['sma_50'], name='SMA 50', line=dict(color='blue')), row=1, col=1)
     
     # Bollinger Bands
     if 'bb_upper' in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df['bb_upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['bb_lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['bb_upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['bb_lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
     
     # RSI
     if 'rsi_14' in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df['rsi_14'], name='RSI', line=dict(color='purple')), row=2, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['rsi_14'], name='RSI', line=dict(color='purple')), row=2, col=1)
         fig.add_hline(y=70, line=dict(dash="dash", color="red"), row=2, col=1)
         fig.add_hline(y=30, line=dict(dash="dash", color="green"), row=2, col=1)
     
     # MACD
     if 'macd' in df.columns:
-        fig.add_trace(go.Scatter(x=df.index, y=df['macd'], name='MACD', line=dict(color='blue')), row=3, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['macd_signal'], name='Signal', line=dict(color='red')), row=3, col=1)
-        fig.add_trace(go.Bar(x=df.index, y=df['macd_hist'], name='Histogram'), row=3, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['macd'], name='MACD', line=dict(color='blue')), row=3, col=1)
+        fig.add_trace(go.Scatter(x=df_plot.index, y=df_plot['macd_signal'], name='Signal', line=dict(color='red')), row=3, col=1)
+        fig.add_trace(go.Bar(x=df_plot.index, y=df_plot['macd_hist'], name='Histogram'), row=3, col=1)
     
     # Volume
-    fig.add_trace(go.Bar(x=df.index, y=df['volume'], name='Volume'), row=4, col=1)
+    fig.add_trace(go.Bar(x=df_plot.index, y=df_plot['volume'], name='Volume'), row=4, col=1)
     
     fig.update_layout(height=1000, showlegend=True, xaxis=dict(rangeslider=dict(visible=False)))
     st.plotly_chart(fig, width='stretch', key="technical_analysis_chart")
@@ -1971,82 +1893,55 @@ def backtesting_page():
         
         with col2:
             # Get total count for ticker (will be updated after date selection)
-            db = SessionLocal()
-            try:
-                ticker_obj = db.query(TickerModel).filter(TickerModel.symbol == selected_ticker).first()
-                if ticker_obj:
-                    total_count = db.query(HistoricalData).filter(HistoricalData.ticker_id == ticker_obj.id).count()
-                    st.metric("Points totaux", f"{total_count:,}")
-            finally:
-                db.close()
+            ticker_stats = data_cache.get_ticker_stats(selected_ticker)
+            if ticker_stats:
+                st.metric("Points totaux", f"{ticker_stats['count']:,}")
         
         # Period selection
         st.markdown("### 📅 Période d'analyse")
         col_date1, col_date2, col_date3 = st.columns([2, 2, 1])
         
-        # Get min/max dates for the ticker
-        db = SessionLocal()
-        try:
-            ticker_obj = db.query(TickerModel).filter(TickerModel.symbol == selected_ticker).first()
-            if ticker_obj:
-                min_date_query = db.query(HistoricalData.timestamp).filter(
-                    HistoricalData.ticker_id == ticker_obj.id
-                ).order_by(HistoricalData.timestamp.asc()).first()
-                max_date_query = db.query(HistoricalData.timestamp).filter(
-                    HistoricalData.ticker_id == ticker_obj.id
-                ).order_by(HistoricalData.timestamp.desc()).first()
-                
-                if min_date_query and max_date_query:
-                    min_date = min_date_query[0].date()
-                    max_date = max_date_query[0].date()
-                    
-                    # Calculate default start date: 30 days before max, but not before min
-                    default_start = max_date - pd.Timedelta(days=30)
-                    if default_start < min_date:
-                        default_start = min_date
+        # Get min/max dates for the ticker (cached)
+        min_date, max_date = data_cache.get_date_bounds(selected_ticker)
+        if min_date and max_date:
+            # Calculate default start date: 30 days before max, but not before min
+            default_start = max_date - pd.Timedelta(days=30)
+            if default_start < min_date:
+                default_start = min_date
+            
+            with col_date1:
+                start_date = st.date_input(
+                    "Date de début",
+                    value=default_start,
+                    min_value=min_date,
+                    max_value=max_date,
+                    help="Début de la période d'analyse"
+                )
+            
+            with col_date2:
+                end_date = st.date_input(
+                    "Date de fin",
+                    value=max_date,
+                    min_value=min_date,
+                    max_value=max_date,
+                    help="Fin de la période d'analyse"
+                )
+            
+            with col_date3:
+                # Calculate number of days and points in selected period
+                if start_date and end_date:
+                    days_diff = (end_date - start_date).days
                     
-                    with col_date1:
-                        start_date = st.date_input(
-                            "Date de début",
-                            value=default_start,
-                            min_value=min_date,
-                            max_value=max_date,
-                            help="Début de la période d'analyse"
-                        )
+                    # Count actual data points in the selected period
+                    start_datetime = pd.Timestamp(start_date)
+                    end_datetime = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
                     
-                    with col_date2:
-                        end_date = st.date_input(
-                            "Date de fin",
-                            value=max_date,
-                            min_value=min_date,
-                            max_value=max_date,
-                            help="Fin de la période d'analyse"
-                        )
+                    filtered_count = data_cache.count_bars(selected_ticker, start_datetime, end_datetime)
                     
-                    with col_date3:
-                        # Calculate number of days and points in selected period
-                        if start_date and end_date:
-                            days_diff = (end_date - start_date).days
-                            
-                            # Count actual data points in the selected period
-                            start_datetime = pd.Timestamp(start_date)
-                            end_datetime = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-                            
-                            filtered_count = db.query(HistoricalData).filter(
-                                HistoricalData.ticker_id == ticker_obj.id,
-                                HistoricalData.timestamp >= start_datetime,
-                                HistoricalData.timestamp <= end_datetime
-                            ).count()
-                            
-                            st.metric("Points période", f"{filtered_count:,}", delta=f"{days_diff} jours")
-                else:
-                    start_date = None
-                    end_date = None
-            else:
-                start_date = None
-                end_date = None
-        finally:
-            db.close()
+                    st.metric("Points période", f"{filtered_count:,}", delta=f"{days_diff} jours")
+        else:
+            start_date = None
+            end_date = None
         
         # Parallel mode option
         col_mode1, col_mode2 = st.columns([3, 1])
@@ -2103,7 +1998,7 @@ def backtesting_page():
                 help="Temps minimum à attendre entre deux trades pour éviter le sur-trading"
             )
         
-        col5, _ = st.columns(2)
+        col5, col6 = st.columns(2)
         
         with col5:
             max_iterations = st.number_input(
@@ -2114,6 +2009,16 @@ def backtesting_page():
                 step=100
             )
         
+        with col6:
+            search_method = st.selectbox(
+                "Méthode de recherche",
+                ["Aléatoire", "TPE + successive halving"],
+                help="TPE + successive halving : chaque candidat est d'abord testé sur un extrait récent de "
+                     "l'historique, seul le meilleur tiers passe à l'étape suivante (1/9 des candidats "
+                     "sont testés sur toute la période). Recherche sur la stratégie EnhancedMA."
+            )
+        use_smart_search = search_method == "TPE + successive halving"
+        
         # Button to start optimization
         if st.button("🚀 Lancer la recherche", type="primary", width='stretch'):
             # Clear previous results
@@ -2136,26 +2041,12 @@ def backtesting_page():
                         return
                     
                     # Get all data
-                    data = db.query(HistoricalData).filter(
-                        HistoricalData.ticker_id == ticker.id
-                    ).order_by(HistoricalData.timestamp.asc()).all()
+                    df = bar_store.load_bars(db, ticker.id, ticker.symbol, index=True)
                     
-                    if len(data) < 100:
+                    if len(df) < 100:
                         st.error("Pas assez de données (minimum 100 points requis)")
                         return
                     
-                    # Convert to DataFrame
-                    df = pd.DataFrame([{
-                        'timestamp': d.timestamp,
-                        'open': d.open,
-                        'high': d.high,
-                        'low': d.low,
-                        'close': d.close,
-                        'volume': d.volume
-                    } for d in data])
-                    
-                    df.set_index('timestamp', inplace=True)
-                    
                     # Apply date filter if specified
                     if start_date and end_date:
                         start_datetime = pd.Timestamp(start_date)
@@ -2172,7 +2063,39 @@ def backtesting_page():
                     # Convert commission % to decimal
                     commission_decimal = commission_pct / 100
                     
-                    if enable_parallel:
+                    if use_smart_search:
+                        # === TPE + SUCCESSIVE HALVING ===
+                        from backend.strategy_search import StrategySearch
+                        
+                        progress_bar = st.progress(0)
+                        progress_text = st.empty()
+                        
+                        def update_search_progress(current, total, best_return):
+                            """Callback to update progress bar"""
+                            progress_bar.progress(min(current / total, 1.0))
+                            best_text = f"{best_return:.2f}%" if np.isfinite(best_return) else "-"
+                            progress_text.text(f"🔄 Backtest {current}/{total} - Meilleur rendement (période complète): {best_text}")
+                        
+                        engine = BacktestingEngine(
+                            initial_capital=initial_capital,
+                            commission=commission_decimal,
+                            allow_short=True,
+                            min_hold_minutes=min_hold_minutes
+                        )
+                        search = StrategySearch(df, selected_ticker, engine).run(
+                            n_candidates=max_iterations,
+                            strategy_type='enhanced',
+                            progress_callback=update_search_progress
+                        )
+                        best_strategy = search.best_strategy
+                        best_result = search.best_result
+                        best_return = best_result.total_return if best_result else -np.inf
+                        st.success(
+                            f"✅ Recherche terminée ! {search.candidates} candidats, "
+                            f"{search.full_backtests} backtests sur la période complète."
+                        )
+                    
+                    elif enable_parallel:
                         # === MODE PARALLÈLE ===
                         st.info(f"🚀 Mode parallèle activé - utilisation de {cpu_count() - 1} processus")
                         st.warning("📊 **Progression en temps réel** : Consultez les logs dans la console/terminal pour suivre l'avancement détaillé (mise à jour tous les 10 backtests)")
@@ -2341,7 +2264,7 @@ def backtesting_page():
                         status_text.text(f"{objective_status} | Itération {iterations_done}/{max_iterations} | Meilleur: {best_return:.2f}%")
                     
                     # All iterations complete - display best result (mode séquentiel uniquement)
-                    if not enable_parallel:
+                    if not enable_parallel and not use_smart_search:
                         progress_bar.progress(1.0)
                         status_text.empty()
                     
@@ -2735,8 +2658,9 @@ def live_prices_page():
     
     # Import required modules
     from backend.live_price_thread import start_live_price_collection, stop_live_price_collection, is_collecting
+    from backend.price_bus import price_bus
     import plotly.graph_objects as go
-    from backend.models import SessionLocal, Ticker, HistoricalData
+    from backend.models import SessionLocal, Ticker
     import time as time_module
     
     # Initialize session state for auto-refresh (like dashboard)
@@ -2801,14 +2725,14 @@ def live_prices_page():
             return
         
         # Get only ACTIVE tickers
-        all_tickers = db.query(Ticker).filter(Ticker.is_active == True).all()
+        all_tickers = data_cache.get_active_tickers()
         
         if not all_tickers:
             st.warning("⚠️ Aucune action disponible. Allez dans 'Collecte de Données' pour en ajouter.")
             return
         
         # Ticker selection - only active tickers
-        ticker_options = {ticker.symbol: f"{ticker.symbol} - {ticker.name}" for ticker in all_tickers}
+        ticker_options = {ticker['symbol']: f"{ticker['symbol']} - {ticker['name']}" for ticker in all_tickers}
         
         # Layout: Symbol selection + Start/Stop button
         col1, col2 = st.columns([3, 1])
@@ -2851,47 +2775,64 @@ def live_prices_page():
         db.expire_all()
         
         # Get latest data from database
-        latest_records = db.query(HistoricalData).filter(
-            HistoricalData.ticker_id == ticker_obj.id,
-            HistoricalData.interval == '1day'
-        ).order_by(HistoricalData.timestamp.desc()).all()
+        records = load_bars_frame(db, ticker_obj.id, interval='1day', columns=['close'])
         
-        if not latest_records:
+        if records.empty:
             st.info("⏳ Aucune donnée. Cliquez sur 'Démarrer' pour commencer la collecte.")
         else:
             # Display metrics
-            latest = latest_records[0]  # Most recent first now
-            prev = latest_records[1] if len(latest_records) > 1 else latest
+            latest = records.iloc[-1]  # Most recent last (chronological order)
+            prev = records.iloc[-2] if len(records) > 1 else latest
+            
+            # Last streamed price (price bus) beats the last stored daily close
+            live_tick = price_bus.latest(selected_symbol)
+            if live_tick:
+                current_price = live_tick['close']
+                current_time = live_tick['timestamp']
+                reference = latest if latest.timestamp.date() < current_time.date() else prev
+            else:
+                current_price = latest.close
+                current_time = latest.timestamp
+                reference = prev
             
             metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
             
             with metric_col1:
-                st.metric("Prix Actuel", f"{latest.close:.2f} €")
+                st.metric("Prix Actuel", f"{current_price:.2f} €")
             
             with metric_col2:
-                change = latest.close - prev.close
-                change_pct = (change / prev.close * 100) if prev.close else 0
+                change = current_price - reference.close
+                change_pct = (change / reference.close * 100) if reference.close else 0
                 st.metric("Variation", f"{change_pct:+.2f}%", f"{change:+.2f} €")
             
             with metric_col3:
-                st.metric("Nombre de points", len(latest_records))
+                st.metric("Nombre de points", len(records))
             
             with metric_col4:
-                timestamp_str = latest.timestamp.strftime("%H:%M:%S") if hasattr(latest.timestamp, 'strftime') else str(latest.timestamp)
+                timestamp_str = current_time.strftime("%H:%M:%S")
                 st.metric("Dernière MAJ", timestamp_str)
             
             st.markdown("---")
             
             # Create and display chart with indicators
-            sorted_records = sorted(latest_records, key=lambda r: r.timestamp, reverse=False)
-            times = [rec.timestamp for rec in sorted_records]
-            prices = [rec.close for rec in sorted_records]
+            times = records['timestamp'].tolist()
+            prices = records['close'].tolist()
             
             # Calculate indicators
             rsi = calculate_rsi(prices, period=14)
             macd_result = calculate_macd(prices, fast=12, slow=26, signal=9)
             bollinger_result = calculate_bollinger_bands(prices, period=20, num_std=2)
             
+            # Indicators use every point; the chart only gets the ones that shape the curve (LTTB)
+            max_points = target_points(CHART_WIDTH_PX)
+            if len(prices) > max_points:
+                kept = lttb_indices(records['timestamp'], records['close'], max_points)
+                times, prices, rsi = take(times, kept), take(prices, kept), take(rsi, kept)
+                if macd_result:
+                    macd_result = tuple(take(values, kept) for values in macd_result)
+                if bollinger_result:
+                    bollinger_result = tuple(take(values, kept) for values in bollinger_result)
+            
             # Create subplots
             from plotly.subplots import make_subplots
             import plotly.graph_objects as go
@@ -4363,6 +4304,18 @@ def auto_trading_page():
                         help="Pourcentage de gain pour prise de profit automatique"
                     )
                 
+                mode_options = {
+                    "Flux temps réel (stream)": 'stream',
+                    "Polling de la base (poll)": 'poll',
+                }
+                selected_mode_display = st.selectbox(
+                    "Source des prix",
+                    list(mode_options.keys()),
+                    help="stream : stratégie évaluée à chaque clôture de bougie, repli automatique sur poll "
+                         "si le flux IBKR est indisponible. poll : lecture périodique de la base."
+                )
+                selected_mode = mode_options[selected_mode_display]
+                
                 st.markdown("---")
                 
                 if st.button("🚀 Créer et Démarrer Session", type="primary", width='stretch'):
@@ -4384,7 +4337,7 @@ def auto_trading_page():
                                 config=config
                             )
                             
-                            manager.start_session(session_id)
+                            manager.start_session(session_id, mode=selected_mode)
                             
                             st.success(f"✅ Session #{session_id} créée et démarrée !")
                             # Switch to Active Sessions tab via query params
@@ -4483,6 +4436,10 @@ def auto_trading_page():
                                 hours = int(uptime.total_seconds() // 3600)
                                 minutes = int((uptime.total_seconds() % 3600) // 60)
                                 st.write(f"**Uptime:** {hours}h {minutes}m")
+                                
+                                st.write(f"**Source des prix:** {status['mode']}")
+                                if status['fallback_reason']:
+                                    st.caption(f"⚠️ Repli sur poll : {status['fallback_reason']}")
                             
                             # Live Chart with Price Buffer
                             st.markdown("---")
@@ -4490,7 +4447,7 @@ def auto_trading_page():
                             
                             if trader.price_buffer and len(trader.price_buffer) > 0:
                                 # Convert buffer to DataFrame
-                                buffer_df = pd.DataFrame(trader.price_buffer)
+                                buffer_df = trader.price_buffer.to_frame()
                                 
                                 # Calculate indicators for visualization
                                 try:
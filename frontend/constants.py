@@ -18,3 +18,6 @@ LABEL_PRICE_EUR = "Prix (€)"
 
 # Plotly hovermode
 HOVERMODE_X_UNIFIED = 'x unified'
+
+# Chart width used to downsample series (about one point per pixel)
+CHART_WIDTH_PX = 1400
@@ -0,0 +1,323 @@
+"""
+Cached read layer for the Streamlit frontend
+
+Every widget change (and the 0.5 s dashboard auto-refresh) reruns the whole
+script; the ticker lists, bar counts, date bounds and bar frames it needs are
+served from st.cache_data instead of querying SQLite again.
+
+Ticker lists, counts and date bounds are read from the ticker_interval_stats
+summary table, never from a scan of historical_data.
+
+Entries are dropped when bars change. Writers in this process call
+backend.data_access.notify_bars_changed(ticker_id, interval); that bumps the
+generation counters of the series concerned, and the counters are part of the
+cache keys, so only the entries of that ticker/interval (and the cross-ticker
+summaries) are reloaded. The live 1-minute writer flushing every few seconds
+leaves the other series cached. invalidate() without arguments (after the
+page's own deletes, when a Celery collection job finishes) clears everything.
+The TTL is only a safety net for writes made by other processes.
+"""
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import func
+
+from backend.config import logger
+from backend.models import SessionLocal, Ticker as TickerModel, HistoricalData, TickerIntervalStats
+from backend.data_access import load_bars_frame, add_bars_listener
+
+# Seconds before an entry is reloaded even without invalidation
+CACHE_TTL = 120
+
+# Bar frames are large: keep only the most recent requests
+MAX_BAR_FRAMES = 16
+
+# Test/mock tickers hidden from the pages
+HIDDEN_TICKER_MARKERS = ('TEST', 'MOCK', 'INVALID', 'XYZ', 'DUMMY')
+
+Bound = Union[str, date, datetime, pd.Timestamp, None]
+
+
+# Generation counters, part of the cache keys (bumped by invalidate())
+_generation_lock = threading.Lock()
+_series_generation: Dict[Tuple[str, str], int] = defaultdict(int)  # (symbol, interval): that series changed
+_ticker_generation: Dict[str, int] = defaultdict(int)  # symbol: any of its series changed
+_ticker_wide_generation: Dict[str, int] = defaultdict(int)  # symbol: changed without a known interval
+_data_generation = 0  # any bar changed (cross-ticker summaries)
+_ticker_symbols: Dict[int, str] = {}  # ticker_id -> symbol, for the bars listener
+
+
+def _series_key(symbol: str, interval: Optional[str]) -> Tuple[int, ...]:
+    """Generation of the data behind a (symbol, interval) request (interval None = all intervals)"""
+    with _generation_lock:
+        if interval is None:
+            return (_ticker_generation[symbol],)
+        return (_ticker_wide_generation[symbol], _series_generation[(symbol, interval)])
+
+
+def _symbol_of(ticker_id: int) -> Optional[str]:
+    if ticker_id not in _ticker_symbols:
+        db = SessionLocal()
+        try:
+            row = db.query(TickerModel.symbol).filter(TickerModel.id == ticker_id).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        _ticker_symbols[ticker_id] = row[0]
+    return _ticker_symbols[ticker_id]
+
+
+def _is_hidden(symbol: str) -> bool:
+    symbol = symbol.upper()
+    return any(marker in symbol for marker in HIDDEN_TICKER_MARKERS)
+
+
+def _ticker_id(db, symbol: str) -> Optional[int]:
+    row = db.query(TickerModel.id).filter(TickerModel.symbol == symbol).first()
+    return row[0] if row else None
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def get_active_tickers() -> List[Dict]:
+    """
+    Active tickers, sorted by symbol
+
+    Returns:
+        List of dicts with id, symbol, name, exchange and currency
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            TickerModel.id, TickerModel.symbol, TickerModel.name, TickerModel.exchange, TickerModel.currency
+        ).filter(TickerModel.is_active == True).order_by(TickerModel.symbol).all()
+        return [
+            {'id': r.id, 'symbol': r.symbol, 'name': r.name, 'exchange': r.exchange, 'currency': r.currency}
+            for r in rows
+        ]
+    except Exception as e:
+        logger.error(f"Error getting active tickers: {e}")
+        return []
+    finally:
+        db.close()
+
+
+def get_available_tickers() -> Dict[str, str]:
+    """Tickers that have collected data, excluding test tickers (symbol -> name)"""
+    return _get_available_tickers(_data_generation)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_available_tickers(generation: int) -> Dict[str, str]:
+    db = SessionLocal()
+    try:
+        tickers_with_data = db.query(TickerModel.symbol, TickerModel.name).join(
+            TickerIntervalStats,
+            TickerModel.id == TickerIntervalStats.ticker_id
+        ).filter(TickerIntervalStats.bar_count > 0).distinct().all()
+        return {t.symbol: t.name for t in tickers_with_data if not _is_hidden(t.symbol)}
+    except Exception as e:
+        logger.error(f"Error getting available tickers: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+def get_data_overview() -> pd.DataFrame:
+    """
+    One row per ticker with data
+
+    Returns:
+        DataFrame with symbol, name, total_points, first_date and last_date
+    """
+    return _get_data_overview(_data_generation)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_data_overview(generation: int) -> pd.DataFrame:
+    columns = ['symbol', 'name', 'total_points', 'first_date', 'last_date']
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            TickerModel.symbol,
+            TickerModel.name,
+            func.sum(TickerIntervalStats.bar_count),
+            func.min(TickerIntervalStats.first_timestamp),
+            func.max(TickerIntervalStats.last_timestamp)
+        ).join(
+            TickerIntervalStats,
+            TickerModel.id == TickerIntervalStats.ticker_id
+        ).filter(
+            TickerIntervalStats.bar_count > 0
+        ).group_by(
+            TickerModel.id, TickerModel.symbol, TickerModel.name
+        ).order_by(TickerModel.symbol).all()
+        return pd.DataFrame([tuple(r) for r in rows], columns=columns)
+    except Exception as e:
+        logger.error(f"Error getting data overview: {e}")
+        return pd.DataFrame(columns=columns)
+    finally:
+        db.close()
+
+
+def get_interval_stats(symbol: str) -> pd.DataFrame:
+    """
+    Bar count and date bounds of each interval stored for a ticker
+
+    Returns:
+        DataFrame with interval, count, first and last (empty if unknown ticker)
+    """
+    return _get_interval_stats(symbol, _series_key(symbol, None))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_interval_stats(symbol: str, generation: Tuple[int, ...]) -> pd.DataFrame:
+    columns = ['interval', 'count', 'first', 'last']
+    db = SessionLocal()
+    try:
+        ticker_id = _ticker_id(db, symbol)
+        if ticker_id is None:
+            return pd.DataFrame(columns=columns)
+        rows = db.query(
+            TickerIntervalStats.interval,
+            TickerIntervalStats.bar_count,
+            TickerIntervalStats.first_timestamp,
+            TickerIntervalStats.last_timestamp
+        ).filter(
+            TickerIntervalStats.ticker_id == ticker_id,
+            TickerIntervalStats.bar_count > 0
+        ).order_by(TickerIntervalStats.interval).all()
+        return pd.DataFrame([tuple(r) for r in rows], columns=columns)
+    except Exception as e:
+        logger.error(f"Error getting interval stats for {symbol}: {e}")
+        return pd.DataFrame(columns=columns)
+    finally:
+        db.close()
+
+
+def get_ticker_stats(symbol: str, interval: Optional[str] = None) -> Optional[Dict]:
+    """
+    Bar count and first/last timestamp of a ticker (all intervals or one)
+
+    Derived from get_interval_stats(), so it shares its cache entry.
+
+    Returns:
+        Dict with count, first and last, or None if the ticker has no bars
+    """
+    stats = get_interval_stats(symbol)
+    if interval is not None:
+        stats = stats[stats['interval'] == interval]
+    if stats.empty:
+        return None
+    return {
+        'count': int(stats['count'].sum()),
+        'first': stats['first'].min(),
+        'last': stats['last'].max(),
+    }
+
+
+def get_date_bounds(symbol: str, interval: Optional[str] = None) -> Tuple[Optional[date], Optional[date]]:
+    """First and last day with bars ((None, None) if none)"""
+    stats = get_ticker_stats(symbol, interval)
+    if stats is None:
+        return None, None
+    return pd.Timestamp(stats['first']).date(), pd.Timestamp(stats['last']).date()
+
+
+def count_bars(symbol: str, start: Bound = None, end: Bound = None, interval: Optional[str] = None) -> int:
+    """Number of bars of a ticker between start and end (inclusive)"""
+    return _count_bars(symbol, start, end, interval, _series_key(symbol, interval))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _count_bars(symbol: str, start: Bound, end: Bound, interval: Optional[str], generation: Tuple[int, ...]) -> int:
+    db = SessionLocal()
+    try:
+        ticker_id = _ticker_id(db, symbol)
+        if ticker_id is None:
+            return 0
+        query = db.query(func.count(HistoricalData.id)).filter(HistoricalData.ticker_id == ticker_id)
+        if interval is not None:
+            query = query.filter(HistoricalData.interval == interval)
+        if start is not None:
+            query = query.filter(HistoricalData.timestamp >= pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            query = query.filter(HistoricalData.timestamp <= pd.Timestamp(end).to_pydatetime())
+        return query.scalar() or 0
+    finally:
+        db.close()
+
+
+def get_bars(
+    symbol: str,
+    interval: Optional[str] = None,
+    start: Bound = None,
+    end: Bound = None,
+    columns: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+    index: bool = False
+) -> pd.DataFrame:
+    """
+    Bars of a ticker as a DataFrame (see backend.data_access.load_bars_frame)
+
+    Pass rounded bounds (e.g. to the minute) for "last N days" ranges, otherwise
+    every rerun produces a new cache key.
+
+    Returns:
+        DataFrame sorted by timestamp (empty if the ticker is unknown)
+    """
+    return _get_bars(symbol, interval, start, end, columns, limit, index, _series_key(symbol, interval))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_BAR_FRAMES, show_spinner=False)
+def _get_bars(symbol: str, interval: Optional[str], start: Bound, end: Bound, columns: Optional[Sequence[str]],
+              limit: Optional[int], index: bool, generation: Tuple[int, ...]) -> pd.DataFrame:
+    db = SessionLocal()
+    try:
+        ticker_id = _ticker_id(db, symbol)
+        if ticker_id is None:
+            return load_bars_frame(db, -1, columns=columns, index=index)
+        return load_bars_frame(db, ticker_id, interval, start, end, columns=columns, limit=limit, index=index)
+    finally:
+        db.close()
+
+
+def invalidate(ticker_id: Optional[int] = None, interval: Optional[str] = None):
+    """
+    Drop cached data after bars or tickers are written or deleted
+
+    With a ticker_id (bars listener), only the entries of that ticker/interval
+    and the cross-ticker summaries get a new generation; the ticker list is
+    kept. Without arguments every cached function is cleared.
+
+    Args:
+        ticker_id: Ticker whose bars changed (None = anything, including tickers)
+        interval: Interval that changed (None = all intervals of the ticker)
+    """
+    global _data_generation
+    symbol = _symbol_of(ticker_id) if ticker_id is not None else None
+    if symbol is None:
+        for cached in (get_active_tickers, _get_available_tickers, _get_data_overview,
+                       _get_interval_stats, _count_bars, _get_bars):
+            cached.clear()
+        _ticker_symbols.clear()
+        return
+
+    with _generation_lock:
+        _data_generation += 1
+        _ticker_generation[symbol] += 1
+        if interval is None:
+            _ticker_wide_generation[symbol] += 1
+        else:
+            _series_generation[(symbol, interval)] += 1
+
+
+@st.cache_resource
+def register_invalidation() -> bool:
+    """Invalidate the changed series whenever a writer of this process changes historical_data (once per server)"""
+    add_bars_listener(invalidate)
+    return True
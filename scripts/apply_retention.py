@@ -0,0 +1,47 @@
+"""
+Apply the bar retention policy (backend/bar_retention.py)
+Archives, rolls up and deletes expired bars in small batches.
+Usage: python scripts/apply_retention.py [--dry-run] [--days N] [--enable-incremental-vacuum]
+  --dry-run                    list the series with expired bars, change nothing
+  --days N                     keep every interval N days instead of the policy
+  --enable-incremental-vacuum  switch the database to auto_vacuum=INCREMENTAL first (one full VACUUM)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import SessionLocal, init_db
+from backend.bar_retention import apply_retention, enable_incremental_vacuum, plan_retention
+
+
+def main():
+    args = sys.argv[1:]
+    days = int(args[args.index('--days') + 1]) if '--days' in args else None
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if '--enable-incremental-vacuum' in args:
+            changed = enable_incremental_vacuum(db)
+            print("auto_vacuum set to INCREMENTAL" if changed else "auto_vacuum already INCREMENTAL")
+
+        if '--dry-run' in args:
+            plan = plan_retention(db, days=days)
+            for item in plan:
+                target = f" -> {item['rule'].rollup_to}" if item['rule'].rollup_to else ""
+                print(f"{item['symbol']:10s} {item['interval']:6s}{target:9s} "
+                      f"{item['first']:%Y-%m-%d} .. {item['cutoff']:%Y-%m-%d}")
+            print(f"{len(plan)} series with expired bars")
+            return
+
+        result = apply_retention(db, days=days, progress_callback=lambda done, total: print(f"  series {done}/{total}"))
+        print(f"Deleted {result['deleted']} bars in {result['series']} series, "
+              f"{result['rolled_up']} rolled up, {result['archived']} archived in {len(result['files'])} files, "
+              f"{result['pages_released']} pages released")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
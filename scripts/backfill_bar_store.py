@@ -0,0 +1,24 @@
+"""
+Backfill the Parquet bar store from the historical_data table
+Usage: python scripts/backfill_bar_store.py [SYMBOL] [INTERVAL]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.bar_store import backfill_from_database
+
+
+def main():
+    symbol = sys.argv[1] if len(sys.argv) > 1 else None
+    interval = sys.argv[2] if len(sys.argv) > 2 else None
+
+    written = backfill_from_database(symbol, interval)
+    for series, count in written.items():
+        print(f"{series:30s} {count:>10d} bars")
+    print(f"Total: {sum(written.values())} bars in {len(written)} series")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: BacktestingEngine array simulation vs bar-by-bar loop
+Usage: python scripts/benchmark_backtest.py [nb_bars] [repeats]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.backtesting_engine import BacktestingEngine, SimpleMovingAverageStrategy
+from backend.constants import CONST_CLOSE
+
+
+def make_intraday(n_bars: int) -> pd.DataFrame:
+    """Synthetic 1min series"""
+    rng = np.random.default_rng(42)
+    index = pd.date_range('2024-01-02 09:00', periods=n_bars, freq='1min')
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, n_bars)))
+    return pd.DataFrame({CONST_CLOSE: prices}, index=index)
+
+
+def legacy_loop(signals: pd.Series, prices: np.ndarray, capital: float = 10000.0) -> float:
+    """Previous BacktestingEngine.run() simulation (signals.iloc[i] per bar, long only)"""
+    position = 0
+    entry_price = 0
+    for i in range(len(signals)):
+        signal = signals.iloc[i]
+        price = prices[i]
+        if signal == 1 and position == 0:
+            position = 1
+            entry_price = price
+        elif signal == -1 and position == 1:
+            capital += (price - entry_price) * (capital / entry_price)
+            position = 0
+    return capital
+
+
+def best_of(func, repeats: int) -> float:
+    """Best wall time over several runs (seconds)"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    df = make_intraday(n_bars)
+    strategy = SimpleMovingAverageStrategy(fast=10, slow=30)
+    signal_series = strategy.generate_signals(df)
+    signals = np.asarray(signal_series, dtype=np.float64)
+    prices = df[CONST_CLOSE].values
+
+    print("=" * 60)
+    print(f"BACKTEST BENCHMARK - {n_bars:,} bars, best of {repeats}")
+    print("=" * 60)
+
+    t_legacy = best_of(lambda: legacy_loop(signal_series, prices), 1)
+    print(f"\nprevious iloc loop (long only): {t_legacy * 1000:9.1f} ms")
+
+    for allow_short in (False, True):
+        engine = BacktestingEngine(allow_short=allow_short, min_hold_minutes=5)
+
+        fast_capital, fast_trades = engine._simulate(signals, prices, df.index)
+        loop_capital, loop_trades = engine._simulate_loop(signals, prices, df.index)
+        identical = fast_capital == loop_capital and fast_trades == loop_trades
+
+        t_loop = best_of(lambda: engine._simulate_loop(signals, prices, df.index), repeats)
+        t_fast = best_of(lambda: engine._simulate(signals, prices, df.index), repeats)
+        t_run = best_of(lambda: engine.run(strategy, df, "BENCH"), repeats)
+
+        print(f"\nallow_short={allow_short} - {len(fast_trades)} trades - identical: {identical}")
+        print(f"  loop       : {t_loop * 1000:9.1f} ms")
+        print(f"  array      : {t_fast * 1000:9.1f} ms  (x{t_loop / t_fast:.1f} vs loop, x{t_legacy / t_fast:.1f} vs iloc loop)")
+        print(f"  run() total: {t_run * 1000:9.1f} ms  (signals + simulation + metrics)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: historical_data vs the compact WITHOUT ROWID bar layout (backend/compact_bars.py)
+Writes the same synthetic 5s bars into two SQLite files, then compares insert
+rate, file size and the speed of one-day range scans.
+Usage: python scripts/benchmark_compact_storage.py [nb_bars] [nb_tickers] [nb_scans]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import Base, Ticker
+from backend.data_access import upsert_bars, load_bars_frame
+from backend.compact_bars import create_compact_schema, write_compact_bars, load_compact_frame
+
+INTERVAL = '5s'
+
+
+def make_bars(n_bars: int, seed: int) -> pd.DataFrame:
+    """Synthetic 5s series"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0002, n_bars)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-02 09:00', periods=n_bars, freq='5s'),
+        'open': close, 'high': close * 1.0005, 'low': close * 0.9995, 'close': close,
+        'volume': rng.integers(1, 1000, n_bars),
+    })
+
+
+def open_session(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    return engine, sessionmaker(bind=engine)()
+
+
+def file_size(engine, path: Path) -> int:
+    """Size after VACUUM (bytes)"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    return path.stat().st_size
+
+
+def time_scans(load, ticker_ids, windows) -> float:
+    """Mean time of one range scan (seconds)"""
+    start = time.perf_counter()
+    for ticker_id, (lo, hi) in zip(ticker_ids, windows):
+        load(ticker_id, lo, hi)
+    return (time.perf_counter() - start) / len(windows)
+
+
+def main():
+    n_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_tickers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    n_scans = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    frames = [make_bars(n_bars, seed) for seed in range(n_tickers)]
+    total = n_bars * n_tickers
+
+    print("=" * 60)
+    print(f"STORAGE BENCHMARK - {n_tickers} tickers x {n_bars:,} bars ({INTERVAL})")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path, compact_path = Path(tmp) / 'legacy.db', Path(tmp) / 'compact.db'
+
+        legacy_engine, legacy = open_session(legacy_path)
+        Base.metadata.create_all(legacy_engine)
+        ticker_ids = []
+        for k in range(n_tickers):
+            ticker = Ticker(symbol=f"T{k}", name=f"Ticker {k}")
+            legacy.add(ticker)
+            legacy.commit()
+            ticker_ids.append(ticker.id)
+
+        start = time.perf_counter()
+        for ticker_id, df in zip(ticker_ids, frames):
+            upsert_bars(legacy, ticker_id, INTERVAL, df)
+        t_legacy = time.perf_counter() - start
+
+        compact_engine, compact = open_session(compact_path)
+        create_compact_schema(compact)
+        start = time.perf_counter()
+        for ticker_id, df in zip(ticker_ids, frames):
+            write_compact_bars(compact, ticker_id, INTERVAL, df)
+        t_compact = time.perf_counter() - start
+
+        size_legacy = file_size(legacy_engine, legacy_path)
+        size_compact = file_size(compact_engine, compact_path)
+
+        # One trading day (8h30 of 5s bars) at random positions
+        rng = np.random.default_rng(0)
+        day = int(8.5 * 3600) // 5
+        scan_tickers = rng.choice(ticker_ids, n_scans).tolist()
+        windows = []
+        stamps = frames[0]['timestamp']
+        for first in rng.integers(0, max(1, n_bars - day), n_scans):
+            windows.append((stamps.iloc[int(first)], stamps.iloc[min(int(first) + day, n_bars) - 1]))
+
+        s_legacy = time_scans(lambda t, lo, hi: load_bars_frame(legacy, t, INTERVAL, lo, hi), scan_tickers, windows)
+        s_compact = time_scans(lambda t, lo, hi: load_compact_frame(compact, t, INTERVAL, lo, hi), scan_tickers, windows)
+
+        same = load_bars_frame(legacy, ticker_ids[0], INTERVAL).equals(load_compact_frame(compact, ticker_ids[0], INTERVAL))
+
+        legacy.close()
+        compact.close()
+        legacy_engine.dispose()
+        compact_engine.dispose()
+
+    print(f"\nidentical frames: {same}")
+    print(f"{'':14}{'historical_data':>18}{'compact_bars':>16}{'ratio':>8}")
+    print(f"{'insert rows/s':14}{total / t_legacy:18,.0f}{total / t_compact:16,.0f}{t_legacy / t_compact:7.1f}x")
+    print(f"{'file MB':14}{size_legacy / 1e6:18.1f}{size_compact / 1e6:16.1f}{size_legacy / size_compact:7.1f}x")
+    print(f"{'bytes/bar':14}{size_legacy / total:18.1f}{size_compact / total:16.1f}")
+    print(f"{'1-day scan ms':14}{s_legacy * 1000:18.2f}{s_compact * 1000:16.2f}{s_legacy / s_compact:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: multi-ticker historical collection, sequential vs paced concurrent
+Runs offline against backend.fake_ib.FakeIB with all delays scaled down.
+Usage: python scripts/benchmark_ibkr_collection.py [nb_tickers] [time_scale]
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.fake_ib import FakeIB, FakeContract
+from backend.ibkr_pacing import PacingScheduler, collect_many, plan_chunks, format_end_datetime
+
+LATENCY = 2.0  # Typical IBKR answer time for a chunk (seconds)
+
+SCENARIOS = [
+    # (bar size, days per ticker, days per chunk)
+    ('1 min', 30, 7),
+    ('5 secs', 6, 2),
+]
+
+
+def sequential(ib: FakeIB, contracts, bar_size: str, days: int, chunk_days: int):
+    """Previous behaviour: one chunk at a time with ib.sleep(1) between requests"""
+    for contract in contracts:
+        for end, duration in plan_chunks(datetime.now(), days, chunk_days):
+            ib.reqHistoricalData(contract, format_end_datetime(end), duration, bar_size, 'TRADES', False)
+            ib.sleep(1)
+
+
+def concurrent(ib: FakeIB, contracts, bar_size: str, days: int, chunk_days: int, scale: float):
+    scheduler = PacingScheduler(
+        window_seconds=600 * scale,
+        contract_window_seconds=2 * scale,
+        identical_seconds=15 * scale,
+    )
+    jobs = [{
+        'symbol': c.symbol,
+        'contract': c,
+        'bar_size': bar_size,
+        'chunks': plan_chunks(datetime.now(), days, chunk_days),
+    } for c in contracts]
+    asyncio.run(collect_many(ib, jobs, scheduler))
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 0.002
+
+    for bar_size, days, chunk_days in SCENARIOS:
+        requests = n_tickers * len(plan_chunks(datetime.now(), days, chunk_days))
+        print(f"\n{n_tickers} tickers x {days} days @ {bar_size} = {requests} requests")
+
+        for name in ('sequential', 'concurrent'):
+            ib = FakeIB(latency=LATENCY, time_scale=scale, max_bars=50)
+            contracts = ib.qualifyContracts(*[FakeContract(f"T{i:02d}") for i in range(n_tickers)])
+            start = time.perf_counter()
+            if name == 'sequential':
+                sequential(ib, contracts, bar_size, days, chunk_days)
+            else:
+                concurrent(ib, contracts, bar_size, days, chunk_days, scale)
+            elapsed = (time.perf_counter() - start) / scale
+            print(f"  {name:10s} ~{elapsed / 60:6.1f} min real time, "
+                  f"{len(ib.violations):4d} pacing violations, max in flight {max(ib.max_in_flight, 1)}")
+
+
+if __name__ == '__main__':
+    main()
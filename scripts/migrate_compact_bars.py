@@ -0,0 +1,44 @@
+"""
+Database migration: slim down historical_data
+Moves the stored indicator values to compact_bar_indicators (WITHOUT ROWID,
+clustered on ticker/interval/timestamp), rebuilds historical_data without its
+indicator columns, drops the indexes the HistoricalData model no longer
+declares, then runs VACUUM to give the space back. The script can be re-run.
+Usage: python scripts/migrate_compact_bars.py [--no-vacuum]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import SessionLocal
+from backend.compact_bars import slim_historical_data
+from backend.config import logger
+
+def migrate_database(vacuum: bool = True):
+    """Slim historical_data down to the HistoricalData model"""
+    db = SessionLocal()
+    try:
+        logger.info("Starting database migration...")
+        result = slim_historical_data(db)
+        if vacuum:
+            logger.info("Running VACUUM...")
+            db.connection().exec_driver_sql("VACUUM")
+        logger.info("✅ Database migration completed successfully")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DATABASE MIGRATION: slim historical_data")
+    print("=" * 60)
+
+    result = migrate_database(vacuum='--no-vacuum' not in sys.argv[1:])
+
+    print(f"\n✅ {result['columns_dropped']} columns and {result['indexes_dropped']} indexes dropped, "
+          f"{result['indicator_rows']} indicator rows moved to compact_bar_indicators")
@@ -0,0 +1,42 @@
+"""
+Database migration: one row per bar in historical_data
+Removes duplicate bars (keeping the most recently written one), then builds
+the unique (ticker_id, interval, timestamp) index used by the bulk writers.
+Run it once on databases created before the index existed; the bar writers
+fall back to row-by-row inserts until it has been applied.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import SessionLocal
+from backend.data_access import migrate_unique_bar_index
+from backend.config import logger
+
+def migrate_database():
+    """Deduplicate historical_data and create the unique bar index"""
+    db = SessionLocal()
+    try:
+        logger.info("Starting database migration...")
+        result = migrate_unique_bar_index(db)
+        logger.info("✅ Database migration completed successfully")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DATABASE MIGRATION: Unique (ticker_id, interval, timestamp) index")
+    print("=" * 60)
+    
+    result = migrate_database()
+    
+    if result['index_created']:
+        print(f"\n✅ Index created, {result['duplicates_removed']} duplicate bars removed")
+    else:
+        print("\n✅ Index already present, nothing to do")
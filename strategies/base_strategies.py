@@ -10,10 +10,30 @@ from backend.config import logger
 class BaseStrategy:
     """Base class for trading strategies"""
     
+    # Bars generate_signal() needs to see (current and previous bar)
+    lookback = 2
+    
     def __init__(self, name: str, parameters: Dict[str, Any] = None):
         self.name = name
         self.parameters = parameters or {}
     
+    def on_bar(self, bar, state) -> str:
+        """
+        Streaming interface used by backtesting.engine.BacktestEngine
+        
+        Default implementation calls generate_signal() on the last
+        `lookback` bars; subclasses can override it to work incrementally
+        from `bar` and `state` (see backtesting.engine.RollingState).
+        
+        Args:
+            bar: Current bar
+            state: Rolling state of the replay
+            
+        Returns:
+            'BUY', 'SELL', or 'HOLD'
+        """
+        return self.generate_signal(state.window(self.lookback))
+    
     def generate_signal(self, data: pd.DataFrame) -> str:
         """
         Generate trading signal
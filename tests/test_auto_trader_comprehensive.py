@@ -112,6 +112,7 @@ class TestAutoTraderStartStop:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_session
         
         trader = AutoTrader(1)
+        trader.market_data = Mock()
         trader.start()
         
         assert trader.running is True
@@ -333,3 +334,300 @@ class TestAutoTraderIntegration:
         assert trader.ibkr_collector is None
         assert hasattr(trader, 'order_manager')
         assert hasattr(trader, 'data_collector')
+
+
+class TestAutoTraderStreamingSignals:
+    """Incremental signal calculation"""
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_streaming_matches_dataframe_path(self, mock_om, mock_dc, mock_session_local, mock_session):
+        """Streaming signals equal the DataFrame/StrategyRunner signals tick after tick"""
+        from datetime import timedelta
+        
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        mock_session.strategy.strategy_type = "SMA"
+        mock_session.strategy.parameters = '{"fast_period": 5, "slow_period": 20}'
+        
+        streaming = AutoTrader(1)
+        reference = AutoTrader(1)
+        reference._stream_unavailable = True  # Force the DataFrame path
+        
+        rng = np.random.default_rng(3)
+        start = datetime(2024, 1, 2, 9, 0)
+        for i in range(260):
+            price = 100 + float(np.sum(rng.normal(0, 0.3, 1)))
+            bar = {'timestamp': start + timedelta(minutes=i), 'open': price, 'high': price,
+                   'low': price, 'close': price, 'volume': 100}
+            streaming._add_to_buffer(bar)
+            reference._add_to_buffer(dict(bar))
+            
+            fast = streaming._calculate_signals()
+            slow = reference._calculate_signals()
+            if slow is None:
+                assert fast is None
+                continue
+            assert fast['signal'] == slow['signal']
+            assert fast['price'] == slow['price']
+        
+        assert streaming.signal_stream is not None
+        assert streaming.signal_stream.count == 260
+
+
+class TestAutoTraderEventDriven:
+    """Bar-close driven trading loop and cached session config"""
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_strategy_evaluated_once_per_closed_bar(self, mock_om, mock_dc, mock_session_local, mock_session):
+        """Events are folded into 1-minute bars; each closed bar triggers one evaluation"""
+        import threading
+        import time as time_module
+        from datetime import timedelta
+        from backend.price_bus import PriceBus, make_event
+        
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        mock_session.ticker.symbol = "TTE"
+        
+        trader = AutoTrader(1)
+        trader.bus = PriceBus()
+        start = datetime(2024, 3, 4, 10, 0)
+        trader.clock = lambda: start  # Never close a bar on the clock
+        for i in range(49):
+            trader._add_to_buffer({'timestamp': start - timedelta(minutes=49 - i), 'open': 50.0,
+                                   'high': 50.0, 'low': 50.0, 'close': 50.0, 'volume': 0})
+        
+        with patch.object(trader, '_calculate_signals', return_value={'signal': 1, 'price': 51.0}) as calc, \
+             patch.object(trader, '_process_signal') as process, \
+             patch.object(trader, '_update_session'):
+            trader.running = True
+            thread = threading.Thread(target=trader._stream_loop)
+            thread.start()
+            while trader.bus.subscriber_count() == 0:
+                time_module.sleep(0.01)
+            
+            for second in range(0, 60, 5):
+                trader.bus.publish(make_event("TTE", start + timedelta(seconds=second), 50.0 + second / 100,
+                                              volume=10, kind='bar'))
+            trader.bus.publish(make_event("WLN", start, 5.0))  # Other symbol: ignored
+            trader.bus.publish(make_event("TTE", start + timedelta(minutes=1), 52.0))
+            
+            deadline = time_module.time() + 5
+            while not process.called and time_module.time() < deadline:
+                time_module.sleep(0.01)
+            trader.running = False
+            thread.join(timeout=5)
+        
+        assert calc.call_count == 1
+        process.assert_called_once_with({'signal': 1, 'price': 51.0})
+        closed = trader.price_buffer[-1]
+        assert closed['timestamp'] == start
+        assert closed['open'] == 50.0 and closed['close'] == 50.55
+        assert closed['volume'] == 120
+        assert trader.last_decision_ms is not None
+        assert trader.bus.subscriber_count() == 0
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_start_and_stop_use_live_data_service(self, mock_om, mock_dc, mock_session_local, mock_session):
+        """Stream mode subscribes the symbol on the shared service instead of a dedicated collector"""
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        
+        trader = AutoTrader(1)
+        trader.market_data = Mock()
+        with patch.object(trader, '_trading_loop'):
+            trader.start()
+            trader.stop()
+        
+        trader.market_data.subscribe.assert_called_once_with("AAPL", owner="autotrader:1")
+        trader.market_data.unsubscribe.assert_called_once_with("AAPL", owner="autotrader:1")
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_falls_back_to_polling_when_service_not_connected(self, mock_om, mock_dc, mock_session_local,
+                                                               mock_session):
+        """A stream session polls when the live data service does not connect in time"""
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        
+        trader = AutoTrader(1, connect_timeout=0.1)
+        trader.market_data = Mock()
+        trader.market_data.wait_connected.return_value = False
+        trader.market_data.last_error = "connection failed"
+        with patch('backend.live_price_thread.start_live_price_collection') as start_polling, \
+             patch('backend.live_price_thread.stop_live_price_collection') as stop_polling:
+            trader._start_market_data()
+            assert trader.mode == 'poll'
+            assert "connection failed" in trader.fallback_reason
+            trader.market_data.wait_connected.assert_called_once_with(timeout=0.1)
+            trader.market_data.unsubscribe.assert_called_once_with("AAPL", owner="autotrader:1")
+            start_polling.assert_called_once_with("AAPL", interval=5)
+            
+            trader._stop_market_data()
+            stop_polling.assert_called_once()
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_trading_loop_polls_once_service_stops(self, mock_om, mock_dc, mock_session_local, mock_session):
+        """The stream loop hands over to the poll loop when the live data service stops"""
+        from backend.price_bus import PriceBus
+        
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        
+        trader = AutoTrader(1)
+        trader.bus = PriceBus()
+        trader.market_data = Mock()
+        trader.market_data.running = False
+        trader.running = True
+        with patch.object(trader, '_prepare_buffer'), \
+             patch.object(trader, '_poll_loop') as poll_loop, \
+             patch('backend.live_price_thread.start_live_price_collection'):
+            trader._trading_loop()
+        
+        poll_loop.assert_called_once()
+        assert trader.fallback_reason == "live data service stopped"
+        assert trader.get_status()['mode'] == 'poll'
+        assert trader.bus.subscriber_count() == 0
+    
+    @patch('backend.auto_trader.SessionLocal')
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_poll_loop_uses_cached_polling_interval(self, mock_om, mock_dc, mock_session_local, mock_session):
+        """The polling interval is read from the cached config, not queried every iteration"""
+        mock_db = Mock()
+        mock_session_local.return_value = mock_db
+        mock_session.polling_interval = 30
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_session
+        
+        trader = AutoTrader(1, mode='poll')
+        assert trader.config['polling_interval'] == 30
+        trader.refresh_config({'polling_interval': 5, 'unknown': 1})
+        assert trader.config['polling_interval'] == 5
+        assert 'unknown' not in trader.config
+        
+        queries = mock_db.query.call_count
+        sleeps = []
+        
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            trader.running = False
+        
+        trader.running = True
+        with patch.object(trader, '_fetch_live_price', return_value=None), \
+             patch('backend.auto_trader.time.sleep', side_effect=fake_sleep):
+            trader._poll_loop()
+        
+        assert sleeps == [5]
+        assert mock_db.query.call_count == queries
+
+
+@pytest.fixture
+def trading_db():
+    """In-memory database with three sessions: two on TTE, one on WLN"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.models import Base
+    
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    tte = Ticker(symbol="TTE", name="TotalEnergies")
+    wln = Ticker(symbol="WLN", name="Worldline")
+    strategy = Strategy(name="Test", strategy_type="SMA", parameters="{}")
+    db.add_all([tte, wln, strategy])
+    db.flush()
+    for ticker in (tte, tte, wln):
+        db.add(AutoTraderSession(ticker_id=ticker.id, strategy_id=strategy.id))
+    db.commit()
+    db.close()
+    with patch('backend.auto_trader.SessionLocal', factory):
+        yield factory
+    engine.dispose()
+
+
+class TestAutoTraderScheduler:
+    """Many sessions on one asyncio loop"""
+    
+    @patch('backend.auto_trader.DataCollector')
+    @patch('backend.auto_trader.OrderManager')
+    def test_sessions_share_feeds_and_batch_state_writes(self, mock_om, mock_dc, trading_db):
+        import time as time_module
+        from datetime import timedelta
+        from backend.auto_trader import AutoTraderScheduler
+        from backend.price_bus import PriceBus, make_event
+        
+        start = datetime(2024, 3, 4, 10, 0)
+        scheduler = AutoTraderScheduler(bus=PriceBus(), flush_interval=3600, session_factory=trading_db)
+        scheduler.clock = lambda: start  # Bars close on the next event only
+        
+        traders = []
+        for session_id in (1, 2, 3):
+            trader = AutoTrader(session_id)
+            trader.market_data = Mock()
+            for i in range(60):
+                trader._add_to_buffer({'timestamp': start - timedelta(minutes=60 - i), 'open': 50.0,
+                                       'high': 50.0, 'low': 50.0, 'close': 50.0, 'volume': 0})
+            traders.append(trader)
+        
+        hold = {'signal': 0, 'price': 50.0}
+        with patch.object(AutoTrader, '_prepare_buffer', return_value=60), \
+             patch.object(AutoTrader, '_calculate_signals', return_value=hold), \
+             patch.object(AutoTrader, '_process_signal') as process:
+            try:
+                for trader in traders:
+                    scheduler.add(trader)
+                
+                assert scheduler.bus.subscriber_count() == 1
+                assert set(scheduler._feeds) == {"TTE", "WLN"}
+                
+                for symbol, price in (("TTE", 50.0), ("WLN", 5.0)):
+                    scheduler.bus.publish(make_event(symbol, start + timedelta(seconds=10), price))
+                    scheduler.bus.publish(make_event(symbol, start + timedelta(seconds=30), price + 1))
+                    scheduler.bus.publish(make_event(symbol, start + timedelta(minutes=1), price))
+                
+                deadline = time_module.time() + 5
+                while time_module.time() < deadline and any(t.metrics['bars'] < 1 for t in traders):
+                    time_module.sleep(0.01)
+                
+                metrics = scheduler.session_metrics()
+                assert [metrics[sid]['bars'] for sid in (1, 2, 3)] == [1, 1, 1]
+                assert all(metrics[sid]['evaluations'] == 1 for sid in (1, 2, 3))
+                assert all(metrics[sid]['last_ms'] is not None for sid in (1, 2, 3))
+                assert traders[0].price_buffer[-1] == traders[1].price_buffer[-1]
+                assert traders[0].price_buffer[-1] is not traders[1].price_buffer[-1]
+                assert traders[0].price_buffer[-1]['high'] == 51.0
+                assert traders[2].price_buffer[-1]['close'] == 6.0
+                process.assert_not_called()  # HOLD signals never reach the executor
+                
+                # State updates are pending until the batched flush
+                db = trading_db()
+                assert db.query(AutoTraderSession).filter(AutoTraderSession.last_check_at.isnot(None)).count() == 0
+                db.close()
+                assert scheduler.flush() == 3
+                assert scheduler.flushes == 1
+            finally:
+                scheduler.stop()
+        
+        db = trading_db()
+        sessions = db.query(AutoTraderSession).all()
+        assert all(s.last_check_at is not None for s in sessions)
+        assert all(s.status == AutoTraderStatus.STOPPED for s in sessions)
+        db.close()
+        assert scheduler.bus.subscriber_count() == 0
+        assert not scheduler.running
@@ -0,0 +1,106 @@
+"""
+Tests for backtesting/engine.py - streaming bar replay
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting.engine import BacktestEngine, BacktestConfig, RollingState, Bar, as_bar_handler
+from strategies.base_strategies import MovingAverageCrossStrategy
+
+
+@pytest.fixture
+def sma_dataframe():
+    rng = np.random.default_rng(5)
+    dates = pd.date_range('2024-01-01', periods=600, freq='1h')
+    close = 100 + np.cumsum(rng.normal(0, 1, 600))
+    df = pd.DataFrame({'close': close}, index=dates)
+    df['sma_5'] = df['close'].rolling(5).mean()
+    df['sma_20'] = df['close'].rolling(20).mean()
+    return df
+
+
+def legacy_replay(df, strategy_func, symbol, config):
+    """Previous run_backtest loop: strategy sees df.iloc[:idx+1] on every bar"""
+    engine = BacktestEngine(config)
+    for idx in range(len(df)):
+        bar = df.iloc[idx]
+        signal = strategy_func(df.iloc[:idx + 1])
+        if signal == 'BUY' and len(engine.positions) == 0:
+            engine.open_position(df.index[idx], symbol, 'LONG', bar['close'],
+                                 percent_capital=config.risk_per_trade)
+        elif signal == 'SELL' and engine.positions:
+            for trade in engine.positions[:]:
+                engine.close_position(df.index[idx], trade, bar['close'])
+        engine.update_equity(df.index[idx], {symbol: bar['close']})
+    for trade in engine.positions[:]:
+        engine.close_position(df.index[-1], trade, df['close'].iloc[-1])
+    return engine.calculate_results()
+
+
+class TestRollingState:
+    def test_history_and_window(self, sma_dataframe):
+        state = RollingState(sma_dataframe)
+        for _ in range(10):
+            state.advance()
+        
+        assert len(state) == 10
+        np.testing.assert_array_equal(state.history('close', 3), sma_dataframe['close'].to_numpy()[7:10])
+        assert len(state.window(2)) == 2
+        assert state.window(2).index[-1] == sma_dataframe.index[9]
+        assert len(state.window()) == 10
+    
+    def test_bar_reads_current_values(self, sma_dataframe):
+        state = RollingState(sma_dataframe)
+        state.advance()
+        bar = Bar(sma_dataframe.index[0], 0, state._columns)
+        
+        assert bar.close == sma_dataframe['close'].iloc[0]
+        assert bar.get('missing', 'x') == 'x'
+
+
+class TestStreamingReplay:
+    def test_base_strategy_matches_full_history_replay(self, sma_dataframe):
+        config = BacktestConfig(initial_capital=10000, risk_per_trade=0.5)
+        strategy = MovingAverageCrossStrategy(fast_period=5, slow_period=20)
+        
+        streaming = BacktestEngine(config).run_backtest(sma_dataframe, strategy.generate_signal, 'TEST')
+        legacy = legacy_replay(sma_dataframe, strategy.generate_signal, 'TEST', config)
+        
+        assert streaming['total_trades'] == legacy['total_trades'] > 0
+        assert streaming['final_capital'] == legacy['final_capital']
+        assert streaming['equity_curve'] == legacy['equity_curve']
+    
+    def test_plain_function_gets_bounded_window(self, sma_dataframe):
+        seen = []
+        
+        def strategy(data):
+            seen.append(len(data))
+            return 'HOLD'
+        
+        BacktestEngine().run_backtest(sma_dataframe, strategy, 'TEST', lookback=3)
+        
+        assert seen[:4] == [1, 2, 3, 3]
+        assert max(seen) == 3
+    
+    def test_on_bar_strategy(self, sma_dataframe):
+        class Breakout:
+            def on_bar(self, bar, state):
+                recent = state.history('close', 10)
+                if len(recent) == 10 and bar.close >= recent.max():
+                    return 'BUY'
+                if len(recent) == 10 and bar.close <= recent.min():
+                    return 'SELL'
+                return 'HOLD'
+        
+        results = BacktestEngine(BacktestConfig(risk_per_trade=0.5)).run_backtest(sma_dataframe, Breakout(), 'TEST')
+        
+        assert results['total_trades'] > 0
+        assert len(results['equity_curve']) == len(sma_dataframe) + 1
+    
+    def test_handler_resolution(self):
+        strategy = MovingAverageCrossStrategy()
+        
+        assert as_bar_handler(strategy) == strategy.on_bar
+        assert as_bar_handler(strategy.generate_signal) == strategy.on_bar
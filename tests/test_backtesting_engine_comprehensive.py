@@ -12,7 +12,10 @@ from backend.backtesting_engine import (
     Strategy,
     SimpleMovingAverageStrategy,
     RSIStrategy,
-    EnhancedMovingAverageStrategy
+    EnhancedMovingAverageStrategy,
+    BacktestingEngine,
+    StrategyGenerator,
+    SharedOHLCV
 )
 from backend.constants import CONST_CLOSE
 
@@ -347,3 +350,155 @@ class TestStrategyEdgeCases:
         signals = strategy.generate_signals(df)
         
         assert isinstance(signals, pd.Series)
+
+
+class TestBacktestingEngineSimulation:
+    """Array-based simulation must match the bar-by-bar reference loop"""
+    
+    @staticmethod
+    def _random_case(seed, n=2000):
+        rng = np.random.default_rng(seed)
+        index = pd.date_range('2024-01-02 09:00', periods=n, freq='1min')
+        prices = 100 + np.cumsum(rng.normal(0, 0.2, n))
+        signals = rng.choice([0, 0, 0, 1, -1], size=n).astype(float)
+        return signals, prices, index
+    
+    @pytest.mark.parametrize("allow_short", [False, True])
+    @pytest.mark.parametrize("min_hold_minutes", [0, 1, 7])
+    @pytest.mark.parametrize("commission", [0.0, 0.001])
+    def test_matches_reference_loop(self, allow_short, min_hold_minutes, commission):
+        engine = BacktestingEngine(commission=commission, allow_short=allow_short,
+                                   min_hold_minutes=min_hold_minutes)
+        for seed in range(5):
+            signals, prices, index = self._random_case(seed)
+            fast_capital, fast_trades = engine._simulate(signals, prices, index)
+            loop_capital, loop_trades = engine._simulate_loop(signals, prices, index)
+            
+            assert fast_capital == loop_capital
+            assert fast_trades == loop_trades
+    
+    @staticmethod
+    def _legacy_run(signals, prices, index, capital=10000.0):
+        """Long-only bar loop of the original run() (no commission, no min hold)"""
+        position, entry_price, entry_date, trades = 0, 0.0, None, []
+        for i in range(len(signals)):
+            if signals[i] == 1 and position == 0:
+                position, entry_price, entry_date = 1, prices[i], index[i]
+            elif signals[i] == -1 and position == 1:
+                profit = (prices[i] - entry_price) * (capital / entry_price)
+                capital += profit
+                trades.append((entry_date, index[i], profit, (prices[i] - entry_price) / entry_price * 100))
+                position = 0
+        if position == 1:
+            profit = (prices[-1] - entry_price) * (capital / entry_price)
+            capital += profit
+            trades.append((entry_date, index[-1], profit, (prices[-1] - entry_price) / entry_price * 100))
+        return capital, trades
+    
+    def test_matches_original_run_without_costs(self):
+        engine = BacktestingEngine(commission=0.0, min_hold_minutes=0)
+        for seed in range(5):
+            signals, prices, index = self._random_case(seed)
+            capital, trades = engine._simulate(signals, prices, index)
+            legacy_capital, legacy_trades = self._legacy_run(signals, prices, index)
+            
+            assert capital == pytest.approx(legacy_capital, rel=1e-12)
+            assert [(t["entry_date"], t["exit_date"]) for t in trades] == [t[:2] for t in legacy_trades]
+            assert [t["profit"] for t in trades] == pytest.approx([t[2] for t in legacy_trades], rel=1e-9)
+            assert [t["profit_pct"] for t in trades] == pytest.approx([t[3] for t in legacy_trades], rel=1e-9)
+    
+    def test_profit_pct_is_net_of_commission(self):
+        engine = BacktestingEngine(commission=0.001, min_hold_minutes=0)
+        index = pd.RangeIndex(2)
+        
+        capital, trades = engine._simulate(np.array([1, -1], dtype=float), np.array([100.0, 101.0]), index)
+        
+        assert trades[0]["profit"] == pytest.approx(100.0 - 0.001 * (10000 + 10100))
+        assert trades[0]["profit_pct"] == pytest.approx((capital - 10000.0) / 10000.0 * 100)
+        assert trades[0]["profit_pct"] < 1.0
+    
+    def test_long_only_ignores_sell_when_flat(self):
+        engine = BacktestingEngine(commission=0.0)
+        index = pd.date_range('2024-01-02', periods=5, freq='1D')
+        signals = np.array([-1, 1, 0, -1, 0], dtype=float)
+        prices = np.array([100.0, 100.0, 105.0, 110.0, 90.0])
+        
+        capital, trades = engine._simulate(signals, prices, index)
+        
+        assert len(trades) == 1
+        assert trades[0]["direction"] == "LONG"
+        assert trades[0]["entry_date"] == index[1]
+        assert capital == pytest.approx(11000.0)
+    
+    def test_short_profit_and_commission(self):
+        engine = BacktestingEngine(commission=0.001, allow_short=True, min_hold_minutes=0)
+        index = pd.RangeIndex(3)
+        signals = np.array([-1, 0, 1], dtype=float)
+        prices = np.array([100.0, 95.0, 90.0])
+        
+        capital, trades = engine._simulate(signals, prices, index)
+        
+        assert trades[0]["direction"] == "SHORT"
+        assert trades[0]["commission"] == pytest.approx(0.001 * (10000 + 9000))
+        assert capital == pytest.approx(11000.0 - 19.0)
+    
+    def test_min_hold_delays_exit(self):
+        engine = BacktestingEngine(commission=0.0, min_hold_minutes=3)
+        index = pd.date_range('2024-01-02 09:00', periods=6, freq='1min')
+        signals = np.array([1, -1, -1, 0, -1, 0], dtype=float)
+        prices = np.arange(100.0, 106.0)
+        
+        _, trades = engine._simulate(signals, prices, index)
+        
+        assert trades[0]["exit_date"] == index[4]
+    
+    def test_run_open_position_closed_at_end(self, sample_dataframe):
+        engine = BacktestingEngine(commission=0.0)
+        result = engine.run(SimpleMovingAverageStrategy(fast=5, slow=20), sample_dataframe, "TEST")
+        
+        assert result.total_trades == len(result.trades)
+        assert result.trades[-1]["exit_date"] <= sample_dataframe.index[-1]
+        assert result.final_capital == pytest.approx(
+            10000.0 + sum(t["profit"] for t in result.trades)
+        )
+
+
+class TestParallelOptimization:
+    """Seeded, multi-process strategy search"""
+    
+    def test_generator_is_deterministic_under_seed(self):
+        gen_a, gen_b = StrategyGenerator(seed=3), StrategyGenerator(seed=3)
+        seq_a = [gen_a.generate().to_dict() for _ in range(20)]
+        seq_b = [gen_b.generate().to_dict() for _ in range(20)]
+        
+        assert seq_a == seq_b
+    
+    def test_shared_ohlcv_roundtrip(self, sample_dataframe):
+        shared = SharedOHLCV(sample_dataframe)
+        try:
+            df, blocks = SharedOHLCV.attach(shared.spec)
+            pd.testing.assert_frame_equal(df, sample_dataframe.astype(np.float64), check_freq=False)
+            del df
+            for block in blocks:
+                block.close()
+        finally:
+            shared.close()
+    
+    def test_parallel_matches_sequential(self, sample_dataframe):
+        engine = BacktestingEngine(allow_short=True)
+        progress = []
+        
+        seq_strategy, seq_best, seq_all = engine.run_parallel_optimization(
+            sample_dataframe, "TEST", num_iterations=12, num_processes=1, seed=11
+        )
+        par_strategy, par_best, par_all = engine.run_parallel_optimization(
+            sample_dataframe, "TEST", num_iterations=12, num_processes=2, seed=11,
+            progress_callback=lambda *args: progress.append(args)
+        )
+        
+        assert par_strategy.to_dict() == seq_strategy.to_dict()
+        assert par_best.total_return == seq_best.total_return
+        assert par_best.trades == seq_best.trades
+        assert [r.total_return for r in par_all] == [r.total_return for r in seq_all]
+        assert [p[0] for p in progress] == list(range(1, 13))
+        assert progress[-1][2] == max(r.total_return for r in seq_all)
@@ -0,0 +1,199 @@
+"""
+Tests for backend/bar_retention.py - tiered retention of historical_data
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import bar_retention
+from backend.models import Base, Ticker
+from backend.data_access import upsert_bars, load_bars_frame, get_series_stats
+from backend.bar_retention import (
+    RetentionRule, rule_for, retention_cutoff, plan_retention, rollup_bars, apply_retention, read_archive,
+    delete_bars_batched, enable_incremental_vacuum, incremental_vacuum
+)
+
+NOW = datetime(2024, 3, 20, 15, 30)
+POLICY = {'5s': RetentionRule(14, '1min'), '1min': RetentionRule(365, '1h'), '1day': RetentionRule(None)}
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite database with the full schema and one ticker"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Ticker(symbol="TTE", name="TotalEnergies", exchange="Euronext Paris"))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def make_bars(start, periods, freq="5s"):
+    timestamps = pd.date_range(start, periods=periods, freq=freq)
+    close = pd.Series(range(periods), dtype=float) + 100
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": 10,
+    })
+
+
+class TestRetentionRules:
+    def test_policy_lookup_and_cutoff(self):
+        assert rule_for('5s', POLICY) == RetentionRule(14, '1min')
+        assert rule_for('5s', POLICY, days=3) == RetentionRule(3, '1min')
+        assert rule_for('2min', POLICY).keep_days == bar_retention.DATA_CONFIG["retention_days"]
+        assert retention_cutoff(POLICY['5s'], NOW) == pd.Timestamp('2024-03-06')
+        assert retention_cutoff(POLICY['1day'], NOW) is None
+
+    def test_default_policy_matches_stored_interval_names(self):
+        assert rule_for('5sec') == RetentionRule(14, '1min')
+        assert rule_for('5s') == rule_for('5 secs') == rule_for('5sec')
+        assert rule_for('1 hour') == rule_for('1h') == RetentionRule(730, '1day')
+        assert rule_for('2min').rollup_to == '1h'
+        assert rule_for('1month').keep_days is None
+
+    def test_rollup_bars(self):
+        bars = make_bars("2024-01-02 09:00:30", 24)  # 09:00:30 -> 09:02:25
+
+        rolled = rollup_bars(bars, '1min')
+
+        assert list(rolled["timestamp"]) == list(pd.to_datetime(["2024-01-02 09:00", "2024-01-02 09:01",
+                                                                 "2024-01-02 09:02"]))
+        assert list(rolled["open"]) == [100.0, 106.0, 118.0]
+        assert list(rolled["high"]) == [106.0, 118.0, 124.0]
+        assert list(rolled["low"]) == [99.0, 105.0, 117.0]
+        assert list(rolled["close"]) == [105.0, 117.0, 123.0]
+        assert list(rolled["volume"]) == [60, 120, 60]
+        with pytest.raises(ValueError):
+            rollup_bars(bars, 'fortnight')
+
+
+class TestApplyRetention:
+    def test_archives_rolls_up_and_deletes(self, db, tmp_path):
+        # 5s bars from 2024-02-28 to 2024-03-08, one existing 1min bar in the expired range
+        upsert_bars(db, 1, '5s', make_bars("2024-02-28 09:00", 9 * 24 * 720))
+        upsert_bars(db, 1, '1min', pd.DataFrame({
+            "timestamp": [pd.Timestamp("2024-03-01 09:00")],
+            "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1,
+        }))
+        expired = load_bars_frame(db, 1, '5s', end="2024-03-05 23:59:59.999999")
+        progress = []
+
+        plan = plan_retention(db, POLICY, now=NOW)
+        result = apply_retention(db, POLICY, now=NOW, archive=True, archive_dir=tmp_path, batch_size=1000,
+                                 progress_callback=lambda done, total: progress.append((done, total)))
+
+        assert [(item['interval'], item['cutoff']) for item in plan] == [('5s', pd.Timestamp('2024-03-06'))]
+        assert result['series'] == 1 and progress == [(1, 1)]
+        assert result['deleted'] == result['archived'] == len(expired)
+
+        # Kept bars start at the cutoff, stats follow
+        kept = load_bars_frame(db, 1, '5s')
+        assert kept["timestamp"].iloc[0] == pd.Timestamp("2024-03-06")
+        assert get_series_stats(db, 1, '5s')['count'] == len(kept)
+
+        # Expired bars rolled up to 1min, the existing 1min bar is kept as is
+        minutes = load_bars_frame(db, 1, '1min', index=True)
+        assert len(minutes) == len(expired) // 12
+        assert result['rolled_up'] == len(minutes) - 1
+        assert minutes.loc["2024-03-01 09:00", "close"] == 1.0
+        assert minutes["volume"].iloc[-1] == 120
+        assert get_series_stats(db, 1, '1min')['count'] == len(minutes)
+
+        # One archive per month, together holding exactly the deleted bars
+        assert [path.name for path in result['files']] == ["2024-02.parquet", "2024-03.parquet"]
+        archived = pd.concat([read_archive(path) for path in result['files']], ignore_index=True)
+        pd.testing.assert_frame_equal(archived, expired)
+
+        # Nothing left to do
+        assert apply_retention(db, POLICY, now=NOW, archive_dir=tmp_path)['series'] == 0
+
+    def test_default_policy_on_5sec_bars(self, db, tmp_path):
+        upsert_bars(db, 1, '5sec', make_bars("2024-03-01 09:00", 120))
+        upsert_bars(db, 1, '5sec', make_bars("2024-03-19 09:00", 12))
+
+        result = apply_retention(db, now=NOW, archive_dir=tmp_path)
+
+        assert result['deleted'] == 120
+        assert len(load_bars_frame(db, 1, '5sec')) == 12
+        assert len(load_bars_frame(db, 1, '1min')) == 10
+        assert result['files'] == [tmp_path / "TTE" / "5sec" / "2024-03.parquet"]
+
+    def test_csv_archive_without_pyarrow(self, db, tmp_path):
+        upsert_bars(db, 1, '5s', make_bars("2024-03-01 09:00", 100))
+
+        with patch.object(bar_retention, "PYARROW_AVAILABLE", False):
+            first = apply_retention(db, POLICY, now=NOW, archive=True, archive_dir=tmp_path)
+            # A later run merges into the same monthly file
+            upsert_bars(db, 1, '5s', make_bars("2024-03-02 09:00", 50))
+            second = apply_retention(db, POLICY, now=NOW, archive=True, archive_dir=tmp_path)
+
+        assert first['files'] == second['files'] == [tmp_path / "TTE" / "5s" / "2024-03.csv.gz"]
+        assert len(read_archive(first['files'][0])) == 150
+
+    def test_delete_bars_batched(self, db):
+        upsert_bars(db, 1, '5s', make_bars("2024-03-01 09:00", 250))
+        with patch.object(db, "commit", wraps=db.commit) as commit:
+            deleted = delete_bars_batched(db, 1, '5s', "2024-03-01", "2024-03-01 09:10", batch_size=50)
+        assert deleted == 120
+        assert commit.call_count == 3
+        assert len(load_bars_frame(db, 1, '5s')) == 130
+
+
+class TestIncrementalVacuum:
+    def test_pages_released_after_delete(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'bars.db'}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            assert incremental_vacuum(db) == 0  # auto_vacuum off
+            assert enable_incremental_vacuum(db) is True
+            assert enable_incremental_vacuum(db) is False
+
+            db.add(Ticker(symbol="TTE", name="TotalEnergies"))
+            db.commit()
+            upsert_bars(db, 1, '5s', make_bars("2024-01-02 09:00", 20000))
+            delete_bars_batched(db, 1, '5s', "2024-01-01", "2024-02-01")
+            assert db.execute(text("PRAGMA freelist_count")).scalar() > 0
+
+            assert incremental_vacuum(db, step_pages=50) > 0
+            assert db.execute(text("PRAGMA freelist_count")).scalar() == 0
+        finally:
+            db.close()
+            engine.dispose()
+
+
+class TestCleanupOldData:
+    def test_data_collector_uses_retention_policy(self, session_factory, tmp_path):
+        from backend.data_collector import DataCollector
+
+        with patch('backend.data_collector.SessionLocal', session_factory):
+            collector = DataCollector()
+        upsert_bars(collector.db, 1, '5s', make_bars("2020-01-02 09:00", 100))
+        upsert_bars(collector.db, 1, '5s', make_bars(datetime.now().replace(microsecond=0), 10))
+
+        with patch.object(bar_retention, "BAR_ARCHIVE_DIR", tmp_path):
+            assert collector.cleanup_old_data() == 100
+
+        assert len(load_bars_frame(collector.db, 1, '5s')) == 10
+        assert len(load_bars_frame(collector.db, 1, '1min')) == 9
+        assert list(tmp_path.glob("TTE/5s/2020-01.*"))
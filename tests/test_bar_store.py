@@ -0,0 +1,242 @@
+"""
+Tests for backend/bar_store.py - Parquet bar store
+"""
+import pytest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker, HistoricalData
+from backend import bar_store
+from backend.bar_store import BarStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path / "bars")
+
+
+def make_bars(n, start="2024-01-02 09:00", close=100.0, freq="1min"):
+    timestamps = pd.date_range(start, periods=n, freq=freq)
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": np.arange(n, dtype=float) + close,
+        "volume": 1000,
+    })
+
+
+class TestBarStore:
+    def test_partitioned_by_day_with_safe_interval_dir(self, store):
+        store.append("TTE", "1 min", make_bars(3 * 24 * 60, start="2024-01-02 00:00"))
+
+        files = sorted(p.name for p in (store.root / "TTE" / "1_min").glob("*.parquet"))
+        assert files == ["2024-01-02.parquet", "2024-01-03.parquet", "2024-01-04.parquet"]
+
+    def test_roundtrip_types(self, store):
+        store.append("TTE", "1min", make_bars(10))
+
+        df = store.load_bars("TTE", "1min")
+        assert len(df) == 10
+        assert isinstance(df.index, pd.DatetimeIndex)
+        assert df["close"].dtype == np.float64
+        assert df["volume"].dtype == np.int64
+        assert df["close"].iloc[-1] == 109.0
+
+    def test_append_replaces_same_timestamp(self, store):
+        store.append("TTE", "1min", make_bars(10))
+        store.append("TTE", "1min", make_bars(5, start="2024-01-02 09:08", close=200.0))
+
+        df = store.load_bars("TTE", "1min")
+        assert len(df) == 13
+        assert df.index.is_monotonic_increasing
+        assert df.loc["2024-01-02 09:08", "close"] == 200.0
+        assert df.loc["2024-01-02 09:07", "close"] == 107.0
+
+    def test_range_and_column_projection(self, store):
+        store.append("TTE", "1min", make_bars(3 * 24 * 60))
+
+        df = store.load_bars("TTE", "1min", start="2024-01-03 10:00", end="2024-01-03 10:04",
+                             columns=["close"])
+        assert list(df.columns) == ["close"]
+        assert len(df) == 5
+        assert df.index[0] == pd.Timestamp("2024-01-03 10:00")
+        assert df.index[-1] == pd.Timestamp("2024-01-03 10:04")
+
+    def test_index_input_and_timezone(self, store):
+        bars = make_bars(5).set_index("timestamp")
+        bars.index = bars.index.tz_localize("Europe/Paris")
+        store.append("TTE", "1min", bars)
+
+        df = store.load_bars("TTE", "1min")
+        assert df.index[0] == pd.Timestamp("2024-01-02 09:00")
+
+    def test_load_arrays(self, store):
+        store.append("TTE", "1min", make_bars(10))
+
+        arrays = store.load_arrays("TTE", "1min", columns=["close"])
+        assert set(arrays) == {"timestamp", "close"}
+        assert arrays["timestamp"].dtype == "datetime64[ns]"
+        np.testing.assert_array_equal(arrays["close"], np.arange(10) + 100.0)
+
+    def test_limit_reads_most_recent_days(self, store):
+        store.append("TTE", "1min", make_bars(3 * 24 * 60, start="2024-01-02 00:00"))
+
+        df = store.load_bars("TTE", "1min", end="2024-01-03 00:02", limit=5)
+        assert df.index.tolist() == list(pd.date_range("2024-01-02 23:58", periods=5, freq="1min"))
+        assert len(store.load_bars("TTE", "1min", limit=10 ** 6)) == 3 * 24 * 60
+
+    def test_manifest_tracks_count_and_bounds(self, store):
+        store.append("TTE", "1min", make_bars(10))
+        store.append("TTE", "1min", make_bars(5, start="2024-01-02 09:08", close=200.0), keep_existing=True)
+
+        manifest = store.manifest("TTE", "1min")
+        assert manifest["bar_count"] == 13
+        assert pd.Timestamp(manifest["first"]) == pd.Timestamp("2024-01-02 09:00")
+        assert pd.Timestamp(manifest["last"]) == pd.Timestamp("2024-01-02 09:12")
+        assert manifest["stamp"] is None
+        # keep_existing: bars already stored are not replaced
+        assert store.load_bars("TTE", "1min").loc["2024-01-02 09:08", "close"] == 108.0
+
+    def test_missing_series(self, store):
+        assert store.load_bars("XXX", "1min").empty
+        assert store.load_arrays("XXX", "1min") == {}
+        assert store.date_range("XXX", "1min") is None
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Ticker(symbol="TTE", name="TotalEnergies", exchange="Euronext Paris"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def enabled(store):
+    with patch.dict(bar_store.DATA_CONFIG, {"bar_store_enabled": True}), \
+         patch.object(bar_store, "_default_store", store):
+        yield store
+
+
+def save(db, bars, interval="1min"):
+    """Collector save: stamp, database write, then the store hook"""
+    from backend.data_access import upsert_bars
+
+    stamp = bar_store.series_stamp(db, 1, interval)
+    upsert_bars(db, 1, interval, bars)
+    return bar_store.append_bars(db, 1, "TTE", interval, bars, stamp)
+
+
+def from_store_only():
+    return patch.object(bar_store, "load_bars_frame", side_effect=AssertionError("database read"))
+
+
+class TestAppendHook:
+    def test_disabled_is_noop(self, db, store):
+        with patch.dict(bar_store.DATA_CONFIG, {"bar_store_enabled": False}), \
+             patch.object(bar_store, "_default_store", store):
+            assert bar_store.series_stamp(db, 1, "1min") is None
+            assert save(db, make_bars(5)) == 0
+        assert not store.root.exists()
+
+    def test_saves_keep_store_in_sync(self, db, enabled):
+        assert save(db, make_bars(10)) == 10
+        assert save(db, make_bars(10, start="2024-01-02 09:05", close=200.0)) == 10
+
+        with from_store_only():
+            df = bar_store.load_bars(db, 1, "TTE", "1min", start="2024-01-02 09:03", end="2024-01-02 09:06")
+        assert df["timestamp"].tolist() == list(pd.date_range("2024-01-02 09:03", periods=4, freq="1min"))
+        assert df["close"].tolist() == [103.0, 104.0, 200.0, 201.0]
+        assert df["volume"].dtype == np.int64
+
+    def test_swallows_errors(self, db, enabled):
+        assert bar_store.append_bars(db, 1, "TTE", "1min", pd.DataFrame({"timestamp": [1]}), None) == 0
+
+
+class TestLoadBars:
+    def test_database_writes_not_mirrored_make_store_stale(self, db, enabled):
+        from backend.data_access import merge_price
+
+        save(db, make_bars(30))
+        with from_store_only():
+            assert len(bar_store.load_bars(db, 1, "TTE", "1min")) == 30
+
+        # Live price merged into an existing bar of the database only
+        merge_price(db, 1, "1min", pd.Timestamp("2024-01-02 09:10").to_pydatetime(), 500.0)
+        db.commit()
+        df = bar_store.load_bars(db, 1, "TTE", "1min", index=True)
+        assert df.loc["2024-01-02 09:10", "high"] == 500.0
+
+        # A later collector save does not make the diverged store current again
+        save(db, make_bars(5, start="2024-01-02 10:00"))
+        assert enabled.manifest("TTE", "1min")["stamp"] is None
+        assert bar_store.load_bars(db, 1, "TTE", "1min", index=True).loc["2024-01-02 09:10", "high"] == 500.0
+
+    def test_deleted_bars_make_store_stale(self, db, enabled):
+        from backend.data_access import refresh_interval_stats
+
+        save(db, make_bars(30))
+        # Bars deleted from the database (retention) but still in the store
+        db.execute(HistoricalData.__table__.delete().where(HistoricalData.id <= 3))
+        refresh_interval_stats(db, 1, "1min")
+        db.commit()
+
+        assert len(bar_store.load_bars(db, 1, "TTE", "1min")) == 27
+
+    def test_emptied_series_is_rewritten(self, db, enabled):
+        from backend.data_access import refresh_interval_stats
+
+        save(db, make_bars(30))
+        db.execute(HistoricalData.__table__.delete())
+        refresh_interval_stats(db, 1)
+        db.commit()
+        save(db, make_bars(5, start="2024-01-03 09:00"))
+
+        with from_store_only():
+            assert len(bar_store.load_bars(db, 1, "TTE", "1min")) == 5
+
+    def test_single_interval_and_limit_from_store(self, db, enabled):
+        save(db, make_bars(30))
+
+        with from_store_only():
+            df = bar_store.load_bars(db, 1, "TTE", limit=5, index=True)
+        assert df.index[0] == pd.Timestamp("2024-01-02 09:25")
+        assert len(df) == 5
+
+        # Two intervals: interval=None mixes them, only the database can answer
+        save(db, make_bars(3, freq="1D"), interval="1day")
+        assert len(bar_store.load_bars(db, 1, "TTE")) == 33
+
+    def test_disabled_reads_database(self, db, store):
+        from backend.data_access import upsert_bars
+
+        upsert_bars(db, 1, "1min", make_bars(5))
+        with patch.dict(bar_store.DATA_CONFIG, {"bar_store_enabled": False}), \
+             patch.object(bar_store, "_default_store", store):
+            assert len(bar_store.load_bars(db, 1, "TTE", "1min")) == 5
+
+
+def test_backfill_from_database(db, enabled):
+    from backend.data_access import upsert_bars
+
+    upsert_bars(db, 1, "1min", make_bars(4))
+    enabled.append("TTE", "1min", make_bars(2, start="2023-01-02 09:00"))  # stale leftovers
+    factory = sessionmaker(bind=db.get_bind())
+
+    with patch("backend.models.SessionLocal", factory):
+        written = bar_store.backfill_from_database(store=enabled)
+
+    assert written == {"TTE 1min": 4}
+    with from_store_only():
+        df = bar_store.load_bars(db, 1, "TTE", "1min")
+    assert df["close"].tolist() == [100.0, 101.0, 102.0, 103.0]
@@ -0,0 +1,127 @@
+"""
+Tests for backend/compact_bars.py - compact WITHOUT ROWID bar layout
+"""
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker
+from backend.data_access import upsert_bars, load_bars_frame
+from backend.compact_bars import (
+    create_compact_schema, interval_codes, write_compact_bars, load_compact_frame, slim_historical_data,
+    to_epoch, from_epoch, DEFAULT_INTERVALS, INDICATOR_COLUMNS
+)
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite database with the full schema and one ticker"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Ticker(symbol="TTE", name="TotalEnergies", exchange="Euronext Paris"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def make_bars(n, start="2024-01-02 09:00", freq="5s", close=100.0):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq=freq),
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": 1000,
+    })
+
+
+class TestCompactSchema:
+    def test_tables_and_interval_codes(self, db):
+        create_compact_schema(db)
+        create_compact_schema(db)
+
+        codes = interval_codes(db)
+        assert list(codes) == DEFAULT_INTERVALS
+        assert sorted(codes.values()) == list(range(1, len(DEFAULT_INTERVALS) + 1))
+        ddl = db.execute(text("SELECT sql FROM sqlite_master WHERE name = 'compact_bars'")).scalar()
+        assert "WITHOUT ROWID" in ddl
+
+    def test_epoch_round_trip_keeps_wall_clock(self):
+        stamps = pd.to_datetime(["2024-03-31 01:59:55", "2024-03-31 03:00:00"])
+        epochs = to_epoch(stamps)
+        assert epochs[1] - epochs[0] == 3605  # No DST shift: naive Paris time
+        assert list(from_epoch(epochs)) == list(stamps)
+
+
+class TestWriteCompactBars:
+    def test_upsert_and_range_scan(self, db):
+        create_compact_schema(db)
+        assert write_compact_bars(db, 1, "5s", make_bars(100), chunk_size=30) == 100
+
+        # Second write overwrites the overlap instead of duplicating it
+        write_compact_bars(db, 1, "5s", make_bars(50, start="2024-01-02 09:05", close=200.0))
+        assert db.execute(text("SELECT COUNT(*) FROM compact_bars")).scalar() == 110
+
+        df = load_compact_frame(db, 1, "5s", "2024-01-02 09:04:55", "2024-01-02 09:05:05", index=True)
+        assert list(df["close"]) == [100.0, 200.0, 200.0]
+        assert df.index[0] == pd.Timestamp("2024-01-02 09:04:55")
+
+    def test_unknown_interval_gets_a_code(self, db):
+        create_compact_schema(db)
+        write_compact_bars(db, 1, "2min", make_bars(3, freq="2min"))
+        assert interval_codes(db)["2min"] == len(DEFAULT_INTERVALS) + 1
+        assert load_compact_frame(db, 1, "1min").empty
+
+
+def add_legacy_layout(db):
+    """Indicator columns and indexes of databases created before the slim schema"""
+    for name in INDICATOR_COLUMNS:
+        db.execute(text(f"ALTER TABLE historical_data ADD COLUMN {name} FLOAT"))
+    db.execute(text("CREATE INDEX ix_historical_data_ticker_id ON historical_data (ticker_id)"))
+    db.execute(text("CREATE INDEX ix_historical_data_timestamp ON historical_data (timestamp)"))
+    db.execute(text("CREATE INDEX idx_ticker_interval_timestamp ON historical_data (ticker_id, interval, timestamp)"))
+    db.commit()
+
+
+def table_layout(db):
+    columns = [row[1] for row in db.execute(text("PRAGMA table_info(historical_data)"))]
+    indexes = sorted(row[1] for row in db.execute(text("PRAGMA index_list(historical_data)")))
+    return columns, indexes
+
+
+class TestSlimHistoricalData:
+    def test_legacy_table_is_rebuilt(self, db):
+        add_legacy_layout(db)
+        upsert_bars(db, 1, "5s", make_bars(300))
+        upsert_bars(db, 1, "1min", make_bars(40, freq="1min", close=50.0))
+        db.execute(text("UPDATE historical_data SET rsi_14 = 55 WHERE interval = '1min'"))
+        db.commit()
+        before = {interval: load_bars_frame(db, 1, interval) for interval in ("5s", "1min")}
+        ids = db.execute(text("SELECT id FROM historical_data ORDER BY id")).scalars().all()
+
+        result = slim_historical_data(db)
+
+        assert result == {"indicator_rows": 40, "columns_dropped": len(INDICATOR_COLUMNS), "indexes_dropped": 3}
+        columns, indexes = table_layout(db)
+        assert not set(INDICATOR_COLUMNS) & set(columns)
+        assert indexes == ["idx_ticker_timestamp", "idx_unique_historical_data"]
+        for interval, df in before.items():
+            pd.testing.assert_frame_equal(load_bars_frame(db, 1, interval), df)
+        assert db.execute(text("SELECT id FROM historical_data ORDER BY id")).scalars().all() == ids
+        assert db.execute(text("SELECT COUNT(*) FROM compact_bar_indicators WHERE rsi_14 = 55")).scalar() == 40
+
+        # Writers keep working on the rebuilt table, and re-running changes nothing
+        upsert_bars(db, 1, "1min", make_bars(5, start="2024-01-03 09:00", freq="1min"))
+        assert len(load_bars_frame(db, 1, "1min")) == 45
+        assert slim_historical_data(db) == {"indicator_rows": 0, "columns_dropped": 0, "indexes_dropped": 0}
+
+    def test_current_schema_is_left_alone(self, db):
+        upsert_bars(db, 1, "5s", make_bars(10))
+        layout = table_layout(db)
+
+        assert slim_historical_data(db) == {"indicator_rows": 0, "columns_dropped": 0, "indexes_dropped": 0}
+        assert table_layout(db) == layout
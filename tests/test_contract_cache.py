@@ -0,0 +1,113 @@
+"""
+Tests for backend/contract_cache.py - qualified contract cache
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, QualifiedContract
+from backend.contract_cache import ContractCache
+from backend.fake_ib import FakeIB, FakeContract
+from backend.ibkr_collector import IBKRCollector
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def qualified(symbol="TTE", con_id=29612193, currency="EUR"):
+    contract = FakeContract(symbol, exchange="SMART", currency=currency, conId=con_id)
+    contract.primaryExchange = "SBF"
+    return contract
+
+
+class TestContractCache:
+    def test_store_and_lookup(self, session_factory):
+        cache = ContractCache(session_factory)
+        cache.store("tte", "SMART", None, qualified(), isin="FR0000120271")
+
+        entry = cache.lookup("TTE")
+        assert entry["con_id"] == 29612193
+        assert entry["primary_exchange"] == "SBF"
+        assert cache.is_fresh(entry)
+        # Currency-specific requests are a different key, ISIN still resolves
+        assert cache.lookup("TTE", currency="EUR") is None
+        assert cache.lookup("XXX", isin="FR0000120271")["con_id"] == 29612193
+
+    def test_persisted_across_instances(self, session_factory):
+        ContractCache(session_factory).store("TTE", "SMART", None, qualified())
+        ContractCache(session_factory).store("TTE", "SMART", None, qualified(con_id=42))
+
+        db = session_factory()
+        assert db.query(QualifiedContract).count() == 1
+        db.close()
+        assert ContractCache(session_factory).lookup("TTE")["con_id"] == 42
+
+    def test_unqualified_contract_not_cached(self, session_factory):
+        cache = ContractCache(session_factory)
+        assert cache.store("TTE", "SMART", None, FakeContract("TTE")) is None
+        assert cache.lookup("TTE") is None
+
+    def test_ttl_and_invalidate(self, session_factory):
+        cache = ContractCache(session_factory, ttl=timedelta(days=7))
+        entry = cache.store("TTE", "SMART", None, qualified())
+        assert not cache.is_fresh(entry, now=datetime.now() + timedelta(days=8))
+
+        cache.invalidate("tte")
+        assert cache.lookup("TTE") is None
+        assert ContractCache(session_factory).lookup("TTE") is None
+
+    def test_cached_contract_matches_currency(self, session_factory):
+        cache = ContractCache(session_factory)
+        cache.store("TTE", "SMART", None, qualified())
+
+        assert cache.cached_contract("TTE", currency="EUR").conId == 29612193
+        assert cache.cached_contract("TTE", currency="USD") is None
+
+
+class TestGetContractUsesCache:
+    @pytest.fixture
+    def collector(self, session_factory):
+        collector = IBKRCollector(client_id=998)
+        collector.ib = FakeIB(latency=0)
+        collector.connected = True
+        with patch("backend.ibkr_collector.contract_cache", ContractCache(session_factory)) as cache:
+            yield collector, cache
+
+    def test_second_call_skips_qualification(self, collector):
+        collector, _ = collector
+        with patch.object(collector.ib, "qualifyContracts", wraps=collector.ib.qualifyContracts) as qualify:
+            first = collector.get_contract("AAPL")
+            second = collector.get_contract("AAPL")
+
+        assert qualify.call_count == 1
+        assert second.conId == first.conId
+
+    def test_european_seed_is_qualified_once(self, collector):
+        collector, cache = collector
+        with patch.object(collector.ib, "qualifyContracts", wraps=collector.ib.qualifyContracts) as qualify:
+            collector.get_contract("TTE")
+            contract = collector.get_contract("TTE")
+
+        assert qualify.call_count == 1
+        assert contract.currency == "EUR"
+        assert cache.lookup("TTE")["con_id"] == contract.conId
+
+    def test_stale_entry_used_when_requalification_fails(self, collector):
+        collector, cache = collector
+        cache.store("AAPL", "SMART", None, qualified("AAPL", con_id=265598, currency="USD"))
+        cache.lookup("AAPL")["qualified_at"] = datetime.now() - timedelta(days=30)
+
+        with patch.object(collector.ib, "qualifyContracts", return_value=[]) as qualify:
+            contract = collector.get_contract("AAPL")
+
+        assert qualify.called
+        assert contract.conId == 265598
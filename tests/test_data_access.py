@@ -0,0 +1,323 @@
+"""
+Tests for backend/data_access.py - bulk historical_data upserts
+"""
+import pytest
+from unittest.mock import patch
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker, HistoricalData
+from backend.data_access import (
+    ensure_unique_bar_index, upsert_bars, format_sqlite_timestamps, load_bars_frame,
+    add_bars_listener, remove_bars_listener, get_series_stats, refresh_interval_stats, ensure_interval_stats,
+    migrate_unique_bar_index, merge_price, merge_bar, UNIQUE_BAR_INDEX
+)
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite database with the full schema"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def ticker_id(session_factory):
+    db = session_factory()
+    ticker = Ticker(symbol="TTE", name="TotalEnergies", exchange="Euronext Paris")
+    db.add(ticker)
+    db.commit()
+    ticker_id = ticker.id
+    db.close()
+    return ticker_id
+
+
+def make_bars(n, start="2024-01-02 09:00", close=100.0):
+    timestamps = pd.date_range(start, periods=n, freq="1min")
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": 1000,
+    })
+
+
+class TestFormatSqliteTimestamps:
+    def test_matches_orm_layout(self):
+        ts = pd.Series(pd.to_datetime(["2024-01-02 09:00:00"]))
+        assert format_sqlite_timestamps(ts)[0] == "2024-01-02 09:00:00.000000"
+
+    def test_timezone_aware_keeps_wall_time(self):
+        ts = pd.Series(pd.to_datetime(["2024-01-02 09:00:00"]).tz_localize("Europe/Paris"))
+        assert format_sqlite_timestamps(ts)[0] == "2024-01-02 09:00:00.000000"
+
+
+class TestUpsertBars:
+    def test_insert_then_skip_identical(self, session_factory, ticker_id):
+        db = session_factory()
+        assert ensure_unique_bar_index(db)
+
+        first = upsert_bars(db, ticker_id, "1min", make_bars(500), chunk_size=128)
+        assert first["new_records"] == 500
+        assert first["updated_records"] == 0
+
+        second = upsert_bars(db, ticker_id, "1min", make_bars(500), chunk_size=128)
+        assert second["new_records"] == 0
+        assert second["skipped_records"] == 500
+        assert db.query(HistoricalData).count() == 500
+        db.close()
+
+    def test_changed_bars_are_updated(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        upsert_bars(db, ticker_id, "1min", make_bars(10))
+
+        changed = make_bars(10)
+        changed.loc[3, "close"] = 105.5
+        result = upsert_bars(db, ticker_id, "1min", changed)
+
+        assert result["updated_records"] == 1
+        assert result["skipped_records"] == 9
+        closes = [row.close for row in db.query(HistoricalData).order_by(HistoricalData.timestamp)]
+        assert closes[3] == 105.5
+        db.close()
+
+    def test_rows_readable_through_orm(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        upsert_bars(db, ticker_id, "1min", make_bars(3))
+
+        row = db.query(HistoricalData).order_by(HistoricalData.timestamp).first()
+        assert row.timestamp == pd.Timestamp("2024-01-02 09:00").to_pydatetime()
+        assert row.volume == 1000
+        assert row.interval == "1min"
+        db.close()
+
+    def test_invalid_rows_and_batch_duplicates(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        bars = make_bars(5)
+        bars["close"] = bars["close"].astype(object)
+        bars.loc[1, "close"] = "n/a"
+        bars = pd.concat([bars, bars.iloc[[4]]], ignore_index=True)
+
+        result = upsert_bars(db, ticker_id, "1min", bars)
+
+        assert result["errors"] == ["Row 1: Invalid data types"]
+        assert result["new_records"] == 4
+        assert result["skipped_records"] == 1
+        db.close()
+
+    def test_intervals_are_independent(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        upsert_bars(db, ticker_id, "1min", make_bars(5))
+        result = upsert_bars(db, ticker_id, "5min", make_bars(5))
+        assert result["new_records"] == 5
+        db.close()
+
+    def test_listeners_notified_only_on_changes(self, session_factory, ticker_id):
+        calls = []
+        listener = lambda tid, interval: calls.append((tid, interval))
+        add_bars_listener(listener)
+        add_bars_listener(listener)
+        try:
+            db = session_factory()
+            ensure_unique_bar_index(db)
+            upsert_bars(db, ticker_id, "1min", make_bars(5))
+            upsert_bars(db, ticker_id, "1min", make_bars(5))
+            db.close()
+        finally:
+            remove_bars_listener(listener)
+        assert calls == [(ticker_id, "1min")]
+
+
+class TestIntervalStats:
+    def test_upsert_maintains_stats(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        upsert_bars(db, ticker_id, "1min", make_bars(5))
+        upsert_bars(db, ticker_id, "1min", make_bars(10, start="2024-01-02 09:03", close=101.0))
+        stats = get_series_stats(db, ticker_id, "1min")
+        assert stats["count"] == 13
+        assert stats["first"] == pd.Timestamp("2024-01-02 09:00")
+        assert stats["last"] == pd.Timestamp("2024-01-02 09:12")
+        assert get_series_stats(db, ticker_id, "5min") is None
+        db.close()
+
+    def test_refresh_after_delete_and_backfill(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        upsert_bars(db, ticker_id, "1min", make_bars(5))
+        db.query(HistoricalData).filter(HistoricalData.timestamp < pd.Timestamp("2024-01-02 09:02")).delete()
+        refresh_interval_stats(db, ticker_id)
+        db.commit()
+        stats = get_series_stats(db, ticker_id, "1min")
+        assert (stats["count"], stats["first"]) == (3, pd.Timestamp("2024-01-02 09:02"))
+
+        db.execute(text("DELETE FROM ticker_interval_stats"))
+        db.commit()
+        assert ensure_interval_stats(db) is True
+        assert ensure_interval_stats(db) is False
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 3
+        db.close()
+
+    def test_stats_table_created_on_first_write(self, session_factory, ticker_id):
+        # Database created before ticker_interval_stats, written by a worker (no init_db)
+        db = session_factory()
+        upsert_bars(db, ticker_id, "1min", make_bars(5))
+        db.execute(text("DROP TABLE ticker_interval_stats"))
+        db.commit()
+        db.close()
+
+        db = session_factory()
+        upsert_bars(db, ticker_id, "1min", make_bars(3, start="2024-01-02 10:00"))
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 8
+        merge_price(db, ticker_id, "1min", pd.Timestamp("2024-01-02 11:00").to_pydatetime(), 100.0)
+        db.commit()
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 9
+        db.close()
+
+
+class TestUniqueBarIndex:
+    def test_migration_removes_duplicates_and_builds_index(self, session_factory, ticker_id):
+        db = session_factory()
+        # Layout of databases created before the model declared the unique index
+        db.execute(text(f"DROP INDEX {UNIQUE_BAR_INDEX}"))
+        db.execute(text("CREATE INDEX idx_ticker_interval_timestamp ON historical_data (ticker_id, interval, timestamp)"))
+        for close in (100.0, 101.0, 102.0):
+            db.add(HistoricalData(ticker_id=ticker_id, interval="1min", timestamp=pd.Timestamp("2024-01-02 09:00"),
+                                  open=close, high=close, low=close, close=close, volume=1))
+        db.add(HistoricalData(ticker_id=ticker_id, interval="1min", timestamp=pd.Timestamp("2024-01-02 09:01"),
+                              open=1, high=1, low=1, close=1, volume=1))
+        db.commit()
+        refresh_interval_stats(db)
+        db.commit()
+
+        assert migrate_unique_bar_index(db) == {"duplicates_removed": 2, "index_created": 1}
+        assert migrate_unique_bar_index(db) == {"duplicates_removed": 0, "index_created": 0}
+
+        closes = [row.close for row in db.query(HistoricalData).order_by(HistoricalData.timestamp)]
+        assert closes == [102.0, 1.0]
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 2
+        names = {row[0] for row in db.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        assert UNIQUE_BAR_INDEX in names
+        assert "idx_ticker_interval_timestamp" not in names
+        db.close()
+
+    def test_keep_existing_inserts_only_new_bars(self, session_factory, ticker_id):
+        db = session_factory()
+        upsert_bars(db, ticker_id, "1min", make_bars(5))
+
+        result = upsert_bars(db, ticker_id, "1min", make_bars(8, close=50.0), keep_existing=True)
+
+        assert (result["new_records"], result["updated_records"], result["skipped_records"]) == (3, 0, 5)
+        closes = [row.close for row in db.query(HistoricalData).order_by(HistoricalData.timestamp)]
+        assert closes == [100.0] * 5 + [50.0] * 3
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 8
+        db.close()
+
+    def test_merge_price(self, session_factory, ticker_id):
+        db = session_factory()
+        minute = pd.Timestamp("2024-01-02 09:00").to_pydatetime()
+
+        assert merge_price(db, ticker_id, "1min", minute, 10.0) is True
+        assert merge_price(db, ticker_id, "1min", minute, 12.0) is False
+        assert merge_price(db, ticker_id, "1min", minute, 9.0) is False
+        db.commit()
+
+        bar = db.query(HistoricalData).one()
+        assert (bar.timestamp, bar.open, bar.high, bar.low, bar.close) == (minute, 10.0, 12.0, 9.0, 9.0)
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 1
+        db.close()
+
+    def test_merge_bar(self, session_factory, ticker_id):
+        db = session_factory()
+        minute = pd.Timestamp("2024-01-02 09:00").to_pydatetime()
+        first = {"timestamp": minute, "open": 10.0, "high": 11.0, "low": 9.5, "close": 10.5, "volume": 100}
+        late = {"timestamp": minute, "open": 10.4, "high": 12.0, "low": 10.0, "close": 11.5, "volume": 40}
+
+        assert merge_bar(db, ticker_id, "1min", first) is True
+        assert merge_bar(db, ticker_id, "1min", late) is False
+        db.commit()
+
+        bar = db.query(HistoricalData).one()
+        assert (bar.open, bar.high, bar.low, bar.close, bar.volume) == (10.0, 12.0, 9.5, 11.5, 140)
+        assert get_series_stats(db, ticker_id, "1min")["count"] == 1
+        db.close()
+
+
+class TestSaveToDatabaseBulk:
+    def test_bulk_and_row_paths_agree(self, session_factory):
+        from backend.ibkr_collector import IBKRCollector
+
+        with patch("backend.ibkr_collector.IB"):
+            collector = IBKRCollector()
+
+        with patch("backend.ibkr_collector.SessionLocal", session_factory):
+            bulk = collector.save_to_database("AIR", make_bars(50), "1min")
+            changed = make_bars(50)
+            changed.loc[0, "close"] = 99.0
+            rows = collector.save_to_database("AIR", changed, "1min", bulk=False)
+
+        assert bulk["success"] is True
+        assert bulk["new_records"] == 50
+        assert rows["success"] is True
+        assert rows["new_records"] == 0
+        assert rows["updated_records"] == 1
+        assert rows["skipped_records"] == 49
+
+
+class TestLoadBarsFrame:
+    def test_matches_orm_rows(self, session_factory, ticker_id):
+        db = session_factory()
+        for row in make_bars(5).itertuples(index=False):
+            db.add(HistoricalData(ticker_id=ticker_id, interval="1min", timestamp=row.timestamp.to_pydatetime(),
+                                  open=row.open, high=row.high, low=row.low, close=row.close, volume=row.volume))
+        db.commit()
+
+        df = load_bars_frame(db, ticker_id)
+        orm_rows = db.query(HistoricalData).order_by(HistoricalData.timestamp).all()
+
+        assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume"]
+        assert df["timestamp"].tolist() == [r.timestamp for r in orm_rows]
+        assert df["close"].dtype == "float64"
+        assert df["volume"].dtype == "int64"
+        db.close()
+
+    def test_filters_limit_and_projection(self, session_factory, ticker_id):
+        db = session_factory()
+        ensure_unique_bar_index(db)
+        bars = make_bars(10)
+        bars["close"] = range(10)
+        upsert_bars(db, ticker_id, "1min", bars)
+        upsert_bars(db, ticker_id, "5min", make_bars(3))
+
+        ranged = load_bars_frame(db, ticker_id, interval="1min",
+                                 start="2024-01-02 09:02", end=pd.Timestamp("2024-01-02 09:04"))
+        assert ranged["close"].tolist() == [2.0, 3.0, 4.0]
+
+        latest = load_bars_frame(db, ticker_id, interval="1min", columns=["close"], limit=3, index=True)
+        assert list(latest.columns) == ["close"]
+        assert latest["close"].tolist() == [7.0, 8.0, 9.0]
+        assert latest.index[-1] == pd.Timestamp("2024-01-02 09:09")
+
+        assert len(load_bars_frame(db, ticker_id)) == 13
+        db.close()
+
+    def test_empty_and_unknown_column(self, session_factory, ticker_id):
+        db = session_factory()
+        df = load_bars_frame(db, ticker_id, columns=["close"])
+        assert df.empty
+        assert list(df.columns) == ["timestamp", "close"]
+
+        with pytest.raises(ValueError):
+            load_bars_frame(db, ticker_id, columns=["close; DROP TABLE tickers"])
+        db.close()
@@ -0,0 +1,132 @@
+"""
+Tests for backend/data_coverage.py - gap detection on historical_data
+"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker
+from backend.data_access import (
+    ensure_unique_bar_index, notify_bars_changed, refresh_interval_stats, series_version, upsert_bars
+)
+from backend.data_coverage import CoverageIndex, coverage_index
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Ticker(symbol="TTE", name="TotalEnergies", exchange="Euronext Paris"))
+    session.commit()
+    ensure_unique_bar_index(session)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def session_bars(day, start="09:00", end="17:29"):
+    timestamps = pd.date_range(f"{day} {start}", f"{day} {end}", freq="1min")
+    return pd.DataFrame({"timestamp": timestamps, "open": 1.0, "high": 1.0, "low": 1.0,
+                         "close": 1.0, "volume": 1})
+
+
+class TestCoverageIndex:
+    def test_full_sessions_are_complete(self, db):
+        for day in ["2024-01-04", "2024-01-05", "2024-01-08"]:
+            upsert_bars(db, 1, "1min", session_bars(day))
+
+        coverage = CoverageIndex().coverage(db, 1, "1min", datetime(2024, 1, 4, 9), datetime(2024, 1, 8, 17, 29))
+        assert coverage["is_complete"]
+        assert coverage["total_records"] == 3 * 510
+
+    def test_internal_gaps_found(self, db):
+        upsert_bars(db, 1, "1min", session_bars("2024-01-03"))
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", end="11:59"))
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", start="14:00"))
+        upsert_bars(db, 1, "1min", session_bars("2024-01-08"))
+
+        coverage = CoverageIndex().coverage(db, 1, "1min", datetime(2024, 1, 3, 9), datetime(2024, 1, 8, 17, 29))
+        assert coverage["missing_ranges"] == [
+            {"start": datetime(2024, 1, 4, 12, 0), "end": datetime(2024, 1, 4, 14, 0)},
+            {"start": datetime(2024, 1, 5, 9, 0), "end": datetime(2024, 1, 5, 17, 30)},
+        ]
+
+    def test_head_and_tail(self, db):
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", start="10:00", end="16:00"))
+
+        coverage = CoverageIndex().coverage(db, 1, "1min", datetime(2024, 1, 4, 9), datetime(2024, 1, 4, 17, 29))
+        assert coverage["missing_ranges"] == [
+            {"start": datetime(2024, 1, 4, 9, 0), "end": datetime(2024, 1, 4, 10, 0)},
+            {"start": datetime(2024, 1, 4, 16, 1), "end": datetime(2024, 1, 4, 17, 30)},
+        ]
+
+    def test_no_data(self, db):
+        coverage = CoverageIndex().coverage(db, 1, "1day", datetime(2024, 1, 6), datetime(2024, 1, 7))
+        assert not coverage["has_data"]
+        assert coverage["is_complete"]  # week-end only
+
+    def test_incremental_update_on_save(self, db):
+        index = CoverageIndex()
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", end="11:59"))
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", start="14:00"))
+        assert len(index.get(db, 1, "1min")["gaps"]) == 1
+
+        fill = session_bars("2024-01-04", start="12:00", end="13:59")
+        stamp = series_version(db, 1, "1min")
+        upsert_bars(db, 1, "1min", fill)
+        index.record_saved(db, 1, "1min", fill["timestamp"].min(), fill["timestamp"].max(), stamp_before=stamp)
+
+        index._build = None  # patched entry must be trusted without a rebuild
+        assert index.get(db, 1, "1min")["gaps"] == []
+
+    def test_save_after_foreign_write_drops_entry(self, db):
+        index = CoverageIndex()
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04"))
+        index.get(db, 1, "1min")
+
+        upsert_bars(db, 1, "1min", session_bars("2024-01-05"))  # not reported to the index
+        stamp = series_version(db, 1, "1min")
+        upsert_bars(db, 1, "1min", session_bars("2024-01-08"))
+        index.record_saved(db, 1, "1min", datetime(2024, 1, 8, 9), datetime(2024, 1, 8, 17, 29), stamp_before=stamp)
+
+        assert (1, "1min") not in index._entries
+
+    def test_write_from_another_path_is_detected(self, db):
+        index = CoverageIndex()
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", end="11:59"))
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", start="14:00"))
+        assert len(index.get(db, 1, "1min")["gaps"]) == 1
+
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04", start="12:00", end="13:59"))
+
+        assert index.get(db, 1, "1min")["gaps"] == []
+
+    def test_deletion_is_detected(self, db):
+        index = CoverageIndex()
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04"))
+        assert index.get(db, 1, "1min")["gaps"] == []
+
+        db.execute(text("DELETE FROM historical_data WHERE timestamp BETWEEN "
+                        "'2024-01-04 12:00:00.000000' AND '2024-01-04 12:59:00.000000'"))
+        refresh_interval_stats(db, 1, "1min")
+        db.commit()
+
+        coverage = index.coverage(db, 1, "1min", datetime(2024, 1, 4, 9), datetime(2024, 1, 4, 17, 29))
+        assert coverage["missing_ranges"] == [
+            {"start": datetime(2024, 1, 4, 12, 0), "end": datetime(2024, 1, 4, 13, 0)},
+        ]
+
+    def test_bars_listener_marks_entries_stale(self, db):
+        upsert_bars(db, 1, "1min", session_bars("2024-01-04"))
+        coverage_index.get(db, 1, "1min")
+        try:
+            notify_bars_changed(1, "1min")
+            assert coverage_index._entries[(1, "1min")]["stale"]
+        finally:
+            coverage_index.invalidate()
+            coverage_index._entries.clear()
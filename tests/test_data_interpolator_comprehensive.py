@@ -5,7 +5,11 @@ import pytest
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
+from unittest.mock import patch
 from pandas.testing import assert_frame_equal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from backend.data_interpolator import DataInterpolator
 
@@ -417,3 +421,79 @@ class TestDataInterpolatorIntegration:
         
         for source, target in defined_conversions:
             assert DataInterpolator.can_interpolate(source, target) is True
+
+
+class TestDataInterpolatorVectorized:
+    """Test the NumPy implementation and the chunked save"""
+    
+    @staticmethod
+    def make_df(n=50):
+        rng = np.random.default_rng(1)
+        close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+        return pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-02 09:00', periods=n, freq='1min'),
+            'open': close - 0.1,
+            'high': close + 0.3,
+            'low': close - 0.3,
+            'close': close,
+            'volume': rng.integers(100, 1000, n),
+        })
+    
+    def test_linear_values(self):
+        df = self.make_df(3)
+        result = DataInterpolator.interpolate_data(df, '1min', '30s', 'linear')
+        
+        assert len(result) == 5
+        assert list(result['timestamp']) == list(pd.date_range('2024-01-02 09:00', periods=5, freq='30s'))
+        assert result['close'].iloc[1] == pytest.approx((df['close'].iloc[0] + df['close'].iloc[1]) / 2)
+        assert result['volume'].iloc[1] == df['volume'].iloc[0] // 2
+        assert result.iloc[-1]['close'] == df['close'].iloc[-1]
+    
+    def test_ohlc_bars_are_consistent_and_seeded(self):
+        df = self.make_df()
+        result = DataInterpolator.interpolate_data(df, '1min', '5s', 'ohlc', seed=7)
+        
+        assert (result['high'] >= result[['open', 'close']].max(axis=1)).all()
+        assert (result['low'] <= result[['open', 'close']].min(axis=1)).all()
+        assert_frame_equal(result, DataInterpolator.interpolate_data(df, '1min', '5s', 'ohlc', seed=7))
+    
+    def test_chunks_match_full_result(self):
+        df = self.make_df()
+        full = DataInterpolator.interpolate_data(df, '1min', '5s', 'cubic')
+        chunks = list(DataInterpolator.iter_interpolated(df, '1min', '5s', 'cubic', chunk_rows=100))
+        
+        assert len(chunks) > 2
+        assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+    
+    def test_interpolate_and_save_streams_without_overwriting(self):
+        from backend.models import Base, Ticker, HistoricalData
+        
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        ticker = Ticker(symbol='TTE', name='TotalEnergies', exchange='Euronext Paris')
+        db.add(ticker)
+        db.commit()
+        for row in self.make_df(10).itertuples(index=False):
+            db.add(HistoricalData(ticker_id=ticker.id, interval='1min', timestamp=row.timestamp.to_pydatetime(),
+                                  open=row.open, high=row.high, low=row.low, close=row.close, volume=int(row.volume)))
+        # Already present at the target interval: must be kept as is
+        db.add(HistoricalData(ticker_id=ticker.id, interval='30s', timestamp=datetime(2024, 1, 2, 9, 0, 30),
+                              open=1, high=1, low=1, close=1, volume=1))
+        db.commit()
+        
+        with patch('backend.data_interpolator.SessionLocal', factory), \
+                patch('backend.data_interpolator.OUTPUT_CHUNK_ROWS', 4):
+            result = DataInterpolator.interpolate_and_save('TTE', '1min', '30s', 'linear')
+        
+        assert result['success'] is True
+        assert result['generated_records'] == 19
+        assert result['new_records'] == 18
+        assert result['duplicates'] == 1
+        kept = db.query(HistoricalData).filter(HistoricalData.interval == '30s',
+                                               HistoricalData.timestamp == datetime(2024, 1, 2, 9, 0, 30)).one()
+        assert kept.close == 1
+        assert db.query(HistoricalData).filter(HistoricalData.interval == '30s').count() == 19
+        db.close()
+        engine.dispose()
@@ -0,0 +1,81 @@
+"""
+Tests for backend/downsampling.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.downsampling import (
+    aggregate_ohlc, downsample, lttb_indices, minmax_indices, target_points, take, MIN_POINTS
+)
+
+
+def bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    index = pd.date_range("2024-03-04 09:00", periods=n, freq="5s", name="timestamp")
+    return pd.DataFrame({
+        "open": close - 0.01,
+        "high": close + rng.uniform(0, 0.2, n),
+        "low": close - rng.uniform(0, 0.2, n),
+        "close": close,
+        "volume": rng.integers(1, 100, n),
+    }, index=index)
+
+
+class TestDownsampling:
+    def test_ohlc_keeps_extremes_and_volume(self):
+        df = bars(50_000)
+        df.iloc[1234, df.columns.get_loc("high")] = 500.0
+        df.iloc[4321, df.columns.get_loc("low")] = 1.0
+
+        reduced = downsample(df, 800)
+
+        assert len(reduced) == 800
+        assert reduced["high"].max() == 500.0
+        assert reduced["low"].min() == 1.0
+        assert reduced["volume"].sum() == df["volume"].sum()
+        assert reduced["open"].iloc[0] == df["open"].iloc[0]
+        assert reduced["close"].iloc[-1] == df["close"].iloc[-1]
+        assert reduced.index.is_monotonic_increasing
+
+    def test_visible_range_gives_more_detail(self):
+        df = bars(50_000)
+        start, end = df.index[1000], df.index[1499]
+
+        zoomed = downsample(df, 800, start=start, end=end)
+
+        # 500 visible bars fit in 800 pixels: returned untouched
+        assert len(zoomed) == 500
+        pd.testing.assert_frame_equal(zoomed, df.loc[start:end])
+
+    def test_lttb_keeps_ends_and_peak(self):
+        x = np.arange(10_000)
+        y = np.sin(x / 500.0)
+        y[7777] = 50.0
+
+        kept = lttb_indices(x, y, 300)
+
+        assert len(kept) == 300
+        assert kept[0] == 0 and kept[-1] == len(x) - 1
+        assert np.all(np.diff(kept) > 0)
+        assert 7777 in kept
+        assert list(lttb_indices(x[:10], y[:10], 300)) == list(range(10))
+
+    def test_minmax_indices(self):
+        assert list(minmax_indices([1, 5, 2, 8, 3, 0, 4, 4], 2)) == [0, 3, 5, 6, 7]
+        values = np.r_[[np.nan] * 4, [1.0, 2.0, 3.0, 4.0]]
+        assert list(minmax_indices(values, 2)) == [0, 4, 7]
+
+    def test_lines_follow_rows_and_helpers(self):
+        df = bars(5_000).reset_index()
+        reduced = downsample(df, 300, method="lttb")
+        assert len(reduced) == 300
+        assert set(reduced["timestamp"]) <= set(df["timestamp"])
+
+        assert target_points(10) == MIN_POINTS
+        assert aggregate_ohlc(df, 10_000) is df
+        assert take(None, np.array([0])) is None
+        assert take([10, 20, 30], np.array([0, 2])) == [10, 30]
+        with pytest.raises(ValueError):
+            downsample(df, 300, method="median")
@@ -0,0 +1,185 @@
+"""
+Tests for backend/ibkr_pacing.py - paced concurrent historical requests
+"""
+import asyncio
+import selectors
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from backend.fake_ib import FakeIB, FakeContract
+from backend.ibkr_collector import IBKRCollector
+from backend.ibkr_pacing import PacingScheduler, collect_many, plan_chunks
+
+
+SCALE = 0.001
+
+
+@pytest.fixture(autouse=True)
+def event_loop_fresh():
+    # Other suites may leave a closed loop installed (nest_asyncio reuses it)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class _AdvancingSelector(selectors.SelectSelector):
+    """Instead of waiting for the next timer, move the loop's clock to it"""
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("virtual time loop has nothing left to wait for")
+        self._loop.now += timeout
+        return []
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop on a simulated clock: sleeps take no wall time, ordering stays exact"""
+
+    def __init__(self):
+        self.now = 0.0
+        super().__init__(selector=_AdvancingSelector(self))
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def virtual_loop(event_loop_fresh):
+    loop = VirtualTimeLoop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(event_loop_fresh)
+
+
+def scaled_scheduler(**kwargs):
+    return PacingScheduler(
+        window_seconds=600 * SCALE,
+        contract_window_seconds=2 * SCALE,
+        identical_seconds=15 * SCALE,
+        **kwargs
+    )
+
+
+class TestPacingScheduler:
+    def test_global_window(self):
+        scheduler = PacingScheduler(max_requests=3, window_seconds=10)
+        for i in range(3):
+            assert scheduler.delay_for(f"c{i}", (i,), now=1.0 + i) == 0
+            scheduler.record(f"c{i}", (i,), now=1.0 + i)
+        # 4th request must wait until the first one leaves the window
+        assert scheduler.delay_for("c9", (9,), now=4.0) == pytest.approx(7.0)
+        assert scheduler.delay_for("c9", (9,), now=11.0) == 0
+
+    def test_per_contract_window(self):
+        scheduler = PacingScheduler(contract_max_requests=2, contract_window_seconds=2)
+        scheduler.record("TTE", ("TTE", 1), now=0.0)
+        scheduler.record("TTE", ("TTE", 2), now=0.5)
+        assert scheduler.delay_for("TTE", ("TTE", 3), now=1.0) == pytest.approx(1.0)
+        # Other contracts are not held back
+        assert scheduler.delay_for("WLN", ("WLN", 1), now=1.0) == 0
+
+    def test_identical_request(self):
+        scheduler = PacingScheduler(identical_seconds=15)
+        scheduler.record("TTE", ("TTE", "1 D"), now=0.0)
+        assert scheduler.delay_for("TTE", ("TTE", "1 D"), now=5.0) == pytest.approx(10.0)
+        assert scheduler.delay_for("TTE", ("TTE", "2 D"), now=5.0) == 0
+
+    def test_non_strict_ignores_hard_limits(self):
+        scheduler = PacingScheduler(max_requests=1, window_seconds=600)
+        scheduler.record("TTE", ("TTE", 1), now=0.0, strict=False)
+        assert scheduler.delay_for("WLN", ("WLN", 1), now=1.0, strict=False) == 0
+        # Identical requests are spaced regardless of the bar size
+        assert scheduler.delay_for("TTE", ("TTE", 1), now=1.0, strict=False) > 0
+
+
+class TestPlanChunks:
+    def test_chunks_cover_request(self):
+        chunks = plan_chunks(datetime(2024, 3, 1), 16, 7)
+        assert [duration for _, duration in chunks] == ["7 D", "7 D", "2 D"]
+        assert chunks[0][0] == datetime(2024, 3, 1)
+        assert chunks[1][0] == datetime(2024, 2, 23)
+
+
+class TestCollectMany:
+    def _jobs(self, ib, n_tickers, bar_size, days, chunk_days):
+        contracts = ib.qualifyContracts(*[FakeContract(f"T{i}") for i in range(n_tickers)])
+        end = datetime(2024, 3, 1, 18, 0)
+        return [{'symbol': c.symbol, 'contract': c, 'bar_size': bar_size,
+                 'chunks': plan_chunks(end, days, chunk_days)} for c in contracts]
+
+    def test_small_bars_respect_pacing(self, virtual_loop):
+        # Real IBKR windows on a simulated clock shared by scheduler and server
+        ib = FakeIB(latency=2.0, max_bars=20, clock=virtual_loop.time)
+        jobs = self._jobs(ib, 10, '5 secs', 20, 2)  # 100 requests > 60 per window
+        done = []
+
+        results = run(collect_many(ib, jobs, PacingScheduler(clock=virtual_loop.time),
+                                   on_symbol_done=lambda s, df: done.append(s)))
+
+        assert ib.violations == []
+        assert len(ib.requests) == 100
+        assert ib.max_in_flight > 1
+        assert virtual_loop.time() >= 600  # the last 40 requests waited for the window
+        assert sorted(done) == sorted(results)
+        assert all(len(df) > 0 for df in results.values())
+
+    def test_chunks_are_merged_sorted(self, virtual_loop):
+        ib = FakeIB(latency=1.0, clock=virtual_loop.time)
+        jobs = self._jobs(ib, 2, '1 hour', 60, 30)
+
+        results = run(collect_many(ib, jobs, PacingScheduler(clock=virtual_loop.time)))
+
+        for df in results.values():
+            assert df['timestamp'].is_monotonic_increasing
+            assert not df['timestamp'].duplicated().any()
+
+    def test_failed_chunk_does_not_abort_others(self):
+        ib = FakeIB(latency=0.0)
+        jobs = self._jobs(ib, 2, '1 hour', 30, 30)
+        original = ib.reqHistoricalDataAsync
+
+        async def flaky(contract, *args, **kwargs):
+            if contract.symbol == 'T0':
+                raise TimeoutError("no answer")
+            return await original(contract, *args, **kwargs)
+
+        ib.reqHistoricalDataAsync = flaky
+        results = run(collect_many(ib, jobs, scaled_scheduler()))
+
+        assert results['T0'].empty
+        assert not results['T1'].empty
+
+
+class TestCollectorMultipleTickers:
+    def test_collect_multiple_tickers_saves_each_symbol(self):
+        collector = IBKRCollector(client_id=999)
+        collector.ib = FakeIB(latency=0.5, time_scale=SCALE, max_bars=10)
+        collector.connected = True
+        saved = {}
+
+        def fake_save(symbol, df, interval):
+            saved[symbol] = (len(df), interval)
+            return {'success': True, 'records_saved': len(df)}
+
+        with patch.object(collector, 'get_contract', side_effect=lambda s: FakeContract(s, conId=hash(s) % 10000 + 1)), \
+             patch.object(collector, 'save_to_database', side_effect=fake_save), \
+             patch('backend.ibkr_pacing._scheduler', scaled_scheduler()):
+            results = collector.collect_multiple_tickers(['TTE', 'WLN'], duration='2 W', interval='1min')
+
+        assert set(results) == {'TTE', 'WLN'}
+        assert all(r['success'] for r in results.values())
+        assert saved['TTE'][1] == '1min'
+        assert len(collector.ib.requests) == 4  # 14 days in 7-day chunks, 2 tickers
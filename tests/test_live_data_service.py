@@ -0,0 +1,214 @@
+"""
+Tests for backend/live_data_service.py (multiplexed live data over one connection)
+"""
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker
+from backend.data_access import load_bars_frame
+from backend.fake_ib import ReplayIB
+from backend.live_data_service import LiveDataService, STREAMING, TICKS_ONLY, PENDING
+from backend.price_bus import PriceBus
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def no_cached_contracts():
+    with patch("backend.live_data_service.contract_cache.cached_contract", return_value=None):
+        yield
+
+
+def replay_frame(symbols=("TTE", "WLN", "AIR"), periods=24):
+    frames = []
+    for n, symbol in enumerate(symbols):
+        closes = [10.0 * (n + 1) + i * 0.01 for i in range(periods)]
+        frames.append(pd.DataFrame({
+            "symbol": symbol,
+            "timestamp": pd.date_range("2024-03-04 10:00:00", periods=periods, freq="5s"),
+            "open": closes, "high": [c + 0.02 for c in closes], "low": [c - 0.02 for c in closes],
+            "close": closes, "volume": 100,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_service(ib, **kwargs):
+    """Service driven synchronously: no thread, IB set by hand"""
+    service = LiveDataService(bus=PriceBus(), write_bars=False, **kwargs)
+    service.ib = ib
+    ib.errorEvent += service._on_error
+    return service
+
+
+class TestSubscriptions:
+    def test_many_symbols_share_one_connection(self):
+        ib = ReplayIB(replay_frame())
+        service = make_service(ib)
+        received = []
+        service.bus.subscribe(received.append)
+
+        service.subscribe(["TTE", "WLN", "AIR"])
+        service._reconcile()
+        ib.sleep(1)
+
+        assert service.status() == {"TTE": STREAMING, "WLN": STREAMING, "AIR": STREAMING}
+        for symbol in ("TTE", "WLN", "AIR"):
+            events = [e for e in received if e["symbol"] == symbol]
+            assert sum(e["kind"] == "bar" for e in events) == 24
+            assert sum(e["kind"] == "tick" for e in events) == 24
+        tick = service.latest("wln")
+        assert tick["last"] == pytest.approx(20.23)
+        assert tick["timestamp"] == datetime(2024, 3, 4, 10, 1, 55)
+        assert tick["updates"] == 24
+        assert list(service.snapshot()["symbol"]) == ["TTE", "WLN", "AIR"]
+
+    def test_line_cap_queues_symbols_until_a_line_is_released(self):
+        ib = ReplayIB(replay_frame())
+        service = make_service(ib, max_lines=2)
+
+        service.subscribe(["TTE", "WLN", "AIR"])
+        service._reconcile()
+        assert service.status() == {"TTE": STREAMING, "WLN": STREAMING, "AIR": PENDING}
+        assert set(ib._tickers) == {"TTE", "WLN"}
+
+        service.unsubscribe("TTE")
+        service._reconcile()
+        assert service.status() == {"WLN": STREAMING, "AIR": STREAMING}
+        assert set(ib._tickers) == {"WLN", "AIR"}
+        assert ib._bar_subscriptions["TTE"] == []
+
+    def test_realtime_bar_cap_falls_back_to_ticks(self):
+        ib = ReplayIB(replay_frame())
+        service = make_service(ib, max_realtime_bars=1)
+        received = []
+        service.bus.subscribe(received.append)
+
+        service.subscribe(["TTE", "WLN"])
+        service._reconcile()
+        ib.sleep(1)
+
+        assert service.status() == {"TTE": STREAMING, "WLN": TICKS_ONLY}
+        assert not any(e["symbol"] == "WLN" and e["kind"] == "bar" for e in received)
+        assert service.latest("WLN")["updates"] == 24
+
+    def test_subscription_kept_while_another_owner_watches(self):
+        ib = ReplayIB(replay_frame())
+        service = make_service(ib)
+
+        service.subscribe("TTE", owner="page")
+        service.subscribe(["TTE", "WLN"], owner="task")
+        service._reconcile()
+        service.unsubscribe(owner="task")
+        service._reconcile()
+
+        assert service.status() == {"TTE": STREAMING}
+        assert set(ib._tickers) == {"TTE"}
+
+    def test_refused_lines_lower_the_cap(self):
+        ib = ReplayIB(replay_frame(), max_tickers=2)
+        service = make_service(ib, max_lines=10)
+
+        service.subscribe(["TTE", "WLN", "AIR"])
+        service._reconcile()  # AIR refused with error 101
+        service._reconcile()
+
+        assert service.max_lines == 2
+        assert service.status() == {"TTE": STREAMING, "WLN": STREAMING, "AIR": PENDING}
+
+
+class TestServiceThread:
+    def test_streams_all_symbols_to_bus_and_database(self, session_factory):
+        ib = ReplayIB(replay_frame(periods=36))
+        service = LiveDataService(bus=PriceBus(), ib_factory=lambda: ib, session_factory=session_factory,
+                                  poll_interval=0.05)
+        service.subscribe(["TTE", "WLN", "AIR"])
+
+        assert service.start()
+        assert service.wait_connected(timeout=5)
+        deadline = time.time() + 10
+        while not ib.finished and time.time() < deadline:
+            time.sleep(0.05)
+        service.stop()
+
+        assert ib.finished
+        assert ib.connections == 1
+        assert ib._tickers == {}  # cancelled on stop
+        db = session_factory()
+        for symbol in ("TTE", "WLN", "AIR"):
+            ticker = db.query(Ticker).filter(Ticker.symbol == symbol).one()
+            bars = load_bars_frame(db, ticker.id, interval="1min")
+            assert len(bars) == 3
+            assert bars["volume"].tolist() == [1200, 1200, 1200]
+        db.close()
+
+
+class FlakyIB(ReplayIB):
+    """ReplayIB whose connection is refused, or drops after a number of event-loop runs"""
+
+    def __init__(self, *args, refuse=False, drop_after=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refuse = refuse
+        self.drop_after = drop_after
+        self.up = False
+        self.sleeps = 0
+
+    def connect(self, *args, **kwargs):
+        if self.refuse:
+            raise ConnectionRefusedError("TWS not running")
+        self.up = True
+        return super().connect(*args, **kwargs)
+
+    def isConnected(self) -> bool:
+        return self.up
+
+    def sleep(self, seconds: float = 0):
+        super().sleep(seconds)
+        self.sleeps += 1
+        if self.drop_after is not None and self.sleeps >= self.drop_after:
+            self.up = False
+
+
+class TestReconnection:
+    def test_failed_and_dropped_connections_are_retried(self):
+        ibs = [FlakyIB(replay_frame(), refuse=True), FlakyIB(replay_frame(), drop_after=3),
+               FlakyIB(replay_frame(periods=2000))]
+        service = LiveDataService(bus=PriceBus(), ib_factory=iter(ibs).__next__, write_bars=False,
+                                  poll_interval=0.01, reconnect_delay=0.01)
+        service.subscribe(["TTE", "WLN", "AIR"])
+
+        service.start()
+        deadline = time.time() + 5
+        while set(ibs[2]._tickers) != {"TTE", "WLN", "AIR"} and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert set(ibs[1]._tickers) == {"TTE", "WLN", "AIR"}  # subscribed before the drop
+        assert set(ibs[2]._tickers) == {"TTE", "WLN", "AIR"}  # restored on the new connection
+        assert service.reconnects == 2
+        assert service.wait_connected(timeout=1)
+        assert service.last_error is None
+        service.stop()
+        assert ibs[2]._tickers == {}
+
+    def test_connection_failure_is_reported(self):
+        service = LiveDataService(bus=PriceBus(), ib_factory=lambda: FlakyIB(replay_frame(), refuse=True),
+                                  write_bars=False, reconnect_delay=0.01, max_reconnect_delay=0.05)
+
+        service.start()
+        assert not service.wait_connected(timeout=0.3)
+        assert "TWS not running" in service.last_error
+        assert service.running and service.reconnects > 0
+        service.stop()
+        assert not service.thread.is_alive()
@@ -4,7 +4,7 @@ Tests Celery task execution and live data streaming
 Target: 40%+ coverage
 """
 import pytest
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import MagicMock, patch
 from datetime import datetime
 
 
@@ -69,16 +69,15 @@ class TestStreamLiveDataContinuous:
         except Exception as e:
             pytest.skip(f"Cannot check parameters: {e}")
     
-    @patch('backend.live_data_task.IBKRCollector')
-    def test_task_handles_connection_failure(self, mock_collector_class):
+    @patch('backend.live_data_task.live_data_service')
+    def test_task_handles_connection_failure(self, mock_service):
         """Test task handles connection failure gracefully"""
         try:
             from backend.live_data_task import stream_live_data_continuous
             
-            # Mock collector that fails to connect
-            mock_collector = Mock()
-            mock_collector.connect.return_value = False
-            mock_collector_class.return_value = mock_collector
+            # Shared service that fails to connect
+            mock_service.running = False
+            mock_service.wait_connected.return_value = False
             
             # We can't easily call the task, so just verify the structure
             assert callable(stream_live_data_continuous)
@@ -327,3 +326,27 @@ class TestLiveDataTaskIntegration:
             assert callable(stream_live_data_continuous)
         except Exception as e:
             pytest.skip(f"Cannot check task callable: {e}")
+
+
+class TestWorkerClientId:
+    """Worker processes use their own live-data clientId"""
+    
+    def test_worker_client_id_differs_from_app(self):
+        from backend.config import IBKR_CONFIG
+        from backend.live_data_task import worker_client_id
+        
+        assert worker_client_id() >= IBKR_CONFIG['worker_live_client_id']
+        assert worker_client_id() not in (IBKR_CONFIG['live_client_id'], IBKR_CONFIG['live_price_client_id'])
+    
+    @patch('backend.live_data_task.live_data_service')
+    def test_task_connects_with_worker_client_id(self, mock_service):
+        from backend.live_data_task import stream_live_data_continuous, worker_client_id
+        
+        mock_service.running = False
+        mock_service.wait_connected.return_value = False
+        
+        result = stream_live_data_continuous.run("TTE", duration=0)
+        
+        assert result['success'] is False
+        assert mock_service.client_id == worker_client_id()
+        mock_service.start.assert_called_once()
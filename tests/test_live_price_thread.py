@@ -81,6 +81,7 @@ class TestLivePriceCollector:
         
         collector = LivePriceCollector()
         collector.symbol = "TTE"
+        collector.mode = "poll"  # 'stream' goes through the live data service
         collector.running = False  # Will stop immediately after first iteration
         
         # Should not raise any exceptions
@@ -90,6 +91,25 @@ class TestLivePriceCollector:
         # Verify connection attempted
         mock_ib_instance.connect.assert_called_once_with('127.0.0.1', 4002, clientId=201)
 
+    @patch('backend.live_price_thread.time.sleep')
+    @patch('backend.live_price_thread.SessionLocal')
+    @patch('backend.live_price_thread.IB')
+    def test_stream_falls_back_to_polling(self, mock_ib_class, mock_session_local, mock_sleep):
+        """Stream mode polls when the live data service cannot connect"""
+        mock_ib_class.return_value.isConnected.return_value = False
+        collector = LivePriceCollector()
+        collector.service = Mock()
+        collector.service.wait_connected.return_value = False
+        collector.service.last_error = "connection failed"
+        collector.symbol = "TTE"
+        collector.running = True
+
+        collector._collect_prices()
+
+        assert collector.mode == "poll"
+        collector.service.subscribe.assert_not_called()
+        mock_ib_class.return_value.connect.assert_called_once_with('127.0.0.1', 4002, clientId=201)
+
     @patch('backend.live_price_thread.SessionLocal')
     @patch('backend.live_price_thread.IB')
     def test_collect_prices_connection_failure(self, mock_ib_class, mock_session_local):
@@ -103,6 +123,7 @@ class TestLivePriceCollector:
         
         collector = LivePriceCollector()
         collector.symbol = "TTE"
+        collector.mode = "poll"
         
         # Should return without processing
         collector._collect_prices()
@@ -110,27 +131,48 @@ class TestLivePriceCollector:
         # Verify disconnect was attempted
         mock_ib_instance.disconnect.assert_called()
 
+    @patch('backend.live_price_thread.ensure_unique_bar_index', return_value=False)
     @patch('backend.live_price_thread.SessionLocal')
-    def test_save_price_to_db_success(self, mock_session_local):
-        """Test saving price to database successfully"""
+    def test_save_price_to_db_success(self, mock_session_local, mock_ensure_index):
+        """Test saving price to database successfully (no unique bar index)"""
         from backend.models import Ticker, HistoricalData
         
         mock_db = Mock()
         mock_session_local.return_value = mock_db
         
-        # Mock ticker query
+        # Mock ticker query, then no existing bar for the current minute
         mock_ticker = Mock(spec=Ticker)
         mock_ticker.id = 1
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_ticker
+        mock_db.query.return_value.filter.return_value.first.side_effect = [mock_ticker, None]
         
         collector = LivePriceCollector()
-        result = collector._save_price_to_db(mock_db, "TTE", 56.15)
+        with patch('backend.live_price_thread.record_bars_added'):
+            result = collector._save_price_to_db(mock_db, "TTE", 56.15)
         
         assert result is True
         # Verify add and commit were called
         mock_db.add.assert_called()
         mock_db.commit.assert_called()
 
+    @patch('backend.live_price_thread.merge_price')
+    @patch('backend.live_price_thread.ensure_unique_bar_index', return_value=True)
+    def test_save_price_to_db_bulk(self, mock_ensure_index, mock_merge_price):
+        """Test saving price through the unique-index upsert"""
+        from backend.models import Ticker
+        
+        mock_db = Mock()
+        mock_ticker = Mock(spec=Ticker)
+        mock_ticker.id = 1
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_ticker
+        
+        collector = LivePriceCollector()
+        result = collector._save_price_to_db(mock_db, "TTE", 56.15)
+        
+        assert result is True
+        mock_merge_price.assert_called_once()
+        mock_db.add.assert_not_called()
+        mock_db.commit.assert_called()
+
     @patch('backend.live_price_thread.SessionLocal')
     def test_save_price_to_db_no_ticker(self, mock_session_local):
         """Test saving price when ticker doesn't exist"""
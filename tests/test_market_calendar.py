@@ -0,0 +1,72 @@
+"""
+Tests for backend/market_calendar.py - Euronext Paris sessions
+"""
+from datetime import date, datetime
+
+from backend.market_calendar import (
+    interval_to_seconds, euronext_holidays, is_trading_day, session_bounds,
+    trading_seconds_between, missing_session_range
+)
+
+
+class TestIntervalToSeconds:
+    def test_database_and_ibkr_formats(self):
+        assert interval_to_seconds("1min") == 60
+        assert interval_to_seconds("5sec") == 5
+        assert interval_to_seconds("1h") == 3600
+        assert interval_to_seconds("1day") == 86400
+        assert interval_to_seconds("5 mins") == 300
+        assert interval_to_seconds("1 hour") == 3600
+        assert interval_to_seconds("1 secs") == 1
+
+    def test_unknown(self):
+        assert interval_to_seconds("tick") is None
+        assert interval_to_seconds("") is None
+
+
+class TestCalendar:
+    def test_holidays_2024(self):
+        holidays = euronext_holidays(2024)
+        assert date(2024, 3, 29) in holidays   # Good Friday
+        assert date(2024, 4, 1) in holidays    # Easter Monday
+        assert date(2024, 5, 1) in holidays
+        assert date(2024, 12, 26) in holidays
+
+    def test_trading_days(self):
+        assert is_trading_day(date(2024, 1, 2))
+        assert not is_trading_day(date(2024, 1, 6))   # Saturday
+        assert not is_trading_day(date(2024, 1, 1))
+
+    def test_early_close(self):
+        assert session_bounds(date(2024, 12, 24))[1] == datetime(2024, 12, 24, 14, 5)
+        assert session_bounds(date(2024, 12, 25)) is None
+
+    def test_trading_seconds_skip_nights_and_weekend(self):
+        # Friday 17:00 -> Monday 09:30 = 30 min Friday + 30 min Monday
+        seconds = trading_seconds_between(datetime(2024, 1, 5, 17, 0), datetime(2024, 1, 8, 9, 30))
+        assert seconds == 3600
+
+
+class TestMissingSessionRange:
+    def test_overnight_is_not_a_gap(self):
+        assert missing_session_range(datetime(2024, 1, 2, 17, 29), datetime(2024, 1, 3, 9, 0), 60) is None
+
+    def test_weekend_and_holiday_daily_bars(self):
+        # Thursday 28 March -> Tuesday 2 April 2024 (Good Friday + Easter Monday)
+        assert missing_session_range(datetime(2024, 3, 28), datetime(2024, 4, 2), 86400) is None
+
+    def test_intraday_hole(self):
+        gap = missing_session_range(datetime(2024, 1, 2, 10, 0), datetime(2024, 1, 2, 11, 0), 60)
+        assert gap == (datetime(2024, 1, 2, 10, 1), datetime(2024, 1, 2, 11, 0))
+
+    def test_hole_clipped_to_sessions(self):
+        gap = missing_session_range(datetime(2024, 1, 2, 17, 0), datetime(2024, 1, 4, 10, 0), 60)
+        assert gap == (datetime(2024, 1, 2, 17, 1), datetime(2024, 1, 4, 10, 0))
+
+    def test_thin_trading_tolerance(self):
+        assert missing_session_range(datetime(2024, 1, 2, 10, 0), datetime(2024, 1, 2, 10, 5), 60,
+                                     min_gap_seconds=900) is None
+
+    def test_missing_daily_bar(self):
+        gap = missing_session_range(datetime(2024, 1, 2), datetime(2024, 1, 5), 86400)
+        assert gap == (datetime(2024, 1, 3), datetime(2024, 1, 4, 23, 59, 59, 999999))
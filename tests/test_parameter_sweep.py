@@ -0,0 +1,110 @@
+"""
+Tests for backend/parameter_sweep.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.backtesting_engine import BacktestingEngine
+from backend.parameter_sweep import (
+    ParameterSweep, IndicatorMatrix, PARAMETER_SPACES, sample_parameters, score_signals
+)
+
+
+def prices_frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    return pd.DataFrame({
+        "open": close, "high": close, "low": close, "close": close, "volume": 1,
+    }, index=pd.date_range("2024-01-02 09:00", periods=n, freq="1min"))
+
+
+class TestSamplers:
+    def test_grid_random_and_lhs(self):
+        space = {"fast_period": (5, 9), "slow_period": (20, 29)}
+        grid = sample_parameters(space, "grid")
+        assert grid.shape == (50, 2)
+        assert len(sample_parameters(space, "grid", n_samples=7, seed=1)) == 7
+
+        random = sample_parameters(space, "random", n_samples=100, seed=1)
+        assert random[:, 0].min() >= 5 and random[:, 0].max() <= 9
+        np.testing.assert_array_equal(random, sample_parameters(space, "random", n_samples=100, seed=1))
+
+        # Latin hypercube: each of the 10 slow periods used exactly once in 10 samples
+        lhs = sample_parameters(space, "lhs", n_samples=10, seed=3)
+        assert sorted(lhs[:, 1]) == list(range(20, 30))
+
+        with pytest.raises(ValueError):
+            sample_parameters(space, "random")
+        with pytest.raises(ValueError):
+            sample_parameters(space, "sobol", n_samples=10)
+
+
+class TestScoring:
+    def test_score_signals_by_hand(self):
+        prices = np.array([10.0, 11.0, 12.0, 9.0, 10.0, 15.0])
+        signals = np.array([
+            [1, 0, -1, 1, 0, 0],   # 10 -> 12, then 9 -> 15 (closed on the last bar)
+            [0, 0, 0, 0, 0, 0],    # no trade
+            [-1, 1, 1, -1, -1, 0], # 11 -> 9
+        ], dtype=np.int8)
+
+        scores = score_signals(signals, prices, commission=0.0)
+
+        np.testing.assert_allclose(scores["total_return"], [(1.2 * 15 / 9 - 1) * 100, 0.0, (9 / 11 - 1) * 100])
+        assert list(scores["total_trades"]) == [2, 0, 1]
+        assert list(scores["winning_trades"]) == [2, 0, 0]
+
+    @pytest.mark.parametrize("strategy_type", ["ma", "rsi", "enhanced"])
+    def test_matches_backtesting_engine(self, strategy_type):
+        df = prices_frame()
+        engine = BacktestingEngine(commission=0.001)
+        sweep = ParameterSweep(df, engine, batch_cells=7 * len(df))
+
+        params = sample_parameters(PARAMETER_SPACES[strategy_type], "random", n_samples=25, seed=4)
+        scores = sweep.evaluate(strategy_type, params)
+
+        for k, values in enumerate(params):
+            result = engine.run(sweep.make_strategy(strategy_type, values), df)
+            assert scores["total_return"][k] == pytest.approx(result.total_return, rel=1e-9, abs=1e-9)
+            assert scores["total_trades"][k] == result.total_trades
+            assert scores["winning_trades"][k] == result.winning_trades
+
+
+class TestParameterSweep:
+    @pytest.mark.parametrize("strategy_type", ["ma", "rsi", "enhanced"])
+    def test_every_searched_parameter_changes_signals(self, strategy_type):
+        df = prices_frame(1000)
+        space = PARAMETER_SPACES[strategy_type]
+        low = [bound[0] for bound in space.values()]
+        base = ParameterSweep.make_strategy(strategy_type, low).generate_signals(df)
+        for k, (_, high) in enumerate(space.values()):
+            values = low[:k] + [high] + low[k + 1:]
+            changed = ParameterSweep.make_strategy(strategy_type, values).generate_signals(df)
+            assert not changed.equals(base)
+
+    def test_run_returns_sorted_scores_and_confirmed_top(self):
+        df = prices_frame()
+        result = ParameterSweep(df).run("ma", "grid", top_k=3, symbol="TTE")
+
+        assert len(result.scores) == 15 * 30
+        assert result.scores["total_return"].is_monotonic_decreasing
+        assert len(result.top) == 3
+        assert result.best_result.symbol == "TTE"
+        assert result.best_result.total_return == max(r.total_return for _, r in result.top)
+
+    def test_indicator_matrix_rows(self):
+        close = prices_frame(200)["close"]
+        matrix = IndicatorMatrix.rolling_mean(close, [20, 5, 20])
+        assert matrix.periods == [5, 20]
+        np.testing.assert_array_equal(matrix.values[matrix.rows(np.array([20]))[0]],
+                                      close.rolling(window=20).mean().to_numpy())
+
+    def test_invalid_arguments(self):
+        sweep = ParameterSweep(prices_frame(100))
+        with pytest.raises(ValueError):
+            sweep.run("macd")
+        with pytest.raises(ValueError):
+            sweep.run("ma", space={"slow_period": (20, 30), "fast_period": (5, 9)})
+        with pytest.raises(ValueError):
+            ParameterSweep(pd.DataFrame())
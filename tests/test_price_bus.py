@@ -0,0 +1,200 @@
+"""
+Tests for backend/price_bus.py and the streaming mode of the live price collector
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Ticker
+from backend.data_access import load_bars_frame
+from backend.fake_ib import ReplayIB
+from backend.live_data_service import LiveDataService
+from backend.live_price_thread import LivePriceCollector
+from backend.price_bus import PriceBus, MinuteBarWriter, BarBuilder, make_event
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def replay_frame(symbol="TTE", start="2024-03-04 10:00:00", periods=36):
+    timestamps = pd.date_range(start, periods=periods, freq="5s")
+    closes = [50.0 + i * 0.01 for i in range(periods)]
+    return pd.DataFrame({"symbol": symbol, "timestamp": timestamps, "open": closes,
+                         "high": [c + 0.02 for c in closes], "low": [c - 0.02 for c in closes],
+                         "close": closes, "volume": 100})
+
+
+class TestPriceBus:
+    def test_fan_out_and_symbol_filter(self):
+        bus = PriceBus()
+        everything, only_wln = [], []
+        bus.subscribe(everything.append)
+        bus.subscribe(only_wln.append, symbols=["WLN"])
+
+        bus.publish(make_event("TTE", datetime(2024, 3, 4, 10, 0), 50.0))
+        bus.publish(make_event("WLN", datetime(2024, 3, 4, 10, 0), 5.0))
+
+        assert [e["symbol"] for e in everything] == ["TTE", "WLN"]
+        assert [e["symbol"] for e in only_wln] == ["WLN"]
+        assert bus.latest("TTE")["close"] == 50.0
+
+    def test_failing_subscriber_does_not_block_others(self):
+        bus = PriceBus()
+        received = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe(broken)
+        bus.subscribe(received.append)
+        bus.publish(make_event("TTE", datetime(2024, 3, 4, 10, 0), 50.0))
+
+        assert len(received) == 1
+
+    def test_queue_keeps_latest_events(self):
+        bus = PriceBus()
+        sub_id, events = bus.subscribe_queue(maxsize=2)
+        for price in (1.0, 2.0, 3.0):
+            bus.publish(make_event("TTE", datetime(2024, 3, 4, 10, 0), price))
+
+        assert [events.get_nowait()["close"] for _ in range(2)] == [2.0, 3.0]
+        bus.unsubscribe(sub_id)
+        assert bus.subscriber_count() == 0
+
+    def test_utc_timestamps_become_paris_time(self):
+        event = make_event("TTE", datetime(2024, 3, 4, 9, 0, tzinfo=timezone.utc), 50.0)
+        assert event["timestamp"] == datetime(2024, 3, 4, 10, 0)
+
+
+class TestMinuteBarWriter:
+    def test_events_folded_into_minute_bars(self, session_factory):
+        writer = MinuteBarWriter(PriceBus(), session_factory=session_factory)
+        for row in replay_frame(periods=14).itertuples():
+            writer.on_event(make_event("TTE", row.timestamp.to_pydatetime(), row.close, row.open,
+                                       row.high, row.low, row.volume, kind="bar"))
+        # A tick without volume only moves the price
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 1, 10), 49.0))
+
+        assert writer.flush() == 2
+        db = session_factory()
+        ticker = db.query(Ticker).filter(Ticker.symbol == "TTE").one()
+        bars = load_bars_frame(db, ticker.id, interval="1min")
+        db.close()
+
+        assert bars["timestamp"].tolist() == [pd.Timestamp("2024-03-04 10:00"), pd.Timestamp("2024-03-04 10:01")]
+        first, second = bars.iloc[0], bars.iloc[1]
+        assert (first.open, first.close, first.volume) == (50.0, pytest.approx(50.11), 1200)
+        assert second.low == 49.0 and second.close == 49.0 and second.volume == 200
+
+    def test_flush_writes_only_changed_minutes(self, session_factory):
+        writer = MinuteBarWriter(PriceBus(), session_factory=session_factory)
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 5), 50.0))
+        assert writer.flush() == 1
+        assert writer.flush() == 0
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 30), 51.0))
+        assert writer.flush() == 1
+
+    def test_late_updates_merged_into_written_bar(self, session_factory):
+        writer = MinuteBarWriter(PriceBus(), session_factory=session_factory)
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 5), 50.0, 49.8, 50.2, 49.5, 100, kind="bar"))
+        writer.flush()
+        # Later minutes flushed in between, then a late bar for 10:00
+        for minute in range(1, 5):
+            writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, minute, 5), 51.0))
+            writer.flush()
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 55), 50.6, 50.1, 50.9, 50.0, 40, kind="bar"))
+        assert writer.flush() == 1
+
+        db = session_factory()
+        bar = load_bars_frame(db, 1, interval="1min").iloc[0]
+        db.close()
+        assert (bar.open, bar.high, bar.low, bar.close, bar.volume) == (49.8, 50.9, 49.5, 50.6, 140)
+
+    def test_failed_flush_keeps_bars(self, session_factory):
+        writer = MinuteBarWriter(PriceBus(), session_factory=session_factory)
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 5), 50.0, volume=100, kind="bar"))
+        with patch("backend.price_bus.merge_bar", side_effect=RuntimeError("database is locked")):
+            assert writer.flush() == 0
+        writer.on_event(make_event("TTE", datetime(2024, 3, 4, 10, 0, 10), 52.0, volume=30, kind="bar"))
+        assert writer.flush() == 1
+
+        db = session_factory()
+        bars = load_bars_frame(db, 1, interval="1min")
+        db.close()
+        assert len(bars) == 1
+        assert (bars.open[0], bars.high[0], bars.close[0], bars.volume[0]) == (50.0, 52.0, 52.0, 130)
+
+
+class TestStreamingCollector:
+    def test_replay_streams_through_the_live_data_service(self, session_factory):
+        replay_ib = ReplayIB(replay_frame())
+        collector = LivePriceCollector()
+        collector.service = LiveDataService(bus=PriceBus(), ib_factory=lambda: replay_ib,
+                                            session_factory=session_factory, poll_interval=0.05)
+        received = []
+        collector.service.bus.subscribe(received.append)
+        collector.symbol = "TTE"
+        collector.running = True
+
+        with patch("backend.live_data_service.contract_cache.cached_contract", return_value=None):
+            thread = threading.Thread(target=collector._collect_prices)
+            thread.start()
+            deadline = time.time() + 10
+            while not replay_ib.finished and time.time() < deadline:
+                time.sleep(0.05)
+            collector.running = False
+            thread.join(timeout=10)
+            assert collector.service.symbols() == []  # Released by the collector
+            collector.service.stop()
+
+        assert replay_ib.finished
+        assert replay_ib.connections == 1
+        assert collector.ib is None  # No connection of its own in 'stream' mode
+        # One real-time bar and one trade update per replayed row
+        assert sum(e["kind"] == "bar" for e in received) == 36
+        assert sum(e["kind"] == "tick" for e in received) == 36
+        assert collector.service.bus.latest("TTE")["timestamp"] == datetime(2024, 3, 4, 10, 2, 55)
+
+        db = session_factory()
+        ticker = db.query(Ticker).filter(Ticker.symbol == "TTE").one()
+        bars = load_bars_frame(db, ticker.id, interval="1min")
+        db.close()
+        assert len(bars) == 3
+        assert bars["volume"].tolist() == [1200, 1200, 1200]
+
+
+class TestBarBuilder:
+    def test_bar_closes_when_next_period_starts(self):
+        builder = BarBuilder(60)
+        start = datetime(2024, 3, 4, 10, 0)
+        assert builder.add(make_event("TTE", start.replace(second=5), 50.0)) is None
+        assert builder.add(make_event("TTE", start.replace(second=20), 50.5, volume=300, kind="bar")) is None
+        assert builder.add(make_event("TTE", start.replace(second=40), 49.5, volume=7)) is None
+
+        closed = builder.add(make_event("TTE", start.replace(minute=1), 50.2))
+        assert closed == {"timestamp": start, "open": 50.0, "high": 50.5, "low": 49.5,
+                          "close": 49.5, "volume": 300}
+        # Late event for the closed minute is dropped
+        assert builder.add(make_event("TTE", start.replace(second=59), 60.0)) is None
+        assert builder.current["high"] == 50.2
+
+    def test_close_due_without_new_event(self):
+        builder = BarBuilder(300, grace=2.0)
+        builder.add(make_event("TTE", datetime(2024, 3, 4, 10, 3, 10), 50.0))
+        assert builder.current["timestamp"] == datetime(2024, 3, 4, 10, 0)
+        assert builder.seconds_until_due(datetime(2024, 3, 4, 10, 5)) == 2.0
+        assert builder.close_due(datetime(2024, 3, 4, 10, 5, 1)) is None
+        assert builder.close_due(datetime(2024, 3, 4, 10, 5, 2))["close"] == 50.0
+        assert builder.current is None
@@ -0,0 +1,79 @@
+"""
+Tests for backend/ring_buffer.py
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ring_buffer import OHLCVRingBuffer
+
+
+def bar(i):
+    price = 100.0 + i
+    return {'timestamp': datetime(2024, 3, 4, 9) + timedelta(minutes=i), 'open': price,
+            'high': price + 1, 'low': price - 1, 'close': price, 'volume': 10 * i}
+
+
+def frame(n, offset=0):
+    return pd.DataFrame([bar(offset + i) for i in range(n)])
+
+
+class TestOHLCVRingBuffer:
+    def test_append_wraps_and_keeps_last_bars(self):
+        buffer = OHLCVRingBuffer(5)
+        for i in range(12):
+            buffer.append(bar(i))
+
+        assert len(buffer) == 5
+        assert buffer.total == 12
+        assert buffer.view('close').tolist() == [107.0, 108.0, 109.0, 110.0, 111.0]
+        assert buffer[-1] == bar(11)
+        assert buffer[0]['timestamp'] == datetime(2024, 3, 4, 9, 7)
+        assert [b['volume'] for b in buffer[-2:]] == [100.0, 110.0]
+        with pytest.raises(IndexError):
+            buffer[5]
+
+    def test_views_are_contiguous_read_only_and_zero_copy(self):
+        buffer = OHLCVRingBuffer(4)
+        for i in range(7):
+            buffer.append(bar(i))
+
+        close = buffer.view('close')
+        assert close.flags['C_CONTIGUOUS']
+        assert not close.flags.writeable
+        assert np.shares_memory(close, buffer.view('close', last=2))
+        assert buffer.view('close', last=2).tolist() == [105.0, 106.0]
+        assert buffer.view('timestamp')[-1] == np.datetime64('2024-03-04T09:06')
+
+    def test_extend_frame_matches_appends(self):
+        bulk = OHLCVRingBuffer(6)
+        bulk.append(bar(0))
+        bulk.extend_frame(frame(9, offset=1))
+        one_by_one = OHLCVRingBuffer(6)
+        for i in range(10):
+            one_by_one.append(bar(i))
+
+        pd.testing.assert_frame_equal(bulk.to_frame(), one_by_one.to_frame())
+        assert bulk.total == one_by_one.total == 10
+
+    def test_extend_frame_with_datetime_index_and_missing_columns(self):
+        buffer = OHLCVRingBuffer(10)
+        df = frame(3).set_index('timestamp')[['close']]
+        buffer.extend(df)
+
+        result = buffer.to_frame()
+        assert list(result.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        assert result['timestamp'].tolist() == list(df.index)
+        assert result['close'].tolist() == [100.0, 101.0, 102.0]
+        assert result['volume'].isna().all()
+
+    def test_list_compatibility(self):
+        buffer = OHLCVRingBuffer(3)
+        assert not buffer
+        buffer.append({'close': 1.0})
+        assert buffer
+        assert buffer[0]['close'] == 1.0 and np.isnan(buffer[0]['open']) and buffer[0]['timestamp'] is None
+        assert len(pd.DataFrame(list(buffer))) == 1
+        assert buffer.tail(0) == []
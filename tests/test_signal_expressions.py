@@ -0,0 +1,159 @@
+"""
+Tests for backend/signal_expressions.py and vectorized simple strategy signals
+"""
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.models import Strategy as StrategyModel
+from backend.signal_expressions import (
+    SignalExpressionError, compile_condition, evaluate_on_frame
+)
+from backend.strategy_adapter import StrategyAdapter
+
+
+class TestCompileCondition:
+    def test_scalar_evaluation(self):
+        condition = compile_condition("rsi < 30 and price > 100")
+        assert condition.names == {"rsi", "price"}
+        assert bool(condition.evaluate({"rsi": 25, "price": 101})) is True
+        assert bool(condition.evaluate({"rsi": 25, "price": 99})) is False
+
+    def test_vector_matches_python(self):
+        rng = np.random.default_rng(1)
+        rsi = rng.uniform(0, 100, 500)
+        price = rng.uniform(90, 110, 500)
+        source = "not (rsi > 70 or price < 95) and 20 < rsi <= 60 and price * 1.01 > 96 - 1"
+        expected = [eval(source, {}, {"rsi": r, "price": p}) for r, p in zip(rsi, price)]
+
+        result = compile_condition(source).evaluate({"rsi": rsi, "price": price})
+
+        assert result.tolist() == expected
+
+    @pytest.mark.parametrize("source", [
+        "__import__('os').system('echo hi')",
+        "price.__class__",
+        "prices[0] > 1",
+        "(lambda: 1)()",
+        "price > 'abc'",
+        "price in (1, 2)",
+        "price is 1",
+        "price == None",
+        "price >",
+    ])
+    def test_rejects_unsafe_or_invalid(self, source):
+        with pytest.raises(SignalExpressionError):
+            compile_condition(source)
+
+    def test_missing_column_gives_no_signal(self):
+        df = pd.DataFrame({"close": [1.0, 2.0, 3.0]})
+        assert not evaluate_on_frame(compile_condition("rsi < 30"), df).any()
+
+    def test_missing_alias_only_falsifies_its_comparisons(self):
+        df = pd.DataFrame({"close": [99.0, 101.0, 102.0]})
+        condition = compile_condition("price > 100 or rsi < 20")
+        assert evaluate_on_frame(condition, df).tolist() == [False, True, True]
+        assert evaluate_on_frame(compile_condition("rsi is None and price > 100"), df).tolist() == [False, True, True]
+        assert not evaluate_on_frame(compile_condition("unknown_column > 0 or price > 100"), df).any()
+
+    def test_nan_compares_false(self):
+        df = pd.DataFrame({"close": [1.0, 2.0], "rsi_14": [np.nan, 10.0]})
+        assert evaluate_on_frame(compile_condition("rsi < 30"), df).tolist() == [False, True]
+
+    def test_is_none_checks_nan(self):
+        df = pd.DataFrame({"close": [1.0, 2.0], "rsi_14": [np.nan, 10.0]})
+        assert evaluate_on_frame(compile_condition("rsi is None"), df).tolist() == [True, False]
+        assert evaluate_on_frame(compile_condition("None is not rsi"), df).tolist() == [False, True]
+
+    def test_is_not_none_with_missing_scalar(self):
+        condition = compile_condition("rsi is not None and rsi < 20")
+        assert bool(condition.evaluate({"rsi": None})) is False
+        assert bool(condition.evaluate({"rsi": np.nan})) is False
+        assert bool(condition.evaluate({"rsi": 15.0})) is True
+
+
+class TestVectorizedSimpleSignals:
+    def _strategy(self, buy, sell, strategy_id=1):
+        strategy = Mock(spec=StrategyModel)
+        strategy.id = strategy_id
+        strategy.strategy_type = "simple"
+        strategy.parameters = json.dumps({"buy_conditions": buy, "sell_conditions": sell})
+        return strategy
+
+    def test_matches_row_by_row_evaluation(self):
+        rng = np.random.default_rng(7)
+        n = 300
+        df = pd.DataFrame({
+            "time": pd.date_range("2024-01-02 09:00", periods=n, freq="1min"),
+            "close": rng.uniform(95, 105, n),
+            "rsi_14": rng.uniform(10, 90, n),
+        })
+        strategy = self._strategy("rsi < 30 and price > 98", "rsi > 70", strategy_id=42)
+        params = json.loads(strategy.parameters)
+
+        expected = []
+        for i in range(1, n):
+            variables = StrategyAdapter._prepare_signal_variables(df, i)
+            buy, sell = StrategyAdapter._evaluate_conditions(params, variables)
+            if buy or sell:
+                expected.append((df["time"].iloc[i], df["close"].iloc[i], "buy" if buy else "sell"))
+
+        times, prices, types = StrategyAdapter.generate_signals_simple(df, strategy)
+
+        assert list(zip(times, prices, types)) == expected
+        assert len(expected) > 0
+
+    # Conditions stored by create_simple_strategies.py / create_example_strategy.py
+    @pytest.mark.parametrize("buy, sell", [
+        ("rsi is not None and rsi < 40", "rsi is not None and rsi > 60"),
+        ("macd is not None and macd_signal is not None and macd > macd_signal",
+         "macd is not None and macd_signal is not None and macd < macd_signal"),
+        ("macd is not None and macd > 0 and macd_signal is not None",
+         "macd is not None and macd < 0 and macd_signal is not None"),
+        ("rsi is not None and macd is not None and macd_signal is not None and rsi < 30 and macd > macd_signal",
+         "rsi is not None and macd is not None and macd_signal is not None and rsi > 70 and macd < macd_signal"),
+    ])
+    def test_stored_conditions_match_python_eval(self, buy, sell):
+        rng = np.random.default_rng(3)
+        n = 400
+        rsi = rng.uniform(5, 95, n)
+        macd = rng.normal(0, 1, n)
+        rsi[:14] = np.nan  # indicator warm-up
+        macd[:26] = np.nan
+        df = pd.DataFrame({
+            "time": pd.date_range("2024-01-02 09:00", periods=n, freq="1min"),
+            "close": rng.uniform(95, 105, n),
+            "rsi_14": rsi,
+            "macd": macd,
+            "macd_signal": rng.normal(0, 1, n),
+        })
+        strategy = self._strategy(buy, sell, strategy_id=43)
+
+        expected = []
+        for i in range(1, n):
+            variables = StrategyAdapter._prepare_signal_variables(df, i)
+            is_buy, is_sell = eval(buy, {}, variables), eval(sell, {}, variables)
+            assert StrategyAdapter._evaluate_conditions(json.loads(strategy.parameters), variables) == (is_buy, is_sell)
+            if is_buy or is_sell:
+                expected.append((df["time"].iloc[i], df["close"].iloc[i], "buy" if is_buy else "sell"))
+
+        times, prices, types = StrategyAdapter.generate_signals_simple(df, strategy)
+
+        assert list(zip(times, prices, types)) == expected
+        assert len(expected) > 0
+
+    def test_conditions_compiled_once_per_strategy(self):
+        df = pd.DataFrame({"time": pd.date_range("2024-01-02", periods=3, freq="1min"),
+                           "close": [100.0, 106.0, 99.0]})
+        strategy = self._strategy("price > 105", "price < 100", strategy_id=777)
+
+        StrategyAdapter.generate_signals_simple(df, strategy)
+        cached = [k for k in StrategyAdapter._condition_cache if k[0] == 777]
+        _, _, types = StrategyAdapter.generate_signals_simple(df, strategy)
+
+        assert len(cached) == 1
+        assert [k for k in StrategyAdapter._condition_cache if k[0] == 777] == cached
+        assert types == ["buy", "sell"]
@@ -0,0 +1,85 @@
+"""
+Tests for backend/strategy_search.py
+"""
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.backtesting_engine import BacktestingEngine
+from backend.parameter_sweep import ParameterSweep
+from backend.strategy_search import StrategySearch, TPESampler, SearchResult
+
+
+def trending_frame(n=6000, seed=3):
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.001, n) + 0.0004 * np.sin(np.arange(n) / 150)
+    close = 100 * np.exp(np.cumsum(steps))
+    return pd.DataFrame({
+        "open": close, "high": close, "low": close, "close": close, "volume": 1,
+    }, index=pd.date_range("2024-01-02 09:00", periods=n, freq="1min"))
+
+
+class TestTPESampler:
+    def test_concentrates_on_good_region(self):
+        space = {"x": (0, 99), "y": (0, 99)}
+        tpe = TPESampler(space, n_startup=20, seed=0)
+
+        for _ in range(10):
+            rows = tpe.ask(10)
+            tpe.tell(rows, -np.abs(rows[:, 0] - 70) - np.abs(rows[:, 1] - 20))
+
+        proposals = tpe.ask(50)
+        assert proposals[:, 0].min() >= 0 and proposals[:, 0].max() <= 99
+        assert np.median(np.abs(proposals[:, 0] - 70)) < 15
+        assert np.median(np.abs(proposals[:, 1] - 20)) < 15
+
+
+class TestStrategySearch:
+    def test_successive_halving_budget(self):
+        df = trending_frame()
+        search = StrategySearch(df, "TTE")
+
+        result = search.run(n_candidates=45, strategy_type="ma", seed=1)
+
+        # 45 on 1/9 of the history, 15 on 1/3, 5 on the full range
+        assert result.candidates == 45
+        assert result.full_backtests == 5
+        assert result.total_backtests == 65
+        assert result.bars_backtested == 45 * round(len(df) / 9) + 15 * len(df) // 3 + 5 * len(df)
+        assert len(result.results) == 5
+        assert result.best_result.total_return == max(r.total_return for r in result.results)
+        assert result.best_result.start_date == df.index[0]
+
+        # The winner's result is a plain full-range backtest
+        exact = BacktestingEngine().run(result.best_strategy, df, "TTE")
+        assert exact.total_return == pytest.approx(result.best_result.total_return)
+
+    def test_finds_the_grid_optimum_with_few_full_backtests(self):
+        df = trending_frame()
+        grid = ParameterSweep(df).run("ma", "grid", top_k=1)
+
+        result = StrategySearch(df).run(n_candidates=90, strategy_type="ma", seed=2)
+
+        # 10 full backtests instead of 450, within 20% of the exhaustive optimum
+        assert result.full_backtests == 10
+        assert result.best_result.total_return >= 0.8 * grid.best_result.total_return
+
+    def test_short_history_and_invalid_arguments(self):
+        search = StrategySearch(trending_frame(900))
+        assert search.slice_fractions(3, 3) == [1 / 3, 1]
+
+        with pytest.raises(ValueError):
+            search.run(strategy_type="macd")
+        with pytest.raises(ValueError):
+            search.run(sampler="grid")
+        with pytest.raises(ValueError):
+            search.run(eta=1)
+
+    def test_save_best(self):
+        assert StrategySearch.save_best(SearchResult(None, None)) is None
+        result = StrategySearch(trending_frame(2000)).run(n_candidates=9, strategy_type="ma", seed=0)
+        with patch("backend.strategy_manager.StrategyManager.save_strategy", return_value=7) as save:
+            assert StrategySearch.save_best(result) == 7
+        save.assert_called_once_with(result.best_strategy, result.best_result)
@@ -0,0 +1,119 @@
+"""
+Tests for backend/streaming_indicators.py - parity with the batch TechnicalIndicators
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.technical_indicators import TechnicalIndicators
+from backend.backtesting_engine import SimpleMovingAverageStrategy, RSIStrategy
+from backend.streaming_indicators import (
+    IndicatorSet, RSI, MonotonicExtremum, MACrossSignal, RSISignal
+)
+
+
+@pytest.fixture
+def ohlcv():
+    """Random walk with a flat stretch and zero-volume bars (edge cases for rolling windows)"""
+    rng = np.random.default_rng(7)
+    n = 2000
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.5, n)), 2)
+    close[300:340] = close[300]
+    df = pd.DataFrame({
+        'open': close,
+        'high': close + np.round(rng.uniform(0, 0.5, n), 2),
+        'low': close - np.round(rng.uniform(0, 0.5, n), 2),
+        'close': close,
+        'volume': rng.integers(0, 5000, n).astype(float),
+    })
+    df.loc[300:339, ['high', 'low']] = close[300]
+    df.loc[500:510, 'volume'] = 0.0
+    return df
+
+
+def stream(indicators, df):
+    rows = [dict(indicators.update(bar)) for bar in df.to_dict('records')]
+    return pd.DataFrame(rows, index=df.index)
+
+
+def assert_parity(streamed, batch, columns):
+    for column in columns:
+        np.testing.assert_allclose(
+            streamed[column].to_numpy(), batch[column].to_numpy(),
+            rtol=1e-7, atol=1e-8, equal_nan=True, err_msg=column
+        )
+
+
+class TestBatchParity:
+    def test_moving_averages(self, ohlcv):
+        batch = TechnicalIndicators.add_ema(TechnicalIndicators.add_sma(ohlcv.copy(), [5, 20]), [12, 26])
+        streamed = stream(IndicatorSet(sma=[5, 20], ema=[12, 26]), ohlcv)
+        assert_parity(streamed, batch, ['sma_5', 'sma_20', 'ema_12', 'ema_26'])
+    
+    def test_rsi_macd_bollinger(self, ohlcv):
+        batch = ohlcv.copy()
+        batch = TechnicalIndicators.add_rsi(batch, 14)
+        batch = TechnicalIndicators.add_macd(batch)
+        batch = TechnicalIndicators.add_bollinger_bands(batch)
+        streamed = stream(IndicatorSet(rsi=[14], macd=True, bollinger=True), ohlcv)
+        assert_parity(streamed, batch, [
+            'rsi_14', 'macd', 'macd_signal', 'macd_hist',
+            'bb_middle', 'bb_upper', 'bb_lower', 'bb_width', 'bb_percent'
+        ])
+    
+    def test_range_indicators(self, ohlcv):
+        batch = ohlcv.copy()
+        batch = TechnicalIndicators.add_atr(batch, 14)
+        batch = TechnicalIndicators.add_adx(batch, 14)
+        batch = TechnicalIndicators.add_stochastic(batch)
+        streamed = stream(IndicatorSet(atr=[14], adx=14, stochastic=True), ohlcv)
+        assert_parity(streamed, batch, ['atr_14', 'adx', 'di_plus', 'di_minus', 'stoch_k', 'stoch_d'])
+    
+    def test_volume_indicators(self, ohlcv):
+        batch = ohlcv.copy()
+        batch = TechnicalIndicators.add_obv(batch)
+        batch = TechnicalIndicators.add_vwap(batch)
+        batch = TechnicalIndicators.add_mfi(batch, 14)
+        streamed = stream(IndicatorSet(obv=True, vwap=True, mfi=[14]), ohlcv)
+        assert_parity(streamed, batch, ['obv', 'vwap', 'mfi_14'])
+
+
+class TestStreamingPrimitives:
+    def test_wilder_rsi(self, ohlcv):
+        period = 14
+        delta = ohlcv['close'].diff()
+        gain = delta.clip(lower=0).to_numpy()
+        loss = (-delta).clip(lower=0).to_numpy()
+        avg_gain, avg_loss = gain[1:period + 1].mean(), loss[1:period + 1].mean()
+        expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+        for i in range(period + 1, len(ohlcv)):
+            avg_gain = (avg_gain * (period - 1) + gain[i]) / period
+            avg_loss = (avg_loss * (period - 1) + loss[i]) / period
+            expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+        
+        rsi = RSI(period, method='wilder')
+        values = [rsi.update(c) for c in ohlcv['close']]
+        
+        assert all(np.isnan(values[:period]))
+        np.testing.assert_allclose(values[period:], expected, rtol=1e-9)
+    
+    def test_monotonic_extremum(self):
+        values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+        rolling_max = MonotonicExtremum(3, 'max')
+        result = [rolling_max.update(v) for v in values]
+        expected = pd.Series(values).rolling(3).max().tolist()
+        np.testing.assert_array_equal(result, expected)
+
+
+class TestSignalStreams:
+    def test_ma_cross_matches_strategy(self, ohlcv):
+        expected = SimpleMovingAverageStrategy(fast=5, slow=20).generate_signals(ohlcv).to_numpy()
+        signal = MACrossSignal(5, 20)
+        result = [signal.update(bar) for bar in ohlcv.to_dict('records')]
+        np.testing.assert_array_equal(result, expected)
+    
+    def test_rsi_matches_strategy(self, ohlcv):
+        expected = RSIStrategy(period=14, oversold=30, overbought=70).generate_signals(ohlcv).to_numpy()
+        signal = RSISignal(14, 30, 70)
+        result = [signal.update(bar) for bar in ohlcv.to_dict('records')]
+        np.testing.assert_array_equal(result, expected)